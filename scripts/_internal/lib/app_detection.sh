@@ -1,9 +1,15 @@
 #!/usr/bin/env bash
 
+_APP_DETECTION_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+# shellcheck source=./docker_engine.sh
+source "$_APP_DETECTION_DIR/docker_engine.sh"
+
 # Lists active services (running status) using the provided docker compose command.
 # The first argument must be the name of an array variable (nameref) that will
 # receive the result. The following arguments represent the docker compose
 # command to be executed (e.g., docker compose -f docker-compose.yml ...).
+# With DOCKER_STATUS_BACKEND=engine the services are read from the Docker
+# Engine API instead, falling back to the command when the socket fails.
 app_detection__list_active_services() {
   local __target_ref="$1"
   shift
@@ -25,9 +31,22 @@ app_detection__list_active_services() {
   local __raw_output=""
   local __status=0
 
-  __raw_output="$("${__compose_cmd[@]}" ps --status running --services 2>/dev/null)" || __status=$?
-  if ((__status != 0)); then
-    return "${__status}"
+  local __engine_ok=0
+  if docker_engine__enabled; then
+    local __compose_file
+    if __compose_file="$(docker_engine__compose_file_from_args "${__compose_cmd[@]}")" &&
+      __raw_output="$(docker_engine__run "$__compose_file" services --status running)"; then
+      __engine_ok=1
+    else
+      docker_engine__warn_fallback
+    fi
+  fi
+
+  if ((__engine_ok == 0)); then
+    __raw_output="$("${__compose_cmd[@]}" ps --status running --services 2>/dev/null)" || __status=$?
+    if ((__status != 0)); then
+      return "${__status}"
+    fi
   fi
 
   if [[ -z "$__raw_output" ]]; then
@@ -0,0 +1,86 @@
+#!/usr/bin/env bash
+# shellcheck shell=bash
+
+# Track the inputs used to generate a consolidated docker-compose.yml so that
+# readers can reuse the file without rebuilding it while the inputs are
+# unchanged. The stamp lives next to the output as ".<name>.inputs".
+
+compose_build_stamp__path() {
+  local output_file="$1"
+  printf '%s/.%s.inputs\n' "$(dirname "$output_file")" "$(basename "$output_file")"
+}
+
+compose_build_stamp__file_digest() {
+  local file="$1"
+  local digest="missing"
+  if [[ -f "$file" ]]; then
+    digest="$(sha256sum <"$file")"
+    digest="${digest%% *}"
+  fi
+  printf '%s\n' "$digest"
+}
+
+# Usage: compose_build_stamp__compute <repo_root> <instance> <compose_files_array> <env_files_array>
+# Prints a sha256 digest covering the instance name, the ordered compose plan,
+# the ordered env chain, and the content of every file involved.
+compose_build_stamp__compute() {
+  local repo_root="$1"
+  local instance="$2"
+  local -n __stamp_compose_files="$3"
+  local -n __stamp_env_files="$4"
+
+  local entry resolved
+  {
+    printf 'instance=%s\n' "$instance"
+    for entry in "${__stamp_compose_files[@]}"; do
+      resolved="$entry"
+      if [[ "$resolved" != /* ]]; then
+        resolved="$repo_root/${resolved#./}"
+      fi
+      printf 'compose %s %s\n' "$resolved" "$(compose_build_stamp__file_digest "$resolved")"
+    done
+    for entry in "${__stamp_env_files[@]}"; do
+      printf 'env %s %s\n' "$entry" "$(compose_build_stamp__file_digest "$entry")"
+    done
+  } | sha256sum | cut -d' ' -f1
+}
+
+# Usage: compose_build_stamp__write <output_file> <env_output_file> <instance> <digest>
+compose_build_stamp__write() {
+  local output_file="$1"
+  local env_output_file="$2"
+  local instance="$3"
+  local digest="$4"
+
+  {
+    printf 'instance=%s\n' "$instance"
+    printf 'inputs=%s\n' "$digest"
+    printf 'env_output=%s\n' "$env_output_file"
+    printf 'output=%s\n' "$(compose_build_stamp__file_digest "$output_file")"
+  } >"$(compose_build_stamp__path "$output_file")"
+}
+
+# Usage: compose_build_stamp__is_fresh <output_file> <env_output_file> <instance> <digest>
+# Succeeds when both generated files exist and were produced from the same inputs.
+compose_build_stamp__is_fresh() {
+  local output_file="$1"
+  local env_output_file="$2"
+  local instance="$3"
+  local digest="$4"
+  local stamp_file
+  stamp_file="$(compose_build_stamp__path "$output_file")"
+
+  if [[ ! -f "$output_file" || ! -f "$env_output_file" || ! -f "$stamp_file" ]]; then
+    return 1
+  fi
+
+  local expected
+  expected="$(printf 'instance=%s\ninputs=%s\nenv_output=%s\noutput=%s' \
+    "$instance" "$digest" "$env_output_file" "$(compose_build_stamp__file_digest "$output_file")")"
+  [[ "$(<"$stamp_file")" == "$expected" ]]
+}
+
+if [[ "${BASH_SOURCE[0]}" == "$0" ]]; then
+  echo "This script is intended to be sourced." >&2
+  exit 1
+fi
@@ -0,0 +1,79 @@
+#!/usr/bin/env bash
+# shellcheck shell=bash
+
+# Build resolved compose configs for several instances concurrently. Each
+# instance is generated into its own scratch directory, so the root
+# docker-compose.yml/.env are never touched and builds cannot interfere.
+
+_COMPOSE_ISOLATED_BUILD_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+
+# Builds one instance and records the outcome as
+# "<instance>\t<status>\t<config.json>\t<errors.log>" in <scratch>/result.
+compose_isolated_build__one() {
+  local compose_cmd_var="$1"
+  local instance="$2"
+  local scratch="$3"
+
+  local -n __isolated_compose_cmd="$compose_cmd_var"
+  local build_script="${_COMPOSE_ISOLATED_BUILD_DIR}/../../build_compose_file.sh"
+  local config_json="$scratch/config.json"
+  local errors_log="$scratch/errors.log"
+  local status=0
+
+  if ! "$build_script" \
+    --output "$scratch/docker-compose.yml" \
+    --env-output "$scratch/.env" \
+    "$instance" >/dev/null 2>"$errors_log"; then
+    echo "Error: failed to assemble compose configuration for '$instance'." >>"$errors_log"
+    status=1
+  elif ! "${__isolated_compose_cmd[@]}" -f "$scratch/docker-compose.yml" config --format json \
+    >"$config_json" 2>>"$errors_log"; then
+    echo "Error: failed to run docker compose config." >>"$errors_log"
+    status=1
+  fi
+
+  printf '%s\t%s\t%s\t%s\n' "$instance" "$status" "$config_json" "$errors_log" >"$scratch/result"
+}
+
+# Usage: compose_isolated_build__all <compose_cmd_array> <scratch_root> <jobs> <manifest> <instance>...
+# Writes one result line per instance to <manifest>, in the order requested.
+compose_isolated_build__all() {
+  local compose_cmd_var="$1"
+  local scratch_root="$2"
+  local max_jobs="$3"
+  local manifest="$4"
+  shift 4
+  local -a instances=("$@")
+
+  if [[ -z "$max_jobs" ]]; then
+    max_jobs="$(nproc 2>/dev/null || echo 4)"
+  fi
+
+  : >"$manifest"
+
+  local running=0
+  local name
+  for name in "${instances[@]}"; do
+    mkdir -p "$scratch_root/$name"
+    compose_isolated_build__one "$compose_cmd_var" "$name" "$scratch_root/$name" &
+    running=$((running + 1))
+    if ((running >= max_jobs)); then
+      wait -n || true
+      running=$((running - 1))
+    fi
+  done
+  wait || true
+
+  for name in "${instances[@]}"; do
+    if [[ -f "$scratch_root/$name/result" ]]; then
+      cat "$scratch_root/$name/result" >>"$manifest"
+    else
+      printf '%s\t1\t\t\n' "$name" >>"$manifest"
+    fi
+  done
+}
+
+if [[ "${BASH_SOURCE[0]}" == "$0" ]]; then
+  echo "This script is intended to be sourced." >&2
+  exit 1
+fi
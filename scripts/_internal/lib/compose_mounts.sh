@@ -6,19 +6,41 @@ COMPOSE_MOUNTS_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 # shellcheck source=scripts/_internal/lib/python_runtime.sh
 source "${COMPOSE_MOUNTS_DIR}/python_runtime.sh"
 
-compose_mounts__collect_bind_paths() {
+compose_mounts__run_collector() {
   local repo_root="$1"
-  shift
+  local instance="$2"
+  local env_files_var="$3"
+  local format="$4"
+  shift 4
   local -a compose_files=("$@")
 
   if ((${#compose_files[@]} == 0)); then
     return 0
   fi
 
+  local -n __compose_mounts_env_files="$env_files_var"
   local script_path="${COMPOSE_MOUNTS_DIR}/../python/collect_bind_mounts.py"
+  local -a collector_args=(--format "$format" --project-dir "$repo_root")
+  local env_file
+  for env_file in "${__compose_mounts_env_files[@]}"; do
+    collector_args+=(--env-file "$env_file")
+  done
+
+  REPO_ROOT="$repo_root" LOCAL_INSTANCE="$instance" \
+    python_runtime__run "$repo_root" "REPO_ROOT LOCAL_INSTANCE" -- \
+    "$script_path" "${collector_args[@]}" "${compose_files[@]}"
+}
+
+# Prints one unique bind-mount source per line for the whole compose plan.
+# Usage: compose_mounts__collect_bind_paths <repo_root> <instance> <env_files_array> <compose_file>...
+compose_mounts__collect_bind_paths() {
+  compose_mounts__run_collector "$1" "$2" "$3" paths "${@:4}"
+}
 
-  REPO_ROOT="$repo_root" \
-    python_runtime__run "$repo_root" "REPO_ROOT" -- "$script_path" "${compose_files[@]}"
+# Prints "service<TAB>source<TAB>target" for every bind mount in the plan.
+# Usage: compose_mounts__collect_bind_mounts <repo_root> <instance> <env_files_array> <compose_file>...
+compose_mounts__collect_bind_mounts() {
+  compose_mounts__run_collector "$1" "$2" "$3" tsv "${@:4}"
 }
 
 if [[ "${BASH_SOURCE[0]}" == "$0" ]]; then
@@ -1,9 +1,21 @@
 #!/usr/bin/env bash
 
+_DB_INTEGRITY_BACKEND_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+
+# shellcheck source=./python_runtime.sh
+source "$_DB_INTEGRITY_BACKEND_DIR/python_runtime.sh"
+
 resolve_sqlite_backend() {
   local resolved_bin=""
 
   case "$SQLITE3_MODE" in
+  python)
+    # Checks run in-process; the sqlite3 CLI (or the container) is only
+    # needed if a database has to be recovered.
+    SQLITE3_BACKEND="python"
+    SQLITE3_BIN_PATH="$(command -v "$SQLITE3_BIN" 2>/dev/null || true)"
+    return 0
+    ;;
   binary)
     if resolved_bin="$(command -v "$SQLITE3_BIN" 2>/dev/null)"; then
       SQLITE3_BACKEND="binary"
@@ -46,11 +58,16 @@ resolve_sqlite_backend() {
 }
 
 sqlite3_exec() {
-  if [[ "$SQLITE3_BACKEND" == "binary" ]]; then
+  if [[ -n "$SQLITE3_BIN_PATH" && "$SQLITE3_BACKEND" != "container" ]]; then
     "$SQLITE3_BIN_PATH" "$@"
     return $?
   fi
 
+  if [[ "$SQLITE3_BACKEND" == "python" ]] && ! command -v "$SQLITE3_CONTAINER_RUNTIME" >/dev/null 2>&1; then
+    echo "sqlite3 CLI (binary: $SQLITE3_BIN) and runtime '$SQLITE3_CONTAINER_RUNTIME' unavailable." >&2
+    return 127
+  fi
+
   declare -a volume_args=()
   declare -A mounted_paths=()
   local arg path dir
@@ -87,3 +104,189 @@ sqlite3_exec() {
     "$SQLITE3_CONTAINER_IMAGE" \
     sqlite3 "$@"
 }
+
+# Shell loop run inside the sqlite3 container. Arguments: <jobs> <sqlite3>
+# <pragma> followed by <index> <db> pairs. Up to <jobs> checks run at once (a FIFO
+# holds the free slots); each result is framed between "@@BEGIN <index>" and
+# "@@END <index> <status>" lines and written under a lock, so records never
+# interleave and the host can parse the stream as it arrives.
+# shellcheck disable=SC2016  # Expanded by the container shell.
+SQLITE3_BATCH_SCRIPT='
+jobs="$1"
+bin="$2"
+pragma="$3"
+shift 3
+work="$(mktemp -d)"
+check() {
+  status=0
+  "$bin" "$2" "PRAGMA $pragma;" >"$work/$1.out" 2>&1 || status=$?
+  until mkdir "$work/lock" 2>/dev/null; do sleep 0.01; done
+  printf "@@BEGIN %d\n" "$1"
+  cat "$work/$1.out"
+  printf "\n@@END %d %d\n" "$1" "$status"
+  rmdir "$work/lock"
+  rm -f "$work/$1.out"
+}
+mkfifo "$work/slots"
+exec 3<>"$work/slots"
+slot=0
+while [ "$slot" -lt "$jobs" ]; do
+  echo >&3
+  slot=$((slot + 1))
+done
+while [ "$#" -ge 2 ]; do
+  read -r _ <&3
+  (
+    check "$1" "$2"
+    echo >&3
+  ) &
+  shift 2
+done
+wait
+rm -rf "$work"
+'
+
+# Prints the indexes of the given files ordered by size, largest first, so a
+# worker pool starts the long checks early and they do not dominate the tail.
+sqlite3_schedule_by_size() {
+  local index=0 size
+  while IFS= read -r size; do
+    printf '%s\t%s\n' "${size:-0}" "$index"
+    index=$((index + 1))
+  done < <(stat -c '%s' -- "$@" 2>/dev/null) |
+    sort -t $'\t' -k1,1nr -k2,2n | cut -f2
+}
+
+# Reads "@@BEGIN <index>" ... "@@END <index> <status>" frames from stdin and
+# stores each result in CHECK_OUTPUTS/CHECK_STATUSES at <index>.
+sqlite3_read_frames() {
+  local line current="" buffer=""
+  while IFS= read -r line; do
+    case "$line" in
+    "@@BEGIN "*)
+      current="${line#@@BEGIN }"
+      buffer=""
+      ;;
+    "@@END "*)
+      if [[ -n "$current" ]]; then
+        # Match $(...) semantics: drop the trailing newlines (including the
+        # one the session prints before each END marker).
+        while [[ "$buffer" == *$'\n' ]]; do
+          buffer="${buffer%$'\n'}"
+        done
+        CHECK_OUTPUTS[current]="$buffer"
+        CHECK_STATUSES[current]="${line##* }"
+      fi
+      current=""
+      ;;
+    *)
+      if [[ -n "$current" ]]; then
+        buffer+="$line"$'\n'
+      fi
+      ;;
+    esac
+  done
+}
+
+# Runs `PRAGMA integrity_check` (or INTEGRITY_PRAGMA, e.g. quick_check) for
+# every database and stores the results in CHECK_OUTPUTS/CHECK_STATUSES,
+# indexed like the arguments. Up to
+# INTEGRITY_JOBS checks run concurrently (default 1), largest files first. The
+# container backend starts a single container with <mount_dir> mounted and
+# checks every file in that session instead of paying one `docker run` per
+# database; the python backend checks them in-process (db_integrity_check.py).
+# Usage: sqlite3_integrity_batch <mount_dir> <db_file>...
+sqlite3_integrity_batch() {
+  local mount_dir="$1"
+  shift
+  local -a db_files=("$@")
+  local jobs="${INTEGRITY_JOBS:-1}"
+  local pragma="${INTEGRITY_PRAGMA:-integrity_check}"
+  CHECK_OUTPUTS=()
+  CHECK_STATUSES=()
+
+  if ((${#db_files[@]} == 0)); then
+    return 0
+  fi
+
+  local -a schedule=()
+  if ((jobs > 1)); then
+    mapfile -t schedule < <(sqlite3_schedule_by_size "${db_files[@]}")
+  fi
+  if ((${#schedule[@]} != ${#db_files[@]})); then
+    schedule=("${!db_files[@]}")
+  fi
+
+  local index
+  if [[ "$SQLITE3_BACKEND" == "binary" ]]; then
+    local scratch running=0
+    scratch="$(mktemp -d)"
+    for index in "${schedule[@]}"; do
+      (
+        status=0
+        "$SQLITE3_BIN_PATH" "${db_files[$index]}" "PRAGMA $pragma;" >"$scratch/$index.out" 2>&1 ||
+          status=$?
+        printf '%s\n' "$status" >"$scratch/$index.status"
+      ) &
+      running=$((running + 1))
+      if ((running >= jobs)); then
+        wait -n || true
+        running=$((running - 1))
+      fi
+    done
+    wait || true
+    for index in "${!db_files[@]}"; do
+      CHECK_OUTPUTS[index]="$(cat "$scratch/$index.out" 2>/dev/null)"
+      CHECK_STATUSES[index]="$(cat "$scratch/$index.status" 2>/dev/null || echo 1)"
+    done
+    rm -rf "$scratch"
+    return 0
+  fi
+
+  local -a pairs=() volume_args=()
+  local session_label="sqlite3 container session"
+  if [[ "$SQLITE3_BACKEND" == "python" ]]; then
+    session_label="python sqlite3 checker"
+  else
+    for index in "${schedule[@]}"; do
+      pairs+=("$index" "${db_files[$index]}")
+    done
+    volume_args=(--volume "$mount_dir:$mount_dir:rw")
+    if [[ -d "$REPO_ROOT" && "$mount_dir" != "$REPO_ROOT" ]]; then
+      volume_args+=(--volume "$REPO_ROOT:$REPO_ROOT:rw")
+    fi
+  fi
+
+  local session_err session_status=0
+  session_err="$(mktemp)"
+  sqlite3_read_frames < <(
+    if [[ "$SQLITE3_BACKEND" == "python" ]]; then
+      PYTHON_RUNTIME_EXTRA_MOUNTS="$mount_dir" PYTHON_RUNTIME_SKIP_REQUIREMENTS=1 python_runtime__run "$REPO_ROOT" "" -- \
+        "$_DB_INTEGRITY_BACKEND_DIR/db_integrity_check.py" --jobs "$jobs" --pragma "$pragma" --format frames -- "${db_files[@]}"
+    else
+      "$SQLITE3_CONTAINER_RUNTIME" run --rm -i \
+        "${volume_args[@]}" \
+        --workdir "$mount_dir" \
+        "$SQLITE3_CONTAINER_IMAGE" \
+        sh -c "$SQLITE3_BATCH_SCRIPT" sqlite3-batch "$jobs" sqlite3 "$pragma" "${pairs[@]}"
+    fi 2>"$session_err" </dev/null ||
+      printf '%s\n' "$?" >"$session_err.status"
+  )
+
+  if [[ -f "$session_err.status" ]]; then
+    session_status="$(<"$session_err.status")"
+  fi
+  local session_message=""
+  if [[ -s "$session_err" ]]; then
+    session_message="$(tr '\n' ' ' <"$session_err")"
+  fi
+  rm -f "$session_err" "$session_err.status"
+
+  for index in "${!db_files[@]}"; do
+    if [[ -z "${CHECK_STATUSES[index]:-}" ]]; then
+      CHECK_OUTPUTS[index]="no result from the $session_label (exit $session_status) ${session_message}"
+      CHECK_STATUSES[index]=1
+    fi
+  done
+  return 0
+}
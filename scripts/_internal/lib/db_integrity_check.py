@@ -0,0 +1,110 @@
+"""Check SQLite databases in-process with the standard-library ``sqlite3`` module.
+
+Used by check_db_integrity.sh when ``SQLITE3_MODE=python``. Every database is
+opened read-only through a ``file:...?mode=ro`` URI and checked with
+``PRAGMA integrity_check`` (or ``quick_check``) on a thread pool, largest files
+first; no sqlite3 process or container is started per file.
+
+Results are printed as they complete, either as one JSON object per line
+(``--format ndjson``) or framed between ``@@BEGIN <index>`` and
+``@@END <index> <status>`` lines (``--format frames``), the protocol the
+container session of db_integrity_backend.sh already speaks. ``<index>`` is
+the position of the database on the command line and ``<status>`` is 0 when
+the check could run, 1 otherwise.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Sequence
+
+PRAGMAS = ("integrity_check", "quick_check")
+
+
+@dataclass
+class CheckResult:
+    index: int
+    path: str
+    pragma: str
+    status: int
+    output: str
+    duration_ms: float
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 0 and self.output == "ok"
+
+
+def read_only_uri(path: str) -> str:
+    return f"{Path(os.path.abspath(path)).as_uri()}?mode=ro"
+
+
+def check_database(index: int, path: str, pragma: str) -> CheckResult:
+    started = time.perf_counter()
+    status = 0
+    try:
+        connection = sqlite3.connect(read_only_uri(path), uri=True, timeout=30)
+        try:
+            rows = connection.execute(f"PRAGMA {pragma}").fetchall()
+        finally:
+            connection.close()
+        output = "\n".join(str(row[0]) for row in rows)
+    except sqlite3.Error as exc:
+        status = 1
+        output = f"Error: {exc}"
+    duration = round((time.perf_counter() - started) * 1000, 3)
+    return CheckResult(index, path, pragma, status, output, duration)
+
+
+def schedule_by_size(paths: Sequence[str]) -> List[int]:
+    """Indexes ordered largest file first, so long checks start early."""
+
+    def size(index: int) -> int:
+        try:
+            return os.stat(paths[index]).st_size
+        except OSError:
+            return 0
+
+    return sorted(range(len(paths)), key=lambda index: (-size(index), index))
+
+
+def emit(result: CheckResult, output_format: str) -> None:
+    if output_format == "ndjson":
+        record = {"type": "integrity", **asdict(result), "ok": result.ok}
+        sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+    else:
+        sys.stdout.write(f"@@BEGIN {result.index}\n{result.output}\n@@END {result.index} {result.status}\n")
+    sys.stdout.flush()
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Check SQLite databases with the sqlite3 module.")
+    parser.add_argument("--pragma", choices=PRAGMAS, default="integrity_check")
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--format", choices=("ndjson", "frames"), default="ndjson")
+    parser.add_argument("databases", nargs="*")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str]) -> int:
+    args = parse_args(argv)
+    # sqlite3 releases the GIL while a statement runs, so threads overlap the
+    # page reads of different databases.
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        futures = [
+            executor.submit(check_database, index, args.databases[index], args.pragma)
+            for index in schedule_by_size(args.databases)
+        ]
+        for future in as_completed(futures):
+            emit(future.result(), args.format)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,169 @@
+"""Find SQLite databases under a data directory and checkpoint their WAL files.
+
+Subcommands:
+  scan        Walk the directory tree concurrently (one ``os.scandir`` per
+              directory on a thread pool) and print every database path,
+              NUL-terminated and sorted bytewise like ``LC_ALL=C sort -z``. A
+              regular file is a database when its name matches a ``--name``
+              glob (``*.db``, ``*.sqlite`` and ``*.sqlite3`` by default) or
+              when it starts with the 16-byte ``SQLite format 3`` header. Name
+              matches are kept even when the header is unreadable, so a
+              database with a corrupted first page is still checked.
+              ``--exclude`` globs are matched against the basename and the
+              path relative to the root.
+  checkpoint  Run ``PRAGMA wal_checkpoint(PASSIVE)`` for every database with a
+              non-empty ``-wal`` file. A passive checkpoint never waits for
+              readers or writers, so it is safe while services hold the file.
+              Databases or WAL files without a valid header are not opened.
+
+``-wal``, ``-shm`` and ``-journal`` companions never start with the header and
+are not reported; they belong to the database with the same base name.
+"""
+
+import argparse
+import fnmatch
+import os
+import sqlite3
+import stat
+import sys
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Sequence, Tuple
+
+SQLITE_MAGIC = b"SQLite format 3\x00"
+WAL_MAGICS = (b"\x37\x7f\x06\x82", b"\x37\x7f\x06\x83")
+MIN_DATABASE_SIZE = 512
+DEFAULT_NAMES = ("*.db", "*.sqlite", "*.sqlite3")
+DEFAULT_EXCLUDES = ("*.bak", ".*.recovering.*")
+COMPANION_SUFFIXES = ("-wal", "-shm", "-journal")
+
+
+def _starts_with(path: str, magics: Sequence[bytes]) -> bool:
+    try:
+        with open(path, "rb") as handle:
+            head = handle.read(max(len(magic) for magic in magics))
+    except OSError:
+        return False
+    return any(head.startswith(magic) for magic in magics)
+
+
+def has_sqlite_header(path: str) -> bool:
+    return _starts_with(path, (SQLITE_MAGIC,))
+
+
+class DatabaseScanner:
+    def __init__(self, root: str, names: Sequence[str], excludes: Sequence[str], jobs: int) -> None:
+        self.root = root
+        self.names = list(names)
+        self.excludes = list(excludes)
+        self.jobs = max(1, jobs)
+
+    def _excluded(self, path: str, name: str) -> bool:
+        relative = os.path.relpath(path, self.root)
+        return any(fnmatch.fnmatch(name, glob) or fnmatch.fnmatch(relative, glob) for glob in self.excludes)
+
+    def _visit(self, directory: str) -> Tuple[List[str], List[str]]:
+        """Returns (subdirectories, databases) found directly in ``directory``."""
+
+        subdirs: List[str] = []
+        databases: List[str] = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not self._excluded(entry.path, entry.name):
+                                subdirs.append(entry.path)
+                            continue
+                        info = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if not stat.S_ISREG(info.st_mode) or entry.name.endswith(COMPANION_SUFFIXES):
+                        continue
+                    if self._excluded(entry.path, entry.name):
+                        continue
+                    if any(fnmatch.fnmatch(entry.name, glob) for glob in self.names):
+                        databases.append(entry.path)
+                    elif info.st_size >= MIN_DATABASE_SIZE and has_sqlite_header(entry.path):
+                        databases.append(entry.path)
+        except OSError as exc:
+            print(f"Warning: cannot scan {directory}: {exc}", file=sys.stderr)
+        return subdirs, databases
+
+    def scan(self) -> List[str]:
+        found: List[str] = []
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            pending: Dict[Future, str] = {pool.submit(self._visit, self.root): self.root}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.pop(future)
+                    subdirs, databases = future.result()
+                    found.extend(databases)
+                    for subdir in subdirs:
+                        pending[pool.submit(self._visit, subdir)] = subdir
+        return sorted(found, key=os.fsencode)
+
+
+def checkpoint(path: str) -> str:
+    wal_path = f"{path}-wal"
+    try:
+        if os.path.getsize(wal_path) == 0:
+            return ""
+    except OSError:
+        return ""
+    # SQLite discards a WAL it cannot read when the connection closes; leave
+    # damaged files alone so recovery still sees them.
+    if not has_sqlite_header(path) or not _starts_with(wal_path, WAL_MAGICS):
+        return f"{path}: checkpoint skipped (unrecognised database or WAL header)"
+    try:
+        connection = sqlite3.connect(path, timeout=0)
+        try:
+            busy, log_frames, checkpointed = connection.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+        finally:
+            connection.close()
+    except sqlite3.Error as exc:
+        return f"{path}: checkpoint skipped ({exc})"
+    if busy or checkpointed < log_frames:
+        return f"{path}: checkpointed {checkpointed} of {log_frames} WAL frames"
+    return ""
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Discover SQLite databases for check_db_integrity.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scan = subparsers.add_parser("scan")
+    scan.add_argument("--name", action="append", default=[], dest="names", metavar="GLOB")
+    scan.add_argument("--exclude", action="append", default=[], dest="excludes", metavar="GLOB")
+    scan.add_argument("--jobs", type=int, default=8)
+    scan.add_argument("root")
+
+    checkpoint_parser = subparsers.add_parser("checkpoint")
+    checkpoint_parser.add_argument("databases", nargs="*")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str]) -> int:
+    args = parse_args(argv)
+    if args.command == "checkpoint":
+        for database in args.databases:
+            note = checkpoint(database)
+            if note:
+                print(f"[i] WAL {note}", file=sys.stderr)
+        return 0
+
+    if not os.path.isdir(args.root):
+        print(f"Error: not a directory: {args.root}", file=sys.stderr)
+        return 1
+    scanner = DatabaseScanner(
+        args.root, args.names or DEFAULT_NAMES, [*DEFAULT_EXCLUDES, *args.excludes], args.jobs
+    )
+    output = sys.stdout.buffer
+    for path in scanner.scan():
+        output.write(os.fsencode(path) + b"\0")
+    output.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
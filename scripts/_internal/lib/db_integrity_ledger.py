@@ -0,0 +1,187 @@
+"""Track which SQLite databases are unchanged since their last verified check.
+
+The ledger (JSON, ``data/.integrity-ledger.json`` by default) keeps one entry
+per database that passed a full ``PRAGMA integrity_check``: size, mtime,
+inode, the size and mtime of its ``-wal`` file, and a BLAKE2 hash of the
+100-byte header plus the last page. Reading two small ranges is enough to
+notice rewrites that keep size and mtime, without hashing multi-GB files.
+
+Subcommands:
+  classify  Print ``unchanged`` or ``changed`` for every database argument,
+            in order.
+  update    Read ``verified<TAB>path[<TAB>fingerprint-file]`` and
+            ``keep<TAB>path`` lines from stdin. Verified databases get a fresh
+            fingerprint (or the one saved before an online snapshot), kept
+            ones retain their entry, and every other entry is dropped. The
+            file is replaced atomically.
+  fingerprint
+            Read ``path<TAB>fingerprint-file`` lines from stdin and save the
+            current fingerprint of each database to its file, so a baseline
+            can be taken while the owners are paused and recorded by
+            ``update`` after they resume.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+LEDGER_VERSION = 1
+HEADER_SIZE = 100
+DEFAULT_PAGE_SIZE = 4096
+
+
+def _page_size(header: bytes) -> int:
+    # Bytes 16-17 hold the page size; the value 1 stands for 65536.
+    if len(header) < 18 or not header.startswith(b"SQLite format 3\x00"):
+        return DEFAULT_PAGE_SIZE
+    raw = int.from_bytes(header[16:18], "big")
+    return 65536 if raw == 1 else raw or DEFAULT_PAGE_SIZE
+
+
+def fingerprint(path: Path) -> Dict[str, Any]:
+    stat = path.stat()
+    digest = hashlib.blake2b(digest_size=16)
+    with path.open("rb") as handle:
+        header = handle.read(HEADER_SIZE)
+        digest.update(header)
+        page_size = _page_size(header)
+        if stat.st_size > HEADER_SIZE:
+            handle.seek(max(HEADER_SIZE, stat.st_size - page_size))
+            digest.update(handle.read(page_size))
+
+    wal: Optional[Dict[str, int]] = None
+    wal_path = path.with_name(f"{path.name}-wal")
+    try:
+        wal_stat = wal_path.stat()
+        wal = {"size": wal_stat.st_size, "mtime_ns": wal_stat.st_mtime_ns}
+    except FileNotFoundError:
+        pass
+
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "inode": stat.st_ino,
+        "hash": digest.hexdigest(),
+        "wal": wal,
+    }
+
+
+def load_ledger(path: Path) -> Dict[str, Dict[str, Any]]:
+    try:
+        raw = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(raw, dict) or raw.get("version") != LEDGER_VERSION:
+        return {}
+    databases = raw.get("databases")
+    return databases if isinstance(databases, dict) else {}
+
+
+def save_ledger(path: Path, databases: Dict[str, Dict[str, Any]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"version": LEDGER_VERSION, "databases": databases}
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, indent=2, sort_keys=True)
+            handle.write("\n")
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def _key(path: str) -> str:
+    return os.path.abspath(path)
+
+
+def is_unchanged(entry: Optional[Dict[str, Any]], path: Path) -> bool:
+    if not entry:
+        return False
+    try:
+        current = fingerprint(path)
+    except OSError:
+        return False
+    return all(entry.get(field) == current[field] for field in ("size", "mtime_ns", "inode", "hash", "wal"))
+
+
+def classify(ledger_path: Path, databases: Sequence[str]) -> None:
+    ledger = load_ledger(ledger_path)
+    for database in databases:
+        unchanged = is_unchanged(ledger.get(_key(database)), Path(database))
+        print("unchanged" if unchanged else "changed")
+
+
+def update(ledger_path: Path, lines: Sequence[str]) -> int:
+    previous = load_ledger(ledger_path)
+    databases: Dict[str, Dict[str, Any]] = {}
+    now = time.time()
+    for line in lines:
+        action, _, rest = line.rstrip("\n").partition("\t")
+        database, _, baseline = rest.partition("\t")
+        if not database:
+            continue
+        key = _key(database)
+        if action == "keep" and key in previous:
+            databases[key] = previous[key]
+        elif action == "verified":
+            try:
+                if baseline:
+                    recorded = json.loads(Path(baseline).read_text(encoding="utf-8"))
+                else:
+                    recorded = fingerprint(Path(database))
+                databases[key] = {**recorded, "verified_at": now}
+            except (OSError, ValueError) as exc:
+                print(f"Warning: cannot fingerprint {database}: {exc}", file=sys.stderr)
+    save_ledger(ledger_path, databases)
+    return len(databases)
+
+
+def save_fingerprints(lines: Sequence[str]) -> int:
+    failures = 0
+    for line in lines:
+        database, _, output = line.rstrip("\n").partition("\t")
+        if not database or not output:
+            continue
+        try:
+            Path(output).write_text(json.dumps(fingerprint(Path(database))), encoding="utf-8")
+        except OSError as exc:
+            print(f"Warning: cannot fingerprint {database}: {exc}", file=sys.stderr)
+            failures += 1
+    return failures
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="check_db_integrity ledger of verified databases.")
+    parser.add_argument("--ledger", required=True, type=Path)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    classify_parser = subparsers.add_parser("classify")
+    classify_parser.add_argument("databases", nargs="*")
+    subparsers.add_parser("update")
+    subparsers.add_parser("fingerprint")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str]) -> int:
+    args = parse_args(argv)
+    if args.command == "classify":
+        classify(args.ledger, args.databases)
+        return 0
+    if args.command == "fingerprint":
+        return 1 if save_fingerprints(sys.stdin.readlines()) else 0
+    try:
+        update(args.ledger, sys.stdin.readlines())
+    except OSError as exc:
+        print(f"Error: cannot write integrity ledger {args.ledger}: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
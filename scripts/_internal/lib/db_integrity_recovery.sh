@@ -1,8 +1,29 @@
 #!/usr/bin/env bash
 
+_DB_INTEGRITY_RECOVERY_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+
 RECOVERY_BACKUP_PATH=""
 RECOVERY_DETAILS=""
 
+# Keeps the original database at <backup>: a hardlink when possible (the
+# recovered file is renamed over the original path afterwards, so the old
+# inode simply lives on under the backup name), otherwise a copy through
+# copy_engine.py (reflink, then copy_file_range/sendfile), or `cp -p` when
+# Python is unavailable.
+preserve_original() {
+  local db_file="$1"
+  local backup_file="$2"
+
+  if ln "$db_file" "$backup_file" 2>/dev/null; then
+    return 0
+  fi
+  if PYTHON_RUNTIME_EXTRA_MOUNTS="$(dirname "$db_file")" PYTHON_RUNTIME_SKIP_REQUIREMENTS=1 python_runtime__run "$REPO_ROOT" "" -- \
+    "$_DB_INTEGRITY_RECOVERY_DIR/../python/copy_engine.py" --quiet "$db_file" "$backup_file" 2>/dev/null; then
+    return 0
+  fi
+  cp -p --reflink=auto "$db_file" "$backup_file" 2>/dev/null
+}
+
 attempt_recovery() {
   local db_file="$1"
   local tmp_dir
@@ -15,19 +36,35 @@ attempt_recovery() {
     return 1
   fi
 
-  local dump_file="$tmp_dir/recover.sql"
-  local log_file="$tmp_dir/recover.log"
-  local new_db="$tmp_dir/recovered.db"
-  local timestamp backup_file
+  local recover_log="$tmp_dir/recover.log"
+  local restore_log="$tmp_dir/restore.log"
+  local db_dir new_db timestamp backup_file
+  db_dir="$(dirname "$db_file")"
 
-  if ! sqlite3_exec "$db_file" ".recover" >"$dump_file" 2>"$log_file"; then
-    RECOVERY_DETAILS="sqlite3 .recover failed: $(tr '\n' ' ' <"$log_file")"
+  # The new database is built next to the original so it can replace it with
+  # a rename on the same filesystem.
+  if ! new_db="$(mktemp "$db_dir/.$(basename "$db_file").recovering.XXXXXX")"; then
+    RECOVERY_DETAILS="failed to create the recovered database next to $db_file"
     rm -rf "$tmp_dir"
     return 1
   fi
+  rm -f "$new_db"
 
-  if ! sqlite3_exec "$new_db" <"$dump_file" 2>>"$log_file"; then
-    RECOVERY_DETAILS="failed to recreate database: $(tr '\n' ' ' <"$log_file")"
+  # `.recover` output is replayed as it is produced; no SQL dump is staged.
+  local -a pipeline_status=()
+  sqlite3_exec "$db_file" ".recover" 2>"$recover_log" | sqlite3_exec "$new_db" 2>"$restore_log"
+  pipeline_status=("${PIPESTATUS[@]}")
+
+  if ((pipeline_status[0] != 0)); then
+    RECOVERY_DETAILS="sqlite3 .recover failed: $(tr '\n' ' ' <"$recover_log")"
+    rm -f "$new_db"
+    rm -rf "$tmp_dir"
+    return 1
+  fi
+
+  if ((pipeline_status[1] != 0)); then
+    RECOVERY_DETAILS="failed to recreate database: $(cat "$recover_log" "$restore_log" | tr '\n' ' ')"
+    rm -f "$new_db"
     rm -rf "$tmp_dir"
     return 1
   fi
@@ -35,22 +72,35 @@ attempt_recovery() {
   timestamp="$(date +%Y%m%d%H%M%S)"
   backup_file="${db_file}.${timestamp}.bak"
 
-  if ! cp -p "$db_file" "$backup_file"; then
+  if ! preserve_original "$db_file" "$backup_file"; then
     RECOVERY_DETAILS="failed to save original backup to $backup_file"
+    rm -f "$new_db"
     rm -rf "$tmp_dir"
     return 1
   fi
 
-  if ! cp "$new_db" "$db_file"; then
+  chmod --reference="$db_file" "$new_db" 2>/dev/null || true
+  chown --reference="$db_file" "$new_db" 2>/dev/null || true
+
+  if ! mv -f "$new_db" "$db_file"; then
     RECOVERY_DETAILS="failed to replace corrupted database"
-    cp -p "$backup_file" "$db_file" >/dev/null 2>&1 || true
+    rm -f "$new_db"
     rm -rf "$tmp_dir"
     return 1
   fi
 
+  # WAL, shared-memory and rollback journal files belong to the old database;
+  # left in place they would be replayed into the recovered one on next open.
+  local suffix
+  for suffix in -wal -shm -journal; do
+    if [[ -e "$db_file$suffix" ]]; then
+      mv -f "$db_file$suffix" "$backup_file$suffix" 2>/dev/null || rm -f "$db_file$suffix"
+    fi
+  done
+
   RECOVERY_BACKUP_PATH="$backup_file"
-  if [[ -s "$log_file" ]]; then
-    RECOVERY_DETAILS="recovery completed with notes: $(tr '\n' ' ' <"$log_file")"
+  if [[ -s "$recover_log" || -s "$restore_log" ]]; then
+    RECOVERY_DETAILS="recovery completed with notes: $(cat "$recover_log" "$restore_log" | tr '\n' ' ')"
   else
     RECOVERY_DETAILS="recovery completed via sqlite3 .recover"
   fi
@@ -0,0 +1,74 @@
+"""Take consistent snapshots of live SQLite databases for online checks.
+
+Used by ``check_db_integrity.sh --online``. Each database is copied with the
+SQLite online backup API (one step, so the copy is a single consistent read
+transaction) from a read-only connection into ``<dest>/<position>.db``, where
+``<position>`` is the database's position on the command line. Services keep
+running while the snapshots are taken and then checked.
+
+Before copying, the source's ledger fingerprint (see db_integrity_ledger.py)
+is written to ``<dest>/<position>.fingerprint.json``. Recording the state from
+before the snapshot means a write that lands during the check shows up as a
+change on the next run instead of being marked as verified.
+
+One line is printed per database: ``<position><TAB>ok`` or
+``<position><TAB>error<TAB><message>``.
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Sequence, Tuple
+
+from db_integrity_check import read_only_uri, schedule_by_size
+from db_integrity_ledger import fingerprint
+
+
+def snapshot(position: int, source: str, dest_dir: Path) -> Tuple[int, str]:
+    target = dest_dir / f"{position}.db"
+    try:
+        (dest_dir / f"{position}.fingerprint.json").write_text(
+            json.dumps(fingerprint(Path(source))), encoding="utf-8"
+        )
+        source_connection = sqlite3.connect(read_only_uri(source), uri=True, timeout=30)
+        try:
+            target_connection = sqlite3.connect(str(target))
+            try:
+                source_connection.backup(target_connection, pages=-1)
+            finally:
+                target_connection.close()
+        finally:
+            source_connection.close()
+    except (OSError, sqlite3.Error) as exc:
+        target.unlink(missing_ok=True)
+        return position, f"error\t{exc}"
+    return position, "ok"
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Snapshot SQLite databases with the online backup API.")
+    parser.add_argument("--dest", required=True, type=Path)
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("databases", nargs="*")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str]) -> int:
+    args = parse_args(argv)
+    args.dest.mkdir(parents=True, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        futures = [
+            executor.submit(snapshot, position, args.databases[position], args.dest)
+            for position in schedule_by_size(args.databases)
+        ]
+        for future in futures:
+            position, outcome = future.result()
+            print(f"{position}\t{outcome}".replace("\n", " "), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -212,7 +212,7 @@ build_deploy_context() {
 
   local -a bind_mount_dirs=()
   local bind_mounts_raw=""
-  if bind_mounts_raw="$(compose_mounts__collect_bind_paths "$repo_root" "${compose_files_abs[@]}")"; then
+  if bind_mounts_raw="$(compose_mounts__collect_bind_paths "$repo_root" "$instance" env_files_abs "${compose_files_abs[@]}")"; then
     if [[ -n "$bind_mounts_raw" ]]; then
       mapfile -t bind_mount_dirs <<<"$bind_mounts_raw"
     fi
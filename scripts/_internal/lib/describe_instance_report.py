@@ -1,8 +1,30 @@
 import json
 import os
+import re
 import sys
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+from scripts._internal.python.collect_bind_mounts import (
+    InterpolationError,
+    interpolate_tree,
+    load_env_chain,
+    normalize_volume,
+)
+
+# Exit status used when the cached model cannot be rendered in-process and the
+# caller should fall back to `docker compose config`. describe_instance.sh owns
+# the value and passes it in, so both sides agree on it.
+CACHE_FALLBACK_STATUS = int(os.environ.get("DESCRIBE_INSTANCE_CACHE_FALLBACK_STATUS", "3"))
+
+SHORT_PORT_PATTERN = re.compile(
+    r"^(?:(?P<host_ip>\[[^\]]*\]|[^:\[\]]*):)??"
+    r"(?:(?P<published>\d+(?:-\d+)?)?:)?"
+    r"(?P<target>\d+(?:-\d+)?)"
+    r"(?:/(?P<protocol>\w+))?$"
+)
 
 
 def split_entries(raw: str) -> List[str]:
@@ -74,6 +96,95 @@ def format_port(port: object) -> str:
     return result
 
 
+def parse_port_spec(raw: object) -> Optional[Dict[str, str]]:
+    """Split short port syntax ("[ip:][published:]target[/protocol]") into parts."""
+
+    match = SHORT_PORT_PATTERN.match(str(raw).strip())
+    if not match:
+        return None
+    host_ip = match.group("host_ip") or ""
+    if host_ip.startswith("[") and host_ip.endswith("]"):
+        host_ip = host_ip[1:-1]
+    return {
+        "host_ip": host_ip,
+        "published": match.group("published") or "",
+        "target": match.group("target"),
+        "protocol": match.group("protocol") or "tcp",
+    }
+
+
+def _split_range(raw: str) -> List[int]:
+    start_text, _, end_text = raw.partition("-")
+    start = int(start_text)
+    end = int(end_text) if end_text else start
+    return list(range(start, end + 1))
+
+
+def normalize_port(port: object) -> List[object]:
+    """Expand a port entry into the long form produced by `docker compose config`."""
+
+    if isinstance(port, dict):
+        normalized = dict(port)
+        normalized.setdefault("mode", "ingress")
+        normalized.setdefault("protocol", "tcp")
+        if "target" in normalized:
+            try:
+                normalized["target"] = int(normalized["target"])
+            except (TypeError, ValueError):
+                pass
+        if normalized.get("published") is not None:
+            normalized["published"] = str(normalized["published"])
+        return [normalized]
+
+    parts = parse_port_spec(port)
+    if parts is None:
+        return [port]
+    targets = _split_range(parts["target"])
+    published = _split_range(parts["published"]) if parts["published"] else []
+    if published and len(published) != len(targets):
+        return [port]
+
+    entries: List[object] = []
+    for index, target in enumerate(targets):
+        entry: Dict[str, Any] = {"mode": "ingress", "target": target, "protocol": parts["protocol"]}
+        if published:
+            entry["published"] = str(published[index])
+        if parts["host_ip"]:
+            entry["host_ip"] = parts["host_ip"]
+        entries.append(entry)
+    return entries
+
+
+def load_cached_model(compose_path: Path, env_file: Path) -> Dict[str, Any]:
+    """Build the subset of `docker compose config` used by the report, in-process."""
+
+    raw = yaml.safe_load(compose_path.read_text(encoding="utf-8")) or {}
+    if not isinstance(raw, dict):
+        raise ValueError(f"{compose_path} does not contain a compose mapping")
+    env = load_env_chain([str(env_file)], os.environ)
+    project_dir = compose_path.parent
+    named_volumes = raw.get("volumes")
+
+    services: Dict[str, Any] = {}
+    raw_services = raw.get("services") or {}
+    if not isinstance(raw_services, dict):
+        raise ValueError(f"{compose_path}: services must be a mapping")
+    for name, definition in raw_services.items():
+        if not isinstance(definition, dict):
+            continue
+        raw_ports = interpolate_tree(definition.get("ports") or [], env)
+        raw_volumes = definition.get("volumes") or []
+        ports: List[object] = []
+        for port in raw_ports if isinstance(raw_ports, list) else []:
+            ports.extend(normalize_port(port))
+        volumes = [
+            normalize_volume(volume, project_dir, env, named_volumes)
+            for volume in (raw_volumes if isinstance(raw_volumes, list) else [])
+        ]
+        services[str(name)] = {"ports": ports, "volumes": volumes}
+    return {"services": services}
+
+
 def format_volume(volume: object) -> str:
     if isinstance(volume, str):
         return volume
@@ -242,7 +353,130 @@ def main(
     return 0
 
 
+def _read_error_log(raw_path: str) -> str:
+    if not raw_path:
+        return ""
+    try:
+        return Path(raw_path).read_text(encoding="utf-8").strip()
+    except OSError:
+        return ""
+
+
+def build_all_summaries(
+    manifest_path: Path,
+    compose_files: str,
+    extra_files: str,
+    repo_root: Path,
+) -> List[Dict[str, Any]]:
+    summaries: List[Dict[str, Any]] = []
+    for line in manifest_path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        fields = (line.split("\t") + ["", "", "", ""])[:4]
+        instance_name, status, config_path, errors_path = fields
+        errors = _read_error_log(errors_path)
+
+        summary: Dict[str, Any]
+        if status.strip() != "0":
+            summary = {"instance": instance_name, "error": errors or "build failed"}
+        else:
+            try:
+                config = json.loads(Path(config_path).read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError) as exc:
+                summary = {
+                    "instance": instance_name,
+                    "error": f"Error parsing docker compose config output: {exc}",
+                }
+            else:
+                summary = build_summary(config, instance_name, compose_files, extra_files, repo_root)
+        summaries.append(summary)
+    return summaries
+
+
+def main_all(
+    manifest: str,
+    format: str,
+    compose_files: str,
+    extra_files: str,
+    repo_root: str,
+) -> int:
+    format_arg = (format or "table").strip().lower()
+    repo_root_resolved = Path(repo_root or ".").resolve()
+
+    try:
+        summaries = build_all_summaries(
+            Path(manifest), compose_files, extra_files, repo_root_resolved
+        )
+    except OSError as exc:
+        print(f"Internal error: could not read instance manifest: {exc}", file=sys.stderr)
+        return 1
+
+    failed = [summary for summary in summaries if "error" in summary]
+    for summary in failed:
+        print(f"Error: failed to describe instance '{summary['instance']}'.", file=sys.stderr)
+        print(summary["error"], file=sys.stderr)
+
+    if format_arg == "json":
+        json.dump({"instances": summaries}, sys.stdout, ensure_ascii=False, indent=2, sort_keys=True)
+        sys.stdout.write("\n")
+    else:
+        for index, summary in enumerate(summaries):
+            if index:
+                print("")
+                print("-" * 40)
+                print("")
+            if "error" in summary:
+                print(f"Instance: {summary['instance']}")
+                print("")
+                print("  (failed to describe; see errors above)")
+                continue
+            render_table(summary)
+
+    return 1 if failed else 0
+
+
+def main_cached(
+    compose_path: str,
+    env_file: str,
+    format: str,
+    instance: str,
+    compose_files: str,
+    extra_files: str,
+    repo_root: str,
+) -> int:
+    try:
+        config = load_cached_model(Path(compose_path), Path(env_file))
+    except (OSError, ValueError, InterpolationError) as exc:
+        print(f"[*] Cached compose model unusable ({exc}); falling back to docker compose.", file=sys.stderr)
+        return CACHE_FALLBACK_STATUS
+    return main(json.dumps(config), format, instance, compose_files, extra_files, repo_root)
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 3 and sys.argv[1] == "--cached":
+        sys.exit(
+            main_cached(
+                compose_path=sys.argv[2],
+                env_file=sys.argv[3],
+                format=os.environ.get("DESCRIBE_INSTANCE_FORMAT", "table"),
+                instance=os.environ.get("DESCRIBE_INSTANCE_NAME", ""),
+                compose_files=os.environ.get("DESCRIBE_INSTANCE_COMPOSE_FILES", ""),
+                extra_files=os.environ.get("DESCRIBE_INSTANCE_EXTRA_FILES", ""),
+                repo_root=os.environ.get("DESCRIBE_INSTANCE_REPO_ROOT", "."),
+            )
+        )
+
+    if len(sys.argv) > 2 and sys.argv[1] == "--all":
+        sys.exit(
+            main_all(
+                manifest=sys.argv[2],
+                format=os.environ.get("DESCRIBE_INSTANCE_FORMAT", "table"),
+                compose_files=os.environ.get("DESCRIBE_INSTANCE_COMPOSE_FILES", ""),
+                extra_files=os.environ.get("DESCRIBE_INSTANCE_EXTRA_FILES", ""),
+                repo_root=os.environ.get("DESCRIBE_INSTANCE_REPO_ROOT", "."),
+            )
+        )
+
     raw_config_arg = sys.argv[1] if len(sys.argv) > 1 else ""
     if not raw_config_arg:
         raw_config_arg = sys.stdin.read()
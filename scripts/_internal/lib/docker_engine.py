@@ -0,0 +1,381 @@
+"""Query container state and logs straight from the Docker Engine API.
+
+Talks HTTP/1.1 over the daemon's Unix socket (``DOCKER_HOST=unix://...`` or
+``/var/run/docker.sock``) through a small pool of keep-alive connections, so
+status checks do not pay for a Docker CLI process per query. Containers are
+selected with the ``com.docker.compose.project``/``com.docker.compose.service``
+labels that Compose sets; one-off ``docker compose run`` containers are skipped,
+as ``docker compose ps`` and ``docker compose logs`` do.
+
+Subcommands:
+  services  List services with containers (``--status running`` for active ones).
+  ps        Print compose-like container rows (``--format table|json|both``).
+  logs      Fetch log tails concurrently into ``<dir>/<index>.log`` and
+            ``<dir>/<index>.status`` (the layout used by health_logs.sh), plus
+            ``<index>.scan`` error-pattern counts when ``--pattern`` is given.
+
+Exit status 3 means the engine could not be reached; callers fall back to the CLI.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import queue
+import re
+import socket
+import struct
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import quote, urlencode
+
+from health_log_demux import ServiceLog, compile_patterns
+
+ENGINE_UNAVAILABLE_STATUS = 3
+DEFAULT_SOCKET = "/var/run/docker.sock"
+PROJECT_LABEL = "com.docker.compose.project"
+SERVICE_LABEL = "com.docker.compose.service"
+ONEOFF_LABEL = "com.docker.compose.oneoff"
+HEALTH_PATTERN = re.compile(r"\((healthy|unhealthy|health: starting)\)")
+# Top-level `name:` of a compose file; the helper stays stdlib-only to start fast.
+PROJECT_NAME_PATTERN = re.compile(r"^name:\s*['\"]?([^'\"#\s$]+)['\"]?\s*(?:#.*)?$", re.MULTILINE)
+DURATION_PATTERN = re.compile(r"^(\d+(?:\.\d+)?)(ms|s|m|h)$")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+class EngineError(RuntimeError):
+    """Raised when the Docker Engine API cannot be reached or rejects a request."""
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+class EngineClient:
+    """Minimal Engine API client with a bounded pool of persistent connections."""
+
+    def __init__(self, socket_path: str, pool_size: int = 4, timeout: float = 30.0) -> None:
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._pool: "queue.LifoQueue[UnixHTTPConnection]" = queue.LifoQueue(maxsize=pool_size)
+
+    def _acquire(self) -> UnixHTTPConnection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return UnixHTTPConnection(self.socket_path, self.timeout)
+
+    def _release(self, connection: UnixHTTPConnection) -> None:
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Tuple[int, bytes]:
+        target = path + (f"?{urlencode(params)}" if params else "")
+        # A pooled connection may have been closed by the daemon; retry once on a fresh one.
+        for attempt in range(2):
+            connection = self._acquire()
+            try:
+                connection.request("GET", target, headers={"Host": "docker"})
+                response = connection.getresponse()
+                body = response.read()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError) as exc:
+                connection.close()
+                if attempt == 0:
+                    continue
+                raise EngineError(f"connection to {self.socket_path} lost: {exc}") from exc
+            except OSError as exc:
+                connection.close()
+                raise EngineError(f"cannot reach the Docker Engine at {self.socket_path}: {exc}") from exc
+            if response.will_close:
+                connection.close()
+            else:
+                self._release(connection)
+            return response.status, body
+        raise EngineError(f"cannot reach the Docker Engine at {self.socket_path}")
+
+    def get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        status, body = self.get(path, params)
+        if status != 200:
+            raise EngineError(f"GET {path} returned HTTP {status}: {body[:200].decode(errors='replace')}")
+        return json.loads(body)
+
+    def list_containers(self, project: str, include_stopped: bool = True) -> List[Dict[str, Any]]:
+        filters = {"label": [f"{PROJECT_LABEL}={project}"]}
+        params = {"all": "1" if include_stopped else "0", "filters": json.dumps(filters)}
+        containers = self.get_json("/containers/json", params)
+        return [
+            entry
+            for entry in containers
+            if isinstance(entry, dict) and (entry.get("Labels") or {}).get(ONEOFF_LABEL) != "True"
+        ]
+
+    def container_logs(self, container_id: str, tail: str, since: Optional[float] = None) -> str:
+        params = {"stdout": "1", "stderr": "1", "tail": tail}
+        if since is not None:
+            params["since"] = f"{since:.3f}"
+        status, body = self.get(f"/containers/{quote(container_id, safe='')}/logs", params)
+        if status != 200:
+            raise EngineError(f"logs for {container_id[:12]} returned HTTP {status}")
+        return demultiplex_stream(body).decode("utf-8", errors="replace")
+
+
+def demultiplex_stream(payload: bytes) -> bytes:
+    """Strip the 8-byte stdout/stderr frame headers of non-TTY log streams."""
+
+    if len(payload) < 8 or payload[0] not in (0, 1, 2) or payload[1:4] != b"\x00\x00\x00":
+        return payload
+    chunks: List[bytes] = []
+    offset = 0
+    while offset + 8 <= len(payload):
+        (size,) = struct.unpack(">I", payload[offset + 4 : offset + 8])
+        chunks.append(payload[offset + 8 : offset + 8 + size])
+        offset += 8 + size
+    return b"".join(chunks)
+
+
+def parse_since(raw: str, now: Optional[float] = None) -> float:
+    """Convert a `docker compose logs --since` value (`10m`, RFC 3339, epoch) to a timestamp."""
+
+    match = DURATION_PATTERN.match(raw)
+    if match:
+        return (now or time.time()) - float(match.group(1)) * DURATION_UNITS[match.group(2)]
+    try:
+        return float(raw)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(raw.replace("Z", "+00:00")).timestamp()
+    except ValueError as exc:
+        raise ValueError(f"invalid --since value: {raw}") from exc
+
+
+def resolve_socket_path(environ: Dict[str, str]) -> str:
+    host = environ.get("DOCKER_HOST", "")
+    if host.startswith("unix://"):
+        return host[len("unix://") :]
+    return DEFAULT_SOCKET
+
+
+def _normalize_project(name: str) -> str:
+    return re.sub(r"[^a-z0-9_-]", "", name.lower())
+
+
+def _env_chain_value(paths: Sequence[Path], key: str) -> Optional[str]:
+    """Value of ``key`` across an env-file chain; later files override earlier ones."""
+
+    found: Optional[str] = None
+    for path in paths:
+        try:
+            lines = path.read_text(encoding="utf-8").splitlines()
+        except OSError:
+            continue
+        for line in lines:
+            stripped = line.strip()
+            if stripped.startswith("export "):
+                stripped = stripped[len("export ") :].lstrip()
+            name, separator, value = stripped.partition("=")
+            if separator and name.strip() == key:
+                found = value.strip().strip("'\"")
+    return found
+
+
+def resolve_project_name(
+    compose_file: Path, environ: Dict[str, str], env_files: Sequence[Path] = ()
+) -> str:
+    """Follow Compose precedence: COMPOSE_PROJECT_NAME, top-level ``name:``, then the directory.
+
+    COMPOSE_PROJECT_NAME is read from the environment, then from the instance env
+    chain (``env_files``), or from the ``.env`` next to the compose file when no
+    chain is given.
+    """
+
+    candidates = [
+        environ.get("COMPOSE_PROJECT_NAME"),
+        _env_chain_value(list(env_files) or [compose_file.parent / ".env"], "COMPOSE_PROJECT_NAME"),
+    ]
+    try:
+        match = PROJECT_NAME_PATTERN.search(compose_file.read_text(encoding="utf-8"))
+    except OSError:
+        match = None
+    if match:
+        candidates.append(match.group(1))
+    candidates.append(compose_file.resolve().parent.name)
+    for candidate in candidates:
+        if candidate and _normalize_project(candidate):
+            return _normalize_project(candidate)
+    return "default"
+
+
+def container_health(container: Dict[str, Any]) -> str:
+    match = HEALTH_PATTERN.search(str(container.get("Status") or ""))
+    if not match:
+        return ""
+    return "starting" if match.group(1) == "health: starting" else match.group(1)
+
+
+def compose_rows(containers: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Shape Engine container entries like `docker compose ps --format json` rows."""
+
+    rows: List[Dict[str, Any]] = []
+    for container in containers:
+        labels = container.get("Labels") or {}
+        names = container.get("Names") or []
+        rows.append(
+            {
+                "ID": container.get("Id", ""),
+                "Name": str(names[0]).lstrip("/") if names else "",
+                "Image": container.get("Image", ""),
+                "Project": labels.get(PROJECT_LABEL, ""),
+                "Service": labels.get(SERVICE_LABEL, ""),
+                "State": container.get("State", ""),
+                "Health": container_health(container),
+                "Status": container.get("Status", ""),
+            }
+        )
+    rows.sort(key=lambda row: (row["Service"], row["Name"]))
+    return rows
+
+
+def render_table(rows: Sequence[Dict[str, Any]]) -> str:
+    headers = ("NAME", "IMAGE", "SERVICE", "STATUS")
+    table = [headers] + [(row["Name"], row["Image"], row["Service"], row["Status"]) for row in rows]
+    widths = [max(len(str(line[index])) for line in table) for index in range(len(headers))]
+    return "\n".join(
+        "   ".join(str(value).ljust(width) for value, width in zip(line, widths)).rstrip() for line in table
+    )
+
+
+def fetch_service_logs(
+    client: EngineClient,
+    rows: Sequence[Dict[str, Any]],
+    services: Sequence[str],
+    tail: int,
+    jobs: int,
+    fetch_tail: str = "",
+    since: Optional[float] = None,
+    patterns: Sequence[re.Pattern] = (),
+    matches: int = 5,
+) -> List[Tuple[int, str, Optional[ServiceLog]]]:
+    by_service: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        by_service.setdefault(row["Service"], []).append(row)
+
+    def fetch(service: str) -> Tuple[int, str, Optional[ServiceLog]]:
+        containers = by_service.get(service)
+        if not containers:
+            return 1, f"Error: no containers found for service {service}.\n", None
+        log = ServiceLog(tail, patterns, matches)
+        try:
+            for container in containers:
+                text = client.container_logs(container["ID"], fetch_tail or str(tail), since)
+                for line in text.splitlines():
+                    log.append(line)
+        except EngineError as exc:
+            return 1, f"Error: {exc}\n", None
+        return 0, "".join(f"{line}\n" for line in log), log
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        return list(executor.map(fetch, services))
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Docker Engine API helper.")
+    parser.add_argument("--compose-file", required=True, type=Path)
+    parser.add_argument("--project", default="")
+    parser.add_argument("--env-file", action="append", default=[], type=Path)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    services = subparsers.add_parser("services")
+    services.add_argument("--status", choices=("running", "all"), default="all")
+
+    ps = subparsers.add_parser("ps")
+    ps.add_argument(
+        "--format",
+        choices=("table", "json", "both"),
+        default="table",
+        help="'both' prints the JSON rows on the first line, then the table.",
+    )
+
+    logs = subparsers.add_parser("logs")
+    logs.add_argument("--tail", type=int, default=50, help="Lines kept per service.")
+    logs.add_argument("--fetch-tail", default="", help="Lines requested from the daemon (default: --tail).")
+    logs.add_argument("--since", default="")
+    logs.add_argument("--pattern", action="append", default=[])
+    logs.add_argument("--matches", type=int, default=5)
+    logs.add_argument("--jobs", type=int, default=4)
+    logs.add_argument("--output-dir", required=True, type=Path)
+    logs.add_argument("services", nargs="+")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str]) -> int:
+    args = parse_args(argv)
+    environ = dict(os.environ)
+    project = args.project or resolve_project_name(args.compose_file, environ, args.env_file)
+    pool_size = max(1, getattr(args, "jobs", 1))
+    client = EngineClient(resolve_socket_path(environ), pool_size=pool_size, timeout=args.timeout)
+
+    try:
+        if args.command == "services":
+            rows = compose_rows(client.list_containers(project, include_stopped=args.status == "all"))
+            seen: List[str] = []
+            for row in rows:
+                if row["Service"] and row["Service"] not in seen:
+                    seen.append(row["Service"])
+            if seen:
+                print("\n".join(seen))
+        elif args.command == "ps":
+            rows = compose_rows(client.list_containers(project))
+            if args.format in ("json", "both"):
+                print(json.dumps(rows))
+            if args.format in ("table", "both"):
+                print(render_table(rows))
+        else:
+            patterns = compile_patterns(args.pattern)
+            since = parse_since(args.since) if args.since else None
+            rows = compose_rows(client.list_containers(project))
+            results = fetch_service_logs(
+                client, rows, args.services, args.tail, args.jobs, args.fetch_tail, since, patterns, args.matches
+            )
+            for index, (status, text, log) in enumerate(results):
+                (args.output_dir / f"{index}.log").write_text(text, encoding="utf-8")
+                (args.output_dir / f"{index}.status").write_text(f"{status}\n", encoding="utf-8")
+                if patterns:
+                    scan = (log or ServiceLog(1, patterns)).scan_text()
+                    (args.output_dir / f"{index}.scan").write_text(scan, encoding="utf-8")
+    except (EngineError, ValueError, re.error) as exc:
+        print(f"[!] Docker Engine API unavailable: {exc}", file=sys.stderr)
+        return ENGINE_UNAVAILABLE_STATUS
+    finally:
+        client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,67 @@
+#!/usr/bin/env bash
+# shellcheck shell=bash
+
+# Optional Docker Engine API backend for status and log queries.
+# Enabled with DOCKER_STATUS_BACKEND=engine; every caller keeps its Docker CLI
+# path as the fallback when the daemon socket cannot be used.
+
+_DOCKER_ENGINE_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+_DOCKER_ENGINE_WARNED=0
+# Instance env chain (absolute paths) used to resolve COMPOSE_PROJECT_NAME;
+# empty means the .env next to the compose file.
+declare -a DOCKER_ENGINE_ENV_FILES=()
+
+# shellcheck source=./python_runtime.sh
+source "$_DOCKER_ENGINE_DIR/python_runtime.sh"
+
+docker_engine__enabled() {
+  [[ "${DOCKER_STATUS_BACKEND:-cli}" == "engine" ]]
+}
+
+# Prints the last "-f <file>" value from a docker compose command line.
+docker_engine__compose_file_from_args() {
+  local compose_file=""
+  while [[ $# -gt 0 ]]; do
+    case "$1" in
+    -f | --file)
+      compose_file="${2:-}"
+      shift
+      ;;
+    --file=*)
+      compose_file="${1#*=}"
+      ;;
+    esac
+    shift
+  done
+  if [[ -z "$compose_file" ]]; then
+    return 1
+  fi
+  printf '%s\n' "$compose_file"
+}
+
+# Usage: docker_engine__run <compose_file> <subcommand> [args...]
+docker_engine__run() {
+  local compose_file="$1"
+  shift
+  local -a env_args=()
+  local env_file
+  for env_file in "${DOCKER_ENGINE_ENV_FILES[@]}"; do
+    env_args+=(--env-file "$env_file")
+  done
+  # The helper only needs the standard library, so skip the requirements install.
+  PYTHON_RUNTIME_SKIP_REQUIREMENTS=1 python_runtime__run \
+    "$_DOCKER_ENGINE_DIR/../../.." "DOCKER_HOST COMPOSE_PROJECT_NAME" -- \
+    "$_DOCKER_ENGINE_DIR/docker_engine.py" --compose-file "$compose_file" "${env_args[@]}" "$@"
+}
+
+docker_engine__warn_fallback() {
+  if ((_DOCKER_ENGINE_WARNED == 0)); then
+    echo "[!] Docker Engine API backend failed; falling back to the docker CLI." >&2
+    _DOCKER_ENGINE_WARNED=1
+  fi
+}
+
+if [[ "${BASH_SOURCE[0]}" == "$0" ]]; then
+  echo "This script is intended to be sourced." >&2
+  exit 1
+fi
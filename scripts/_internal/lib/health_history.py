@@ -0,0 +1,341 @@
+"""Persist check_health results in SQLite and summarize them.
+
+Subcommands:
+  record  Read the NDJSON report stream (see health_report.py) from stdin and
+          insert one row per service in a single transaction.
+  query   Print uptime percentage, p50/p95 check duration, restarts and log
+          error counts per service over a time window. A missing database is
+          reported as "no history" and never created by a query.
+
+``check_ms`` is how long the whole check took, not the service itself: the
+``check_ms`` of the one-shot run (status, probes and logs), or the poll
+duration in watch mode. Every service of a run shares it. ``log_errors`` is the
+``matched`` count of the service's error scan, which covers the whole log
+window rather than only the kept tail.
+
+Restarts are derived when a sample is stored: a service that is up again, or
+up with a container ID missing from its previous sample, counts as one restart.
+Rows older than the retention window are purged at most once a day.
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from health_report import iter_records
+from health_watch import parse_interval, parse_ps_output, summarize_containers
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checks (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    instance TEXT NOT NULL,
+    service TEXT NOT NULL,
+    status TEXT NOT NULL,
+    up INTEGER NOT NULL,
+    restarts INTEGER NOT NULL DEFAULT 0,
+    check_ms REAL,
+    log_errors INTEGER NOT NULL DEFAULT 0,
+    container_ids TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS checks_by_service ON checks (instance, service, ts);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+COMPACT_EVERY_SECONDS = 24 * 3600
+
+
+@dataclass
+class Sample:
+    instance: str
+    service: str
+    status: str
+    up: bool
+    check_ms: Optional[float]
+    log_errors: int
+    container_ids: Sequence[str] = ()
+    ts: float = 0.0
+
+
+class HistoryStore:
+    def __init__(self, path: Path, retention_days: float = 90.0, read_only: bool = False) -> None:
+        self.retention_days = retention_days
+        if read_only:
+            self.connection = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True, timeout=30)
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(path), timeout=30)
+        # auto_vacuum only takes effect before the first table is created.
+        self.connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _previous(self, instance: str, service: str) -> Optional[sqlite3.Row]:
+        cursor = self.connection.execute(
+            "SELECT up, restarts, container_ids FROM checks "
+            "WHERE instance = ? AND service = ? ORDER BY ts DESC, id DESC LIMIT 1",
+            (instance, service),
+        )
+        return cursor.fetchone()
+
+    def record(self, samples: Iterable[Sample]) -> int:
+        """Insert a batch of samples in one transaction; returns the row count."""
+
+        rows: List[tuple] = []
+        last: Dict[tuple, tuple] = {}
+        with self.connection:
+            for sample in samples:
+                key = (sample.instance, sample.service)
+                previous = last.get(key) or self._previous(*key)
+                restarts = previous[1] if previous else 0
+                ids = ",".join(sorted(sample.container_ids))
+                if previous and sample.up and ids:
+                    previous_ids = set(filter(None, str(previous[2]).split(",")))
+                    replaced = not previous_ids.issuperset(sample.container_ids)
+                    if previous_ids and (replaced or not previous[0]):
+                        restarts += 1
+                row = (
+                    sample.ts or time.time(),
+                    sample.instance,
+                    sample.service,
+                    sample.status,
+                    int(sample.up),
+                    restarts,
+                    sample.check_ms,
+                    sample.log_errors,
+                    ids,
+                )
+                last[key] = (int(sample.up), restarts, ids)
+                rows.append(row)
+            self.connection.executemany(
+                "INSERT INTO checks (ts, instance, service, status, up, restarts, check_ms, "
+                "log_errors, container_ids) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        self.maybe_compact()
+        return len(rows)
+
+    def maybe_compact(self, now: Optional[float] = None) -> bool:
+        now = now or time.time()
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'last_compaction'").fetchone()
+        if row and now - float(row[0]) < COMPACT_EVERY_SECONDS:
+            return False
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM checks WHERE ts < ?", (now - self.retention_days * 86400,)
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('last_compaction', ?)", (str(now),)
+            )
+        self.connection.execute("PRAGMA incremental_vacuum")
+        self.connection.execute("PRAGMA optimize")
+        return True
+
+    def summarize(self, since: float, instance: Optional[str] = None) -> List[Dict[str, Any]]:
+        query = (
+            "SELECT instance, service, up, restarts, check_ms, log_errors, ts FROM checks "
+            "WHERE ts >= ?"
+        )
+        params: List[Any] = [since]
+        if instance:
+            query += " AND instance = ?"
+            params.append(instance)
+        query += " ORDER BY instance, service, ts"
+
+        groups: Dict[tuple, Dict[str, Any]] = {}
+        for row in self.connection.execute(query, params):
+            key = (row[0], row[1])
+            group = groups.setdefault(
+                key,
+                {"samples": 0, "up": 0, "durations": [], "restarts": [], "errors": 0, "last": 0.0},
+            )
+            group["samples"] += 1
+            group["up"] += row[2]
+            group["restarts"].append(row[3])
+            if row[4] is not None:
+                group["durations"].append(row[4])
+            group["errors"] += row[5]
+            group["last"] = row[6]
+
+        summary: List[Dict[str, Any]] = []
+        for (instance_name, service), group in groups.items():
+            durations = sorted(group["durations"])
+            summary.append(
+                {
+                    "instance": instance_name,
+                    "service": service,
+                    "samples": group["samples"],
+                    "uptime_percent": round(100.0 * group["up"] / group["samples"], 2),
+                    "check_p50_ms": percentile(durations, 50),
+                    "check_p95_ms": percentile(durations, 95),
+                    "restarts": max(group["restarts"]) - min(group["restarts"]),
+                    "log_errors": group["errors"],
+                    "last_sample": group["last"],
+                }
+            )
+        return summary
+
+
+def percentile(sorted_values: Sequence[float], rank: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted sequence."""
+
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(-(-rank * len(sorted_values) // 100)) - 1))
+    return round(float(sorted_values[index]), 3)
+
+
+def scan_matched(scan: str) -> int:
+    """The ``matched`` row of a health_log_demux.py scan record (0 without one)."""
+
+    for row in scan.splitlines():
+        kind, _, value = row.partition("\t")
+        if kind == "matched" and value.isdigit():
+            return int(value)
+    return 0
+
+
+def samples_from_stream(records: Iterable[Dict[str, Any]]) -> List[Sample]:
+    instance = "default"
+    check_ms: Optional[float] = None
+    containers: Dict[str, Dict[str, Any]] = {}
+    services: List[Dict[str, Any]] = []
+    for record in records:
+        record_type = record.get("type")
+        if record_type == "meta":
+            instance = str(record.get("instance") or "default")
+            duration = record.get("check_ms")
+            check_ms = float(duration) if isinstance(duration, (int, float)) else None
+        elif record_type == "compose_ps_json":
+            containers = summarize_containers(_parse_ps(str(record.get("raw") or "")))
+        elif record_type == "service":
+            services.append(record)
+
+    now = time.time()
+    samples: List[Sample] = []
+    for record in services:
+        service = str(record.get("service") or "")
+        entry = containers.get(service)
+        if entry:
+            status = ", ".join(sorted(entry["labels"]))
+            up = bool(entry["up"])
+        else:
+            # Without container state, fall back to whether the logs could be read.
+            status = "missing" if containers else str(record.get("status") or "unknown")
+            up = not containers and record.get("status") == "ok"
+        samples.append(
+            Sample(
+                instance=instance,
+                service=service,
+                status=status,
+                up=up,
+                check_ms=check_ms,
+                log_errors=scan_matched(str(record.get("scan") or "")),
+                container_ids=sorted(entry["ids"]) if entry else (),
+                ts=now,
+            )
+        )
+    return samples
+
+
+def _parse_ps(raw: str) -> List[Dict[str, Any]]:
+    try:
+        return parse_ps_output(raw)
+    except json.JSONDecodeError:
+        return []
+
+
+def render_text(summary: Sequence[Dict[str, Any]], window: str) -> None:
+    if not summary:
+        print(f"No health history recorded in the last {window}.")
+        return
+    headers = ("INSTANCE", "SERVICE", "SAMPLES", "UPTIME", "CHECK P50 MS", "CHECK P95 MS", "RESTARTS", "LOG ERRORS")
+    rows = [headers]
+    for entry in summary:
+        rows.append(
+            (
+                entry["instance"],
+                entry["service"],
+                str(entry["samples"]),
+                f"{entry['uptime_percent']:.2f}%",
+                "-" if entry["check_p50_ms"] is None else f"{entry['check_p50_ms']:.1f}",
+                "-" if entry["check_p95_ms"] is None else f"{entry['check_p95_ms']:.1f}",
+                str(entry["restarts"]),
+                str(entry["log_errors"]),
+            )
+        )
+    widths = [max(len(row[index]) for row in rows) for index in range(len(headers))]
+    print(f"Health history for the last {window}:")
+    for row in rows:
+        print("  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip())
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="check_health history store.")
+    parser.add_argument("--db", required=True, type=Path)
+    parser.add_argument("--retention-days", type=float, default=90.0)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("record")
+
+    query = subparsers.add_parser("query")
+    query.add_argument("--instance", default="")
+    query.add_argument("--window", default="7d")
+    query.add_argument("--format", choices=("text", "json"), default="text")
+    return parser.parse_args(argv)
+
+
+def _window_seconds(raw: str) -> float:
+    if raw.endswith("d") and raw[:-1].replace(".", "", 1).isdigit():
+        return float(raw[:-1]) * 86400
+    return parse_interval(raw)
+
+
+def main(argv: Sequence[str]) -> int:
+    args = parse_args(argv)
+    if args.command == "query" and not args.db.exists():
+        if args.format == "json":
+            payload = {"window": args.window, "instance": args.instance or None, "services": []}
+            print(json.dumps(payload, ensure_ascii=False, indent=2))
+        else:
+            print(f"No health history recorded yet ({args.db} does not exist).")
+        return 0
+    try:
+        store = HistoryStore(args.db, retention_days=args.retention_days, read_only=args.command == "query")
+    except sqlite3.Error as exc:
+        print(f"Error: cannot open health history database {args.db}: {exc}", file=sys.stderr)
+        return 1
+    try:
+        if args.command == "record":
+            stream = open(sys.stdin.fileno(), encoding="utf-8", errors="replace", closefd=False)
+            store.record(samples_from_stream(iter_records(stream)))
+            return 0
+
+        try:
+            window = _window_seconds(args.window)
+        except ValueError as exc:
+            print(f"Error: {exc}", file=sys.stderr)
+            return 2
+        summary = store.summarize(time.time() - window, args.instance or None)
+        if args.format == "json":
+            payload = {"window": args.window, "instance": args.instance or None, "services": summary}
+            print(json.dumps(payload, ensure_ascii=False, indent=2))
+        else:
+            render_text(summary, args.window)
+        return 0
+    except sqlite3.Error as exc:
+        print(f"Error: health history database {args.db} failed: {exc}", file=sys.stderr)
+        return 1
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,194 @@
+"""Split a prefixed `docker compose logs` stream into per-service results.
+
+Reads the combined stream from stdin and writes `<index>.log` and
+`<index>.status` for every requested service into the output directory, using
+the same layout as the per-service collector in health_logs.sh. Each service
+keeps at most `--tail` lines in a ring buffer, so memory stays bounded no
+matter how verbose the stream is.
+
+With `--pattern`, every line is also matched against the error patterns as it
+streams by and `<index>.scan` records the match counts and the last
+`--matches` matching lines (see ServiceLog.scan_text for the layout).
+
+With `--raw INDEX` (repeatable), stdin is not read: `<INDEX>.raw` in the output
+directory holds the unprefixed log of one service (spooled by the per-service
+collector) and is streamed into `<INDEX>.log` and `<INDEX>.scan`, then removed.
+One process scans every service this way; the caller records the fetch status.
+`--check-patterns` only validates the patterns, so every log mode (and watch
+mode) uses the same Python regex dialect.
+"""
+
+import argparse
+import re
+import sys
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Pattern, Sequence
+
+
+class PrefixResolver:
+    """Map compose log prefixes (`svc`, `svc-1`, `project-svc-1`, `project_svc_1`) to services."""
+
+    def __init__(self, services: Sequence[str]) -> None:
+        # Longest names first so "web-api" wins over "api" for "web-api-1".
+        self._patterns = [
+            (service, re.compile(rf"(?:.+[-_])?{re.escape(service)}(?:[-_]\d+)?"))
+            for service in sorted(set(services), key=len, reverse=True)
+        ]
+        self._cache: Dict[str, Optional[str]] = {}
+
+    def resolve(self, prefix: str) -> Optional[str]:
+        if prefix not in self._cache:
+            self._cache[prefix] = next(
+                (service for service, pattern in self._patterns if pattern.fullmatch(prefix)),
+                None,
+            )
+        return self._cache[prefix]
+
+
+class ServiceLog:
+    """Bounded view of one service's log: the last lines plus error-pattern matches."""
+
+    def __init__(self, tail: int, patterns: Sequence[Pattern[str]] = (), matches: int = 5) -> None:
+        self.lines: Deque[str] = deque(maxlen=max(tail, 1))
+        self.patterns = list(patterns)
+        self.counts = [0] * len(self.patterns)
+        self.matches: Deque[str] = deque(maxlen=max(matches, 1))
+        self.matched = 0
+
+    def append(self, line: str) -> None:
+        self.lines.append(line)
+        matched = False
+        for index, pattern in enumerate(self.patterns):
+            if pattern.search(line):
+                self.counts[index] += 1
+                matched = True
+        if matched:
+            self.matched += 1
+            self.matches.append(line)
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.lines)
+
+    def scan_text(self) -> str:
+        """`matched<TAB>n`, `count<TAB>n<TAB>pattern` per pattern, then `match<TAB>line` per kept match."""
+
+        rows = [f"matched\t{self.matched}"]
+        rows += [f"count\t{count}\t{pattern.pattern}" for pattern, count in zip(self.patterns, self.counts)]
+        rows.extend(f"match\t{line}" for line in self.matches)
+        return "".join(f"{row}\n" for row in rows)
+
+
+def compile_patterns(raw_patterns: Sequence[str]) -> List[Pattern[str]]:
+    return [re.compile(pattern) for pattern in raw_patterns]
+
+
+def demultiplex(
+    lines: Iterable[str],
+    services: Sequence[str],
+    tail: int,
+    patterns: Sequence[Pattern[str]] = (),
+    matches: int = 5,
+) -> Dict[str, ServiceLog]:
+    resolver = PrefixResolver(services)
+    buffers: Dict[str, ServiceLog] = {}
+    for raw in lines:
+        prefix, separator, message = raw.rstrip("\n").partition("|")
+        if not separator:
+            continue
+        service = resolver.resolve(prefix.strip())
+        if service is None:
+            continue
+        if message.startswith(" "):
+            message = message[1:]
+        if service not in buffers:
+            buffers[service] = ServiceLog(tail, patterns, matches)
+        buffers[service].append(message)
+    return buffers
+
+
+def write_results(
+    output_dir: Path,
+    services: Sequence[str],
+    buffers: Dict[str, ServiceLog],
+    patterns: Sequence[Pattern[str]] = (),
+) -> None:
+    for index, service in enumerate(services):
+        lines = buffers.get(service)
+        if lines:
+            text = "\n".join(lines) + "\n"
+            status = 0
+        else:
+            text = f"Error: no log lines for {service} in the combined log stream.\n"
+            status = 1
+        (output_dir / f"{index}.log").write_text(text, encoding="utf-8")
+        (output_dir / f"{index}.status").write_text(f"{status}\n", encoding="utf-8")
+        if patterns:
+            scan = lines.scan_text() if lines else ServiceLog(1, patterns).scan_text()
+            (output_dir / f"{index}.scan").write_text(scan, encoding="utf-8")
+
+
+def scan_raw(
+    output_dir: Path,
+    index: int,
+    tail: int,
+    patterns: Sequence[Pattern[str]] = (),
+    matches: int = 5,
+) -> None:
+    raw = output_dir / f"{index}.raw"
+    log = ServiceLog(tail, patterns, matches)
+    with raw.open(encoding="utf-8", errors="replace") as stream:
+        for line in stream:
+            log.append(line.rstrip("\n"))
+    text = "".join(f"{line}\n" for line in log)
+    (output_dir / f"{index}.log").write_text(text, encoding="utf-8")
+    if patterns:
+        (output_dir / f"{index}.scan").write_text(log.scan_text(), encoding="utf-8")
+    raw.unlink()
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tail", type=int, default=50, help="Lines kept per service.")
+    parser.add_argument("--pattern", action="append", default=[], help="Error regex to count (repeatable).")
+    parser.add_argument("--matches", type=int, default=5, help="Matching lines kept per service.")
+    parser.add_argument("--output-dir", type=Path)
+    parser.add_argument(
+        "--raw", type=int, action="append", default=[], help="Scan <output-dir>/<index>.raw (repeatable)."
+    )
+    parser.add_argument("--check-patterns", action="store_true", help="Only validate the patterns.")
+    parser.add_argument("services", nargs="*")
+    args = parser.parse_args(argv)
+    if not args.check_patterns and args.output_dir is None:
+        parser.error("--output-dir is required")
+    if not (args.check_patterns or args.raw or args.services):
+        parser.error("at least one service is required")
+    return args
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    for raw in args.pattern:
+        try:
+            re.compile(raw)
+        except re.error as exc:
+            print(f"Error: invalid --scan-pattern regex: {raw} ({exc})", file=sys.stderr)
+            return 2
+    if args.check_patterns:
+        return 0
+    patterns = compile_patterns(args.pattern)
+    if args.raw:
+        for index in args.raw:
+            scan_raw(args.output_dir, index, args.tail, patterns, args.matches)
+        return 0
+    stream = open(sys.stdin.fileno(), encoding="utf-8", errors="replace", closefd=False)
+    buffers = demultiplex(stream, args.services, args.tail, patterns, args.matches)
+    write_results(args.output_dir, args.services, buffers, patterns)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -2,6 +2,11 @@
 # Helpers for collecting health check log targets and logs.
 set -euo pipefail
 
+_HEALTH_LOGS_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+_HEALTH_LOG_DEFAULT_TAIL=50
+# Error regexes counted while logs stream by (set by check_health.sh).
+declare -a HEALTH_LOG_PATTERN_LIST=()
+
 health_logs__append_real_service_targets() {
   declare -A __log_targets_seen=()
   local __service
@@ -59,19 +64,304 @@ health_logs__select_targets() {
   return 0
 }
 
+# Wraps the command stored in the named array with timeout(1) when a
+# per-call timeout is configured and the tool is available.
+health_logs__apply_timeout() {
+  local -n __timeout_cmd="$1"
+  local timeout_seconds="${HEALTH_LOG_TIMEOUT:-30}"
+  if [[ "$timeout_seconds" != "0" ]] && command -v timeout >/dev/null 2>&1; then
+    __timeout_cmd=(timeout --kill-after=5 "$timeout_seconds" "${__timeout_cmd[@]}")
+  fi
+}
+
+health_logs__timeout_message() {
+  local status="$1"
+  local target="$2"
+  if ((status == 124 || status == 137)) && [[ "${HEALTH_LOG_TIMEOUT:-30}" != "0" ]]; then
+    printf 'Error: timed out after %ss while reading logs for %s.\n' "${HEALTH_LOG_TIMEOUT:-30}" "$target"
+  fi
+}
+
+health_logs__now_us() {
+  local now="${EPOCHREALTIME//[^0-9]/}"
+  printf '%s\n' "${now:-0}"
+}
+
+# Prints the milliseconds elapsed since the given health_logs__now_us value.
+health_logs__elapsed_ms() {
+  local started="$1"
+  local elapsed=$(($(health_logs__now_us) - started))
+  printf '%d.%03d\n' "$((elapsed / 1000))" "$((elapsed % 1000))"
+}
+
+health_logs__tail() {
+  printf '%s\n' "${HEALTH_LOG_TAIL:-$_HEALTH_LOG_DEFAULT_TAIL}"
+}
+
+# Fills the named array with the `docker compose logs` window options. With
+# HEALTH_LOG_SINCE the whole window is streamed through the scanner unless
+# HEALTH_LOG_TAIL was set explicitly; otherwise only the tail is requested.
+health_logs__window_args() {
+  local -n __window_args="$1"
+  __window_args=()
+  if [[ -n "${HEALTH_LOG_SINCE:-}" ]]; then
+    __window_args+=(--since="$HEALTH_LOG_SINCE")
+    if [[ -n "${HEALTH_LOG_TAIL:-}" ]]; then
+      __window_args+=(--tail="$HEALTH_LOG_TAIL")
+    fi
+  else
+    __window_args+=(--tail="$(health_logs__tail)")
+  fi
+}
+
+# Streams stdin into <scratch>/<index>.log, keeping only the last
+# HEALTH_LOG_TAIL lines. With error patterns the whole window is spooled to
+# <index>.raw instead, and health_logs__scan_raw scans every service in one
+# Python process once the pool has finished. Memory use is bounded by the tail
+# and match limits, not by the log volume.
+health_logs__scan_stream() {
+  local scratch="$1"
+  local index="$2"
+
+  if ((${#HEALTH_LOG_PATTERN_LIST[@]} == 0)); then
+    tail -n "$(health_logs__tail)" >"$scratch/$index.log"
+  else
+    cat >"$scratch/$index.raw"
+  fi
+}
+
+# Turns every spooled <scratch>/<index>.raw into <index>.log and <index>.scan
+# with a single health_log_demux.py --raw call, using the same Python regexes as
+# the combined and Engine API modes, then appends the fetch notes (timeouts).
+health_logs__scan_raw() {
+  local scratch="$1"
+  local -a indexes=()
+  local raw
+  for raw in "$scratch"/*.raw; do
+    if [[ -f "$raw" ]]; then
+      raw="${raw##*/}"
+      indexes+=("${raw%.raw}")
+    fi
+  done
+  if ((${#indexes[@]} == 0)); then
+    return 0
+  fi
+
+  local -a scan_args=(--matches "${HEALTH_LOG_MATCHES:-5}")
+  local pattern index
+  for pattern in "${HEALTH_LOG_PATTERN_LIST[@]}"; do
+    scan_args+=(--pattern "$pattern")
+  done
+  for index in "${indexes[@]}"; do
+    scan_args+=(--raw "$index")
+  done
+  if ! PYTHON_RUNTIME_SKIP_REQUIREMENTS=1 PYTHON_RUNTIME_EXTRA_MOUNTS="$scratch" python_runtime__run "$REPO_ROOT" "" -- \
+    "$_HEALTH_LOGS_DIR/health_log_demux.py" --tail "$(health_logs__tail)" "${scan_args[@]}" \
+    --output-dir "$scratch"; then
+    for index in "${indexes[@]}"; do
+      echo "Error: failed to scan the fetched logs." >>"$scratch/$index.log"
+      echo 1 >"$scratch/$index.status"
+    done
+  fi
+  for index in "${indexes[@]}"; do
+    if [[ -f "$scratch/$index.note" ]]; then
+      cat "$scratch/$index.note" >>"$scratch/$index.log"
+    fi
+  done
+}
+
+# Fetches the logs of a single service into <scratch>/<index>.log (or the
+# spooled <index>.raw when scanning) and records the exit status in
+# <scratch>/<index>.status. Runs in the background.
+health_logs__fetch_one() {
+  local service="$1"
+  local scratch="$2"
+  local index="$3"
+  local status=0
+  local started
+  started="$(health_logs__now_us)"
+
+  local -a window_args=()
+  health_logs__window_args window_args
+  local -a fetch_cmd=("${COMPOSE_CMD[@]}" logs "${window_args[@]}" "$service")
+  health_logs__apply_timeout fetch_cmd
+
+  local -a pipe_status=()
+  "${fetch_cmd[@]}" 2>&1 | health_logs__scan_stream "$scratch" "$index" &&
+    pipe_status=("${PIPESTATUS[@]}") || pipe_status=("${PIPESTATUS[@]}")
+  status="${pipe_status[0]}"
+  if ((status == 0 && pipe_status[1] != 0)); then
+    status="${pipe_status[1]}"
+  fi
+  # A spooled log is only turned into <index>.log after the pool has finished.
+  local note="$scratch/$index.log"
+  if [[ -f "$scratch/$index.raw" ]]; then
+    note="$scratch/$index.note"
+  fi
+  health_logs__timeout_message "$status" "$service" >>"$note"
+  health_logs__elapsed_ms "$started" >"$scratch/$index.ms"
+  printf '%s\n' "$status" >"$scratch/$index.status"
+}
+
+# Runs one `docker compose logs` per service with at most HEALTH_LOG_JOBS
+# calls in flight, then scans the spooled logs in one pass.
+health_logs__fetch_pool() {
+  local scratch="$1"
+  shift
+  local -a services=("$@")
+
+  local max_jobs="${HEALTH_LOG_JOBS:-}"
+  if [[ -z "$max_jobs" ]]; then
+    max_jobs="$(nproc 2>/dev/null || echo 4)"
+    if ((max_jobs < 4)); then
+      max_jobs=4
+    fi
+  fi
+
+  local index running=0
+  for index in "${!services[@]}"; do
+    health_logs__fetch_one "${services[$index]}" "$scratch" "$index" &
+    running=$((running + 1))
+    if ((running >= max_jobs)); then
+      wait -n || true
+      running=$((running - 1))
+    fi
+  done
+  wait || true
+  health_logs__scan_raw "$scratch"
+}
+
+# Issues a single `docker compose logs --no-color` for every service and splits
+# the prefixed stream into the same per-service layout as the pool. Returns
+# non-zero when the combined call itself fails.
+health_logs__fetch_combined() {
+  local scratch="$1"
+  shift
+  local -a services=("$@")
+
+  local -a window_args=()
+  health_logs__window_args window_args
+  local -a fetch_cmd=("${COMPOSE_CMD[@]}" logs "${window_args[@]}" --no-color "${services[@]}")
+  health_logs__apply_timeout fetch_cmd
+
+  local -a scan_args=(--matches "${HEALTH_LOG_MATCHES:-5}")
+  local pattern
+  for pattern in "${HEALTH_LOG_PATTERN_LIST[@]}"; do
+    scan_args+=(--pattern "$pattern")
+  done
+
+  # The scratch dir lives outside the repository; the Docker fallback of
+  # python_runtime__run has to mount it to write the per-service files.
+  if ! PYTHON_RUNTIME_EXTRA_MOUNTS="$scratch" python_runtime__run "$REPO_ROOT" "" -- \
+    "$_HEALTH_LOGS_DIR/health_log_demux.py" \
+    --tail "$(health_logs__tail)" "${scan_args[@]}" --output-dir "$scratch" "${services[@]}" \
+    < <(
+      status=0
+      "${fetch_cmd[@]}" 2>"$scratch/combined.err" || status=$?
+      printf '%s\n' "$status" >"$scratch/combined.status"
+    ); then
+    return 1
+  fi
+
+  local status
+  status="$(<"$scratch/combined.status")"
+  if [[ "$status" != "0" ]]; then
+    health_logs__timeout_message "$status" "${services[*]}" >>"$scratch/combined.err"
+    cat "$scratch/combined.err" >&2
+    return 1
+  fi
+  return 0
+}
+
+# Reads every log tail through the Docker Engine API (one helper process,
+# concurrent requests over pooled socket connections).
+health_logs__fetch_engine() {
+  local scratch="$1"
+  shift
+  local compose_file
+  if ! compose_file="$(docker_engine__compose_file_from_args "${COMPOSE_CMD[@]}")"; then
+    return 1
+  fi
+  local -a engine_args=(--tail "$(health_logs__tail)" --matches "${HEALTH_LOG_MATCHES:-5}")
+  if [[ -n "${HEALTH_LOG_SINCE:-}" ]]; then
+    engine_args+=(--since "$HEALTH_LOG_SINCE" --fetch-tail "${HEALTH_LOG_TAIL:-all}")
+  fi
+  local pattern
+  for pattern in "${HEALTH_LOG_PATTERN_LIST[@]}"; do
+    engine_args+=(--pattern "$pattern")
+  done
+  if ! PYTHON_RUNTIME_EXTRA_MOUNTS="$scratch" docker_engine__run "$compose_file" logs \
+    "${engine_args[@]}" --jobs "${HEALTH_LOG_JOBS:-4}" --output-dir "$scratch" "$@"; then
+    docker_engine__warn_fallback
+    return 1
+  fi
+  return 0
+}
+
+# Collects logs for every service through the Engine API when
+# DOCKER_STATUS_BACKEND=engine, otherwise (or when that fails) with one call
+# per service (HEALTH_LOG_MODE=per-service, default) or with a single combined
+# call (HEALTH_LOG_MODE=combined). Results are applied in argument order, so the
+# text output and SERVICE_LOGS/SERVICE_STATUSES do not depend on timing.
 health_logs__collect_logs() {
-  local service service_output
+  local -a services=()
+  local service
   for service in "$@"; do
-    if [[ -z "$service" ]]; then
-      continue
+    if [[ -n "$service" ]]; then
+      services+=("$service")
     fi
-    if service_output="$("${COMPOSE_CMD[@]}" logs --tail=50 "$service" 2>&1)"; then
+  done
+  if ((${#services[@]} == 0)); then
+    return 0
+  fi
+
+  local scratch batch_started
+  scratch="$(mktemp -d)"
+  batch_started="$(health_logs__now_us)"
+
+  if docker_engine__enabled && health_logs__fetch_engine "$scratch" "${services[@]}"; then
+    :
+  elif [[ "${HEALTH_LOG_MODE:-per-service}" == "combined" ]]; then
+    if ! health_logs__fetch_combined "$scratch" "${services[@]}"; then
+      echo "Warning: combined log fetch failed; falling back to one call per service." >&2
+      health_logs__fetch_pool "$scratch" "${services[@]}"
+    fi
+  else
+    health_logs__fetch_pool "$scratch" "${services[@]}"
+  fi
+
+  # Batch backends time the whole call; the per-service pool times each fetch.
+  local batch_ms
+  batch_ms="$(health_logs__elapsed_ms "$batch_started")"
+
+  local index service_output status
+  for index in "${!services[@]}"; do
+    service="${services[$index]}"
+    service_output=""
+    status=1
+    if [[ -f "$scratch/$index.log" ]]; then
+      service_output="$(<"$scratch/$index.log")"
+    fi
+    if [[ -f "$scratch/$index.status" ]]; then
+      status="$(<"$scratch/$index.status")"
+    fi
+    if [[ -f "$scratch/$index.scan" ]]; then
+      SERVICE_SCANS["$service"]="$(<"$scratch/$index.scan")"
+    fi
+    if [[ -f "$scratch/$index.ms" ]]; then
+      SERVICE_DURATIONS["$service"]="$(<"$scratch/$index.ms")"
+    else
+      SERVICE_DURATIONS["$service"]="$batch_ms"
+    fi
+
+    if [[ "$status" == "0" ]]; then
       SERVICE_LOGS["$service"]="$service_output"
       SERVICE_STATUSES["$service"]="ok"
       log_success=true
       : "${SERVICE_LOGS[$service]}" "${SERVICE_STATUSES[$service]}" "$log_success"
       if [[ "$OUTPUT_FORMAT" == "text" ]]; then
         printf '%s\n' "$service_output"
+        health_logs__print_scan_summary "$service" "${SERVICE_SCANS[$service]:-}"
       fi
     else
       SERVICE_LOGS["$service"]="$service_output"
@@ -81,4 +371,120 @@ health_logs__collect_logs() {
       failed_services+=("$service")
     fi
   done
+
+  rm -rf "$scratch"
+}
+
+# Prints the error-pattern counts and the last matching lines of a service
+# when its scan found anything.
+health_logs__print_scan_summary() {
+  local service="$1"
+  local scan="$2"
+  local row matched=0
+  local -a counts=() matches=()
+  while IFS= read -r row; do
+    case "${row%%$'\t'*}" in
+    matched)
+      matched="${row#*$'\t'}"
+      ;;
+    count)
+      row="${row#*$'\t'}"
+      counts+=("${row#*$'\t'}=${row%%$'\t'*}")
+      ;;
+    match)
+      matches+=("${row#*$'\t'}")
+      ;;
+    esac
+  done <<<"$scan"
+
+  if ((matched == 0)); then
+    return 0
+  fi
+  local IFS=','
+  printf '[!] %s: %s log lines matched error patterns (%s); last matches:\n' \
+    "$service" "$matched" "${counts[*]}"
+  printf '    %s\n' "${matches[@]}"
+}
+
+# Prints the argument as a JSON string literal using parameter expansion only,
+# so large log buffers never go through extra processes.
+health_logs__json_string() {
+  local value="$1"
+  value="${value//\\/\\\\}"
+  value="${value//\"/\\\"}"
+  value="${value//$'\n'/\\n}"
+  value="${value//$'\r'/\\r}"
+  value="${value//$'\t'/\\t}"
+  if [[ "$value" == *[[:cntrl:]]* ]]; then
+    local code char
+    for code in {1..31}; do
+      printf -v char "\\x$(printf '%02x' "$code")"
+      if [[ "$value" == *"$char"* ]]; then
+        value="${value//"$char"/$(printf '\\u%04x' "$code")}"
+      fi
+    done
+  fi
+  printf '"%s"' "$value"
+}
+
+health_logs__json_list() {
+  local first=1 entry
+  printf '['
+  for entry in "$@"; do
+    if ((first == 0)); then
+      printf ','
+    fi
+    first=0
+    health_logs__json_string "$entry"
+  done
+  printf ']'
+}
+
+# Writes the NDJSON stream consumed by health_report.py: one meta record, the
+# compose ps outputs, and one record per log target, in target order.
+# Usage: health_logs__emit_report_stream <instance> <ps_text> <ps_json>
+health_logs__emit_report_stream() {
+  local instance="$1"
+  local ps_text="$2"
+  local ps_json="$3"
+
+  printf '{"type":"meta","instance":'
+  health_logs__json_string "$instance"
+  printf ',"has_success":%s,"requested":' "$log_success"
+  health_logs__json_list "${primary_targets[@]}"
+  printf ',"automatic":'
+  health_logs__json_list "${auto_targets[@]}"
+  printf ',"all":'
+  health_logs__json_list "${ALL_LOG_TARGETS[@]}"
+  printf ',"failed":'
+  health_logs__json_list "${failed_services[@]}"
+  printf ',"check_ms":%s' "${CHECK_DURATION_MS:-null}"
+  printf '}\n{"type":"compose_ps","raw":'
+  health_logs__json_string "$ps_text"
+  printf '}\n'
+  if [[ -n "$ps_json" ]]; then
+    printf '{"type":"compose_ps_json","raw":'
+    health_logs__json_string "$ps_json"
+    printf '}\n'
+  fi
+
+  local service
+  for service in "${ALL_LOG_TARGETS[@]}"; do
+    printf '{"type":"service","service":'
+    health_logs__json_string "$service"
+    printf ',"status":'
+    health_logs__json_string "${SERVICE_STATUSES[$service]:-skipped}"
+    printf ',"duration_ms":%s,"log":' "${SERVICE_DURATIONS[$service]:-null}"
+    health_logs__json_string "${SERVICE_LOGS[$service]:-}"
+    if [[ -n "${SERVICE_SCANS[$service]:-}" ]]; then
+      printf ',"scan":'
+      health_logs__json_string "${SERVICE_SCANS[$service]}"
+    fi
+    printf '}\n'
+  done
+
+  # Probe records are already NDJSON (health_probes.py --format ndjson).
+  if [[ -n "${PROBE_RECORDS:-}" ]]; then
+    printf '%s\n' "$PROBE_RECORDS"
+  fi
 }
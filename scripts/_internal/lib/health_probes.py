@@ -0,0 +1,235 @@
+"""Probe published ports of an instance with concurrent TCP and HTTP checks.
+
+Reads the resolved compose model (``docker compose config --format json``)
+from stdin and probes every published TCP port of the selected services with
+asyncio: a TCP connect for each port and, for ports listed with ``--http``, a
+``GET`` request whose status line is read back. Each probe has its own timeout
+and reports the connect and first-byte latency in milliseconds.
+
+Output is either a text table or one ``probe`` record per line for the
+check_health NDJSON report stream (see health_report.py).
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from port_conflicts import iter_port_bindings
+
+WILDCARD_HOSTS = {"", "0.0.0.0"}
+IPV6_WILDCARD_HOSTS = {"::", "[::]"}
+
+
+@dataclass
+class ProbeTarget:
+    service: str
+    spec: str
+    host: str
+    port: int
+    http_path: Optional[str] = None
+
+
+@dataclass
+class ProbeResult:
+    service: str
+    spec: str
+    host: str
+    port: int
+    kind: str
+    status: str = "ok"
+    connect_ms: Optional[float] = None
+    first_byte_ms: Optional[float] = None
+    http_status: Optional[int] = None
+    error: str = ""
+    type: str = field(default="probe", repr=False)
+
+
+def parse_http_specs(raw_specs: Sequence[str]) -> Dict[Tuple[str, Optional[int]], str]:
+    """Parse ``service[:port][=/path]`` entries; the path defaults to ``/``."""
+
+    specs: Dict[Tuple[str, Optional[int]], str] = {}
+    for raw in raw_specs:
+        target, _, path = raw.partition("=")
+        service, _, port_text = target.partition(":")
+        if not service or (port_text and not port_text.isdigit()):
+            raise ValueError(f"invalid HTTP probe: {raw}")
+        path = path or "/"
+        if not path.startswith("/"):
+            path = f"/{path}"
+        specs[(service, int(port_text) if port_text else None)] = path
+    return specs
+
+
+def _probe_host(host_ip: str, default_host: str) -> str:
+    if host_ip in WILDCARD_HOSTS:
+        return default_host
+    if host_ip in IPV6_WILDCARD_HOSTS:
+        return "::1"
+    return host_ip
+
+
+def collect_targets(
+    config: Dict[str, Any],
+    services: Sequence[str],
+    http_specs: Dict[Tuple[str, Optional[int]], str],
+    default_host: str,
+) -> List[ProbeTarget]:
+    compose_services = config.get("services") or {}
+    if not isinstance(compose_services, dict):
+        return []
+    selected = list(services) or sorted(compose_services)
+
+    targets: List[ProbeTarget] = []
+    for service in selected:
+        definition = compose_services.get(service)
+        if not isinstance(definition, dict):
+            continue
+        for binding in iter_port_bindings("", service, definition.get("ports") or []):
+            if binding.protocol != "tcp":
+                continue
+            host = _probe_host(binding.host_ip, default_host)
+            for port in range(binding.start, binding.end + 1):
+                path = http_specs.get((service, port), http_specs.get((service, None)))
+                targets.append(ProbeTarget(service, binding.spec, host, port, path))
+    return targets
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 3)
+
+
+async def probe(target: ProbeTarget, timeout: float) -> ProbeResult:
+    result = ProbeResult(
+        target.service, target.spec, target.host, target.port, "http" if target.http_path else "tcp"
+    )
+    writer: Optional[asyncio.StreamWriter] = None
+    started = time.perf_counter()
+    try:
+        # One deadline per probe covers the connect and the first response byte.
+        deadline = started + timeout
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(target.host, target.port), timeout)
+        result.connect_ms = _elapsed_ms(started)
+        if target.http_path is None:
+            return result
+
+        host_header = f"[{target.host}]" if ":" in target.host else target.host
+        request = (
+            f"GET {target.http_path} HTTP/1.1\r\nHost: {host_header}:{target.port}\r\n"
+            "User-Agent: homelab-check-health\r\nConnection: close\r\n\r\n"
+        )
+        writer.write(request.encode("ascii", errors="replace"))
+        await writer.drain()
+        sent = time.perf_counter()
+        first = await asyncio.wait_for(reader.read(1), max(0.0, deadline - sent))
+        if not first:
+            raise ConnectionError("connection closed before any response byte")
+        result.first_byte_ms = _elapsed_ms(sent)
+        status_line = first + await asyncio.wait_for(reader.readline(), max(0.0, deadline - time.perf_counter()))
+        parts = status_line.decode("latin-1").split()
+        if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+            raise ValueError(f"unexpected HTTP status line: {status_line[:80]!r}")
+        result.http_status = int(parts[1])
+        if result.http_status >= 500:
+            result.status = "error"
+            result.error = f"HTTP {result.http_status}"
+    except asyncio.TimeoutError:
+        result.status = "timeout"
+        result.error = f"no response within {timeout:g}s"
+    except (OSError, ValueError) as exc:
+        result.status = "error"
+        result.error = str(exc) or exc.__class__.__name__
+    finally:
+        if writer is not None:
+            writer.close()
+    return result
+
+
+async def run_probes(targets: Sequence[ProbeTarget], timeout: float, jobs: int) -> List[ProbeResult]:
+    semaphore = asyncio.Semaphore(max(1, jobs))
+
+    async def bounded(target: ProbeTarget) -> ProbeResult:
+        async with semaphore:
+            return await probe(target, timeout)
+
+    return list(await asyncio.gather(*(bounded(target) for target in targets)))
+
+
+def _format_ms(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.1f}"
+
+
+def render_text(results: Sequence[ProbeResult]) -> None:
+    if not results:
+        print("No published TCP ports to probe.")
+        return
+    headers = ("SERVICE", "PORT", "ADDRESS", "KIND", "STATUS", "CONNECT MS", "FIRST BYTE MS", "DETAIL")
+    rows = [headers]
+    for result in results:
+        address = f"[{result.host}]:{result.port}" if ":" in result.host else f"{result.host}:{result.port}"
+        detail = result.error or (f"HTTP {result.http_status}" if result.http_status is not None else "")
+        rows.append(
+            (
+                result.service,
+                result.spec,
+                address,
+                result.kind,
+                result.status,
+                _format_ms(result.connect_ms),
+                _format_ms(result.first_byte_ms),
+                detail,
+            )
+        )
+    widths = [max(len(row[index]) for row in rows) for index in range(len(headers))]
+    for row in rows:
+        print("  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip())
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Probe published ports of compose services.")
+    parser.add_argument("--service", action="append", default=[], dest="services")
+    parser.add_argument("--http", action="append", default=[], metavar="SERVICE[:PORT][=/PATH]")
+    parser.add_argument("--host", default="127.0.0.1", help="Address used for ports published on all interfaces.")
+    parser.add_argument("--timeout", type=float, default=3.0)
+    parser.add_argument("--jobs", type=int, default=32)
+    parser.add_argument("--format", choices=("text", "ndjson"), default="text")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str]) -> int:
+    args = parse_args(argv)
+    try:
+        http_specs = parse_http_specs(args.http)
+    except ValueError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 2
+
+    raw_config = sys.stdin.read()
+    try:
+        config = json.loads(raw_config) if raw_config.strip() else {}
+    except json.JSONDecodeError as exc:
+        print(f"Error: invalid compose config JSON: {exc}", file=sys.stderr)
+        return 1
+    if not isinstance(config, dict):
+        config = {}
+
+    targets = collect_targets(config, args.services, http_specs, args.host)
+    results = asyncio.run(run_probes(targets, args.timeout, args.jobs)) if targets else []
+
+    if args.format == "ndjson":
+        for result in results:
+            print(json.dumps(asdict(result), ensure_ascii=False))
+    else:
+        render_text(results)
+
+    failed = sorted({result.service for result in results if result.status != "ok"})
+    if failed:
+        print(f"Warning: port probes failed for services: {' '.join(failed)}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,82 +1,130 @@
-import base64
-import json
-import os
+"""Build the check_health JSON report from an NDJSON stream.
 
+check_health.sh writes one JSON object per line to stdin (or to the file given
+as the first argument): a ``meta`` record with the targets and flags, the
+``compose_ps``/``compose_ps_json`` outputs, one ``service`` record per log
+target and, when port probes ran, one ``probe`` record per published port.
+Records are consumed one line at a time.
+"""
 
-def load_list(env_key: str) -> list[str]:
-    return [entry for entry in os.environ.get(env_key, "").split() if entry]
+import base64
+import json
+import sys
+from typing import IO, Iterable, Iterator
 
 
-def build_service_entries(service_payload: str) -> list[dict[str, object]]:
-    entries: list[dict[str, object]] = []
-    for line in service_payload.splitlines():
-        if not line:
-            continue
-        parts = line.split("::", 2)
-        if len(parts) != 3:
+def iter_records(stream: IO[str]) -> Iterator[dict[str, object]]:
+    for line in stream:
+        if not line.strip():
             continue
-        name, status, encoded = parts
-        log_text = ""
-        log_b64 = encoded if encoded else None
-        if encoded:
-            try:
-                log_text = base64.b64decode(encoded.encode()).decode("utf-8", errors="replace")
-            except Exception:
-                log_text = ""
-        entry = {
-            "service": name,
-            "status": status,
-            "log": log_text,
-        }
-        if log_b64 is not None:
-            entry["log_b64"] = log_b64
-        entries.append(entry)
-    return entries
-
-
-def main() -> None:
-    compose_ps_text = os.environ.get("COMPOSE_PS_TEXT", "")
-    compose_ps_json_raw = os.environ.get("COMPOSE_PS_JSON", "")
-    primary_targets = load_list("PRIMARY_LOG_SERVICES")
-    auto_targets = load_list("AUTO_LOG_SERVICES")
-    all_targets = load_list("ALL_LOG_SERVICES")
-    failed_services = load_list("FAILED_SERVICES_STR")
-    log_success = os.environ.get("LOG_SUCCESS_FLAG", "false").lower() == "true"
-    instance = os.environ.get("INSTANCE_NAME", "") or None
-
-    services_entries = build_service_entries(os.environ.get("SERVICE_PAYLOAD", ""))
-
-    compose_section: dict[str, object] = {"raw": compose_ps_text}
-    if compose_ps_json_raw:
         try:
-            compose_section["parsed"] = json.loads(compose_ps_json_raw)
+            record = json.loads(line)
         except json.JSONDecodeError:
-            compose_section["parsed_error"] = "invalid_json"
-            compose_section["parsed_raw"] = compose_ps_json_raw
+            continue
+        if isinstance(record, dict):
+            yield record
+
+
+def load_list(value: object) -> list[str]:
+    if not isinstance(value, list):
+        return []
+    return [str(entry) for entry in value if entry]
+
+
+def parse_scan(raw: str) -> dict[str, object]:
+    """Turn the tab-separated error scan of a service into counts and last matches."""
 
-    summary_status = "ok" if not failed_services else "degraded"
+    counts: dict[str, int] = {}
+    matches: list[str] = []
+    matched = 0
+    for row in raw.splitlines():
+        kind, _, rest = row.partition("\t")
+        if kind == "matched" and rest.isdigit():
+            matched = int(rest)
+        elif kind == "count":
+            count, _, pattern = rest.partition("\t")
+            if count.isdigit():
+                counts[pattern] = int(count)
+        elif kind == "match":
+            matches.append(rest)
+    return {"matched": matched, "counts": counts, "last_matches": matches}
 
-    result = {
+
+def build_service_entry(record: dict[str, object]) -> dict[str, object]:
+    log_text = str(record.get("log") or "")
+    entry: dict[str, object] = {
+        "service": str(record.get("service") or ""),
+        "status": str(record.get("status") or "skipped"),
+        "log": log_text,
+    }
+    if log_text:
+        entry["log_b64"] = base64.b64encode(log_text.encode("utf-8")).decode("ascii")
+    if record.get("scan"):
+        entry["errors"] = parse_scan(str(record["scan"]))
+    return entry
+
+
+def build_report(records: Iterable[dict[str, object]]) -> dict[str, object]:
+    meta: dict[str, object] = {}
+    compose_section: dict[str, object] = {"raw": ""}
+    services_entries: list[dict[str, object]] = []
+    probe_entries: list[dict[str, object]] = []
+
+    for record in records:
+        record_type = record.get("type")
+        if record_type == "meta":
+            meta = record
+        elif record_type == "compose_ps":
+            compose_section["raw"] = str(record.get("raw") or "")
+        elif record_type == "compose_ps_json":
+            compose_ps_json_raw = str(record.get("raw") or "")
+            try:
+                compose_section["parsed"] = json.loads(compose_ps_json_raw)
+            except json.JSONDecodeError:
+                compose_section["parsed_error"] = "invalid_json"
+                compose_section["parsed_raw"] = compose_ps_json_raw
+        elif record_type == "service":
+            services_entries.append(build_service_entry(record))
+        elif record_type == "probe":
+            probe_entries.append({key: value for key, value in record.items() if key != "type"})
+
+    failed_services = load_list(meta.get("failed"))
+    failed_probes = sorted({str(entry.get("service")) for entry in probe_entries if entry.get("status") != "ok"})
+    summary_status = "ok" if not failed_services and not failed_probes else "degraded"
+
+    report: dict[str, object] = {
         "format": "json",
         "status": summary_status,
-        "instance": instance,
+        "instance": meta.get("instance") or None,
         "compose": compose_section,
         "targets": {
-            "requested": primary_targets,
-            "automatic": auto_targets,
-            "all": all_targets,
+            "requested": load_list(meta.get("requested")),
+            "automatic": load_list(meta.get("automatic")),
+            "all": load_list(meta.get("all")),
         },
         "logs": {
             "entries": services_entries,
             "failed": failed_services,
-            "has_success": log_success,
+            "has_success": meta.get("has_success") is True,
             "total": len(services_entries),
             "successful": sum(1 for entry in services_entries if entry.get("status") == "ok"),
         },
     }
+    if probe_entries:
+        report["probes"] = {"entries": probe_entries, "failed": failed_probes}
+    return report
+
+
+def main(argv: list[str]) -> None:
+    if argv:
+        with open(argv[0], encoding="utf-8", errors="replace") as stream:
+            result = build_report(iter_records(stream))
+    else:
+        stream = open(sys.stdin.fileno(), encoding="utf-8", errors="replace", closefd=False)
+        result = build_report(iter_records(stream))
 
     print(json.dumps(result, ensure_ascii=False, indent=2))
 
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
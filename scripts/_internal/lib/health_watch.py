@@ -0,0 +1,403 @@
+"""Continuously watch service state for check_health.sh --watch.
+
+Every poll runs `<compose> ps --all --format json` once and scans the logs
+written since the previous poll with a single `<compose> logs --since`
+call. Only state transitions are printed. Failed polls are retried with
+exponential backoff. When a textfile path is given, a node_exporter textfile
+with the current metrics is rewritten atomically after every poll. With a
+history database, samples are buffered and inserted in batches.
+"""
+
+import argparse
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+from health_log_demux import PrefixResolver, compile_patterns
+
+INTERVAL_PATTERN = re.compile(r"^(\d+(?:\.\d+)?)(ms|s|m|h)?$")
+INTERVAL_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+DOCKER_TIMESTAMP = re.compile(r"^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(\.\d+)?(Z|[+-]\d{2}:\d{2})\s?")
+
+
+def parse_interval(raw: str) -> float:
+    match = INTERVAL_PATTERN.match(raw.strip())
+    if not match:
+        raise ValueError(f"invalid interval: {raw}")
+    seconds = float(match.group(1)) * INTERVAL_UNITS[match.group(2) or "s"]
+    if seconds <= 0:
+        raise ValueError(f"interval must be positive: {raw}")
+    return seconds
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _iso(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+@dataclass
+class ServiceState:
+    state: str = "missing"
+    up: bool = False
+    container_ids: Set[str] = field(default_factory=set)
+    seen_up: bool = False
+    restarts: int = 0
+    last_error_ts: Optional[float] = None
+    pending_errors: int = 0
+
+
+def parse_ps_output(raw: str) -> List[Dict[str, Any]]:
+    """Accept both the JSON array and the one-object-per-line forms of `ps --format json`."""
+
+    text = raw.strip()
+    if not text:
+        return []
+    try:
+        parsed = json.loads(text)
+    except json.JSONDecodeError:
+        parsed = [json.loads(line) for line in text.splitlines() if line.strip()]
+    if isinstance(parsed, dict):
+        parsed = [parsed]
+    return [entry for entry in parsed if isinstance(entry, dict)]
+
+
+def summarize_containers(containers: Sequence[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    summary: Dict[str, Dict[str, Any]] = {}
+    for container in containers:
+        service = str(container.get("Service") or "")
+        if not service:
+            continue
+        state = str(container.get("State") or "unknown").lower()
+        health = str(container.get("Health") or "").lower()
+        label = f"{state} ({health})" if health else state
+        entry = summary.setdefault(service, {"labels": set(), "up": True, "ids": set()})
+        entry["labels"].add(label)
+        entry["up"] = entry["up"] and state == "running" and health != "unhealthy"
+        container_id = str(container.get("ID") or container.get("Name") or "")
+        if container_id:
+            entry["ids"].add(container_id)
+    return summary
+
+
+class Watcher:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.compose_cmd: List[str] = args.compose_cmd
+        self.instance: str = args.instance
+        self.services: List[str] = args.services
+        self.interval: float = args.interval
+        self.max_backoff: float = max(args.interval, args.max_backoff)
+        self.textfile: Optional[Path] = args.textfile
+        self.output_format: str = args.format
+        self.max_polls: int = args.max_polls
+        self.timeout: float = args.timeout
+        self.error_patterns = compile_patterns(args.patterns)
+        self.resolver = PrefixResolver(self.services)
+        self.states: Dict[str, ServiceState] = {service: ServiceState() for service in self.services}
+        self.failures = 0
+        self.first_poll = True
+        self.last_duration = 0.0
+        self.last_success: Optional[float] = None
+        self.logs_since = _utc_now()
+        self.history = None
+        self.history_flush_every: int = args.history_flush_every
+        self.pending_samples: List[Any] = []
+        if args.history_db is not None:
+            # Imported lazily: health_history imports helpers from this module.
+            from health_history import HistoryStore, Sample
+
+            self.history = HistoryStore(args.history_db)
+            self.sample_type = Sample
+
+    # -- output -----------------------------------------------------------
+    def emit(self, event: Dict[str, Any]) -> None:
+        event = {"time": _iso(_utc_now()), "instance": self.instance, **event}
+        if self.output_format == "json":
+            print(json.dumps(event, ensure_ascii=False), flush=True)
+            return
+        marker = "[!]" if event.get("level") == "warning" else "[*]"
+        subject = f"{self.instance}/{event['service']}" if "service" in event else self.instance
+        print(f"{marker} {event['time']} {subject}: {event['message']}", flush=True)
+
+    # -- polling ----------------------------------------------------------
+    def _run(self, *args: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [*self.compose_cmd, *args],
+            capture_output=True,
+            text=True,
+            errors="replace",
+            timeout=self.timeout,
+            check=False,
+        )
+
+    def poll(self) -> bool:
+        started = time.monotonic()
+        try:
+            result = self._run("ps", "--all", "--format", "json")
+            containers = parse_ps_output(result.stdout) if result.returncode == 0 else None
+        except (subprocess.TimeoutExpired, OSError, json.JSONDecodeError):
+            containers = None
+        if containers is None:
+            self.last_duration = time.monotonic() - started
+            return False
+
+        if self.failures:
+            self.emit({"event": "recovered", "level": "info", "message": "docker compose ps recovered"})
+        summary = summarize_containers(containers)
+        self.apply_states(summary)
+        self.scan_logs()
+        self.last_duration = time.monotonic() - started
+        self.last_success = time.time()
+        self.buffer_samples(summary)
+        return True
+
+    def buffer_samples(self, summary: Dict[str, Dict[str, Any]]) -> None:
+        if self.history is None:
+            return
+        for service, state in self.states.items():
+            entry = summary.get(service)
+            self.pending_samples.append(
+                self.sample_type(
+                    instance=self.instance,
+                    service=service,
+                    status=state.state,
+                    up=state.up,
+                    check_ms=self.last_duration * 1000,
+                    log_errors=state.pending_errors,
+                    container_ids=sorted(entry["ids"]) if entry else (),
+                    ts=self.last_success or time.time(),
+                )
+            )
+            state.pending_errors = 0
+
+    def flush_history(self) -> None:
+        if self.history is None or not self.pending_samples:
+            return
+        samples, self.pending_samples = self.pending_samples, []
+        self.history.record(samples)
+
+    def apply_states(self, summary: Dict[str, Dict[str, Any]]) -> None:
+        for service in self.services:
+            current = self.states[service]
+            entry = summary.get(service)
+            label = ", ".join(sorted(entry["labels"])) if entry else "missing"
+            up = bool(entry and entry["up"])
+            ids = set(entry["ids"]) if entry else set()
+
+            restarted = False
+            if not self.first_poll and up and current.seen_up:
+                restarted = not current.up or bool(ids - current.container_ids)
+            if restarted:
+                current.restarts += 1
+
+            if self.first_poll or label != current.state:
+                previous = "" if self.first_poll else f"{current.state} -> "
+                self.emit(
+                    {
+                        "service": service,
+                        "event": "state",
+                        "from": None if self.first_poll else current.state,
+                        "to": label,
+                        "up": up,
+                        "level": "info" if up else "warning",
+                        "message": f"{previous}{label}",
+                    }
+                )
+            elif restarted:
+                self.emit(
+                    {
+                        "service": service,
+                        "event": "restart",
+                        "to": label,
+                        "up": up,
+                        "level": "warning",
+                        "message": f"restarted ({label})",
+                    }
+                )
+
+            current.state = label
+            current.up = up
+            current.container_ids = ids
+            current.seen_up = current.seen_up or up
+        self.first_poll = False
+
+    def scan_logs(self) -> None:
+        since = self.logs_since
+        self.logs_since = _utc_now()
+        try:
+            result = self._run(
+                "logs", "--no-color", "--timestamps", "--since", _iso(since), *self.services
+            )
+        except (subprocess.TimeoutExpired, OSError):
+            return
+        if result.returncode != 0:
+            return
+        for line in result.stdout.splitlines():
+            prefix, separator, message = line.partition("|")
+            if not separator:
+                continue
+            service = self.resolver.resolve(prefix.strip())
+            if service is None:
+                continue
+            message = message.lstrip(" ")
+            timestamp = time.time()
+            match = DOCKER_TIMESTAMP.match(message)
+            if match:
+                stamp = match.group(1) + ("+00:00" if match.group(3) == "Z" else match.group(3))
+                try:
+                    timestamp = datetime.fromisoformat(stamp).timestamp()
+                except ValueError:
+                    pass
+                message = message[match.end() :]
+            if any(pattern.search(message) for pattern in self.error_patterns):
+                state = self.states[service]
+                state.last_error_ts = max(state.last_error_ts or 0.0, timestamp)
+                state.pending_errors += 1
+
+    # -- metrics ----------------------------------------------------------
+    def render_metrics(self) -> str:
+        instance = _label(self.instance)
+        lines = [
+            "# HELP homelab_service_up Whether the service is running and not unhealthy.",
+            "# TYPE homelab_service_up gauge",
+        ]
+        for service, state in self.states.items():
+            lines.append(f'homelab_service_up{{instance="{instance}",service="{_label(service)}"}} {int(state.up)}')
+        lines += [
+            "# HELP homelab_service_restarts_total Restarts observed by the watcher.",
+            "# TYPE homelab_service_restarts_total counter",
+        ]
+        for service, state in self.states.items():
+            lines.append(
+                f'homelab_service_restarts_total{{instance="{instance}",service="{_label(service)}"}} {state.restarts}'
+            )
+        lines += [
+            "# HELP homelab_service_last_log_error_timestamp_seconds Timestamp of the last log line matching an error pattern.",
+            "# TYPE homelab_service_last_log_error_timestamp_seconds gauge",
+        ]
+        for service, state in self.states.items():
+            if state.last_error_ts is not None:
+                lines.append(
+                    f'homelab_service_last_log_error_timestamp_seconds{{instance="{instance}",service="{_label(service)}"}} '
+                    f"{state.last_error_ts:.3f}"
+                )
+        lines += [
+            "# HELP homelab_health_check_duration_seconds Duration of the last health poll.",
+            "# TYPE homelab_health_check_duration_seconds gauge",
+            f'homelab_health_check_duration_seconds{{instance="{instance}"}} {self.last_duration:.6f}',
+            "# HELP homelab_health_check_success Whether the last health poll succeeded.",
+            "# TYPE homelab_health_check_success gauge",
+            f'homelab_health_check_success{{instance="{instance}"}} {int(self.failures == 0)}',
+        ]
+        if self.last_success is not None:
+            lines += [
+                "# HELP homelab_health_check_last_success_timestamp_seconds Timestamp of the last successful poll.",
+                "# TYPE homelab_health_check_last_success_timestamp_seconds gauge",
+                f'homelab_health_check_last_success_timestamp_seconds{{instance="{instance}"}} {self.last_success:.3f}',
+            ]
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self) -> None:
+        if self.textfile is None:
+            return
+        self.textfile.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.textfile.with_name(f".{self.textfile.name}.{os.getpid()}.tmp")
+        temp_path.write_text(self.render_metrics(), encoding="utf-8")
+        os.replace(temp_path, self.textfile)
+
+    # -- loop -------------------------------------------------------------
+    def next_delay(self) -> float:
+        if self.failures == 0:
+            return self.interval
+        return min(self.interval * (2 ** self.failures), self.max_backoff)
+
+    def run(self) -> int:
+        try:
+            return self._loop()
+        finally:
+            self.flush_history()
+            if self.history is not None:
+                self.history.close()
+
+    def _loop(self) -> int:
+        polls = 0
+        while True:
+            ok = self.poll()
+            polls += 1
+            self.failures = 0 if ok else self.failures + 1
+            self.write_textfile()
+            if polls % self.history_flush_every == 0:
+                self.flush_history()
+            if self.max_polls and polls >= self.max_polls:
+                return 0
+            delay = self.next_delay()
+            if not ok:
+                self.emit(
+                    {
+                        "event": "poll_failed",
+                        "level": "warning",
+                        "failures": self.failures,
+                        "retry_in": delay,
+                        "message": f"docker compose ps failed (attempt {self.failures}); retrying in {delay:g}s",
+                    }
+                )
+            time.sleep(delay)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--instance", default="")
+    parser.add_argument("--interval", type=parse_interval, default=parse_interval("30s"))
+    parser.add_argument("--max-backoff", type=parse_interval, default=parse_interval("5m"))
+    parser.add_argument("--timeout", type=parse_interval, default=parse_interval("30s"))
+    parser.add_argument("--textfile", type=Path)
+    parser.add_argument("--format", choices=("text", "json"), default="text")
+    parser.add_argument("--max-polls", type=int, default=0)
+    parser.add_argument(
+        "--pattern", dest="patterns", action="append", default=[], help="Error regex (repeatable)."
+    )
+    parser.add_argument("--history-db", type=Path)
+    parser.add_argument("--history-flush-every", type=int, default=10)
+    parser.add_argument("--service", dest="services", action="append", default=[])
+    parser.add_argument("compose_cmd", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+    if args.compose_cmd and args.compose_cmd[0] == "--":
+        args.compose_cmd = args.compose_cmd[1:]
+    if not args.compose_cmd:
+        parser.error("the docker compose command is required after --")
+    return args
+
+
+def _stop(signum: int, _frame: object) -> None:
+    raise KeyboardInterrupt
+
+
+def main(argv: Sequence[str]) -> int:
+    try:
+        args = parse_args(argv)
+    except ValueError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 2
+    signal.signal(signal.SIGTERM, _stop)
+    try:
+        return Watcher(args).run()
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,357 @@
+"""Detect published-port collisions across instances and with host listeners."""
+
+import ipaddress
+import json
+import os
+import sys
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from describe_instance_report import format_port, parse_port_spec
+
+WILDCARD_HOSTS = {"", "0.0.0.0", "::", "[::]"}
+# Socket states from include/net/tcp_states.h: LISTEN for TCP, CLOSE for a bound UDP socket.
+LISTEN_STATES = {"tcp": "0A", "udp": "07"}
+
+
+@dataclass(frozen=True)
+class PortBinding:
+    """A contiguous range of host ports published by one service."""
+
+    instance: str
+    service: str
+    host_ip: str
+    protocol: str
+    start: int
+    end: int
+    spec: str
+
+
+def _parse_range(raw: object) -> Optional[Tuple[int, int]]:
+    if raw is None:
+        return None
+    text = str(raw).strip()
+    if not text:
+        return None
+    start_text, _, end_text = text.partition("-")
+    try:
+        start = int(start_text)
+        end = int(end_text) if end_text else start
+    except ValueError:
+        return None
+    if start <= 0 or end < start:
+        return None
+    return start, end
+
+
+def _normalize_host(raw: object) -> str:
+    host = str(raw or "").strip()
+    if host.startswith("[") and host.endswith("]"):
+        host = host[1:-1]
+    return host
+
+
+def iter_port_bindings(instance: str, service: str, ports: Iterable[object]) -> Iterable[PortBinding]:
+    """Yield published ranges for short ("8000-8010:80/udp") and long port syntax."""
+
+    for port in ports:
+        host_ip: object = ""
+        published: object = None
+        protocol = "tcp"
+        if isinstance(port, dict):
+            host_ip = port.get("host_ip") or ""
+            published = port.get("published")
+            protocol = str(port.get("protocol") or "tcp")
+        elif isinstance(port, (str, int)):
+            parts = parse_port_spec(port)
+            if parts is None:
+                continue
+            host_ip = parts["host_ip"]
+            published = parts["published"]
+            protocol = parts["protocol"]
+        else:
+            continue
+        parsed = _parse_range(published)
+        if parsed is None:
+            continue
+        yield PortBinding(
+            instance=instance,
+            service=service,
+            host_ip=_normalize_host(host_ip),
+            protocol=protocol.lower(),
+            start=parsed[0],
+            end=parsed[1],
+            spec=format_port(port),
+        )
+
+
+def _hosts_overlap(first: str, second: str) -> bool:
+    if first in WILDCARD_HOSTS or second in WILDCARD_HOSTS:
+        return True
+    return first == second
+
+
+def find_collisions(bindings: Sequence[PortBinding]) -> List[Dict[str, Any]]:
+    """Sweep sorted ranges per protocol; ranges are never expanded port by port."""
+
+    collisions: List[Dict[str, Any]] = []
+    by_protocol: Dict[str, List[PortBinding]] = {}
+    for binding in bindings:
+        by_protocol.setdefault(binding.protocol, []).append(binding)
+
+    for protocol in sorted(by_protocol):
+        ordered = sorted(by_protocol[protocol], key=lambda item: (item.start, item.end))
+        active: List[PortBinding] = []
+        for binding in ordered:
+            active = [item for item in active if item.end >= binding.start]
+            for other in active:
+                if (other.instance, other.service) == (binding.instance, binding.service):
+                    continue
+                if not _hosts_overlap(other.host_ip, binding.host_ip):
+                    continue
+                start = max(other.start, binding.start)
+                end = min(other.end, binding.end)
+                collisions.append(
+                    {
+                        "protocol": protocol,
+                        "ports": f"{start}" if start == end else f"{start}-{end}",
+                        "host_ip": other.host_ip or binding.host_ip or "0.0.0.0",
+                        "bindings": [_binding_dict(other), _binding_dict(binding)],
+                    }
+                )
+            active.append(binding)
+    return collisions
+
+
+def _binding_dict(binding: PortBinding) -> Dict[str, Any]:
+    return {
+        "instance": binding.instance,
+        "service": binding.service,
+        "host_ip": binding.host_ip,
+        "spec": binding.spec,
+    }
+
+
+def _decode_proc_address(raw: str) -> Tuple[str, int]:
+    address_hex, _, port_hex = raw.partition(":")
+    packed = bytes.fromhex(address_hex)
+    # /proc/net stores addresses as host-order 32-bit words.
+    words = [packed[index : index + 4][::-1] for index in range(0, len(packed), 4)]
+    address = ipaddress.ip_address(b"".join(words))
+    if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped:
+        address = address.ipv4_mapped
+    return str(address), int(port_hex, 16)
+
+
+def read_host_listeners(proc_net_dir: Path) -> Dict[str, List[Tuple[str, int]]]:
+    listeners: Dict[str, List[Tuple[str, int]]] = {"tcp": [], "udp": []}
+    for protocol, state in LISTEN_STATES.items():
+        for suffix in ("", "6"):
+            table = proc_net_dir / f"{protocol}{suffix}"
+            try:
+                lines = table.read_text(encoding="ascii").splitlines()[1:]
+            except OSError:
+                continue
+            for line in lines:
+                fields = line.split()
+                if len(fields) < 4 or fields[3].upper() != state:
+                    continue
+                try:
+                    listeners[protocol].append(_decode_proc_address(fields[1]))
+                except ValueError:
+                    continue
+    return listeners
+
+
+def load_running_ports(running_path: Path) -> Set[Tuple[str, int]]:
+    """(protocol, port) pairs published by running containers in `compose ps --format json` output."""
+
+    try:
+        text = running_path.read_text(encoding="utf-8").strip()
+    except OSError:
+        return set()
+    if not text:
+        return set()
+    try:
+        parsed = json.loads(text)
+        rows = parsed if isinstance(parsed, list) else [parsed]
+    except json.JSONDecodeError:
+        rows = []
+        for line in text.splitlines():
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    published: Set[Tuple[str, int]] = set()
+    for row in rows:
+        if not isinstance(row, dict) or str(row.get("State", "")).lower() != "running":
+            continue
+        for publisher in row.get("Publishers") or []:
+            if not isinstance(publisher, dict):
+                continue
+            try:
+                port = int(publisher.get("PublishedPort") or 0)
+            except (TypeError, ValueError):
+                continue
+            if port > 0:
+                published.add((str(publisher.get("Protocol") or "tcp").lower(), port))
+    return published
+
+
+def find_host_conflicts(
+    bindings: Sequence[PortBinding],
+    listeners: Dict[str, List[Tuple[str, int]]],
+    running: Optional[Dict[str, Set[Tuple[str, int]]]] = None,
+) -> List[Dict[str, Any]]:
+    """Host listeners on published ports, minus those held by the instance's own containers."""
+
+    running = running or {}
+    conflicts: List[Dict[str, Any]] = []
+    for protocol, entries in listeners.items():
+        ports: Dict[int, List[str]] = {}
+        for address, port in entries:
+            ports.setdefault(port, [])
+            if address not in ports[port]:
+                ports[port].append(address)
+        if not ports:
+            continue
+        sorted_ports = sorted(ports)
+        for binding in bindings:
+            if binding.protocol != protocol:
+                continue
+            own_ports = running.get(binding.instance, set())
+            for port in _ports_in_range(sorted_ports, binding.start, binding.end):
+                if (protocol, port) in own_ports:
+                    continue
+                addresses = [
+                    address for address in ports[port] if _hosts_overlap(address, binding.host_ip)
+                ]
+                if addresses:
+                    conflicts.append(
+                        {
+                            "protocol": protocol,
+                            "port": port,
+                            "host_addresses": addresses,
+                            "binding": _binding_dict(binding),
+                        }
+                    )
+    return conflicts
+
+
+def _ports_in_range(sorted_ports: List[int], start: int, end: int) -> Iterable[int]:
+    return sorted_ports[bisect_left(sorted_ports, start) : bisect_right(sorted_ports, end)]
+
+
+def load_bindings(
+    manifest_path: Path,
+) -> Tuple[List[PortBinding], List[Dict[str, str]], Dict[str, Set[Tuple[str, int]]]]:
+    bindings: List[PortBinding] = []
+    failures: List[Dict[str, str]] = []
+    running: Dict[str, Set[Tuple[str, int]]] = {}
+    for line in manifest_path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        instance, status, config_path, errors_path = (line.split("\t") + ["", "", "", ""])[:4]
+        if status.strip() != "0":
+            error = ""
+            if errors_path:
+                try:
+                    error = Path(errors_path).read_text(encoding="utf-8").strip()
+                except OSError:
+                    error = ""
+            failures.append({"instance": instance, "error": error or "build failed"})
+            continue
+        try:
+            config = json.loads(Path(config_path).read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            failures.append({"instance": instance, "error": f"invalid compose config: {exc}"})
+            continue
+        running[instance] = load_running_ports(Path(config_path).parent / "running.json")
+        services = config.get("services", {}) if isinstance(config, dict) else {}
+        for service_name in sorted(services):
+            service = services[service_name]
+            if not isinstance(service, dict):
+                continue
+            bindings.extend(iter_port_bindings(instance, service_name, service.get("ports") or []))
+    return bindings, failures, running
+
+
+def render_text(report: Dict[str, Any]) -> None:
+    print(f"Instances checked: {', '.join(report['instances']) or '(none)'}")
+    print(f"Published port ranges: {report['published']}")
+    collisions = report["collisions"]
+    print("")
+    if not collisions:
+        print("[*] No published-port conflicts between instances.")
+    else:
+        print(f"[!] {len(collisions)} published-port conflict(s):")
+        for collision in collisions:
+            first, second = collision["bindings"]
+            print(
+                f"  • {collision['host_ip']}:{collision['ports']}/{collision['protocol']}: "
+                f"{first['instance']}/{first['service']} ({first['spec']}) ↔ "
+                f"{second['instance']}/{second['service']} ({second['spec']})"
+            )
+    host_conflicts = report.get("host_conflicts")
+    if host_conflicts is None:
+        return
+    print("")
+    if not host_conflicts:
+        print("[*] No published ports are currently bound on this host.")
+        return
+    print(f"[!] Warning: {len(host_conflicts)} published port(s) already bound on this host:")
+    for conflict in host_conflicts:
+        binding = conflict["binding"]
+        print(
+            f"  • {conflict['port']}/{conflict['protocol']} "
+            f"(listening on {', '.join(conflict['host_addresses'])}): "
+            f"{binding['instance']}/{binding['service']} ({binding['spec']})"
+        )
+
+
+def main(argv: Sequence[str]) -> int:
+    if not argv:
+        print("Usage: port_conflicts.py <manifest.tsv>", file=sys.stderr)
+        return 2
+
+    output_format = os.environ.get("PORT_CONFLICTS_FORMAT", "text").strip().lower()
+    check_host = os.environ.get("PORT_CONFLICTS_CHECK_HOST", "1") == "1"
+    proc_net_dir = Path(os.environ.get("PORT_CONFLICTS_PROC_NET", "/proc/net"))
+
+    bindings, failures, running = load_bindings(Path(argv[0]))
+    instances: List[str] = []
+    for line in Path(argv[0]).read_text(encoding="utf-8").splitlines():
+        name = line.split("\t", 1)[0].strip()
+        if name and name not in instances:
+            instances.append(name)
+
+    report: Dict[str, Any] = {
+        "instances": instances,
+        "published": len(bindings),
+        "collisions": find_collisions(bindings),
+        "failed": failures,
+    }
+    if check_host:
+        report["host_conflicts"] = find_host_conflicts(
+            bindings, read_host_listeners(proc_net_dir), running
+        )
+
+    for failure in failures:
+        print(f"Error: failed to resolve instance '{failure['instance']}'.", file=sys.stderr)
+        print(failure["error"], file=sys.stderr)
+
+    if output_format == "json":
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2, sort_keys=True)
+        sys.stdout.write("\n")
+    else:
+        render_text(report)
+
+    if report["collisions"] or failures:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
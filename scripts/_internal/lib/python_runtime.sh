@@ -8,6 +8,9 @@ PYTHON_RUNTIME_DOCKER_BIN="${PYTHON_RUNTIME_DOCKER_BIN:-docker}"
 PYTHON_RUNTIME_REQUIREMENTS_FILE="${PYTHON_RUNTIME_REQUIREMENTS_FILE:-}" # optional override
 PYTHON_RUNTIME_SKIP_REQUIREMENTS="${PYTHON_RUNTIME_SKIP_REQUIREMENTS:-0}"
 PYTHON_RUNTIME_DISABLE_DOCKER="${PYTHON_RUNTIME_DISABLE_DOCKER:-0}"
+# Colon-separated host paths (scratch dirs, data dirs outside the repository)
+# mounted at the same location when the Docker fallback is used.
+PYTHON_RUNTIME_EXTRA_MOUNTS="${PYTHON_RUNTIME_EXTRA_MOUNTS:-}"
 
 python_runtime__resolve_requirements() {
   local repo_root="$1"
@@ -29,6 +32,13 @@ python_runtime__has_pip() {
   "$python_bin" -m pip --version >/dev/null 2>&1
 }
 
+# Scripts import shared helpers as scripts._internal.*, so the repository root
+# goes first on PYTHONPATH.
+python_runtime__pythonpath() {
+  local repo_root="$1"
+  printf '%s' "${repo_root}${PYTHONPATH:+:$PYTHONPATH}"
+}
+
 python_runtime__build_docker_prefix() {
   local repo_root="$1"
   local env_vars_raw="$2"
@@ -36,7 +46,16 @@ python_runtime__build_docker_prefix() {
 
   local -a docker_cmd=("$PYTHON_RUNTIME_DOCKER_BIN" run --rm -i)
   docker_cmd+=("-v" "${repo_root}:${repo_root}" "-w" "${PWD}")
-  docker_cmd+=("--env" "PYTHONUNBUFFERED=1")
+
+  local -a extra_mounts=()
+  local mount_path
+  IFS=':' read -r -a extra_mounts <<<"$PYTHON_RUNTIME_EXTRA_MOUNTS"
+  for mount_path in "${extra_mounts[@]}"; do
+    if [[ -n "$mount_path" && "$mount_path" != "$repo_root" ]]; then
+      docker_cmd+=("-v" "${mount_path}:${mount_path}")
+    fi
+  done
+  docker_cmd+=("--env" "PYTHONUNBUFFERED=1" "--env" "PYTHONPATH=${repo_root}")
 
   local var_name
   for var_name in $env_vars_raw; do
@@ -61,15 +80,10 @@ python_runtime__install_local_requirements() {
     "$python_bin" -m pip install --root-user-action=ignore --quiet --no-cache-dir -r "$requirements" >/dev/null
 }
 
-python_runtime__run() {
+# Prints the local interpreter python_runtime__run would use, or nothing when
+# it would fall back to Docker.
+python_runtime__local_bin() {
   local repo_root="$1"
-  local env_vars_raw="$2"
-  shift 2 || true
-  if [[ "$1" == "--" ]]; then
-    shift || true
-  fi
-  local -a py_args=("$@")
-
   local python_bin=""
   if command -v python3 >/dev/null 2>&1; then
     python_bin="python3"
@@ -86,10 +100,25 @@ python_runtime__run() {
       fi
     fi
   fi
+  printf '%s' "$python_bin"
+}
+
+python_runtime__run() {
+  local repo_root="$1"
+  local env_vars_raw="$2"
+  shift 2 || true
+  if [[ "$1" == "--" ]]; then
+    shift || true
+  fi
+  local -a py_args=("$@")
+
+  local python_bin requirements
+  python_bin="$(python_runtime__local_bin "$repo_root")"
 
   if [[ -n "$python_bin" ]]; then
+    requirements="$(python_runtime__resolve_requirements "$repo_root")"
     python_runtime__install_local_requirements "$python_bin" "$requirements"
-    "$python_bin" "${py_args[@]}"
+    PYTHONPATH="$(python_runtime__pythonpath "$repo_root")" "$python_bin" "${py_args[@]}"
     return $?
   fi
 
@@ -99,7 +128,6 @@ python_runtime__run() {
   fi
 
   if [[ "$disable_docker" != "1" ]] && command -v "$PYTHON_RUNTIME_DOCKER_BIN" >/dev/null 2>&1; then
-    local requirements
     requirements="$(python_runtime__resolve_requirements "$repo_root")"
     mapfile -t docker_cmd < <(python_runtime__build_docker_prefix "$repo_root" "$env_vars_raw")
     if [[ -n "$requirements" && -f "$requirements" && "$PYTHON_RUNTIME_SKIP_REQUIREMENTS" != "1" ]]; then
@@ -123,26 +151,13 @@ python_runtime__run_stdin() {
   fi
   local -a py_args=("$@")
 
-  local python_bin=""
-  if command -v python3 >/dev/null 2>&1; then
-    python_bin="python3"
-  elif command -v python >/dev/null 2>&1; then
-    python_bin="python"
-  fi
+  local python_bin requirements
+  python_bin="$(python_runtime__local_bin "$repo_root")"
 
   if [[ -n "$python_bin" ]]; then
-    local requirements
     requirements="$(python_runtime__resolve_requirements "$repo_root")"
-    if [[ -n "$requirements" && -f "$requirements" && "$PYTHON_RUNTIME_SKIP_REQUIREMENTS" != "1" ]]; then
-      if ! python_runtime__has_pip "$python_bin"; then
-        python_bin=""
-      fi
-    fi
-  fi
-
-  if [[ -n "$python_bin" ]]; then
     python_runtime__install_local_requirements "$python_bin" "$requirements"
-    cat | "$python_bin" - "${py_args[@]}"
+    cat | PYTHONPATH="$(python_runtime__pythonpath "$repo_root")" "$python_bin" - "${py_args[@]}"
     return $?
   fi
 
@@ -152,7 +167,6 @@ python_runtime__run_stdin() {
   fi
 
   if [[ "$disable_docker" != "1" ]] && command -v "$PYTHON_RUNTIME_DOCKER_BIN" >/dev/null 2>&1; then
-    local requirements
     requirements="$(python_runtime__resolve_requirements "$repo_root")"
     mapfile -t docker_cmd < <(python_runtime__build_docker_prefix "$repo_root" "$env_vars_raw")
     if [[ -n "$requirements" && -f "$requirements" && "$PYTHON_RUNTIME_SKIP_REQUIREMENTS" != "1" ]]; then
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""Stream a data directory into a compressed tar archive with a checksum manifest.
+
+Used by ``backup.sh --archive``. The tar stream is produced with ``tarfile`` in
+streaming mode and piped straight into the compressor, so no uncompressed copy
+of the data is ever staged on disk. ``zstd -T<jobs>`` compresses blocks on
+several threads; for gzip, ``pigz -p <jobs>`` is used when installed and plain
+``gzip`` otherwise. Without ``--jobs`` every core is used (``zstd -T0``).
+
+Every regular file is read exactly once: the bytes handed to the tar stream go
+through a SHA-256 hasher, and the digest is written to the manifest
+(``<name>.manifest.json`` next to the archive) together with size, mtime, mode
+and owner. Further names of a hardlinked file are stored by ``tarfile`` as link
+members without data; the manifest lists them with the digest of the file they
+point to and a ``hardlink`` field naming it. The archive and the manifest are written under temporary names and
+renamed into place only after the compressor exits successfully. The archive
+keeps the ``0600`` mode of its temporary file since it holds the instance data.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import stat
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+from typing import IO, Any, Dict, List, Sequence
+
+from copy_engine import human_size
+
+MANIFEST_VERSION = 1
+EXTENSIONS = {"zstd": ".tar.zst", "gzip": ".tar.gz"}
+
+
+class HashingReader:
+    """File wrapper that hashes whatever ``tarfile`` reads through it."""
+
+    def __init__(self, handle: IO[bytes]) -> None:
+        self._handle = handle
+        self.digest = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._handle.read(size)
+        self.digest.update(data)
+        return data
+
+
+def compressor_command(compression: str, jobs: int) -> List[str]:
+    """Returns the compressor command line; ``jobs`` 0 means one thread per core."""
+
+    if compression == "zstd":
+        if shutil.which("zstd") is None:
+            raise RuntimeError("zstd is not installed")
+        return ["zstd", f"-T{jobs}", "-q", "-c"]
+    if shutil.which("pigz") is not None:
+        return ["pigz", "-p", str(jobs or os.cpu_count() or 1), "-c"]
+    if shutil.which("gzip") is not None:
+        print("[i] pigz not found; compressing with single-threaded gzip.", file=sys.stderr)
+        return ["gzip", "-c"]
+    raise RuntimeError("neither pigz nor gzip is installed")
+
+
+def file_entry(info: os.stat_result, digest: str) -> Dict[str, Any]:
+    return {
+        "size": info.st_size,
+        "mtime_ns": info.st_mtime_ns,
+        "mode": stat.S_IMODE(info.st_mode),
+        "uid": info.st_uid,
+        "gid": info.st_gid,
+        "sha256": digest,
+    }
+
+
+def raise_walk_error(error: OSError) -> None:
+    """``os.walk`` error handler: an unreadable directory fails the archive."""
+
+    raise error
+
+
+def write_tar(stream: IO[bytes], source: str) -> Dict[str, Dict[str, Any]]:
+    files: Dict[str, Dict[str, Any]] = {}
+    with tarfile.open(fileobj=stream, mode="w|", format=tarfile.PAX_FORMAT) as archive:
+        for current, dirnames, filenames in os.walk(source, onerror=raise_walk_error):
+            dirnames.sort()
+            relative_dir = os.path.relpath(current, source)
+            for name in sorted(dirnames + filenames):
+                path = os.path.join(current, name)
+                relative = name if relative_dir == os.curdir else os.path.join(relative_dir, name)
+                info = archive.gettarinfo(path, arcname=relative)
+                if info is None:
+                    print(f"[!] Skipping special file {path}.", file=sys.stderr)
+                    continue
+                if info.islnk() and info.linkname in files:
+                    archive.addfile(info)
+                    files[relative] = {**files[info.linkname], "hardlink": info.linkname}
+                    continue
+                if not info.isreg():
+                    archive.addfile(info)
+                    continue
+                file_info = os.lstat(path)
+                with open(path, "rb") as handle:
+                    reader = HashingReader(handle)
+                    archive.addfile(info, reader)
+                files[relative] = file_entry(file_info, reader.digest.hexdigest())
+    return files
+
+
+def save_json(path: Path, payload: Dict[str, Any]) -> None:
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, indent=1, sort_keys=True)
+            handle.write("\n")
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def build_archive(source: str, dest: str, compression: str, jobs: int) -> Dict[str, Any]:
+    archive_path = Path(dest + EXTENSIONS[compression])
+    manifest_path = Path(dest + ".manifest.json")
+    command = compressor_command(compression, max(0, jobs))
+
+    archive_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, partial_name = tempfile.mkstemp(prefix=f".{archive_path.name}.", dir=str(archive_path.parent))
+    partial = Path(partial_name)
+    started = time.monotonic()
+    try:
+        with os.fdopen(fd, "wb") as output:
+            process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=output)
+            assert process.stdin is not None
+            try:
+                files = write_tar(process.stdin, source)
+            finally:
+                process.stdin.close()
+                returncode = process.wait()
+        if returncode != 0:
+            raise RuntimeError(f"{command[0]} exited with status {returncode}")
+        os.replace(partial, archive_path)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+
+    total = sum(entry["size"] for entry in files.values() if "hardlink" not in entry)
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "created_at": time.time(),
+        "source": os.path.abspath(source),
+        "archive": {
+            "path": archive_path.name,
+            "compression": compression,
+            "compressor": command[0],
+            "size": archive_path.stat().st_size,
+        },
+        "stats": {
+            "files": len(files),
+            "hardlinks": sum(1 for entry in files.values() if "hardlink" in entry),
+            "bytes": total,
+            "seconds": round(time.monotonic() - started, 3),
+        },
+        "files": files,
+    }
+    save_json(manifest_path, manifest)
+    return manifest
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Stream a directory into a compressed tar archive.")
+    parser.add_argument("--source", required=True)
+    parser.add_argument("--dest", required=True, help="Archive path without extension.")
+    parser.add_argument("--compression", choices=sorted(EXTENSIONS), default="zstd")
+    parser.add_argument("--jobs", type=int, default=0, help="Compression threads (default: 0, every core).")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    if not os.path.isdir(args.source):
+        print(f"[!] Archive failed: '{args.source}' is not a directory.", file=sys.stderr)
+        return 1
+    try:
+        manifest = build_archive(args.source, args.dest, args.compression, args.jobs)
+    except (OSError, RuntimeError, tarfile.TarError) as exc:
+        print(f"[!] Archive failed: {exc}", file=sys.stderr)
+        return 1
+
+    stats = manifest["stats"]
+    archive = manifest["archive"]
+    print(
+        f"[*] Archive: {stats['files']} files, {human_size(stats['bytes'])} compressed to "
+        f"{human_size(archive['size'])} with {archive['compressor']} in {stats['seconds']:.1f}s."
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""Create incremental backup snapshots, hardlinking files unchanged since the last one.
+
+Works like ``rsync --link-dest``: every regular file under ``--source`` is
+compared with the same relative path in the previous snapshot (``--link-dest``)
+using that snapshot's manifest. When size, mtime, mode and owner match (and, with
+``--checksum``, the BLAKE2 hash of the content), the file is hardlinked from the
+previous snapshot instead of copied, so a mostly static data directory costs a
+directory walk plus the changed files. Everything else is copied with its
+metadata, like ``cp -a``, through copy_engine.py (reflink first, then in-kernel
+copies). Hardlinks inside the source are kept as hardlinks.
+
+When ``--dest`` already holds an earlier pass of the same snapshot (the live
+pre-copy of ``backup.sh --low-downtime``), the run becomes a delta sync: files
+whose copy in ``--dest`` still matches are left alone, changed ones are replaced
+(never rewritten in place, since they may be hardlinked into older snapshots)
+and entries that no longer exist in the source are removed. Directories that the
+first pass left read-only (their source mode) are made writable again until
+the final metadata pass restores their modes.
+
+The manifest (``<dest>.manifest.json``) lists every file with its metadata and
+is written atomically after the snapshot is complete, so only finished
+snapshots are ever used as a link base. A ``--partial`` pass (the pre-copy)
+writes its file list to ``<dest>.partial.json`` instead; the next pass reads
+the hashes from it and replaces it with the manifest.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+from copy_engine import CopyEngine, copy_metadata, human_size
+
+MANIFEST_VERSION = 1
+MANIFEST_SUFFIX = ".manifest.json"
+PARTIAL_SUFFIX = ".partial.json"
+CHUNK_SIZE = 1024 * 1024
+
+
+def manifest_path(snapshot: str, suffix: str = MANIFEST_SUFFIX) -> Path:
+    return Path(snapshot.rstrip(os.sep) + suffix)
+
+
+def load_manifest(snapshot: str | None, suffix: str = MANIFEST_SUFFIX) -> Dict[str, Dict[str, Any]]:
+    if not snapshot:
+        return {}
+    try:
+        raw = json.loads(manifest_path(snapshot, suffix).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(raw, dict) or raw.get("version") != MANIFEST_VERSION:
+        return {}
+    files = raw.get("files")
+    return files if isinstance(files, dict) else {}
+
+
+def save_manifest(snapshot: str, payload: Dict[str, Any], suffix: str = MANIFEST_SUFFIX) -> None:
+    path = manifest_path(snapshot, suffix)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, indent=1, sort_keys=True)
+            handle.write("\n")
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def file_entry(info: os.stat_result) -> Dict[str, Any]:
+    return {
+        "size": info.st_size,
+        "mtime_ns": info.st_mtime_ns,
+        "mode": stat.S_IMODE(info.st_mode),
+        "uid": info.st_uid,
+        "gid": info.st_gid,
+    }
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def copy_file(
+    engine: CopyEngine, source: str, target: str, source_info: os.stat_result, with_hash: bool
+) -> str:
+    engine.copy_contents(source, target)
+    copy_metadata(source_info, target)
+    return hash_file(target) if with_hash else ""
+
+
+def raise_walk_error(error: OSError) -> None:
+    """``os.walk`` error handler: an unreadable directory fails the snapshot."""
+
+    raise error
+
+
+def make_writable(path: str) -> None:
+    """Gives the owner rwx on a directory whose copied mode would block writes into it."""
+
+    mode = stat.S_IMODE(os.lstat(path).st_mode)
+    if mode & stat.S_IRWXU != stat.S_IRWXU:
+        os.chmod(path, mode | stat.S_IRWXU)
+
+
+def remove_path(path: str) -> None:
+    if os.path.isdir(path) and not os.path.islink(path):
+        make_writable(path)
+        for current, dirnames, _ in os.walk(path, onerror=raise_walk_error):
+            for name in dirnames:
+                make_writable(os.path.join(current, name))
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.unlink(path)
+
+
+@dataclass
+class SnapshotStats:
+    files: int = 0
+    current: int = 0
+    current_bytes: int = 0
+    linked: int = 0
+    linked_bytes: int = 0
+    copied: int = 0
+    copied_bytes: int = 0
+    internal_links: int = 0
+
+
+class SnapshotBuilder:
+    def __init__(self, source: str, dest: str, link_dest: str | None, checksum: bool, jobs: int) -> None:
+        self.source = os.path.abspath(source)
+        self.dest = os.path.abspath(dest)
+        self.link_dest = os.path.abspath(link_dest) if link_dest else None
+        self.previous = load_manifest(self.link_dest)
+        self.existing = load_manifest(self.dest, PARTIAL_SUFFIX) if os.path.isdir(self.dest) else {}
+        self.checksum = checksum
+        self.jobs = max(1, jobs)
+        self.stats = SnapshotStats()
+        self.engine = CopyEngine()
+        self.files: Dict[str, Dict[str, Any]] = {}
+
+    def _reusable(self, relative: str, info: os.stat_result, entry: Dict[str, Any]) -> str | None:
+        """Returns the previous snapshot's copy of ``relative`` when it can be linked."""
+
+        if self.link_dest is None:
+            return None
+        previous = self.previous.get(relative)
+        if not previous or any(previous.get(key) != value for key, value in entry.items()):
+            return None
+        candidate = os.path.join(self.link_dest, relative)
+        try:
+            candidate_info = os.lstat(candidate)
+        except OSError:
+            return None
+        if not stat.S_ISREG(candidate_info.st_mode) or candidate_info.st_size != info.st_size:
+            return None
+        if candidate_info.st_mtime_ns != info.st_mtime_ns:
+            return None
+        return candidate
+
+    def _current(self, target: str, info: os.stat_result, entry: Dict[str, Any]) -> bool:
+        """Whether ``target`` (from an earlier pass into ``dest``) still matches the source."""
+
+        try:
+            target_info = os.lstat(target)
+        except OSError:
+            return False
+        return stat.S_ISREG(target_info.st_mode) and file_entry(target_info) == entry
+
+    def _store_file(self, relative: str, info: os.stat_result) -> Tuple[str, Dict[str, Any], str]:
+        source = os.path.join(self.source, relative)
+        target = os.path.join(self.dest, relative)
+        entry = file_entry(info)
+        if self._current(target, info, entry):
+            if not self.checksum:
+                return relative, entry, "current"
+            entry["hash"] = hash_file(source)
+            if self.existing.get(relative, {}).get("hash") == entry["hash"]:
+                return relative, entry, "current"
+        remove_path(target)
+
+        candidate = self._reusable(relative, info, file_entry(info))
+        if candidate is not None and self.checksum:
+            entry.setdefault("hash", hash_file(source))
+            if self.previous[relative].get("hash") != entry["hash"]:
+                candidate = None
+        if candidate is not None:
+            try:
+                os.link(candidate, target)
+                return relative, entry, "linked"
+            except OSError:
+                pass
+        digest = copy_file(self.engine, source, target, info, self.checksum and "hash" not in entry)
+        if digest:
+            entry["hash"] = digest
+        return relative, entry, "copied"
+
+    def build(self) -> SnapshotStats:
+        directories: List[Tuple[str, os.stat_result]] = []
+        inode_targets: Dict[Tuple[int, int], str] = {}
+        internal_links: List[Tuple[str, str, os.stat_result]] = []
+        futures: List[Future[Tuple[str, Dict[str, Any], str]]] = []
+        seen = {""}
+
+        os.makedirs(self.dest, exist_ok=True)
+        make_writable(self.dest)
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            for current, dirnames, filenames in os.walk(self.source, onerror=raise_walk_error):
+                relative_dir = os.path.relpath(current, self.source)
+                relative_dir = "" if relative_dir == os.curdir else relative_dir
+                directories.append((relative_dir, os.lstat(current)))
+                for name in sorted(dirnames + filenames):
+                    relative = os.path.join(relative_dir, name)
+                    source = os.path.join(current, name)
+                    target = os.path.join(self.dest, relative)
+                    info = os.lstat(source)
+                    seen.add(relative)
+                    if stat.S_ISDIR(info.st_mode):
+                        if not os.path.isdir(target) or os.path.islink(target):
+                            remove_path(target)
+                            os.mkdir(target)
+                        else:
+                            make_writable(target)
+                    elif stat.S_ISLNK(info.st_mode):
+                        remove_path(target)
+                        os.symlink(os.readlink(source), target)
+                        copy_metadata(info, target)
+                    elif stat.S_ISREG(info.st_mode):
+                        key = (info.st_dev, info.st_ino)
+                        if info.st_nlink > 1 and key in inode_targets:
+                            internal_links.append((relative, inode_targets[key], info))
+                            continue
+                        inode_targets[key] = relative
+                        futures.append(pool.submit(self._store_file, relative, info))
+                    elif stat.S_ISFIFO(info.st_mode):
+                        remove_path(target)
+                        os.mkfifo(target)
+                        copy_metadata(info, target)
+                    else:
+                        print(f"[!] Skipping special file {source}.", file=sys.stderr)
+
+            for future in futures:
+                relative, entry, outcome = future.result()
+                self._count(relative, entry, outcome)
+
+        for relative, first, info in internal_links:
+            target = os.path.join(self.dest, relative)
+            remove_path(target)
+            os.link(os.path.join(self.dest, first), target)
+            self._count(relative, dict(self.files[first]), "internal")
+
+        self._remove_stale(seen)
+
+        # Directory timestamps last, deepest first, once nothing is written into them.
+        for relative_dir, info in reversed(directories):
+            copy_metadata(info, os.path.join(self.dest, relative_dir) if relative_dir else self.dest)
+        return self.stats
+
+    def _remove_stale(self, seen: set[str]) -> None:
+        """Drops entries left in ``dest`` by an earlier pass that the source no longer has."""
+
+        for current, dirnames, filenames in os.walk(self.dest, onerror=raise_walk_error):
+            relative_dir = os.path.relpath(current, self.dest)
+            relative_dir = "" if relative_dir == os.curdir else relative_dir
+            for name in list(dirnames):
+                relative = os.path.join(relative_dir, name)
+                if relative not in seen:
+                    remove_path(os.path.join(current, name))
+                    dirnames.remove(name)
+            for name in filenames:
+                if os.path.join(relative_dir, name) not in seen:
+                    os.unlink(os.path.join(current, name))
+
+    def _count(self, relative: str, entry: Dict[str, Any], outcome: str) -> None:
+        self.files[relative] = entry
+        self.stats.files += 1
+        counted = entry["size"]
+        if outcome == "internal":
+            # Another name for a file stored in this snapshot: no data of its own.
+            self.stats.internal_links += 1
+        elif outcome == "current":
+            self.stats.current += 1
+            self.stats.current_bytes += counted
+        elif outcome == "linked":
+            self.stats.linked += 1
+            self.stats.linked_bytes += counted
+        else:
+            self.stats.copied += 1
+            self.stats.copied_bytes += counted
+
+    def manifest(self) -> Dict[str, Any]:
+        return {
+            "version": MANIFEST_VERSION,
+            "created_at": time.time(),
+            "source": self.source,
+            "link_dest": self.link_dest,
+            "checksum": self.checksum,
+            "stats": {**vars(self.stats), "copy_methods": dict(self.engine.bytes)},
+            "files": self.files,
+        }
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Create a hardlink-based incremental snapshot.")
+    parser.add_argument("--source", required=True)
+    parser.add_argument("--dest", required=True)
+    parser.add_argument("--link-dest", default=None)
+    parser.add_argument("--checksum", action="store_true")
+    parser.add_argument(
+        "--partial", action="store_true", help="First pass of a snapshot: no manifest, so it is never a link base."
+    )
+    parser.add_argument("--jobs", type=int, default=4)
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    if not os.path.isdir(args.source):
+        print(f"[!] Snapshot failed: '{args.source}' is not a directory.", file=sys.stderr)
+        return 1
+    builder = SnapshotBuilder(args.source, args.dest, args.link_dest, args.checksum, args.jobs)
+    try:
+        stats = builder.build()
+        if args.partial:
+            save_manifest(builder.dest, builder.manifest(), PARTIAL_SUFFIX)
+        else:
+            save_manifest(builder.dest, builder.manifest())
+            manifest_path(builder.dest, PARTIAL_SUFFIX).unlink(missing_ok=True)
+    except OSError as exc:
+        print(f"[!] Snapshot failed: {exc}", file=sys.stderr)
+        return 1
+
+    base = f" from '{builder.link_dest}'" if builder.link_dest and builder.previous else ""
+    current = f"{stats.current} already current, " if stats.current else ""
+    internal = f", {stats.internal_links} hardlinked within the snapshot" if stats.internal_links else ""
+    print(
+        f"[*] Snapshot: {stats.files} files, {current}{stats.linked} linked{base} "
+        f"({human_size(stats.linked_bytes)}), {stats.copied} copied ({human_size(stats.copied_bytes)}){internal}."
+    )
+    if stats.copied:
+        print(f"[*] Copy engine: {builder.engine.summary()}.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,12 +1,44 @@
+#!/usr/bin/env python3
+"""Collect bind-mount sources from a compose plan, resolving interpolation.
+
+The whole plan (every compose file plus the instance env chain) is handled in a
+single process. Compose-style expressions such as ``${VAR:-default}`` are
+evaluated against the env files and the caller environment, and volumes are
+merged per service target the same way ``docker compose`` merges overrides.
+Relative sources resolve against ``--project-dir`` for every file of the plan,
+like ``docker compose`` does, not against the directory of the declaring file.
+
+``normalize_volume`` turns one service volume into the long form printed by
+``docker compose config``; describe_instance_report.py uses it to render the
+cached consolidated file, so both resolve sources with the same helpers.
+"""
+
+from __future__ import annotations
+
+import argparse
 import os
+import re
 import sys
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Mapping, Sequence
 
 import yaml
 
 
 PATH_PREFIXES = ("/", ".", "~", "$", "\\")
+_NAME_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+class InterpolationError(ValueError):
+    """Raised when an expression references a variable that cannot be resolved."""
+
+
+@dataclass(frozen=True)
+class BindMount:
+    service: str
+    source: str
+    target: str
 
 
 def looks_like_path(value: str) -> bool:
@@ -19,16 +51,149 @@ def looks_like_path(value: str) -> bool:
     return False
 
 
-def normalize_source(raw: str, compose_dir: Path) -> str | None:
+def _strip_env_value(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] in {'"', "'"} and value[-1] == value[0]:
+        return value[1:-1]
+    if value.startswith("#"):
+        return ""
+    match = re.search(r"\s#", value)
+    if match:
+        value = value[: match.start()].rstrip()
+    return value.replace("\\#", "#")
+
+
+def load_env_chain(env_files: Sequence[str], environ: Mapping[str, str]) -> dict[str, str]:
+    """Merge env files in order; the process environment takes precedence."""
+
+    values: dict[str, str] = {}
+    for raw_path in env_files:
+        path = Path(raw_path)
+        try:
+            lines = path.read_text(encoding="utf-8").splitlines()
+        except OSError:
+            continue
+        for raw_line in lines:
+            stripped = raw_line.strip()
+            if not stripped or stripped.startswith("#"):
+                continue
+            if stripped.startswith("export "):
+                stripped = stripped[len("export ") :].lstrip()
+            if "=" not in stripped:
+                continue
+            key, value = stripped.split("=", 1)
+            key = key.strip()
+            if not _NAME_PATTERN.fullmatch(key):
+                continue
+            lookup = {**values, **environ}
+            try:
+                values[key] = interpolate(_strip_env_value(value), lookup)
+            except InterpolationError:
+                values[key] = _strip_env_value(value)
+    values.update(environ)
+    return values
+
+
+def _find_closing_brace(text: str, start: int) -> int:
+    depth = 1
+    cursor = start
+    while cursor < len(text):
+        char = text[cursor]
+        if char == "$" and text.startswith("${", cursor):
+            depth += 1
+            cursor += 2
+            continue
+        if char == "}":
+            depth -= 1
+            if depth == 0:
+                return cursor
+        cursor += 1
+    raise InterpolationError(f"unterminated expression in {text!r}")
+
+
+def _evaluate(expression: str, env: Mapping[str, str]) -> str:
+    match = _NAME_PATTERN.match(expression)
+    if not match:
+        raise InterpolationError(f"invalid expression ${{{expression}}}")
+    name = match.group(0)
+    rest = expression[match.end() :]
+    value = env.get(name)
+
+    if not rest:
+        if value is None:
+            raise InterpolationError(f"variable {name} is not set")
+        return value
+
+    for operator in (":-", ":?", ":+", "-", "?", "+"):
+        if rest.startswith(operator):
+            argument = rest[len(operator) :]
+            break
+    else:
+        raise InterpolationError(f"unsupported expression ${{{expression}}}")
+
+    is_set = value is not None
+    if operator.startswith(":"):
+        is_set = bool(value)
+
+    if operator.endswith("-"):
+        return value if is_set and value is not None else interpolate(argument, env)
+    if operator.endswith("?"):
+        if is_set and value is not None:
+            return value
+        message = interpolate(argument, env) or "required"
+        raise InterpolationError(f"variable {name}: {message}")
+    return interpolate(argument, env) if is_set else ""
+
+
+def interpolate(text: str, env: Mapping[str, str]) -> str:
+    """Expand Compose interpolation syntax (``$VAR``, ``${VAR:-x}``, ``$$``)."""
+
+    result: list[str] = []
+    index = 0
+    while index < len(text):
+        char = text[index]
+        if char != "$":
+            result.append(char)
+            index += 1
+            continue
+        if text.startswith("$$", index):
+            result.append("$")
+            index += 2
+            continue
+        if text.startswith("${", index):
+            closing = _find_closing_brace(text, index + 2)
+            result.append(_evaluate(text[index + 2 : closing], env))
+            index = closing + 1
+            continue
+        match = _NAME_PATTERN.match(text, index + 1)
+        if match:
+            name = match.group(0)
+            if name not in env:
+                raise InterpolationError(f"variable {name} is not set")
+            result.append(env[name])
+            index = match.end()
+            continue
+        result.append(char)
+        index += 1
+    return "".join(result)
+
+
+def resolve_bind_source(source: str, project_dir: Path) -> Path:
+    """Host path of an interpolated bind source, resolved the way ``docker compose`` does."""
+
+    path = Path(os.path.expanduser(source))
+    if not path.is_absolute():
+        path = (project_dir / path).resolve()
+    return path
+
+
+def normalize_source(raw: str, project_dir: Path, env: Mapping[str, str]) -> str | None:
     if not raw:
         return None
-    expanded = os.path.expandvars(raw)
-    if "$" in expanded:
+    expanded = interpolate(raw, env)
+    if not expanded:
         return None
-    expanded = os.path.expanduser(expanded)
-    path = Path(expanded)
-    if not path.is_absolute():
-        path = (compose_dir / path).resolve()
+    path = resolve_bind_source(expanded, project_dir)
     try:
         if path.exists() and path.is_file():
             return None
@@ -37,78 +202,231 @@ def normalize_source(raw: str, compose_dir: Path) -> str | None:
     return str(path)
 
 
-def iter_volume_sources(volumes: Iterable[object], compose_dir: Path) -> Iterable[str]:
+def split_short_volume(raw: str) -> list[str]:
+    """Split ``source:target[:mode]``, keeping defaults such as ``${VAR:-x}`` intact."""
+
+    merged: list[str] = []
+    depth = 0
+    for part in raw.split(":"):
+        if depth > 0 and merged:
+            merged[-1] = f"{merged[-1]}:{part}"
+        else:
+            merged.append(part)
+        depth += part.count("${") - part.count("}")
+        depth = max(depth, 0)
+    return merged
+
+
+def _parse_short_volume(raw: str) -> tuple[str, str] | None:
+    merged = split_short_volume(raw)
+    if len(merged) < 2:
+        return None
+    return merged[0].strip(), merged[1].strip()
+
+
+def interpolate_tree(value: object, env: Mapping[str, str]) -> object:
+    if isinstance(value, str):
+        return interpolate(value, env)
+    if isinstance(value, list):
+        return [interpolate_tree(item, env) for item in value]
+    if isinstance(value, dict):
+        return {key: interpolate_tree(item, env) for key, item in value.items()}
+    return value
+
+
+def normalize_volume(
+    volume: object, project_dir: Path, env: Mapping[str, str], named_volumes: object = None
+) -> object:
+    """Long form of one service volume, as ``docker compose config`` prints it.
+
+    Short syntax is split before interpolation, like the bind-mount collector
+    does, and bind sources go through :func:`resolve_bind_source`.
+    """
+
+    if not isinstance(volume, str):
+        volume = interpolate_tree(volume, env)
+        if isinstance(volume, dict) and volume.get("type") == "bind" and volume.get("source"):
+            volume = {**volume, "source": str(resolve_bind_source(str(volume["source"]), project_dir))}
+        return volume
+    parts = [interpolate(part, env) for part in split_short_volume(volume)]
+    if len(parts) == 1:
+        return {"type": "volume", "target": parts[0], "volume": {}}
+    source, target = parts[0], parts[1]
+    options = set(parts[2].split(",")) if len(parts) > 2 else set()
+    is_named = isinstance(named_volumes, dict) and source in named_volumes
+    entry: dict[str, object]
+    if is_named or not source.startswith(("/", ".", "~")):
+        entry = {"type": "volume", "source": source, "target": target, "volume": {}}
+    else:
+        entry = {
+            "type": "bind",
+            "source": str(resolve_bind_source(source, project_dir)),
+            "target": target,
+            "bind": {"create_host_path": True},
+        }
+    if "ro" in options:
+        entry["read_only"] = True
+    return entry
+
+
+def _named_volume_devices(data: Mapping[str, object]) -> dict[str, str]:
+    devices: dict[str, str] = {}
+    volumes = data.get("volumes")
+    if not isinstance(volumes, dict):
+        return devices
+    for name, definition in volumes.items():
+        if not isinstance(definition, dict):
+            continue
+        options = definition.get("driver_opts")
+        if not isinstance(options, dict):
+            continue
+        mount_options = str(options.get("o") or "")
+        device = options.get("device")
+        if "bind" in mount_options.split(",") and isinstance(device, str) and device:
+            devices[str(name)] = device
+    return devices
+
+
+def iter_volume_entries(
+    volumes: Iterable[object], named_devices: Mapping[str, str]
+) -> Iterable[tuple[str, str]]:
     for entry in volumes:
         if isinstance(entry, str):
             raw = entry.strip()
             if not raw:
                 continue
-            parts = raw.split(":")
-            if len(parts) < 2:
+            parsed = _parse_short_volume(raw)
+            if parsed is None:
+                continue
+            source, target = parsed
+            if source in named_devices:
+                yield named_devices[source], target
                 continue
-            source = parts[0].strip()
             if not looks_like_path(source):
                 continue
-            normalized = normalize_source(source, compose_dir)
-            if normalized:
-                yield normalized
+            yield source, target
             continue
 
         if isinstance(entry, dict):
             entry_type = (entry.get("type") or "").strip()
             source = entry.get("source") or entry.get("src") or ""
+            target = str(entry.get("target") or entry.get("dst") or "")
+            if entry_type == "volume" and source in named_devices:
+                yield named_devices[source], target
+                continue
             if entry_type and entry_type != "bind":
                 continue
             if not source:
                 continue
             if not entry_type and not looks_like_path(source):
                 continue
-            normalized = normalize_source(source, compose_dir)
-            if normalized:
-                yield normalized
+            yield str(source), target
 
 
-def collect_bind_mounts(files: Iterable[str]) -> list[str]:
-    results: list[str] = []
-    seen: set[str] = set()
+def collect_bind_mounts(
+    files: Iterable[str],
+    env: Mapping[str, str] | None = None,
+    project_dir: Path | None = None,
+) -> list[BindMount]:
+    env = dict(os.environ if env is None else env)
+    file_paths = [Path(file_path) for file_path in files]
+    if project_dir is None:
+        project_dir = file_paths[0].parent if file_paths else Path.cwd()
+
+    merged: dict[tuple[str, str], BindMount] = {}
+    named_devices: dict[str, str] = {}
+    documents: list[tuple[Path, dict]] = []
 
-    for file_path in files:
-        path = Path(file_path)
+    for path in file_paths:
         if not path.is_file():
             continue
-        compose_dir = path.parent
         try:
             data = yaml.safe_load(path.read_text(encoding="utf-8"))
         except Exception:
             continue
         if not isinstance(data, dict):
             continue
+        named_devices.update(_named_volume_devices(data))
+        documents.append((path, data))
+
+    for path, data in documents:
         services = data.get("services")
         if not isinstance(services, dict):
             continue
-        for service in services.values():
+        for service_name, service in services.items():
             if not isinstance(service, dict):
                 continue
             volumes = service.get("volumes")
-            if isinstance(volumes, list):
-                for source in iter_volume_sources(volumes, compose_dir):
-                    if source not in seen:
-                        seen.add(source)
-                        results.append(source)
-            elif isinstance(volumes, dict):
-                for source in iter_volume_sources(volumes.values(), compose_dir):
-                    if source not in seen:
-                        seen.add(source)
-                        results.append(source)
+            if isinstance(volumes, dict):
+                volumes = list(volumes.values())
+            if not isinstance(volumes, list):
+                continue
+            for raw_source, target in iter_volume_entries(volumes, named_devices):
+                try:
+                    source = normalize_source(raw_source, project_dir, env)
+                except InterpolationError as exc:
+                    print(
+                        f"[!] Warning: skipping bind mount '{raw_source}' of service "
+                        f"'{service_name}' ({path.name}): {exc}.",
+                        file=sys.stderr,
+                    )
+                    continue
+                key = (str(service_name), target or raw_source)
+                merged.pop(key, None)
+                if source:
+                    merged[key] = BindMount(str(service_name), source, target)
+
+    return list(merged.values())
+
+
+def unique_sources(mounts: Iterable[BindMount]) -> list[str]:
+    results: list[str] = []
+    seen: set[str] = set()
+    for mount in mounts:
+        if mount.source not in seen:
+            seen.add(mount.source)
+            results.append(mount.source)
     return results
 
 
-def main() -> int:
-    files = sys.argv[1:]
-    if not files:
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="List bind-mount sources declared in a compose plan."
+    )
+    parser.add_argument(
+        "--env-file",
+        dest="env_files",
+        action="append",
+        default=[],
+        help="Env file used for interpolation (repeatable, later files win).",
+    )
+    parser.add_argument(
+        "--project-dir",
+        default=None,
+        help="Directory used to resolve relative sources (default: first file's directory).",
+    )
+    parser.add_argument(
+        "--format",
+        choices=("paths", "tsv"),
+        default="paths",
+        help="'paths' prints unique sources; 'tsv' prints service<TAB>source<TAB>target.",
+    )
+    parser.add_argument("files", nargs="*")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    if not args.files:
+        return 0
+    env = load_env_chain(args.env_files, os.environ)
+    project_dir = Path(args.project_dir).resolve() if args.project_dir else None
+    mounts = collect_bind_mounts(args.files, env, project_dir)
+    if args.format == "tsv":
+        for mount in mounts:
+            print(f"{mount.service}\t{mount.source}\t{mount.target}")
         return 0
-    mounts = collect_bind_mounts(files)
-    for path in mounts:
+    for path in unique_sources(mounts):
         print(path)
     return 0
 
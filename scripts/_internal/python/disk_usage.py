@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""Measure disk usage and inode consumption for persistent directories.
+
+Directories are listed concurrently with ``os.scandir`` on a thread pool. Each
+directory's entry names are cached together with its ``st_mtime_ns``; on later
+runs a directory whose mtime is unchanged reuses the cached names instead of
+being listed again, and only ``lstat`` is called on its files. A directory
+mtime only changes when entries are created, removed or renamed, so the names
+stay valid, while sizes are always read fresh and files that grow or shrink in
+place are reported correctly.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import stat
+import sys
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+CACHE_VERSION = 2
+
+
+@dataclass
+class DirectoryListing:
+    """Totals for the entries that live directly inside one directory."""
+
+    mtime_ns: int
+    inode: int
+    bytes: int = 0
+    disk_bytes: int = 0
+    files: int = 0
+    inodes: int = 0
+    subdirs: List[str] = field(default_factory=list)
+    names: List[str] = field(default_factory=list)
+    hardlinks: List[List[int]] = field(default_factory=list)
+    errors: int = 0
+    reused: bool = False
+
+    def add(self, info: os.stat_result) -> None:
+        is_file = stat.S_ISREG(info.st_mode)
+        if info.st_nlink > 1 and is_file:
+            self.hardlinks.append([info.st_dev, info.st_ino, info.st_size, _disk_bytes(info)])
+            return
+        self.inodes += 1
+        self.bytes += info.st_size
+        self.disk_bytes += _disk_bytes(info)
+        if is_file:
+            self.files += 1
+
+    def to_cache(self) -> Dict[str, Any]:
+        """Only the entry names: sizes are read again on every run."""
+
+        return {
+            "mtime_ns": self.mtime_ns,
+            "inode": self.inode,
+            "subdirs": self.subdirs,
+            "names": self.names,
+        }
+
+    @classmethod
+    def from_cache(cls, raw: Dict[str, Any]) -> "DirectoryListing":
+        return cls(
+            mtime_ns=int(raw["mtime_ns"]),
+            inode=int(raw["inode"]),
+            subdirs=[str(name) for name in raw["subdirs"]],
+            names=[str(name) for name in raw["names"]],
+        )
+
+
+@dataclass
+class SubtreeTotals:
+    path: str
+    bytes: int = 0
+    disk_bytes: int = 0
+    files: int = 0
+    directories: int = 0
+    inodes: int = 0
+    errors: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "bytes": self.bytes,
+            "disk_bytes": self.disk_bytes,
+            "files": self.files,
+            "directories": self.directories,
+            "inodes": self.inodes,
+            "errors": self.errors,
+        }
+
+
+def _disk_bytes(info: os.stat_result) -> int:
+    blocks = getattr(info, "st_blocks", None)
+    if blocks is None:
+        return info.st_size
+    return blocks * 512
+
+
+def scan_directory(path: str, info: os.stat_result) -> DirectoryListing:
+    listing = DirectoryListing(mtime_ns=info.st_mtime_ns, inode=info.st_ino)
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        listing.subdirs.append(entry.name)
+                        continue
+                    listing.names.append(entry.name)
+                    entry_info = entry.stat(follow_symlinks=False)
+                except OSError:
+                    listing.errors += 1
+                    continue
+                listing.add(entry_info)
+    except OSError:
+        listing.errors += 1
+    listing.subdirs.sort()
+    listing.names.sort()
+    return listing
+
+
+def restat_directory(path: str, listing: DirectoryListing) -> DirectoryListing:
+    """Fill a cached listing with fresh ``lstat`` results for its file names."""
+
+    for name in listing.names:
+        try:
+            listing.add(os.lstat(os.path.join(path, name)))
+        except OSError:
+            listing.errors += 1
+    listing.reused = True
+    return listing
+
+
+class DiskWalker:
+    """Walk directory trees concurrently, reusing cached entry names by mtime."""
+
+    def __init__(self, cache: Dict[str, Any] | None, jobs: int) -> None:
+        self._cache = cache if cache is not None else {}
+        self._use_cache = cache is not None
+        self._jobs = max(1, jobs)
+        self.listings: Dict[str, DirectoryListing] = {}
+        self.rescanned = 0
+        self.reused = 0
+
+    def _visit(self, path: str) -> DirectoryListing | None:
+        try:
+            info = os.lstat(path)
+        except OSError:
+            return None
+        if not stat.S_ISDIR(info.st_mode):
+            return None
+        cached = self._cache.get(path) if self._use_cache else None
+        if isinstance(cached, dict):
+            try:
+                listing = DirectoryListing.from_cache(cached)
+            except (KeyError, TypeError, ValueError):
+                listing = None
+            if listing and listing.mtime_ns == info.st_mtime_ns and listing.inode == info.st_ino:
+                return restat_directory(path, listing)
+        return scan_directory(path, info)
+
+    def walk(self, roots: Sequence[str]) -> None:
+        with ThreadPoolExecutor(max_workers=self._jobs) as pool:
+            pending: Dict[Future[DirectoryListing | None], str] = {}
+            scheduled: set[str] = set(self.listings)
+            for root in roots:
+                if root not in scheduled:
+                    scheduled.add(root)
+                    pending[pool.submit(self._visit, root)] = root
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = pending.pop(future)
+                    listing = future.result()
+                    if listing is None:
+                        continue
+                    if listing.reused:
+                        self.reused += 1
+                    else:
+                        self.rescanned += 1
+                    self.listings[path] = listing
+                    for name in listing.subdirs:
+                        child = os.path.join(path, name)
+                        if child not in scheduled:
+                            scheduled.add(child)
+                            pending[pool.submit(self._visit, child)] = child
+
+    def totals(self, path: str, seen_links: set[tuple[int, int]]) -> SubtreeTotals:
+        """Aggregate a subtree; hardlinked inodes are charged once, like ``du``."""
+
+        result = SubtreeTotals(path=path)
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            listing = self.listings.get(current)
+            if listing is None:
+                continue
+            if current != path:
+                result.directories += 1
+            result.inodes += 1 + listing.inodes
+            result.bytes += listing.bytes
+            result.disk_bytes += listing.disk_bytes
+            result.files += listing.files
+            result.errors += listing.errors
+            for dev, ino, size, disk in listing.hardlinks:
+                key = (dev, ino)
+                if key in seen_links:
+                    continue
+                seen_links.add(key)
+                result.inodes += 1
+                result.files += 1
+                result.bytes += size
+                result.disk_bytes += disk
+            stack.extend(os.path.join(current, name) for name in reversed(listing.subdirs))
+        return result
+
+    def export_cache(self, previous: Dict[str, Any], roots: Sequence[str]) -> Dict[str, Any]:
+        prefixes = tuple(root.rstrip(os.sep) + os.sep for root in roots)
+        kept = {
+            key: value
+            for key, value in previous.items()
+            if key not in roots and not key.startswith(prefixes)
+        }
+        for path, listing in self.listings.items():
+            kept[path] = listing.to_cache()
+        return kept
+
+
+def report_root(walker: DiskWalker, root: str, top: int) -> Dict[str, Any]:
+    listing = walker.listings.get(root)
+    if listing is None:
+        return {"path": root, "exists": os.path.lexists(root), "scanned": False}
+    seen_links: set[tuple[int, int]] = set()
+    children = [
+        walker.totals(os.path.join(root, name), set()) for name in listing.subdirs
+    ]
+    totals = walker.totals(root, seen_links)
+    children.sort(key=lambda item: (-item.disk_bytes, item.path))
+    summary = totals.as_dict()
+    summary.update(
+        {
+            "exists": True,
+            "scanned": True,
+            "largest_subtrees": [child.as_dict() for child in children[: max(0, top)]],
+        }
+    )
+    return summary
+
+
+def human_size(value: int) -> str:
+    amount = float(value)
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if amount < 1024 or unit == "TiB":
+            return f"{amount:.0f} {unit}" if unit == "B" else f"{amount:.1f} {unit}"
+        amount /= 1024
+    return f"{value} B"  # pragma: no cover - loop always returns
+
+
+def render_table(report: Dict[str, Any]) -> None:
+    print(f"Instance: {report.get('instance', '')}")
+    for item in report.get("directories", []):
+        print("")
+        print(f"{item['path']}")
+        if not item.get("scanned"):
+            print("  (missing)" if not item.get("exists") else "  (not a directory)")
+            continue
+        print(f"  Disk usage: {human_size(item['disk_bytes'])} (apparent {human_size(item['bytes'])})")
+        print(f"  Files: {item['files']}  Directories: {item['directories']}  Inodes: {item['inodes']}")
+        if item.get("errors"):
+            print(f"  Unreadable entries: {item['errors']}")
+        subtrees = item.get("largest_subtrees", [])
+        if subtrees:
+            print("  Largest subtrees:")
+            for child in subtrees:
+                name = os.path.relpath(child["path"], item["path"])
+                print(
+                    f"    • {name}: {human_size(child['disk_bytes'])}, "
+                    f"{child['files']} files, {child['inodes']} inodes"
+                )
+    stats = report.get("scan", {})
+    print("")
+    print(
+        f"Scanned directories: {stats.get('rescanned', 0)} "
+        f"(reused from cache: {stats.get('reused', 0)})"
+    )
+
+
+def load_cache(path: Path | None) -> Dict[str, Any]:
+    if path is None or not path.is_file():
+        return {}
+    try:
+        raw = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(raw, dict) or raw.get("version") != CACHE_VERSION:
+        return {}
+    directories = raw.get("directories")
+    return directories if isinstance(directories, dict) else {}
+
+
+def save_cache(path: Path, directories: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {"version": CACHE_VERSION, "directories": directories}
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, separators=(",", ":"))
+        os.replace(tmp_name, path)
+    except OSError:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def parse_args(argv: Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Report disk and inode usage per directory.")
+    parser.add_argument("--instance", default="")
+    parser.add_argument("--format", choices=("table", "json"), default="table")
+    parser.add_argument("--jobs", type=int, default=min(32, (os.cpu_count() or 1) * 4))
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--cache-file", default=None)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("directories", nargs="*")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+
+    roots: List[str] = []
+    for raw in args.directories:
+        if not raw:
+            continue
+        normalized = os.path.abspath(raw)
+        if normalized not in roots:
+            roots.append(normalized)
+
+    cache_path = Path(args.cache_file) if args.cache_file else None
+    previous = {} if args.no_cache else load_cache(cache_path)
+    walker = DiskWalker(None if args.no_cache else previous, args.jobs)
+    walker.walk(roots)
+
+    report = {
+        "instance": args.instance,
+        "directories": [report_root(walker, root, args.top) for root in roots],
+        "scan": {"rescanned": walker.rescanned, "reused": walker.reused},
+    }
+
+    if cache_path is not None:
+        try:
+            save_cache(cache_path, walker.export_cache(previous, roots))
+        except OSError as exc:
+            print(f"[!] Warning: could not write cache {cache_path}: {exc}", file=sys.stderr)
+
+    if args.format == "json":
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2, sort_keys=True)
+        sys.stdout.write("\n")
+        return 0
+
+    render_table(report)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,25 +1,142 @@
 #!/usr/bin/env bash
 # shellcheck source-path=SCRIPTDIR
-# Usage: scripts/backup.sh <instance>
+# Usage: scripts/backup.sh <instance> [options]
 #
 # Runs a simple backup by stopping the related stack, copying persisted data
 # to the `backups/` directory, and restarting the stack at the end.
 set -euo pipefail
 
-SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
-REPO_ROOT="$(cd "$SCRIPT_DIR/.." && pwd)"
-
-if [[ $# -lt 1 ]]; then
-  cat <<'USAGE' >&2
-Usage: scripts/backup.sh <instance>
+print_help() {
+  cat <<'USAGE'
+Usage: scripts/backup.sh <instance> [options]
 
 Stops the stack for the given instance, copies persisted data into a snapshot
 in backups/<instance>-<timestamp>, then starts the services again.
+
+Available options:
+  --incremental     Hardlink files unchanged since the previous incremental
+                    snapshot instead of copying them (also BACKUP_INCREMENTAL=1).
+  --low-downtime    Copy the data while the stack is still running, then stop
+                    it only to sync the files changed since that pre-copy
+                    (also BACKUP_LOW_DOWNTIME=1).
+  --archive <zstd|gzip>
+                    Stream the data into backups/<instance>-<timestamp>.tar.zst
+                    (or .tar.gz) with a checksum manifest instead of copying it
+                    into a directory (also BACKUP_ARCHIVE). Needs a local
+                    python3 and the compressor on the host.
+  --checksum        Also compare file contents by hash before linking or
+                    keeping a pre-copied file (also BACKUP_CHECKSUM=1).
+  -j, --jobs <N>    Number of files copied at the same time in incremental
+                    and low-downtime modes (default: 4, or BACKUP_JOBS).
+                    Files are cloned (reflink) when the filesystem supports
+                    it. With --archive, the compressor thread count (default:
+                    every core).
+  -h, --help        Shows this message and exits.
 USAGE
+}
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+REPO_ROOT="$(cd "$SCRIPT_DIR/.." && pwd)"
+
+INSTANCE=""
+INCREMENTAL="${BACKUP_INCREMENTAL:-0}"
+LOW_DOWNTIME="${BACKUP_LOW_DOWNTIME:-0}"
+ARCHIVE="${BACKUP_ARCHIVE:-}"
+CHECKSUM="${BACKUP_CHECKSUM:-0}"
+JOBS="${BACKUP_JOBS:-4}"
+JOBS_EXPLICIT=0
+if [[ -n "${BACKUP_JOBS:-}" ]]; then
+  JOBS_EXPLICIT=1
+fi
+
+require_number() {
+  local flag="$1"
+  local value="$2"
+  if [[ ! "$value" =~ ^[1-9][0-9]*$ ]]; then
+    echo "[!] $flag requires a positive integer." >&2
+    exit 1
+  fi
+}
+
+while [[ $# -gt 0 ]]; do
+  case "$1" in
+  --incremental)
+    INCREMENTAL=1
+    ;;
+  --low-downtime)
+    LOW_DOWNTIME=1
+    ;;
+  --archive)
+    shift
+    if [[ -z "${1:-}" ]]; then
+      echo "[!] --archive requires a compression (zstd or gzip)." >&2
+      exit 1
+    fi
+    ARCHIVE="$1"
+    ;;
+  --archive=*)
+    ARCHIVE="${1#*=}"
+    ;;
+  --checksum)
+    CHECKSUM=1
+    ;;
+  -j | --jobs)
+    shift
+    require_number "--jobs" "${1:-}"
+    JOBS="$1"
+    JOBS_EXPLICIT=1
+    ;;
+  --jobs=*)
+    JOBS="${1#*=}"
+    require_number "--jobs" "$JOBS"
+    JOBS_EXPLICIT=1
+    ;;
+  -h | --help)
+    print_help
+    exit 0
+    ;;
+  -*)
+    echo "[!] Unknown option: $1" >&2
+    print_help >&2
+    exit 1
+    ;;
+  *)
+    if [[ -n "$INSTANCE" ]]; then
+      echo "[!] Duplicate instance detected: $1" >&2
+      print_help >&2
+      exit 1
+    fi
+    INSTANCE="$1"
+    ;;
+  esac
+  shift
+done
+
+if [[ -z "$INSTANCE" ]]; then
+  print_help >&2
   exit 1
 fi
+require_number "BACKUP_JOBS" "$JOBS"
 
-INSTANCE="$1"
+if [[ -n "$ARCHIVE" ]]; then
+  if [[ "$ARCHIVE" != "zstd" && "$ARCHIVE" != "gzip" ]]; then
+    echo "[!] Invalid archive compression '$ARCHIVE'. Use 'zstd' or 'gzip'." >&2
+    exit 1
+  fi
+  if [[ "$INCREMENTAL" == "1" || "$LOW_DOWNTIME" == "1" ]]; then
+    echo "[!] --archive cannot be combined with --incremental or --low-downtime." >&2
+    exit 1
+  fi
+  # Checked before the stack is stopped, so a missing compressor costs no downtime.
+  if [[ "$ARCHIVE" == "zstd" ]] && ! command -v zstd >/dev/null 2>&1; then
+    echo "[!] --archive zstd requires the zstd command." >&2
+    exit 1
+  fi
+  if [[ "$ARCHIVE" == "gzip" ]] && ! command -v pigz >/dev/null 2>&1 && ! command -v gzip >/dev/null 2>&1; then
+    echo "[!] --archive gzip requires the pigz or gzip command." >&2
+    exit 1
+  fi
+fi
 
 # shellcheck source=_internal/lib/deploy_context.sh
 source "$SCRIPT_DIR/_internal/lib/deploy_context.sh"
@@ -30,6 +147,17 @@ source "$SCRIPT_DIR/_internal/lib/app_detection.sh"
 # shellcheck source=_internal/lib/compose_command.sh
 source "$SCRIPT_DIR/_internal/lib/compose_command.sh"
 
+# shellcheck source=_internal/lib/python_runtime.sh
+source "$SCRIPT_DIR/_internal/lib/python_runtime.sh"
+
+# backup_archive.py starts the compressor itself, and the python:3.11-slim
+# image of the Docker fallback has no zstd or pigz: archives need a local
+# Python, checked like the compressor before the stack is stopped.
+if [[ -n "$ARCHIVE" && -z "$(PYTHON_RUNTIME_SKIP_REQUIREMENTS=1 python_runtime__local_bin "$REPO_ROOT")" ]]; then
+  echo "[!] --archive requires a local python3 (the Docker fallback has no compressors)." >&2
+  exit 1
+fi
+
 deploy_context_eval=""
 if ! deploy_context_eval="$(build_deploy_context "$REPO_ROOT" "$INSTANCE")"; then
   exit 1
@@ -109,18 +237,10 @@ restart_stack() {
       echo "[*] No services will be restarted; none were active at the start of the backup."
     fi
     stack_was_stopped=0
+    downtime_seconds="$(awk -v start="$downtime_started" -v end="$EPOCHREALTIME" 'BEGIN { printf "%.2f", end - start }')"
   fi
   return $restart_status
 }
-trap restart_stack EXIT
-
-echo "[*] Stopping stack '$INSTANCE' before the backup..."
-if "${COMPOSE_CMD[@]}" down; then
-  stack_was_stopped=1
-else
-  echo "[!] Failed to stop stack '$INSTANCE'." >&2
-  exit 1
-fi
 
 app_data_dir_rel="${DEPLOY_CONTEXT[APP_DATA_REL]}"
 app_data_path="${DEPLOY_CONTEXT[APP_DATA_PATH]}"
@@ -145,23 +265,128 @@ else
   echo "[*] No active applications detected; no services will be restarted."
 fi
 
+# Latest snapshot of this instance with a manifest, i.e. one that an
+# incremental run finished writing.
+find_previous_snapshot() {
+  local manifest previous=""
+  for manifest in "$REPO_ROOT/backups/${INSTANCE}-"[0-9]*-[0-9]*.manifest.json; do
+    if [[ -f "$manifest" && -d "${manifest%.manifest.json}" ]]; then
+      previous="${manifest%.manifest.json}"
+    fi
+  done
+  printf '%s' "$previous"
+}
+
 timestamp="$(date +%Y%m%d-%H%M%S)"
 backup_dir="$REPO_ROOT/backups/${INSTANCE}-${timestamp}"
-mkdir -p "$backup_dir"
+backup_target="$backup_dir"
+case "$ARCHIVE" in
+zstd) backup_target="$backup_dir.tar.zst" ;;
+gzip) backup_target="$backup_dir.tar.gz" ;;
+esac
+
+declare -a snapshot_args=(--source "$data_src" --dest "$backup_dir" --jobs "$JOBS")
+if [[ "$INCREMENTAL" == "1" ]]; then
+  previous_snapshot="$(find_previous_snapshot)"
+  if [[ -n "$previous_snapshot" ]]; then
+    echo "[*] Linking unchanged files from '$previous_snapshot'."
+    snapshot_args+=(--link-dest "$previous_snapshot")
+  else
+    echo "[*] No previous incremental snapshot found; copying every file."
+  fi
+fi
+if [[ "$CHECKSUM" == "1" ]]; then
+  snapshot_args+=(--checksum)
+fi
 
-echo "[*] Copying data from '$data_src' to '$backup_dir'..."
-if ! cp -a "$data_src/." "$backup_dir/"; then
+# Drops an unfinished snapshot (directory, pre-copy file list and manifest).
+remove_snapshot() {
   rm -rf "$backup_dir"
-  echo "[!] Failed to copy data to '$backup_dir'." >&2
+  rm -f "$backup_dir.partial.json" "$backup_dir.manifest.json"
+}
+
+# Copies (or, into an existing pre-copy, delta-syncs) the data directory with
+# backup_snapshot.py, which clones files on reflink-capable filesystems and
+# copies them in the kernel otherwise. Extra arguments are passed through
+# (--partial for the live pre-copy, which must not get a manifest). Removes
+# the partial snapshot on failure.
+run_snapshot() {
+  mkdir -p "$REPO_ROOT/backups"
+  if ! PYTHON_RUNTIME_EXTRA_MOUNTS="$data_src" PYTHON_RUNTIME_SKIP_REQUIREMENTS=1 python_runtime__run "$REPO_ROOT" "" -- \
+    "$SCRIPT_DIR/_internal/python/backup_snapshot.py" "${snapshot_args[@]}" "$@"; then
+    remove_snapshot
+    echo "[!] Failed to copy data to '$backup_dir'." >&2
+    return 1
+  fi
+}
+
+if [[ "$LOW_DOWNTIME" == "1" ]]; then
+  echo "[*] Pre-copying data from '$data_src' to '$backup_dir' while the stack is running..."
+  run_snapshot --partial || exit 1
+fi
+
+trap restart_stack EXIT
+
+echo "[*] Stopping stack '$INSTANCE' before the backup..."
+downtime_started="$EPOCHREALTIME"
+downtime_seconds=""
+if "${COMPOSE_CMD[@]}" down; then
+  stack_was_stopped=1
+else
+  echo "[!] Failed to stop stack '$INSTANCE'." >&2
+  if [[ "$LOW_DOWNTIME" == "1" ]]; then
+    remove_snapshot
+  fi
   exit 1
 fi
 
-echo "[*] Backup for instance '$INSTANCE' completed at '$backup_dir'."
+# Streams the data directory into a compressed archive with backup_archive.py.
+# Without an explicit --jobs/BACKUP_JOBS the compressor uses every core.
+run_archive() {
+  local archive_jobs=0
+  if ((JOBS_EXPLICIT == 1)); then
+    archive_jobs="$JOBS"
+  fi
+  mkdir -p "$REPO_ROOT/backups"
+  if ! PYTHON_RUNTIME_EXTRA_MOUNTS="$data_src" PYTHON_RUNTIME_SKIP_REQUIREMENTS=1 python_runtime__run "$REPO_ROOT" "" -- \
+    "$SCRIPT_DIR/_internal/python/backup_archive.py" \
+    --source "$data_src" --dest "$backup_dir" --compression "$ARCHIVE" --jobs "$archive_jobs"; then
+    rm -f "$backup_dir.manifest.json"
+    echo "[!] Failed to archive data to '$backup_target'." >&2
+    return 1
+  fi
+}
+
+if [[ "$LOW_DOWNTIME" == "1" ]]; then
+  echo "[*] Syncing files changed since the pre-copy into '$backup_dir'..."
+  run_snapshot || exit 1
+elif [[ "$INCREMENTAL" == "1" ]]; then
+  echo "[*] Copying data from '$data_src' to '$backup_dir'..."
+  run_snapshot || exit 1
+elif [[ -n "$ARCHIVE" ]]; then
+  echo "[*] Archiving data from '$data_src' to '$backup_target'..."
+  run_archive || exit 1
+else
+  mkdir -p "$backup_dir"
+
+  echo "[*] Copying data from '$data_src' to '$backup_dir'..."
+  if ! cp -a "$data_src/." "$backup_dir/"; then
+    rm -rf "$backup_dir"
+    echo "[!] Failed to copy data to '$backup_dir'." >&2
+    exit 1
+  fi
+fi
+
+echo "[*] Backup for instance '$INSTANCE' completed at '$backup_target'."
 
 # Restart the stack (trap handles it on earlier errors).
 restart_stack || true
 trap - EXIT
 
+if [[ -n "$downtime_seconds" ]]; then
+  echo "[*] Downtime: ${downtime_seconds}s from stopping the stack to restarting it."
+fi
+
 if [[ $restart_failed -eq 1 ]]; then
   exit 1
 fi
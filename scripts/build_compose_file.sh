@@ -24,6 +24,9 @@ Flags:
                         COMPOSE_ENV_CHAIN).
   -o, --output PATH     Output path (default: ./docker-compose.yml).
   -n, --env-output PATH Consolidated .env path (default: ./.env).
+  --check               Do not generate anything; exit 0 when the existing
+                        output was built from the current inputs (compose
+                        plan, env chain, and their contents) and 1 otherwise.
 
 Relevant environment variables:
   COMPOSE_EXTRA_FILES  Extra compose files applied after the default plan.
@@ -55,8 +58,11 @@ source "$SCRIPT_DIR/_internal/lib/compose_env_chain.sh"
 source "$SCRIPT_DIR/_internal/lib/compose_env_validation.sh"
 # shellcheck source=_internal/lib/env_file_chain.sh
 source "$SCRIPT_DIR/_internal/lib/env_file_chain.sh"
+# shellcheck source=_internal/lib/compose_build_stamp.sh
+source "$SCRIPT_DIR/_internal/lib/compose_build_stamp.sh"
 
 INSTANCE_NAME=""
+CHECK_ONLY=0
 OUTPUT_FILE="$REPO_ROOT/docker-compose.yml"
 ENV_OUTPUT_FILE="$REPO_ROOT/.env"
 GENERATED_HEADER="# GENERATED FILE. DO NOT EDIT. RE-RUN SCRIPTS/BUILD_COMPOSE_FILE.SH OR SCRIPTS/DEPLOY_INSTANCE.SH."
@@ -110,6 +116,9 @@ while [[ $# -gt 0 ]]; do
     fi
     ENV_OUTPUT_FILE="$1"
     ;;
+  --check)
+    CHECK_ONLY=1
+    ;;
   --)
     shift
     break
@@ -217,6 +226,17 @@ if ! compose_env_chain__prepare \
   exit 1
 fi
 
+inputs_digest="$(compose_build_stamp__compute "$REPO_ROOT" "$INSTANCE_NAME" compose_files_list COMPOSE_ENV_FILES_RESOLVED)"
+if ((CHECK_ONLY == 1)); then
+  if compose_build_stamp__is_fresh "$OUTPUT_FILE" "$ENV_OUTPUT_FILE" "$INSTANCE_NAME" "$inputs_digest"; then
+    printf '%s is up to date for instance %s.\n' "$OUTPUT_FILE" "$INSTANCE_NAME"
+    exit 0
+  fi
+  printf '%s is missing or stale for instance %s.\n' "$OUTPUT_FILE" "$INSTANCE_NAME"
+  exit 1
+fi
+rm -f "$(compose_build_stamp__path "$OUTPUT_FILE")"
+
 printf 'Resolved env chain (order):\n'
 if ((${#COMPOSE_ENV_FILES_RESOLVED[@]} > 0)); then
   printf '  - %s\n' "${COMPOSE_ENV_FILES_RESOLVED[@]}"
@@ -291,6 +311,7 @@ if ! "${validate_cmd[@]}"; then
   echo "Error: inconsistencies detected while validating $OUTPUT_FILE." >&2
   exit 1
 fi
+compose_build_stamp__write "$OUTPUT_FILE" "$ENV_OUTPUT_FILE" "$INSTANCE_NAME" "$inputs_digest"
 
 printf 'docker-compose.yml generated at: %s\n' "$OUTPUT_FILE"
 printf 'Applied compose files (order):\n'
@@ -14,6 +14,9 @@ source "$SCRIPT_DIR/_internal/lib/app_detection.sh"
 # shellcheck source=_internal/lib/compose_command.sh
 source "$SCRIPT_DIR/_internal/lib/compose_command.sh"
 
+# shellcheck source=_internal/lib/compose_mounts.sh
+source "$SCRIPT_DIR/_internal/lib/compose_mounts.sh"
+
 # shellcheck source=_internal/lib/db_integrity_backend.sh
 source "$SCRIPT_DIR/_internal/lib/db_integrity_backend.sh"
 
@@ -38,25 +41,47 @@ SQLITE3_CONTAINER_IMAGE="${SQLITE3_CONTAINER_IMAGE:-keinos/sqlite3:latest}"
 OUTPUT_FORMAT="text"
 OUTPUT_FILE=""
 JSON_STDOUT_REDIRECTED=0
+INTEGRITY_JOBS="${DB_INTEGRITY_JOBS:-1}"
+INTEGRITY_FULL="${DB_INTEGRITY_FULL:-0}"
+INTEGRITY_UNCHANGED="${DB_INTEGRITY_UNCHANGED:-skip}"
+LEDGER_FILE="${DB_INTEGRITY_LEDGER:-}"
+USE_LEDGER=1
+ONLINE_MODE="${DB_INTEGRITY_ONLINE:-0}"
+SNAPSHOT_DIR="" # Removed by the EXIT trap.
+BASELINE_DIR="" # Removed by the EXIT trap.
+PAUSE_SCOPE="${DB_INTEGRITY_PAUSE:-owners}"
+declare -a INCLUDE_GLOBS=() EXCLUDE_GLOBS=()
+IFS=$', \t\n' read -r -d '' -a INCLUDE_GLOBS <<<"${DB_INTEGRITY_INCLUDE:-}" || true
+IFS=$', \t\n' read -r -d '' -a EXCLUDE_GLOBS <<<"${DB_INTEGRITY_EXCLUDE:-}" || true
 
 SQLITE3_BACKEND=""
 SQLITE3_BIN_PATH=""
 
 declare -ag COMPOSE_CMD=()
+declare -ag ACTIVE_SERVICES=()
 declare -ag PAUSED_SERVICES=() # Updated when services are paused and read in the EXIT trap.
+declare -ag RESTART_SERVICES=() # Owners of recovered databases, restarted instead of unpaused.
 PAUSED_STACK=0
 
 ALERTS=()
 FIELD_SEPARATOR=$'\x1f'
 declare -a DB_RESULTS=()
+declare -a CHECK_OUTPUTS=()
+declare -a CHECK_STATUSES=()
+declare -a DB_CHECK_MODES=() # full, quick or skipped, per DB_FILES index.
+declare -a DB_CHECK_OUTPUTS=()
+declare -a DB_CHECK_STATUSES=()
+declare -a CHECK_TARGETS=() # File actually checked (an online snapshot) per DB_FILES index.
+declare -a LEDGER_BASELINES=() # Fingerprint file recorded for a verified database.
+CHECK_MOUNT_DIR=""
 
 print_help() {
   cat <<'USAGE'
 Usage: scripts/check_db_integrity.sh instance [options]
 
-Pauses active instance services, checks the integrity of SQLite (*.db) files
-inside the data directory (or a custom directory), and attempts recovery
-when needed.
+Pauses active instance services, checks the integrity of SQLite files
+(*.db, *.sqlite, *.sqlite3, or any file with the SQLite header) inside the
+data directory (or a custom directory), and attempts recovery when needed.
 
 Positional arguments:
   instance               Name of the instance defined in docker compose manifests.
@@ -65,23 +90,51 @@ Options:
   --data-dir <dir>       Base directory containing .db files (default: data/).
   --format {text,json}   Sets the output format (default: text).
   --no-resume            Do not resume services after verification.
+  -j, --jobs <N>         Check up to N databases concurrently (default: 1).
+  --full                 Run a full integrity_check on every database, ignoring the ledger.
+  --no-ledger            Neither read nor update the integrity ledger.
+  --online               Check snapshots taken with the SQLite backup API while
+                         services keep running; pause only if recovery is needed.
+  --pause-all            Pause every active service instead of only the
+                         services whose bind mounts contain the databases.
+  --include <glob>       File name glob always treated as a database (repeatable;
+                         replaces the default *.db, *.sqlite, *.sqlite3).
+  --exclude <glob>       Skip files or directories matching the glob (repeatable).
   --output <file>        Path to write the final summary.
   -h, --help             Show this help and exit.
 
 Relevant environment variables:
-  SQLITE3_MODE           Forces 'container', 'binary', or 'auto' (default: container).
+  SQLITE3_MODE           Forces 'container', 'binary', 'python', or 'auto' (default: container).
   SQLITE3_CONTAINER_RUNTIME  Container runtime to use (default: docker).
   SQLITE3_CONTAINER_IMAGE    sqlite3 container image (default: keinos/sqlite3:latest).
   SQLITE3_BIN            Path to a local sqlite3 binary (used in binary mode or fallback).
   DATA_DIR               Alternative to --data-dir.
+  DB_INTEGRITY_JOBS      Same as --jobs.
+  DB_INTEGRITY_FULL      Set to 1 for the same effect as --full.
+  DB_INTEGRITY_UNCHANGED What to do with databases unchanged since their last
+                         verified check: 'skip' (default) or 'quick' (quick_check).
+  DB_INTEGRITY_LEDGER    Ledger path (default: <data dir>/.integrity-ledger.json).
+  DB_INTEGRITY_ONLINE    Set to 1 for the same effect as --online.
+  DB_INTEGRITY_SCRATCH   Directory for online snapshots (default: $TMPDIR or /tmp).
+  DB_INTEGRITY_PAUSE     'owners' (default) or 'all' (same as --pause-all).
+  DB_INTEGRITY_INCLUDE   Space or comma separated --include globs.
+  DB_INTEGRITY_EXCLUDE   Space or comma separated --exclude globs.
 
 Examples:
   scripts/check_db_integrity.sh core
   DATA_DIR="/mnt/storage/data" scripts/check_db_integrity.sh media --no-resume
+  scripts/check_db_integrity.sh media --online --jobs 4
 USAGE
 }
 
 trap '
+  if [[ -n "$SNAPSHOT_DIR" ]]; then
+    rm -rf "$SNAPSHOT_DIR"
+  fi
+  if [[ -n "$BASELINE_DIR" ]]; then
+    rm -rf "$BASELINE_DIR"
+  fi
+
   if ((PAUSED_STACK == 1 && RESUME_ON_EXIT == 1)); then
     if [[ ${#COMPOSE_CMD[@]} -gt 0 && ${#PAUSED_SERVICES[@]} -gt 0 ]]; then
       if ! "${COMPOSE_CMD[@]}" unpause "${PAUSED_SERVICES[@]}" >/dev/null 2>&1; then
@@ -143,6 +196,47 @@ parse_args() {
       # shellcheck disable=SC2034  # Read by the EXIT trap.
       RESUME_ON_EXIT=0
       ;;
+    -j | --jobs)
+      shift
+      if [[ $# -eq 0 ]]; then
+        echo "Error: --jobs requires an argument." >&2
+        exit 1
+      fi
+      INTEGRITY_JOBS="$1"
+      ;;
+    --jobs=*)
+      INTEGRITY_JOBS="${1#*=}"
+      ;;
+    --full)
+      INTEGRITY_FULL=1
+      ;;
+    --no-ledger)
+      USE_LEDGER=0
+      ;;
+    --online)
+      ONLINE_MODE=1
+      ;;
+    --pause-all)
+      PAUSE_SCOPE="all"
+      ;;
+    --include | --exclude)
+      if [[ $# -lt 2 ]]; then
+        echo "Error: $1 requires a glob." >&2
+        exit 1
+      fi
+      if [[ "$1" == "--include" ]]; then
+        INCLUDE_GLOBS+=("$2")
+      else
+        EXCLUDE_GLOBS+=("$2")
+      fi
+      shift
+      ;;
+    --include=*)
+      INCLUDE_GLOBS+=("${1#*=}")
+      ;;
+    --exclude=*)
+      EXCLUDE_GLOBS+=("${1#*=}")
+      ;;
     --output)
       shift
       if [[ $# -eq 0 ]]; then
@@ -174,6 +268,27 @@ parse_args() {
     shift || true
   done
 
+  if [[ ! "$INTEGRITY_JOBS" =~ ^[1-9][0-9]*$ ]]; then
+    echo "Error: --jobs requires a positive integer." >&2
+    exit 1
+  fi
+
+  case "$PAUSE_SCOPE" in
+  owners | all) ;;
+  *)
+    echo "Error: invalid value for DB_INTEGRITY_PAUSE: $PAUSE_SCOPE (owners|all)." >&2
+    exit 1
+    ;;
+  esac
+
+  case "$INTEGRITY_UNCHANGED" in
+  skip | quick) ;;
+  *)
+    echo "Error: invalid value for DB_INTEGRITY_UNCHANGED: $INTEGRITY_UNCHANGED (skip|quick)." >&2
+    exit 1
+    ;;
+  esac
+
   if [[ -z "$INSTANCE_NAME" ]]; then
     echo "Error: provide the instance to analyze." >&2
     print_help >&2
@@ -199,9 +314,70 @@ if [[ ! -d "$DATA_DIR" ]]; then
   exit 1
 fi
 
+LEDGER_FILE="${LEDGER_FILE:-$DATA_DIR/.integrity-ledger.json}"
+if [[ "$LEDGER_FILE" != /* ]]; then
+  LEDGER_FILE="$REPO_ROOT/$LEDGER_FILE"
+fi
+
+# The ledger reads the databases and the saved baselines, so the Docker
+# fallback needs every directory involved.
+integrity_ledger() {
+  PYTHON_RUNTIME_EXTRA_MOUNTS="$DATA_DIR:$(dirname "$LEDGER_FILE"):$SNAPSHOT_DIR:$BASELINE_DIR" \
+    PYTHON_RUNTIME_SKIP_REQUIREMENTS=1 python_runtime__run "$REPO_ROOT" "" -- \
+    "$SCRIPT_DIR/_internal/lib/db_integrity_ledger.py" --ledger "$LEDGER_FILE" "$@"
+}
+
+# Saves the ledger fingerprints of the DB_FILES at the given indexes into
+# LEDGER_BASELINES. Called while their owners are paused, so a write made
+# after they resume shows up as a change on the next run instead of being
+# recorded as verified.
+record_ledger_baselines() {
+  local db_index
+  if ((USE_LEDGER != 1 || $# == 0)); then
+    return 0
+  fi
+  if [[ -z "$BASELINE_DIR" ]] &&
+    ! BASELINE_DIR="$(mktemp -d "${DB_INTEGRITY_SCRATCH:-${TMPDIR:-/tmp}}/db-integrity-baselines.XXXXXX")"; then
+    BASELINE_DIR=""
+    echo "[!] Unable to create a directory for ledger fingerprints." >&2
+    return 0
+  fi
+  for db_index in "$@"; do
+    printf '%s\t%s\n' "${DB_FILES[$db_index]}" "$BASELINE_DIR/$db_index.fingerprint.json"
+  done | PYTHON_RUNTIME_EXTRA_MOUNTS="$DATA_DIR:$BASELINE_DIR" integrity_ledger fingerprint || true
+  for db_index in "$@"; do
+    if [[ -s "$BASELINE_DIR/$db_index.fingerprint.json" ]]; then
+      LEDGER_BASELINES[db_index]="$BASELINE_DIR/$db_index.fingerprint.json"
+    fi
+  done
+}
+
+# Runs the given pragma for the DB_FILES at the given indexes (or for their
+# CHECK_TARGETS snapshots) and stores the results in
+# DB_CHECK_OUTPUTS/DB_CHECK_STATUSES at those indexes.
+run_integrity_checks() {
+  local pragma="$1"
+  shift
+  local -a indexes=("$@") files=()
+  local position
+  if ((${#indexes[@]} == 0)); then
+    return 0
+  fi
+  for position in "${indexes[@]}"; do
+    files+=("${CHECK_TARGETS[position]:-${DB_FILES[$position]}}")
+  done
+  INTEGRITY_PRAGMA="$pragma" sqlite3_integrity_batch "${CHECK_MOUNT_DIR:-$DATA_DIR}" "${files[@]}"
+  for position in "${!indexes[@]}"; do
+    DB_CHECK_OUTPUTS[indexes[position]]="${CHECK_OUTPUTS[position]:-}"
+    DB_CHECK_STATUSES[indexes[position]]="${CHECK_STATUSES[position]:-1}"
+  done
+}
+
 resolve_sqlite_backend
 
-if [[ "$SQLITE3_BACKEND" == "container" ]]; then
+if [[ "$SQLITE3_BACKEND" == "python" ]]; then
+  echo "[i] Checking databases in-process with the Python sqlite3 module (read-only)." >&2
+elif [[ "$SQLITE3_BACKEND" == "container" ]]; then
   echo "[i] Running sqlite3 via container '$SQLITE3_CONTAINER_IMAGE' (runtime: $SQLITE3_CONTAINER_RUNTIME)." >&2
 fi
 
@@ -225,24 +401,84 @@ fi
 
 COMPOSE_CMD=("${DOCKER_COMPOSE_CMD[@]}" -f "$COMPOSE_ROOT_FILE")
 
-if ! app_detection__list_active_services PAUSED_SERVICES "${COMPOSE_CMD[@]}"; then
+if ! app_detection__list_active_services ACTIVE_SERVICES "${COMPOSE_CMD[@]}"; then
   echo "[!] Unable to list active services for instance '$INSTANCE_NAME'." >&2
-  PAUSED_SERVICES=()
+  ACTIVE_SERVICES=()
 fi
 
-if ((${#PAUSED_SERVICES[@]} > 0)); then
+# Pauses the given services (those not paused yet) and records them in
+# PAUSED_SERVICES for resume_paused_services and the EXIT trap.
+pause_services() {
+  local -a to_pause=()
+  local service paused
+  for service in "$@"; do
+    for paused in "${PAUSED_SERVICES[@]}"; do
+      if [[ "$paused" == "$service" ]]; then
+        continue 2
+      fi
+    done
+    to_pause+=("$service")
+  done
+  if ((${#to_pause[@]} == 0)); then
+    return 0
+  fi
+
   if [[ "$OUTPUT_FORMAT" == "text" ]]; then
-    echo "[*] Pausing active services: ${PAUSED_SERVICES[*]}"
+    echo "[*] Pausing services: ${to_pause[*]}"
   else
-    echo "[*] Pausing active services: ${PAUSED_SERVICES[*]}" >&2
+    echo "[*] Pausing services: ${to_pause[*]}" >&2
   fi
-  if ! "${COMPOSE_CMD[@]}" pause "${PAUSED_SERVICES[@]}"; then
-    echo "[!] Failed to pause services: ${PAUSED_SERVICES[*]}" >&2
-  else
-    # shellcheck disable=SC2034  # Read by the EXIT trap.
-    PAUSED_STACK=1
+  if ! "${COMPOSE_CMD[@]}" pause "${to_pause[@]}"; then
+    echo "[!] Failed to pause services: ${to_pause[*]}" >&2
+    return 0
   fi
-else
+  PAUSED_SERVICES+=("${to_pause[@]}")
+  # shellcheck disable=SC2034  # Read by the EXIT trap.
+  PAUSED_STACK=1
+}
+
+# Resumes everything pause_services paused, unless --no-resume was given (the
+# services then stay paused for investigation). Owners of a recovered database
+# (RESTART_SERVICES) are restarted instead: recovery renames a new file over
+# the database, and an unpaused process would keep using the old inode.
+resume_paused_services() {
+  if ((RESUME_ON_EXIT != 1)); then
+    if ((${#RESTART_SERVICES[@]} > 0)); then
+      echo "[!] Restart these services once investigated, they still use the replaced database files: ${RESTART_SERVICES[*]}" >&2
+    fi
+    return 0
+  fi
+
+  local -a to_unpause=()
+  local service
+  for service in "${PAUSED_SERVICES[@]}"; do
+    if [[ " ${RESTART_SERVICES[*]} " != *" $service "* ]]; then
+      to_unpause+=("$service")
+    fi
+  done
+  if ((${#to_unpause[@]} > 0)); then
+    if ! "${COMPOSE_CMD[@]}" unpause "${to_unpause[@]}" >/dev/null 2>&1; then
+      echo "[!] Failed to resume services: ${to_unpause[*]}" >&2
+      return 0
+    fi
+    echo "[+] Services resumed: ${to_unpause[*]}" >&2
+  fi
+  if ((${#RESTART_SERVICES[@]} > 0)); then
+    if "${COMPOSE_CMD[@]}" restart "${RESTART_SERVICES[@]}" >/dev/null 2>&1; then
+      echo "[+] Services restarted after recovery: ${RESTART_SERVICES[*]}" >&2
+    else
+      echo "[!] Failed to restart services after recovery: ${RESTART_SERVICES[*]}" >&2
+      "${COMPOSE_CMD[@]}" unpause "${RESTART_SERVICES[@]}" >/dev/null 2>&1 || true
+    fi
+    RESTART_SERVICES=()
+  fi
+  PAUSED_SERVICES=()
+  PAUSED_STACK=0
+}
+
+if ((ONLINE_MODE == 1)); then
+  echo "[*] Online mode: checking snapshots while services keep running." >&2
+elif ((${#ACTIVE_SERVICES[@]} == 0)); then
   if [[ "$OUTPUT_FORMAT" == "text" ]]; then
     echo "[*] No running services found to pause."
   else
@@ -250,38 +486,270 @@ else
   fi
 fi
 
+# Fills DB_FILES with the databases under DATA_DIR in path order, detected by
+# name or by SQLite header (db_integrity_discover.py). Falls back to a plain
+# `find -name '*.db'` when the scanner cannot run.
+discover_databases() {
+  local -a scan_args=()
+  local glob file
+  for glob in "${INCLUDE_GLOBS[@]}"; do
+    scan_args+=(--name "$glob")
+  done
+  for glob in "${EXCLUDE_GLOBS[@]}"; do
+    scan_args+=(--exclude "$glob")
+  done
+
+  DB_FILES=()
+  local scan_output
+  scan_output="$(mktemp)"
+  if PYTHON_RUNTIME_EXTRA_MOUNTS="$DATA_DIR" PYTHON_RUNTIME_SKIP_REQUIREMENTS=1 python_runtime__run "$REPO_ROOT" "" -- \
+    "$SCRIPT_DIR/_internal/lib/db_integrity_discover.py" scan "${scan_args[@]}" "$DATA_DIR" >"$scan_output"; then
+    while IFS= read -r -d '' file; do
+      DB_FILES+=("$file")
+    done <"$scan_output"
+    rm -f "$scan_output"
+    return 0
+  fi
+  rm -f "$scan_output"
+
+  echo "[!] Database scanner unavailable; looking for *.db files only." >&2
+  while IFS= read -r -d '' file; do
+    DB_FILES+=("$file")
+  done < <(find "$DATA_DIR" -type f -name '*.db' ! -name '*.bak' -print0 | LC_ALL=C sort -z)
+}
+
 declare -a DB_FILES=()
-while IFS= read -r -d '' file; do
-  DB_FILES+=("$file")
-done < <(find "$DATA_DIR" -type f -name '*.db' -print0)
+discover_databases
 
 if ((${#DB_FILES[@]} == 0)); then
   if [[ "$OUTPUT_FORMAT" == "text" ]]; then
-    echo "[i] No .db files found in $DATA_DIR."
+    echo "[i] No SQLite databases found in $DATA_DIR."
   else
-    echo "[i] No .db files found in $DATA_DIR." >&2
+    echo "[i] No SQLite databases found in $DATA_DIR." >&2
   fi
   exit 0
 fi
 
 overall_status=0
 
-for db_file in "${DB_FILES[@]}"; do
+# Maps every database to the running services whose bind mounts contain it
+# (DB_OWNERS: space-separated names, empty when no owner is running). Files no
+# bind mount covers, or every file with --pause-all, get "*": all active
+# services are paused for them.
+map_database_owners() {
+  local -a mounts=()
+  local raw_mounts="" db_index line service source owners matched
+  local -A active=()
+  for service in "${ACTIVE_SERVICES[@]}"; do
+    active[$service]=1
+  done
+
+  if [[ "$PAUSE_SCOPE" == "owners" && ${#ACTIVE_SERVICES[@]} -gt 0 ]]; then
+    local -a mount_env_files=()
+    if [[ -f "$REPO_ROOT/.env" ]]; then
+      mount_env_files+=("$REPO_ROOT/.env")
+    fi
+    if raw_mounts="$(compose_mounts__collect_bind_mounts "$REPO_ROOT" "$INSTANCE_NAME" mount_env_files "$COMPOSE_ROOT_FILE")"; then
+      if [[ -n "$raw_mounts" ]]; then
+        mapfile -t mounts <<<"$raw_mounts"
+      fi
+    else
+      echo "[!] Unable to read bind mounts from $COMPOSE_ROOT_FILE; pausing every active service." >&2
+    fi
+  fi
+
+  for db_index in "${!DB_FILES[@]}"; do
+    owners=""
+    matched=0
+    for line in "${mounts[@]}"; do
+      IFS=$'\t' read -r service source _ <<<"$line"
+      source="${source%/}"
+      if [[ -z "$source" || "${DB_FILES[$db_index]}" != "$source"/* ]]; then
+        continue
+      fi
+      matched=1
+      if [[ -n "${active[$service]:-}" && " $owners " != *" $service "* ]]; then
+        owners="${owners:+$owners }$service"
+      fi
+    done
+    if ((matched == 0)); then
+      owners="*"
+    fi
+    DB_OWNERS[db_index]="$owners"
+  done
+}
+
+# Pauses the running owners of a database ("*" stands for every active
+# service).
+pause_owners() {
+  local owners="$1"
+  local -a services=()
+  if [[ "$owners" == "*" ]]; then
+    services=("${ACTIVE_SERVICES[@]}")
+  elif [[ -n "$owners" ]]; then
+    read -r -a services <<<"$owners"
+  fi
+  pause_services "${services[@]}"
+}
+
+# Marks the running owners of a recovered database for a restart by
+# resume_paused_services.
+restart_owners() {
+  local owners="$1"
+  local -a services=()
+  local service
+  if [[ "$owners" == "*" ]]; then
+    services=("${ACTIVE_SERVICES[@]}")
+  elif [[ -n "$owners" ]]; then
+    read -r -a services <<<"$owners"
+  fi
+  for service in "${services[@]}"; do
+    if [[ " ${RESTART_SERVICES[*]} " != *" $service "* ]]; then
+      RESTART_SERVICES+=("$service")
+    fi
+  done
+}
+
+# Checks the DB_FILES at the given indexes with integrity_check or quick_check
+# according to DB_CHECK_MODES. In --online mode every database is first copied
+# with the SQLite backup API (a consistent read, taken while services keep
+# running) and the copies are checked instead; a database that cannot be
+# snapshotted (lock timeout, full scratch directory) is checked live with its
+# owners paused.
+check_databases() {
+  local -a full_indexes=() quick_indexes=()
+  local db_index
+  for db_index in "$@"; do
+    if [[ "${DB_CHECK_MODES[db_index]}" == "quick" ]]; then
+      quick_indexes+=("$db_index")
+    else
+      full_indexes+=("$db_index")
+    fi
+  done
+
+  local checked_count=$#
+  if [[ "$SQLITE3_BACKEND" == "container" ]]; then
+    echo "[*] Checking $checked_count database(s) in a single sqlite3 container session (jobs: $INTEGRITY_JOBS)." >&2
+  elif ((INTEGRITY_JOBS > 1)); then
+    echo "[*] Checking $checked_count database(s) with up to $INTEGRITY_JOBS concurrent checks." >&2
+  fi
+
+  if ((ONLINE_MODE == 1)); then
+    SNAPSHOT_DIR="$(mktemp -d "${DB_INTEGRITY_SCRATCH:-${TMPDIR:-/tmp}}/db-integrity-snapshots.XXXXXX")"
+    CHECK_MOUNT_DIR="$SNAPSHOT_DIR"
+    local -a snapshot_indexes=("${full_indexes[@]}" "${quick_indexes[@]}") snapshot_sources=() live_indexes=()
+    local position snapshot_state snapshot_message
+    for db_index in "${snapshot_indexes[@]}"; do
+      snapshot_sources+=("${DB_FILES[$db_index]}")
+    done
+    echo "[*] Taking online snapshots of ${#snapshot_sources[@]} database(s) in $SNAPSHOT_DIR." >&2
+    while IFS=$'\t' read -r position snapshot_state snapshot_message; do
+      db_index="${snapshot_indexes[position]}"
+      if [[ "$snapshot_state" == "ok" && ! -f "$SNAPSHOT_DIR/$position.db" ]]; then
+        snapshot_state="error"
+        snapshot_message="snapshot file $SNAPSHOT_DIR/$position.db is missing"
+      fi
+      if [[ "$snapshot_state" == "ok" ]]; then
+        CHECK_TARGETS[db_index]="$SNAPSHOT_DIR/$position.db"
+        LEDGER_BASELINES[db_index]="$SNAPSHOT_DIR/$position.fingerprint.json"
+      else
+        echo "[!] Online snapshot failed for ${DB_FILES[$db_index]}: $snapshot_message" >&2
+      fi
+    done < <(PYTHON_RUNTIME_EXTRA_MOUNTS="$DATA_DIR:$SNAPSHOT_DIR" PYTHON_RUNTIME_SKIP_REQUIREMENTS=1 python_runtime__run "$REPO_ROOT" "" -- \
+      "$SCRIPT_DIR/_internal/lib/db_integrity_snapshot.py" --dest "$SNAPSHOT_DIR" --jobs "$INTEGRITY_JOBS" \
+      -- "${snapshot_sources[@]}" || true)
+
+    local -a snapshot_full=() snapshot_quick=()
+    for db_index in "${snapshot_indexes[@]}"; do
+      if [[ -z "${CHECK_TARGETS[db_index]:-}" ]]; then
+        live_indexes+=("$db_index")
+      elif [[ "${DB_CHECK_MODES[db_index]}" == "quick" ]]; then
+        snapshot_quick+=("$db_index")
+      else
+        snapshot_full+=("$db_index")
+      fi
+    done
+    run_integrity_checks integrity_check "${snapshot_full[@]}"
+    run_integrity_checks quick_check "${snapshot_quick[@]}"
+    if ((${#live_indexes[@]} == 0)); then
+      return 0
+    fi
+
+    # A failed snapshot says nothing about the database itself, so those
+    # files get the offline check instead: owners paused, live file read.
+    full_indexes=() quick_indexes=()
+    for db_index in "${live_indexes[@]}"; do
+      pause_owners "${DB_OWNERS[db_index]}"
+      if [[ "${DB_CHECK_MODES[db_index]}" == "quick" ]]; then
+        quick_indexes+=("$db_index")
+      else
+        full_indexes+=("$db_index")
+      fi
+    done
+    CHECK_MOUNT_DIR=""
+    set -- "${live_indexes[@]}"
+  fi
+
+  # With the owners paused, fold committed WAL frames into the main file first
+  # (a passive checkpoint never waits on a lock) so the file on disk matches
+  # what the check reads.
+  local -a wal_databases=()
+  for db_index in "$@"; do
+    if [[ -s "${DB_FILES[$db_index]}-wal" ]]; then
+      wal_databases+=("${DB_FILES[$db_index]}")
+    fi
+  done
+  if ((${#wal_databases[@]} > 0)); then
+    PYTHON_RUNTIME_EXTRA_MOUNTS="$DATA_DIR" PYTHON_RUNTIME_SKIP_REQUIREMENTS=1 python_runtime__run "$REPO_ROOT" "" -- \
+      "$SCRIPT_DIR/_internal/lib/db_integrity_discover.py" checkpoint "${wal_databases[@]}" ||
+      echo "[!] Unable to checkpoint WAL files before the check." >&2
+  fi
+
+  record_ledger_baselines "${full_indexes[@]}"
+  run_integrity_checks integrity_check "${full_indexes[@]}"
+  run_integrity_checks quick_check "${quick_indexes[@]}"
+}
+
+declare -a LEDGER_UPDATES=()
+declare -a RESULT_ORDER=()
+
+# Records the check result of one database and recovers it when the check
+# failed. In --online mode its owners are paused just before the recovery
+# (if the live check has not paused them already), because recovery rewrites
+# the live file.
+apply_check_result() {
+  local db_index="$1"
+  local db_file="${DB_FILES[$db_index]}"
+  local check_mode="${DB_CHECK_MODES[db_index]}"
+  RESULT_ORDER+=("$db_index")
+  if [[ "$check_mode" == "skipped" ]]; then
+    record_result "$db_file" "skipped" "Unchanged since the last verified integrity check" "No action required"
+    LEDGER_UPDATES+=("keep"$'\t'"$db_file")
+    if [[ "$OUTPUT_FORMAT" == "text" ]]; then
+      echo "[=] Unchanged since the last verified check, skipped: $db_file"
+    else
+      echo "[=] Unchanged since the last verified check, skipped: $db_file" >&2
+    fi
+    return 0
+  fi
+
   if [[ "$OUTPUT_FORMAT" == "text" ]]; then
     echo "[*] Checking integrity of: $db_file"
   else
     echo "[*] Checking integrity of: $db_file" >&2
   fi
-  check_output=""
-  check_status=0
-  if ! check_output="$(sqlite3_exec "$db_file" "PRAGMA integrity_check;" 2>&1)"; then
-    check_status=$?
-  fi
+  local check_output="${DB_CHECK_OUTPUTS[db_index]:-}"
+  local check_status="${DB_CHECK_STATUSES[db_index]:-1}"
+  local local_message action_message
 
   if ((check_status != 0)) || [[ "$check_output" != "ok" ]]; then
     local_message="Integrity check failed: ${check_output//$'\n'/; }"
     ALERTS+=("$local_message in $db_file")
+    if ((ONLINE_MODE == 1)); then
+      pause_owners "${DB_OWNERS[db_index]}"
+    fi
     if attempt_recovery "$db_file"; then
+      restart_owners "${DB_OWNERS[db_index]}"
       action_message="Automatic recovery completed. Backup saved at $RECOVERY_BACKUP_PATH (${RECOVERY_DETAILS})."
       ALERTS+=("Database '$db_file' recovered. Backup saved at $RECOVERY_BACKUP_PATH (${RECOVERY_DETAILS}).")
       record_result "$db_file" "recovered" "$local_message" "$action_message"
@@ -299,16 +767,115 @@ for db_file in "${DB_FILES[@]}"; do
       echo "[!] Failed to recover $db_file: $RECOVERY_DETAILS" >&2
       overall_status=2
     fi
+  elif [[ "$check_mode" == "quick" ]]; then
+    record_result "$db_file" "ok" "Quick check OK (unchanged since the last full check)" "No action required"
+    LEDGER_UPDATES+=("keep"$'\t'"$db_file")
+    if [[ "$OUTPUT_FORMAT" == "text" ]]; then
+      echo "[+] Quick check OK"
+    else
+      echo "[+] Quick check OK" >&2
+    fi
   else
     record_result "$db_file" "ok" "Integrity OK" "No action required"
+    LEDGER_UPDATES+=("verified"$'\t'"$db_file${LEDGER_BASELINES[db_index]:+$'\t'${LEDGER_BASELINES[db_index]}}")
     if [[ "$OUTPUT_FORMAT" == "text" ]]; then
       echo "[+] Integrity OK"
     else
       echo "[+] Integrity OK" >&2
     fi
   fi
+}
+
+# Databases whose fingerprint matches their ledger entry (recorded after the
+# last full check that passed) are skipped, or only quick-checked.
+declare -a LEDGER_STATES=()
+if ((USE_LEDGER == 1 && INTEGRITY_FULL != 1)); then
+  mapfile -t LEDGER_STATES < <(integrity_ledger classify "${DB_FILES[@]}" || true)
+  if ((${#LEDGER_STATES[@]} != ${#DB_FILES[@]})); then
+    echo "[!] Unable to read the integrity ledger $LEDGER_FILE; checking every database." >&2
+    LEDGER_STATES=()
+  fi
+fi
+
+declare -a CHECK_INDEXES=()
+for db_index in "${!DB_FILES[@]}"; do
+  if [[ "${LEDGER_STATES[db_index]:-changed}" != "unchanged" ]]; then
+    DB_CHECK_MODES[db_index]="full"
+    CHECK_INDEXES+=("$db_index")
+  elif [[ "$INTEGRITY_UNCHANGED" == "quick" ]]; then
+    DB_CHECK_MODES[db_index]="quick"
+    CHECK_INDEXES+=("$db_index")
+  else
+    DB_CHECK_MODES[db_index]="skipped"
+    apply_check_result "$db_index"
+  fi
+done
 
+unchanged_count=$((${#DB_FILES[@]} - ${#CHECK_INDEXES[@]}))
+for db_index in "${CHECK_INDEXES[@]}"; do
+  if [[ "${DB_CHECK_MODES[db_index]}" == "quick" ]]; then
+    unchanged_count=$((unchanged_count + 1))
+  fi
 done
+if ((unchanged_count > 0)); then
+  if [[ "$INTEGRITY_UNCHANGED" == "quick" ]]; then
+    echo "[i] $unchanged_count database(s) unchanged since their last verified check; running quick_check only." >&2
+  else
+    echo "[i] $unchanged_count database(s) unchanged since their last verified check; skipping (use --full to check them)." >&2
+  fi
+fi
+
+declare -a DB_OWNERS=()
+if ((${#CHECK_INDEXES[@]} > 0)); then
+  map_database_owners
+fi
+
+if ((ONLINE_MODE == 1 && ${#CHECK_INDEXES[@]} > 0)); then
+  check_databases "${CHECK_INDEXES[@]}"
+  for db_index in "${CHECK_INDEXES[@]}"; do
+    apply_check_result "$db_index"
+  done
+  resume_paused_services
+elif ((${#CHECK_INDEXES[@]} > 0)); then
+  # Databases are batched by the services that own them: each batch pauses
+  # only its owners for its checks and recoveries, then resumes them, so
+  # unrelated services stay up.
+  declare -a OWNER_GROUPS=()
+  declare -A GROUP_INDEXES=()
+  for db_index in "${CHECK_INDEXES[@]}"; do
+    owners="${DB_OWNERS[db_index]}"
+    if [[ -z "${GROUP_INDEXES[$owners]+set}" ]]; then
+      OWNER_GROUPS+=("$owners")
+      GROUP_INDEXES[$owners]=""
+    fi
+    GROUP_INDEXES[$owners]+=" $db_index"
+  done
+
+  for owners in "${OWNER_GROUPS[@]}"; do
+    read -r -a group_indexes <<<"${GROUP_INDEXES[$owners]}"
+    pause_owners "$owners"
+    check_databases "${group_indexes[@]}"
+    for db_index in "${group_indexes[@]}"; do
+      apply_check_result "$db_index"
+    done
+    resume_paused_services
+  done
+fi
+
+# Report entries follow the path order whatever order the batches ran in.
+declare -a ORDERED_RESULTS=()
+for position in "${!RESULT_ORDER[@]}"; do
+  ORDERED_RESULTS[RESULT_ORDER[position]]="${DB_RESULTS[position]}"
+done
+DB_RESULTS=("${ORDERED_RESULTS[@]}")
+
+# Only databases that passed a full check (or are still known good) stay in
+# the ledger; recovered and corrupted files are checked in full next time.
+if ((USE_LEDGER == 1)); then
+  if ! printf '%s\n' "${LEDGER_UPDATES[@]}" | integrity_ledger update; then
+    echo "[!] Unable to update the integrity ledger $LEDGER_FILE." >&2
+  fi
+fi
 
 if ((${#ALERTS[@]} > 0)); then
   echo "=== ALERTS GENERATED ===" >&2
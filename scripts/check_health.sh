@@ -11,6 +11,15 @@ source "${SCRIPT_DIR}/_internal/lib/python_runtime.sh"
 
 OUTPUT_FORMAT="text"
 OUTPUT_FILE=""
+WATCH_MODE=0
+WATCH_INTERVAL="${HEALTH_WATCH_INTERVAL:-30s}"
+WATCH_TEXTFILE="${HEALTH_TEXTFILE:-}"
+HISTORY_MODE=0
+HISTORY_WINDOW="7d"
+HISTORY_DB=""
+PROBE_MODE="${HEALTH_PROBES:-0}"
+declare -a SCAN_PATTERN_ARGS=()
+PROBE_TIMEOUT="${HEALTH_PROBE_TIMEOUT:-3}"
 
 if [[ "$ORIGINAL_PWD" != "$REPO_ROOT" ]]; then
   cd "$REPO_ROOT"
@@ -27,6 +36,9 @@ source "$SCRIPT_DIR/_internal/lib/env_helpers.sh"
 # shellcheck source=./_internal/lib/env_file_chain.sh
 source "$SCRIPT_DIR/_internal/lib/env_file_chain.sh"
 
+# shellcheck source=./_internal/lib/docker_engine.sh
+source "$SCRIPT_DIR/_internal/lib/docker_engine.sh"
+
 # shellcheck source=./_internal/lib/health_logs.sh
 source "$SCRIPT_DIR/_internal/lib/health_logs.sh"
 
@@ -39,10 +51,54 @@ Checks service status for an instance and prints logs for the monitored services
 Options:
   --format {text,json}  Defines the output format (default: text).
   --output <file>       Writes the final output to the provided path in addition to stdout.
+  -j, --jobs <N>        Maximum concurrent log fetches (default: CPU count, at least 4).
+  --log-timeout <sec>   Per-call timeout for log fetches (default: 30; 0 disables it).
+  --log-mode <mode>     per-service (default) runs one logs call per service;
+                        combined fetches every service with a single call.
+  --tail <N>            Log lines kept per service (default: 50).
+  --since <dur>         Only read logs newer than a duration (e.g. 15m, 2h) or
+                        timestamp; the whole window is scanned for errors.
+  --scan-pattern <re>   Error regex counted in the logs (repeatable; default:
+                        ERROR, panic, OOMKilled).
+  --matches <K>         Matching log lines shown per service (default: 5).
+  --watch               Keep polling service state and print only state transitions
+                        (needs a local python3 with access to the docker CLI).
+  --interval <dur>      Poll interval in watch mode (e.g. 30s, 5m; default: 30s).
+  --textfile <file>     In watch mode, write Prometheus node_exporter metrics to this file.
+  --history             Summarize recorded checks (uptime, p50/p95 check duration) and exit.
+  --window <dur>        Time window for --history (e.g. 24h, 7d; default: 7d).
+  --history-db <file>   Record every check in this SQLite database (also read by --history).
+  --probe               Probe published TCP ports (and HTTP endpoints from
+                        HEALTH_HTTP_PROBES) and report connect/first-byte latency
+                        (needs a local python3 on the Docker host).
+  --probe-timeout <sec> Per-probe timeout (default: 3).
+
+Environment variables:
+  HEALTH_LOG_JOBS       Same as --jobs.
+  HEALTH_LOG_TIMEOUT    Same as --log-timeout.
+  HEALTH_LOG_MODE       Same as --log-mode.
+  HEALTH_LOG_TAIL       Same as --tail.
+  HEALTH_LOG_SINCE      Same as --since.
+  HEALTH_LOG_PATTERNS   Error regexes (Python syntax) separated by spaces or
+                        commas; also used by --watch and the history (empty
+                        disables scanning).
+  HEALTH_LOG_MATCHES    Same as --matches.
+  HEALTH_WATCH_INTERVAL Same as --interval.
+  HEALTH_TEXTFILE       Same as --textfile.
+  HEALTH_HISTORY_DB     Same as --history-db.
+  HEALTH_PROBES         Set to 1 to enable --probe.
+  HEALTH_PROBE_TIMEOUT  Same as --probe-timeout.
+  HEALTH_PROBE_HOST     Address probed for ports published on all interfaces
+                        (default: 127.0.0.1).
+  HEALTH_HTTP_PROBES    Services probed with HTTP GET, as service[:port][=/path]
+                        entries (e.g. "api=/healthz web:8080").
+  DOCKER_STATUS_BACKEND cli (default) or engine to query the Docker Engine API
+                        socket directly for container status and logs.
 
 Examples:
   scripts/check_health.sh core
   scripts/check_health.sh --format json --output status.json media
+  scripts/check_health.sh --watch --interval 30s --textfile /var/lib/node_exporter/core.prom core
 EOF
 }
 
@@ -99,6 +155,189 @@ while [[ $# -gt 0 ]]; do
     shift
     continue
     ;;
+  -j | --jobs)
+    if [[ $# -lt 2 ]]; then
+      echo "Error: --jobs requires a value." >&2
+      exit 2
+    fi
+    HEALTH_LOG_JOBS="$2"
+    shift 2
+    continue
+    ;;
+  --jobs=*)
+    HEALTH_LOG_JOBS="${1#*=}"
+    shift
+    continue
+    ;;
+  --log-timeout)
+    if [[ $# -lt 2 ]]; then
+      echo "Error: --log-timeout requires a value in seconds." >&2
+      exit 2
+    fi
+    HEALTH_LOG_TIMEOUT="$2"
+    shift 2
+    continue
+    ;;
+  --log-timeout=*)
+    HEALTH_LOG_TIMEOUT="${1#*=}"
+    shift
+    continue
+    ;;
+  --log-mode)
+    if [[ $# -lt 2 ]]; then
+      echo "Error: --log-mode requires a value (per-service|combined)." >&2
+      exit 2
+    fi
+    HEALTH_LOG_MODE="$2"
+    shift 2
+    continue
+    ;;
+  --log-mode=*)
+    HEALTH_LOG_MODE="${1#*=}"
+    shift
+    continue
+    ;;
+  --tail)
+    if [[ $# -lt 2 ]]; then
+      echo "Error: --tail requires a number of lines." >&2
+      exit 2
+    fi
+    HEALTH_LOG_TAIL="$2"
+    shift 2
+    continue
+    ;;
+  --tail=*)
+    HEALTH_LOG_TAIL="${1#*=}"
+    shift
+    continue
+    ;;
+  --since)
+    if [[ $# -lt 2 ]]; then
+      echo "Error: --since requires a duration or timestamp (e.g. 15m)." >&2
+      exit 2
+    fi
+    HEALTH_LOG_SINCE="$2"
+    shift 2
+    continue
+    ;;
+  --since=*)
+    HEALTH_LOG_SINCE="${1#*=}"
+    shift
+    continue
+    ;;
+  --scan-pattern)
+    if [[ $# -lt 2 ]]; then
+      echo "Error: --scan-pattern requires a regular expression." >&2
+      exit 2
+    fi
+    SCAN_PATTERN_ARGS+=("$2")
+    shift 2
+    continue
+    ;;
+  --scan-pattern=*)
+    SCAN_PATTERN_ARGS+=("${1#*=}")
+    shift
+    continue
+    ;;
+  --matches)
+    if [[ $# -lt 2 ]]; then
+      echo "Error: --matches requires a number of lines." >&2
+      exit 2
+    fi
+    HEALTH_LOG_MATCHES="$2"
+    shift 2
+    continue
+    ;;
+  --matches=*)
+    HEALTH_LOG_MATCHES="${1#*=}"
+    shift
+    continue
+    ;;
+  --watch)
+    WATCH_MODE=1
+    shift
+    continue
+    ;;
+  --interval)
+    if [[ $# -lt 2 ]]; then
+      echo "Error: --interval requires a duration (e.g. 30s)." >&2
+      exit 2
+    fi
+    WATCH_INTERVAL="$2"
+    shift 2
+    continue
+    ;;
+  --interval=*)
+    WATCH_INTERVAL="${1#*=}"
+    shift
+    continue
+    ;;
+  --textfile)
+    if [[ $# -lt 2 ]]; then
+      echo "Error: --textfile requires a valid path." >&2
+      exit 2
+    fi
+    WATCH_TEXTFILE="$2"
+    shift 2
+    continue
+    ;;
+  --textfile=*)
+    WATCH_TEXTFILE="${1#*=}"
+    shift
+    continue
+    ;;
+  --history)
+    HISTORY_MODE=1
+    shift
+    continue
+    ;;
+  --window)
+    if [[ $# -lt 2 ]]; then
+      echo "Error: --window requires a duration (e.g. 7d)." >&2
+      exit 2
+    fi
+    HISTORY_WINDOW="$2"
+    shift 2
+    continue
+    ;;
+  --window=*)
+    HISTORY_WINDOW="${1#*=}"
+    shift
+    continue
+    ;;
+  --history-db)
+    if [[ $# -lt 2 ]]; then
+      echo "Error: --history-db requires a valid path." >&2
+      exit 2
+    fi
+    HISTORY_DB="$2"
+    shift 2
+    continue
+    ;;
+  --history-db=*)
+    HISTORY_DB="${1#*=}"
+    shift
+    continue
+    ;;
+  --probe)
+    PROBE_MODE=1
+    shift
+    continue
+    ;;
+  --probe-timeout)
+    if [[ $# -lt 2 ]]; then
+      echo "Error: --probe-timeout requires a value in seconds." >&2
+      exit 2
+    fi
+    PROBE_TIMEOUT="$2"
+    shift 2
+    continue
+    ;;
+  --probe-timeout=*)
+    PROBE_TIMEOUT="${1#*=}"
+    shift
+    continue
+    ;;
   --)
     shift
     while [[ $# -gt 0 ]]; do
@@ -118,6 +357,88 @@ while [[ $# -gt 0 ]]; do
   esac
 done
 
+if [[ -n "${HEALTH_LOG_JOBS:-}" && ! "$HEALTH_LOG_JOBS" =~ ^[1-9][0-9]*$ ]]; then
+  echo "Error: --jobs requires a positive integer." >&2
+  exit 2
+fi
+
+if [[ -n "${HEALTH_LOG_TIMEOUT:-}" && ! "$HEALTH_LOG_TIMEOUT" =~ ^[0-9]+$ ]]; then
+  echo "Error: --log-timeout requires a non-negative integer (seconds)." >&2
+  exit 2
+fi
+
+case "${HEALTH_LOG_MODE:-per-service}" in
+per-service | combined) ;;
+*)
+  echo "Error: invalid value for --log-mode: ${HEALTH_LOG_MODE}" >&2
+  exit 2
+  ;;
+esac
+
+if [[ -n "${HEALTH_LOG_TAIL:-}" && ! "$HEALTH_LOG_TAIL" =~ ^[1-9][0-9]*$ ]]; then
+  echo "Error: --tail requires a positive integer." >&2
+  exit 2
+fi
+
+if [[ -n "${HEALTH_LOG_MATCHES:-}" && ! "$HEALTH_LOG_MATCHES" =~ ^[1-9][0-9]*$ ]]; then
+  echo "Error: --matches requires a positive integer." >&2
+  exit 2
+fi
+
+# docker compose logs --since accepts relative durations, Unix timestamps and RFC 3339 times.
+if [[ -n "${HEALTH_LOG_SINCE:-}" && ! "$HEALTH_LOG_SINCE" =~ ^[0-9]+(\.[0-9]+)?(ms|s|m|h)?$ &&
+  ! "$HEALTH_LOG_SINCE" =~ ^[0-9]{4}-[0-9]{2}-[0-9]{2}(T[0-9:.]+(Z|[+-][0-9]{2}:[0-9]{2})?)?$ ]]; then
+  echo "Error: invalid value for --since: $HEALTH_LOG_SINCE" >&2
+  exit 2
+fi
+
+if ((${#SCAN_PATTERN_ARGS[@]} > 0)); then
+  HEALTH_LOG_PATTERN_LIST=("${SCAN_PATTERN_ARGS[@]}")
+else
+  # read -a splits without pathname expansion, so patterns like `.*` stay intact.
+  IFS=$', \n' read -r -d '' -a HEALTH_LOG_PATTERN_LIST \
+    <<<"${HEALTH_LOG_PATTERNS-ERROR panic OOMKilled}" || true
+fi
+# Every mode matches the patterns as Python regexes; reject invalid ones up front.
+declare -a HEALTH_PATTERN_ARGS=()
+for scan_pattern in "${HEALTH_LOG_PATTERN_LIST[@]}"; do
+  HEALTH_PATTERN_ARGS+=(--pattern "$scan_pattern")
+done
+if ((${#HEALTH_PATTERN_ARGS[@]} > 0)) &&
+  ! PYTHON_RUNTIME_SKIP_REQUIREMENTS=1 python_runtime__run "$REPO_ROOT" "" -- \
+    "$SCRIPT_DIR/_internal/lib/health_log_demux.py" --check-patterns "${HEALTH_PATTERN_ARGS[@]}"; then
+  exit 2
+fi
+
+if [[ ! "$WATCH_INTERVAL" =~ ^[0-9]+(\.[0-9]+)?(ms|s|m|h)?$ ]]; then
+  echo "Error: invalid value for --interval: $WATCH_INTERVAL" >&2
+  exit 2
+fi
+
+if [[ ! "$PROBE_TIMEOUT" =~ ^[0-9]+(\.[0-9]+)?$ || "$PROBE_TIMEOUT" =~ ^0+(\.0+)?$ ]]; then
+  echo "Error: --probe-timeout requires a positive number of seconds." >&2
+  exit 2
+fi
+
+if [[ "$WATCH_MODE" -eq 1 && -n "$OUTPUT_FILE" ]]; then
+  echo "Error: --output cannot be combined with --watch; use --textfile instead." >&2
+  exit 2
+fi
+
+# The watcher runs `docker compose` itself; the python_runtime Docker fallback
+# has neither the docker CLI nor the socket.
+if [[ "$WATCH_MODE" -eq 1 && -z "$(PYTHON_RUNTIME_SKIP_REQUIREMENTS=1 python_runtime__local_bin "$REPO_ROOT")" ]]; then
+  echo "Error: --watch requires a local python3 (the Docker fallback cannot run docker compose)." >&2
+  exit 2
+fi
+
+# Published ports are probed on the host's loopback; inside the fallback
+# container 127.0.0.1 is the container itself.
+if [[ "$PROBE_MODE" == "1" && -z "$(PYTHON_RUNTIME_SKIP_REQUIREMENTS=1 python_runtime__local_bin "$REPO_ROOT")" ]]; then
+  echo "Error: --probe requires a local python3 (the Docker fallback cannot reach the host's ports)." >&2
+  exit 2
+fi
+
 if [[ ${#POSITIONAL_ARGS[@]} -gt 0 ]]; then
   set -- "${POSITIONAL_ARGS[@]}"
 else
@@ -126,6 +447,32 @@ fi
 
 COMPOSE_ROOT_FILE="$REPO_ROOT/docker-compose.yml"
 INSTANCE_NAME="${1:-}"
+if [[ -z "$HISTORY_DB" ]]; then
+  # load_env_pairs keeps the first value found, so the instance file wins over common.env.
+  if [[ -n "$INSTANCE_NAME" ]]; then
+    load_env_pairs "$REPO_ROOT/env/local/$INSTANCE_NAME.env" HEALTH_HISTORY_DB || true
+  fi
+  load_env_pairs "$REPO_ROOT/env/local/common.env" HEALTH_HISTORY_DB || true
+  HISTORY_DB="${HEALTH_HISTORY_DB:-}"
+fi
+if [[ -n "$HISTORY_DB" && "$HISTORY_DB" != /* ]]; then
+  HISTORY_DB="$REPO_ROOT/$HISTORY_DB"
+fi
+RECORD_HISTORY=0
+if [[ -n "$HISTORY_DB" ]]; then
+  RECORD_HISTORY=1
+fi
+declare -a HISTORY_ARGS=(--db "$HISTORY_DB")
+
+if [[ "$HISTORY_MODE" -eq 1 ]]; then
+  if [[ "$RECORD_HISTORY" -eq 0 ]]; then
+    echo "Error: no history database configured; set HEALTH_HISTORY_DB or pass --history-db." >&2
+    exit 2
+  fi
+  python_runtime__run "$REPO_ROOT" "" -- "$SCRIPT_DIR/_internal/lib/health_history.py" "${HISTORY_ARGS[@]}" \
+    query --instance "$INSTANCE_NAME" --window "$HISTORY_WINDOW" --format "$OUTPUT_FORMAT"
+  exit $?
+fi
 
 unset COMPOSE_FILES
 unset COMPOSE_EXTRA_FILES
@@ -153,12 +500,26 @@ fi
 
 COMPOSE_CMD=("${DOCKER_COMPOSE_CMD[@]}" -f "$COMPOSE_ROOT_FILE")
 
+# The Engine API backend resolves the project name like Compose: from the
+# instance env chain, then the generated .env the CLI reads.
+if [[ -n "$INSTANCE_NAME" ]] && env_chain_output="$(env_file_chain__defaults "$REPO_ROOT" "$INSTANCE_NAME" 2>/dev/null)"; then
+  mapfile -t engine_env_chain <<<"$env_chain_output"
+  mapfile -t DOCKER_ENGINE_ENV_FILES < <(env_file_chain__to_absolute "$REPO_ROOT" "${engine_env_chain[@]}")
+fi
+if [[ -f "$REPO_ROOT/.env" ]]; then
+  DOCKER_ENGINE_ENV_FILES+=("$REPO_ROOT/.env")
+fi
+
 if [[ -z "${HEALTH_SERVICES:-}" ]]; then
   if [[ -f "$REPO_ROOT/.env" ]]; then
     load_env_pairs "$REPO_ROOT/.env" HEALTH_SERVICES || true
   fi
 fi
 
+if [[ "$PROBE_MODE" == "1" && -z "${HEALTH_HTTP_PROBES:-}" && -f "$REPO_ROOT/.env" ]]; then
+  load_env_pairs "$REPO_ROOT/.env" HEALTH_HTTP_PROBES || true
+fi
+
 mapfile -t LOG_TARGETS < <(env_file_chain__parse_list "${HEALTH_SERVICES:-}") || true
 
 if [[ ${#LOG_TARGETS[@]} -eq 0 ]]; then
@@ -173,11 +534,89 @@ if ! health_logs__select_targets; then
   exit 1
 fi
 
-compose_ps_output="$("${COMPOSE_CMD[@]}" ps)"
+if [[ "$WATCH_MODE" -eq 1 ]]; then
+  # The consolidated file was generated once above; every poll reuses it.
+  watch_timeout="${HEALTH_LOG_TIMEOUT:-30}"
+  if [[ "$watch_timeout" == "0" ]]; then
+    watch_timeout="24h"
+  fi
+  declare -a watch_args=(--instance "${INSTANCE_NAME:-default}" --interval "$WATCH_INTERVAL"
+    --timeout "$watch_timeout" --format "$OUTPUT_FORMAT" --max-polls "${HEALTH_WATCH_MAX_POLLS:-0}")
+  if [[ -n "$WATCH_TEXTFILE" ]]; then
+    watch_args+=(--textfile "$WATCH_TEXTFILE")
+  fi
+  if [[ "$RECORD_HISTORY" -eq 1 ]]; then
+    watch_args+=(--history-db "$HISTORY_DB")
+  fi
+  watch_args+=("${HEALTH_PATTERN_ARGS[@]}")
+  for service in "${ALL_LOG_TARGETS[@]}"; do
+    watch_args+=(--service "$service")
+  done
+  watch_status=0
+  python_runtime__run "$REPO_ROOT" "" -- \
+    "$SCRIPT_DIR/_internal/lib/health_watch.py" "${watch_args[@]}" -- "${COMPOSE_CMD[@]}" || watch_status=$?
+  exit "$watch_status"
+fi
+
+# The history records how long the whole check took (status, probes, logs).
+CHECK_STARTED_US="$(health_logs__now_us)"
+CHECK_DURATION_MS=""
+
+compose_ps_output=""
 compose_ps_json=""
-if [[ "$OUTPUT_FORMAT" == "json" ]]; then
-  if compose_ps_json_candidate="$("${COMPOSE_CMD[@]}" ps --format json 2>/dev/null)"; then
-    compose_ps_json="$compose_ps_json_candidate"
+ps_from_engine=0
+if docker_engine__enabled; then
+  engine_ps_format="table"
+  if [[ "$OUTPUT_FORMAT" == "json" || "$RECORD_HISTORY" -eq 1 ]]; then
+    engine_ps_format="both"
+  fi
+  if engine_ps_output="$(docker_engine__run "$COMPOSE_ROOT_FILE" ps --format "$engine_ps_format")"; then
+    ps_from_engine=1
+    compose_ps_output="$engine_ps_output"
+    if [[ "$engine_ps_format" == "both" ]]; then
+      # One helper call: the JSON rows on the first line, the table after it.
+      compose_ps_json="${engine_ps_output%%$'\n'*}"
+      compose_ps_output="${engine_ps_output#*$'\n'}"
+    fi
+  else
+    docker_engine__warn_fallback
+  fi
+fi
+
+if ((ps_from_engine == 0)); then
+  compose_ps_output="$("${COMPOSE_CMD[@]}" ps)"
+  if [[ "$OUTPUT_FORMAT" == "json" || "$RECORD_HISTORY" -eq 1 ]]; then
+    if compose_ps_json_candidate="$("${COMPOSE_CMD[@]}" ps --format json 2>/dev/null)"; then
+      compose_ps_json="$compose_ps_json_candidate"
+    fi
+  fi
+fi
+
+PROBE_RECORDS=""
+probe_text=""
+if [[ "$PROBE_MODE" == "1" ]]; then
+  declare -a probe_args=(--timeout "$PROBE_TIMEOUT" --host "${HEALTH_PROBE_HOST:-127.0.0.1}")
+  for service in "${ALL_LOG_TARGETS[@]}"; do
+    probe_args+=(--service "$service")
+  done
+  mapfile -t http_probes < <(env_file_chain__parse_list "${HEALTH_HTTP_PROBES:-}") || true
+  for http_probe in "${http_probes[@]}"; do
+    probe_args+=(--http "$http_probe")
+  done
+  probe_format="ndjson"
+  if [[ "$OUTPUT_FORMAT" == "text" ]]; then
+    probe_format="text"
+  fi
+  if compose_config_json="$("${COMPOSE_CMD[@]}" config --format json)" &&
+    probe_output="$(printf '%s' "$compose_config_json" | python_runtime__run "$REPO_ROOT" "" -- \
+      "$SCRIPT_DIR/_internal/lib/health_probes.py" "${probe_args[@]}" --format "$probe_format")"; then
+    if [[ "$probe_format" == "text" ]]; then
+      probe_text="$probe_output"
+    else
+      PROBE_RECORDS="$probe_output"
+    fi
+  else
+    echo "Warning: failed to probe published ports." >&2
   fi
 fi
 
@@ -185,6 +624,13 @@ if [[ "$OUTPUT_FORMAT" == "text" ]]; then
   echo "[*] Containers:"
   printf '%s\n' "$compose_ps_output"
   echo
+  if [[ "$PROBE_MODE" == "1" ]]; then
+    echo "[*] Port probes:"
+    if [[ -n "$probe_text" ]]; then
+      printf '%s\n' "$probe_text"
+    fi
+    echo
+  fi
   echo "[*] Recent logs for monitored services:"
 fi
 
@@ -192,11 +638,18 @@ log_success=false
 failed_services=()
 declare -A SERVICE_LOGS=()
 declare -A SERVICE_STATUSES=()
+declare -A SERVICE_DURATIONS=()
+declare -A SERVICE_SCANS=()
 
-health_logs__collect_logs "${LOG_TARGETS[@]}"
+health_logs__collect_logs "${LOG_TARGETS[@]}" "${auto_targets[@]}"
 
-if [[ ${#auto_targets[@]} -gt 0 ]]; then
-  health_logs__collect_logs "${auto_targets[@]}"
+if [[ "$RECORD_HISTORY" -eq 1 ]]; then
+  CHECK_DURATION_MS="$(health_logs__elapsed_ms "$CHECK_STARTED_US")"
+  if ! health_logs__emit_report_stream "$INSTANCE_NAME" "$compose_ps_output" "$compose_ps_json" |
+    python_runtime__run "$REPO_ROOT" "" -- "$SCRIPT_DIR/_internal/lib/health_history.py" \
+      "${HISTORY_ARGS[@]}" record; then
+    echo "Warning: failed to record the health history in $HISTORY_DB." >&2
+  fi
 fi
 
 if [[ "$log_success" == false ]]; then
@@ -209,34 +662,9 @@ if [[ ${#failed_services[@]} -gt 0 ]]; then
 fi
 
 if [[ "$OUTPUT_FORMAT" == "json" ]]; then
-  COMPOSE_PS_TEXT="$compose_ps_output"
-  COMPOSE_PS_JSON="$compose_ps_json"
-  PRIMARY_LOG_SERVICES="${primary_targets[*]}"
-  AUTO_LOG_SERVICES="${auto_targets[*]}"
-  ALL_LOG_SERVICES="${ALL_LOG_TARGETS[*]}"
-  FAILED_SERVICES_STR="${failed_services[*]:-}"
-  LOG_SUCCESS_FLAG="$log_success"
-
-  declare -a __service_payload_lines=()
-  for service in "${ALL_LOG_TARGETS[@]}"; do
-    status="${SERVICE_STATUSES[$service]:-skipped}"
-    log_value="${SERVICE_LOGS[$service]:-}"
-    encoded_log="$(printf '%s' "$log_value" | base64 | tr -d '\n')"
-    __service_payload_lines+=("$service::${status}::${encoded_log}")
-  done
-  if ((${#__service_payload_lines[@]} > 0)); then
-    SERVICE_PAYLOAD="$(printf '%s\n' "${__service_payload_lines[@]}")"
-  else
-    SERVICE_PAYLOAD=""
-  fi
-  export COMPOSE_PS_TEXT COMPOSE_PS_JSON PRIMARY_LOG_SERVICES AUTO_LOG_SERVICES ALL_LOG_SERVICES FAILED_SERVICES_STR \
-    LOG_SUCCESS_FLAG SERVICE_PAYLOAD INSTANCE_NAME
-
   json_payload="$(
-    python_runtime__run \
-      "$REPO_ROOT" \
-      "COMPOSE_PS_TEXT COMPOSE_PS_JSON PRIMARY_LOG_SERVICES AUTO_LOG_SERVICES ALL_LOG_SERVICES FAILED_SERVICES_STR LOG_SUCCESS_FLAG SERVICE_PAYLOAD INSTANCE_NAME" \
-      -- "$SCRIPT_DIR/_internal/lib/health_report.py"
+    health_logs__emit_report_stream "$INSTANCE_NAME" "$compose_ps_output" "$compose_ps_json" |
+      python_runtime__run "$REPO_ROOT" "" -- "$SCRIPT_DIR/_internal/lib/health_report.py"
   )"
 
   if [[ -n "$OUTPUT_FILE" ]]; then
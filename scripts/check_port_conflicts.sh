@@ -0,0 +1,172 @@
+#!/usr/bin/env bash
+# shellcheck source-path=SCRIPTDIR
+# Usage: scripts/check_port_conflicts.sh [options] [instance...]
+#
+# Resolves the compose config of every requested instance (all of them by
+# default) and reports published ports that collide across instances or that
+# are already bound on the current host.
+set -euo pipefail
+
+print_help() {
+  cat <<'USAGE'
+Usage: scripts/check_port_conflicts.sh [options] [instance...]
+
+Indexes the published ports (host IP, port or range, protocol) of every
+instance and reports collisions between instances and services. Ports that
+are already listening on this host (read from /proc/net/tcp*, /proc/net/udp*)
+are reported as warnings, except those published by the instance's own running
+containers. The host comparison needs a local Python interpreter and is
+skipped when only the Docker fallback is available.
+
+Positional arguments:
+  instance             Instances to check (default: all instances).
+
+Flags:
+  -h, --help           Show this help and exit.
+  -j, --jobs <N>       Number of instances resolved concurrently.
+  --format <format>    Output format: text (default) or json.
+  --no-host-check      Skip the comparison with ports bound on this host.
+
+Exit codes:
+  0  No collisions between instances (host warnings do not fail the check).
+  1  Collisions detected or an instance could not be resolved.
+USAGE
+}
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+REPO_ROOT="$(cd "$SCRIPT_DIR/.." && pwd)"
+
+# shellcheck source=_internal/lib/python_runtime.sh
+source "$SCRIPT_DIR/_internal/lib/python_runtime.sh"
+
+# shellcheck source=_internal/lib/compose_command.sh
+source "$SCRIPT_DIR/_internal/lib/compose_command.sh"
+
+# shellcheck source=_internal/lib/compose_instances.sh
+source "$SCRIPT_DIR/_internal/lib/compose_instances.sh"
+
+# shellcheck source=_internal/lib/compose_isolated_build.sh
+source "$SCRIPT_DIR/_internal/lib/compose_isolated_build.sh"
+
+FORMAT="text"
+JOBS=""
+CHECK_HOST=1
+declare -a REQUESTED_INSTANCES=()
+
+while [[ $# -gt 0 ]]; do
+  case "$1" in
+  -h | --help)
+    print_help
+    exit 0
+    ;;
+  -j | --jobs)
+    shift
+    if [[ $# -eq 0 ]]; then
+      echo "Error: --jobs requires a value." >&2
+      exit 1
+    fi
+    JOBS="$1"
+    ;;
+  --jobs=*)
+    JOBS="${1#*=}"
+    ;;
+  --format)
+    shift
+    if [[ $# -eq 0 ]]; then
+      echo "Error: --format requires a value (text or json)." >&2
+      exit 1
+    fi
+    FORMAT="$1"
+    ;;
+  --format=*)
+    FORMAT="${1#*=}"
+    ;;
+  --no-host-check)
+    CHECK_HOST=0
+    ;;
+  -*)
+    echo "Error: unknown flag '$1'." >&2
+    exit 1
+    ;;
+  *)
+    REQUESTED_INSTANCES+=("$1")
+    ;;
+  esac
+  shift
+done
+
+FORMAT="${FORMAT,,}"
+if [[ "$FORMAT" != "text" && "$FORMAT" != "json" ]]; then
+  echo "Error: invalid format '$FORMAT'. Use 'text' or 'json'." >&2
+  exit 1
+fi
+
+if [[ -n "$JOBS" && ! "$JOBS" =~ ^[1-9][0-9]*$ ]]; then
+  echo "Error: --jobs requires a positive integer." >&2
+  exit 1
+fi
+
+if ! load_compose_instances "$REPO_ROOT"; then
+  echo "Error: failed to load available instances." >&2
+  exit 1
+fi
+
+declare -a TARGET_INSTANCES=()
+if ((${#REQUESTED_INSTANCES[@]} == 0)); then
+  TARGET_INSTANCES=("${COMPOSE_INSTANCE_NAMES[@]}")
+else
+  for requested in "${REQUESTED_INSTANCES[@]}"; do
+    if [[ ! -v COMPOSE_INSTANCE_FILES[$requested] ]]; then
+      echo "Error: unknown instance '$requested'." >&2
+      echo "Available: ${COMPOSE_INSTANCE_NAMES[*]}" >&2
+      exit 1
+    fi
+    TARGET_INSTANCES+=("$requested")
+  done
+fi
+
+unset COMPOSE_FILES
+unset COMPOSE_EXTRA_FILES
+
+declare -a COMPOSE_CMD=()
+compose_resolve_command COMPOSE_CMD
+compose_status=$?
+if ((compose_status != 0)); then
+  exit "$compose_status"
+fi
+
+scratch_root="$(mktemp -d)"
+trap 'rm -rf "$scratch_root"' EXIT
+manifest="$scratch_root/manifest.tsv"
+compose_isolated_build__all COMPOSE_CMD "$scratch_root" "$JOBS" "$manifest" "${TARGET_INSTANCES[@]}"
+
+# /proc/net inside the Docker fallback container only lists the container's
+# own sockets, so the host comparison needs a local interpreter.
+if ((CHECK_HOST == 1)) && [[ -z "${PORT_CONFLICTS_PROC_NET:-}" && -z "$(python_runtime__local_bin "$REPO_ROOT")" ]]; then
+  echo "[!] Host port check skipped: it needs a local Python interpreter to read /proc/net." >&2
+  CHECK_HOST=0
+fi
+
+# Ports published by an instance's own running containers are expected to be
+# bound on the host. The generated compose file is queried like the deployed
+# one (project directory at the repository root, generated .env), so the
+# project name resolves the same way.
+if ((CHECK_HOST == 1)); then
+  for instance in "${TARGET_INSTANCES[@]}"; do
+    instance_scratch="$scratch_root/$instance"
+    if [[ ! -s "$instance_scratch/config.json" ]]; then
+      continue
+    fi
+    "${COMPOSE_CMD[@]}" --project-directory "$REPO_ROOT" --env-file "$instance_scratch/.env" \
+      -f "$instance_scratch/docker-compose.yml" ps --format json \
+      >"$instance_scratch/running.json" 2>/dev/null || : >"$instance_scratch/running.json"
+  done
+fi
+
+export PORT_CONFLICTS_FORMAT="$FORMAT"
+export PORT_CONFLICTS_CHECK_HOST="$CHECK_HOST"
+
+PYTHON_RUNTIME_EXTRA_MOUNTS="$scratch_root" python_runtime__run \
+  "$REPO_ROOT" \
+  "PORT_CONFLICTS_FORMAT PORT_CONFLICTS_CHECK_HOST PORT_CONFLICTS_PROC_NET" \
+  -- "$SCRIPT_DIR/_internal/lib/port_conflicts.py" "$manifest"
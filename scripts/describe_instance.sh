@@ -5,6 +5,7 @@ set -euo pipefail
 print_help() {
   cat <<'USAGE'
 Usage: scripts/describe_instance.sh [--list] <instance> [--format <format>]
+       scripts/describe_instance.sh --all [-j <N>] [--format <format>]
 
 Generates a summary of services, ports, and volumes for the requested instance
 from `docker compose config`, reusing the template conventions.
@@ -15,7 +16,15 @@ Positional arguments:
 Flags:
   -h, --help           Show this help and exit.
   --list               List available instances and exit.
+  --all                Describe every instance in a single report. Each
+                       instance is built in an isolated scratch directory,
+                       so the root docker-compose.yml is left untouched.
+  -j, --jobs <N>       Number of instances built concurrently with --all
+                       (default: number of CPUs).
   --format <format>    Set output format. Accepted values: table (default), json.
+  --no-cache           Always rebuild docker-compose.yml and query
+                       `docker compose config`, even when the cached build
+                       is up to date.
 USAGE
 }
 
@@ -28,9 +37,15 @@ source "${SCRIPT_DIR}/_internal/lib/python_runtime.sh"
 # shellcheck source=_internal/lib/compose_command.sh
 source "$SCRIPT_DIR/_internal/lib/compose_command.sh"
 
+# shellcheck source=_internal/lib/compose_isolated_build.sh
+source "$SCRIPT_DIR/_internal/lib/compose_isolated_build.sh"
+
 FORMAT="table"
 INSTANCE_NAME=""
 LIST_ONLY=false
+DESCRIBE_ALL=false
+JOBS=""
+USE_CACHE=true
 
 while [[ $# -gt 0 ]]; do
   case "$1" in
@@ -42,6 +57,27 @@ while [[ $# -gt 0 ]]; do
     LIST_ONLY=true
     shift
     ;;
+  --all)
+    DESCRIBE_ALL=true
+    shift
+    ;;
+  --no-cache)
+    USE_CACHE=false
+    shift
+    ;;
+  -j | --jobs)
+    shift
+    if [[ $# -eq 0 ]]; then
+      echo "Error: --jobs requires a value." >&2
+      exit 1
+    fi
+    JOBS="$1"
+    shift
+    ;;
+  --jobs=*)
+    JOBS="${1#*=}"
+    shift
+    ;;
   --format)
     shift
     if [[ $# -eq 0 ]]; then
@@ -76,9 +112,33 @@ if [[ "$LIST_ONLY" == true && -n "$INSTANCE_NAME" ]]; then
   exit 1
 fi
 
-if [[ "$LIST_ONLY" == true ]]; then
+if [[ "$DESCRIBE_ALL" == true && -n "$INSTANCE_NAME" ]]; then
+  echo "Error: --all cannot be combined with an instance name." >&2
+  exit 1
+fi
+
+if [[ "$DESCRIBE_ALL" == true && "$LIST_ONLY" == true ]]; then
+  echo "Error: --all cannot be combined with --list." >&2
+  exit 1
+fi
+
+if [[ -n "$JOBS" ]]; then
+  if [[ "$DESCRIBE_ALL" != true ]]; then
+    echo "Error: --jobs is only supported together with --all." >&2
+    exit 1
+  fi
+  if [[ ! "$JOBS" =~ ^[1-9][0-9]*$ ]]; then
+    echo "Error: --jobs requires a positive integer." >&2
+    exit 1
+  fi
+fi
+
+if [[ "$LIST_ONLY" == true || "$DESCRIBE_ALL" == true ]]; then
   # shellcheck source=_internal/lib/compose_instances.sh
   source "$SCRIPT_DIR/_internal/lib/compose_instances.sh"
+fi
+
+if [[ "$LIST_ONLY" == true ]]; then
 
   if ! load_compose_instances "$REPO_ROOT"; then
     echo "Error: failed to load available instances." >&2
@@ -96,7 +156,7 @@ if [[ "$LIST_ONLY" == true ]]; then
   exit 0
 fi
 
-if [[ -z "$INSTANCE_NAME" ]]; then
+if [[ -z "$INSTANCE_NAME" && "$DESCRIBE_ALL" != true ]]; then
   echo "Error: provide the instance name." >&2
   print_help >&2
   exit 1
@@ -111,8 +171,60 @@ fi
 unset COMPOSE_FILES
 unset COMPOSE_EXTRA_FILES
 
+export DESCRIBE_INSTANCE_FORMAT="$FORMAT_LOWER"
+export DESCRIBE_INSTANCE_COMPOSE_FILES="docker-compose.yml"
+export DESCRIBE_INSTANCE_EXTRA_FILES=""
+export DESCRIBE_INSTANCE_REPO_ROOT="$REPO_ROOT"
+# Exit status of describe_instance_report.py --cached asking for the
+# `docker compose config` path instead.
+export DESCRIBE_INSTANCE_CACHE_FALLBACK_STATUS=3
+
+if [[ "$DESCRIBE_ALL" == true ]]; then
+  if ! load_compose_instances "$REPO_ROOT"; then
+    echo "Error: failed to load available instances." >&2
+    exit 1
+  fi
+
+  declare -a COMPOSE_CMD=()
+  compose_resolve_command COMPOSE_CMD
+  compose_status=$?
+  if ((compose_status != 0)); then
+    exit "$compose_status"
+  fi
+
+  scratch_root="$(mktemp -d)"
+  trap 'rm -rf "$scratch_root"' EXIT
+  manifest="$scratch_root/manifest.tsv"
+  compose_isolated_build__all COMPOSE_CMD "$scratch_root" "$JOBS" "$manifest" "${COMPOSE_INSTANCE_NAMES[@]}"
+
+  # The manifest and the per-instance builds live in the scratch dir, which the
+  # Docker fallback of python_runtime__run has to mount next to the repository.
+  PYTHON_RUNTIME_EXTRA_MOUNTS="$scratch_root" python_runtime__run \
+    "$REPO_ROOT" \
+    "DESCRIBE_INSTANCE_FORMAT DESCRIBE_INSTANCE_COMPOSE_FILES DESCRIBE_INSTANCE_EXTRA_FILES DESCRIBE_INSTANCE_REPO_ROOT" \
+    -- "$SCRIPT_DIR/_internal/lib/describe_instance_report.py" --all "$manifest"
+  exit $?
+fi
+
 COMPOSE_ROOT_FILE="$REPO_ROOT/docker-compose.yml"
 declare -a BUILD_COMPOSE_CMD=("$SCRIPT_DIR/build_compose_file.sh" "$INSTANCE_NAME")
+export DESCRIBE_INSTANCE_NAME="$INSTANCE_NAME"
+
+# Render straight from the last generated docker-compose.yml when its inputs
+# are unchanged; only stale builds pay for the rebuild and Docker round-trip.
+if [[ "$USE_CACHE" == true ]] &&
+  "$SCRIPT_DIR/build_compose_file.sh" --check "$INSTANCE_NAME" >/dev/null 2>&1; then
+  set +e
+  python_runtime__run \
+    "$REPO_ROOT" \
+    "DESCRIBE_INSTANCE_FORMAT DESCRIBE_INSTANCE_NAME DESCRIBE_INSTANCE_COMPOSE_FILES DESCRIBE_INSTANCE_EXTRA_FILES DESCRIBE_INSTANCE_REPO_ROOT DESCRIBE_INSTANCE_CACHE_FALLBACK_STATUS" \
+    -- "$SCRIPT_DIR/_internal/lib/describe_instance_report.py" --cached "$COMPOSE_ROOT_FILE" "$REPO_ROOT/.env"
+  cached_status=$?
+  set -e
+  if ((cached_status != DESCRIBE_INSTANCE_CACHE_FALLBACK_STATUS)); then
+    exit "$cached_status"
+  fi
+fi
 
 if ! "${BUILD_COMPOSE_CMD[@]}" >/dev/null; then
   echo "Error: failed to assemble compose configuration for '$INSTANCE_NAME'." >&2
@@ -148,12 +260,6 @@ if [[ -s "$tmp_stderr" ]]; then
 fi
 rm -f "$tmp_stderr"
 
-export DESCRIBE_INSTANCE_FORMAT="$FORMAT_LOWER"
-export DESCRIBE_INSTANCE_NAME="$INSTANCE_NAME"
-export DESCRIBE_INSTANCE_COMPOSE_FILES="docker-compose.yml"
-export DESCRIBE_INSTANCE_EXTRA_FILES=""
-export DESCRIBE_INSTANCE_REPO_ROOT="$REPO_ROOT"
-
 printf '%s' "$config_stdout" | python_runtime__run \
   "$REPO_ROOT" \
   "DESCRIBE_INSTANCE_FORMAT DESCRIBE_INSTANCE_NAME DESCRIBE_INSTANCE_COMPOSE_FILES DESCRIBE_INSTANCE_EXTRA_FILES DESCRIBE_INSTANCE_REPO_ROOT" \
@@ -0,0 +1,144 @@
+#!/usr/bin/env bash
+# shellcheck source-path=SCRIPTDIR
+# Usage: scripts/disk_report.sh <instance> [options]
+#
+# Reports disk usage, file counts, inode counts and the largest subtrees for
+# the persistent directories of an instance (application data path plus the
+# resolved bind mounts).
+set -euo pipefail
+
+print_help() {
+  cat <<'USAGE'
+Usage: scripts/disk_report.sh <instance> [options]
+
+Measures bytes, files, inodes, and the largest subtrees of every persistent
+directory tied to the instance. Directory listings are cached by mtime so
+repeated runs only list directories that changed; file sizes are always re-read.
+
+Available options:
+  --format <format>  Output format: table (default) or json.
+  -j, --jobs <N>     Number of concurrent directory scanners.
+  --top <N>          Number of largest subtrees listed per directory (default: 5).
+  --no-cache         Ignore and do not update the scan cache.
+  -h, --help         Shows this message and exits.
+
+Relevant environment variables:
+  DISK_REPORT_CACHE_FILE  Cache location (default: data/.disk-report-cache.json).
+USAGE
+}
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+REPO_ROOT="$(cd "$SCRIPT_DIR/.." && pwd)"
+
+# shellcheck source=_internal/lib/deploy_context.sh
+source "$SCRIPT_DIR/_internal/lib/deploy_context.sh"
+
+# shellcheck source=_internal/lib/python_runtime.sh
+source "$SCRIPT_DIR/_internal/lib/python_runtime.sh"
+
+INSTANCE=""
+FORMAT="table"
+JOBS=""
+TOP="5"
+USE_CACHE=1
+
+require_number() {
+  local flag="$1"
+  local value="$2"
+  if [[ ! "$value" =~ ^[1-9][0-9]*$ ]]; then
+    echo "[!] $flag requires a positive integer." >&2
+    exit 1
+  fi
+}
+
+while [[ $# -gt 0 ]]; do
+  case "$1" in
+  --format)
+    shift
+    if [[ -z "${1:-}" ]]; then
+      echo "[!] --format requires a value (table or json)." >&2
+      exit 1
+    fi
+    FORMAT="$1"
+    ;;
+  --format=*)
+    FORMAT="${1#*=}"
+    ;;
+  -j | --jobs)
+    shift
+    require_number "--jobs" "${1:-}"
+    JOBS="$1"
+    ;;
+  --jobs=*)
+    JOBS="${1#*=}"
+    require_number "--jobs" "$JOBS"
+    ;;
+  --top)
+    shift
+    require_number "--top" "${1:-}"
+    TOP="$1"
+    ;;
+  --top=*)
+    TOP="${1#*=}"
+    require_number "--top" "$TOP"
+    ;;
+  --no-cache)
+    USE_CACHE=0
+    ;;
+  -h | --help)
+    print_help
+    exit 0
+    ;;
+  -*)
+    echo "[!] Unknown option: $1" >&2
+    print_help >&2
+    exit 1
+    ;;
+  *)
+    if [[ -n "$INSTANCE" ]]; then
+      echo "[!] Duplicate instance detected: $1" >&2
+      print_help >&2
+      exit 1
+    fi
+    INSTANCE="$1"
+    ;;
+  esac
+  shift
+done
+
+if [[ -z "$INSTANCE" ]]; then
+  echo "[!] No instance provided." >&2
+  print_help >&2
+  exit 1
+fi
+
+FORMAT="${FORMAT,,}"
+if [[ "$FORMAT" != "table" && "$FORMAT" != "json" ]]; then
+  echo "[!] Invalid format '$FORMAT'. Use 'table' or 'json'." >&2
+  exit 1
+fi
+
+declare deploy_context_eval=""
+if ! deploy_context_eval="$(build_deploy_context "$REPO_ROOT" "$INSTANCE")"; then
+  exit 1
+fi
+eval "$deploy_context_eval"
+
+declare -a report_dirs=("${DEPLOY_CONTEXT[APP_DATA_PATH]}")
+while IFS= read -r dir; do
+  [[ -z "$dir" ]] && continue
+  append_unique_file report_dirs "$dir"
+done <<<"${DEPLOY_CONTEXT[PERSISTENT_DIRS]}"
+
+declare -a report_args=(--instance "$INSTANCE" --format "$FORMAT" --top "$TOP")
+if [[ -n "$JOBS" ]]; then
+  report_args+=(--jobs "$JOBS")
+fi
+if [[ "$USE_CACHE" -eq 1 ]]; then
+  report_args+=(--cache-file "${DISK_REPORT_CACHE_FILE:-$REPO_ROOT/data/.disk-report-cache.json}")
+else
+  report_args+=(--no-cache)
+fi
+
+python_runtime__run "$REPO_ROOT" "" -- \
+  "$SCRIPT_DIR/_internal/python/disk_usage.py" "${report_args[@]}" "${report_dirs[@]}"
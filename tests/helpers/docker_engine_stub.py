@@ -0,0 +1,141 @@
+"""In-process Docker Engine API stub served over a Unix socket."""
+
+from __future__ import annotations
+
+import json
+import shutil
+import socketserver
+import struct
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+
+@dataclass
+class EngineStubState:
+    containers: list[dict[str, Any]] = field(default_factory=list)
+    logs: dict[str, str] = field(default_factory=dict)
+    requests: list[str] = field(default_factory=list)
+    connections: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+def engine_container(
+    container_id: str,
+    service: str,
+    *,
+    project: str = "repo",
+    state: str = "running",
+    status: str = "Up 5 minutes",
+    oneoff: bool = False,
+) -> dict[str, Any]:
+    name = f"{project}-{service}-run-{container_id}" if oneoff else f"{project}-{service}-1"
+    return {
+        "Id": container_id,
+        "Names": [f"/{name}"],
+        "Image": f"example/{service}:latest",
+        "State": state,
+        "Status": status,
+        "Labels": {
+            "com.docker.compose.project": project,
+            "com.docker.compose.service": service,
+            "com.docker.compose.oneoff": "True" if oneoff else "False",
+        },
+    }
+
+
+def _frame(stream: int, text: str) -> bytes:
+    payload = text.encode("utf-8")
+    return struct.pack(">BxxxI", stream, len(payload)) + payload
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.state.lock:
+            self.server.state.connections += 1
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        return
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:  # noqa: N802
+        state = self.server.state
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        with state.lock:
+            state.requests.append(parsed.path)
+
+        if parsed.path == "/containers/json":
+            filters = json.loads(query.get("filters", ["{}"])[0])
+            wanted = filters.get("label", [])
+            include_stopped = query.get("all", ["0"])[0] == "1"
+            selected = []
+            for container in state.containers:
+                labels = container.get("Labels", {})
+                if not all(
+                    "=" in label and labels.get(label.split("=", 1)[0]) == label.split("=", 1)[1]
+                    for label in wanted
+                ):
+                    continue
+                if not include_stopped and container.get("State") != "running":
+                    continue
+                selected.append(container)
+            self._send(200, json.dumps(selected).encode(), "application/json")
+            return
+
+        if parsed.path.startswith("/containers/") and parsed.path.endswith("/logs"):
+            container_id = parsed.path.split("/")[2]
+            if container_id not in state.logs:
+                self._send(404, b'{"message":"No such container"}', "application/json")
+                return
+            tail = int(query.get("tail", ["0"])[0] or 0)
+            lines = state.logs[container_id].splitlines(keepends=True)
+            if tail:
+                lines = lines[-tail:]
+            body = b"".join(_frame(2 if "ERR" in line else 1, line) for line in lines)
+            self._send(200, body, "application/vnd.docker.multiplexed-stream")
+            return
+
+        self._send(404, b'{"message":"not found"}', "application/json")
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, state: EngineStubState) -> None:
+        self.state = state
+        super().__init__(path, _Handler)
+
+
+class EngineStubServer:
+    """Context manager running the stub; `socket_path` is short enough for AF_UNIX."""
+
+    def __init__(self, state: EngineStubState | None = None) -> None:
+        self.state = state or EngineStubState()
+        self._dir = Path(tempfile.mkdtemp(prefix="engine-", dir="/tmp"))
+        self.socket_path = self._dir / "docker.sock"
+        self._server = _Server(str(self.socket_path), self.state)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "EngineStubServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        shutil.rmtree(self._dir, ignore_errors=True)
@@ -0,0 +1,104 @@
+"""Force scripts onto the Docker fallback of python_runtime.sh.
+
+``install_python_fallback`` hides ``python``/``python3`` from ``PATH`` and puts
+a fake ``docker`` in front of it. The fake runs ``docker run ... IMAGE python
+...`` with the real interpreter, but first checks that every absolute path
+argument lies inside a ``-v`` mount: a file outside the mounts is not visible
+in a real container, and whatever is written there is lost with it.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+
+_DOCKER_STUB = """#!{python}
+import json
+import os
+import sys
+
+args = sys.argv[1:]
+with open({log!r}, "a", encoding="utf-8") as handle:
+    handle.write(json.dumps(args) + "\\n")
+if args[:1] != ["run"]:
+    sys.exit(1)
+
+mounts, env, workdir = [], dict(os.environ), os.getcwd()
+position = 1
+while position < len(args) and args[position].startswith("-"):
+    flag = args[position]
+    if flag in ("-v", "--volume", "-w", "--workdir", "-e", "--env"):
+        value = args[position + 1]
+        if flag in ("-v", "--volume"):
+            mounts.append(value.split(":")[0])
+        elif flag in ("-w", "--workdir"):
+            workdir = value
+        else:
+            key, _, item = value.partition("=")
+            env[key] = item
+        position += 2
+    else:
+        position += 1
+command = args[position + 1 :]
+
+def visible(path):
+    return any(path == mount or path.startswith(mount.rstrip("/") + "/") for mount in mounts)
+
+for argument in command[1:]:
+    if argument.startswith("/") and not visible(argument):
+        sys.stderr.write(f"container: {{argument}} is not mounted\\n")
+        sys.exit(2)
+
+env["PATH"] = {container_bin!r} + os.pathsep + env.get("PATH", "")
+os.chdir(workdir)
+os.execvpe(command[0], command, env)
+"""
+
+
+def _path_without(shadow_root: Path, names: tuple[str, ...]) -> str:
+    directories = []
+    for position, directory in enumerate(os.environ.get("PATH", "").split(os.pathsep)):
+        folder = Path(directory)
+        if not any((folder / name).exists() for name in names):
+            directories.append(directory)
+            continue
+        shadow = shadow_root / f"path-{position}"
+        shadow.mkdir(parents=True)
+        for entry in folder.iterdir():
+            if entry.name not in names:
+                (shadow / entry.name).symlink_to(entry)
+        directories.append(str(shadow))
+    return os.pathsep.join(directories)
+
+
+def install_python_fallback(root: Path) -> tuple[dict[str, str], Path]:
+    """Returns the environment overrides and the log of ``docker`` calls."""
+
+    root.mkdir(parents=True, exist_ok=True)
+    container_bin = root / "container-bin"
+    container_bin.mkdir()
+    (container_bin / "python").symlink_to(sys.executable)
+    (container_bin / "pip").write_text("#!/bin/sh\nexit 0\n", encoding="utf-8")
+    (container_bin / "pip").chmod(0o755)
+
+    host_bin = root / "host-bin"
+    host_bin.mkdir()
+    log = root / "docker-calls.log"
+    docker = host_bin / "docker"
+    docker.write_text(
+        _DOCKER_STUB.format(python=sys.executable, log=str(log), container_bin=str(container_bin)),
+        encoding="utf-8",
+    )
+    docker.chmod(0o755)
+
+    path = _path_without(root / "shadow", ("python", "python3"))
+    env = {"PATH": f"{host_bin}{os.pathsep}{path}", "PYTHON_RUNTIME_DOCKER_BIN": "docker"}
+    return env, log
+
+
+def docker_runs(log: Path) -> list[list[str]]:
+    if not log.exists():
+        return []
+    return [json.loads(line) for line in log.read_text(encoding="utf-8").splitlines() if line.strip()]
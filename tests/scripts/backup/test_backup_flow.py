@@ -1,9 +1,22 @@
 from __future__ import annotations
 
+import hashlib
+import io
+import json
 import os
+import shutil
+import stat
+import subprocess
+import sys
+import tarfile
+import tempfile
 from pathlib import Path
 
+import pytest
+
 from tests.helpers.compose_instances import ComposeInstancesData
+from tests.helpers.docker_engine_stub import EngineStubServer, EngineStubState, engine_container
+from tests.helpers.python_fallback import docker_runs, install_python_fallback
 
 from .utils import run_backup
 
@@ -36,6 +49,7 @@ def _install_compose_stub(
     monkeypatch,
     running_services: dict[str, list[str]] | None = None,
     up_fail_instances: set[str] | None = None,
+    down_hook: str = "",
 ) -> Path:
     compose_log = repo_copy / "compose_calls.log"
     services_file = repo_copy / "compose_services.log"
@@ -85,6 +99,10 @@ if [[ "$command" == 'ps' && "${2:-}" == '--status' && "${3:-}" == 'running' && "
   fi
   exit 0
 fi
+if [[ "$command" == 'down' ]]; then
+  :
+  {down_hook}
+fi
 if [[ "$command" == 'up' ]]; then
   if [[ -f "$fail_file" ]] && grep -Fxq "$instance" "$fail_file"; then
     echo 'stub compose up failure' >&2
@@ -163,6 +181,8 @@ def test_successful_backup_creates_snapshot_and_restarts_stack(
     assert backup_dir.is_dir()
     restored_file = backup_dir / "db.sqlite"
     assert restored_file.read_text(encoding="utf-8") == "payload"
+    assert "Copy engine: " not in result.stdout
+    assert not (repo_copy / "backups" / "core-20240101-030405.manifest.json").exists()
 
     _assert_compose_restart_calls(compose_log, expected_core_apps)
 
@@ -319,3 +339,451 @@ def test_no_restart_when_no_active_services(
     _assert_restart_apps(result.stdout, [])
 
     _assert_compose_restart_calls(compose_log, [])
+
+
+def test_active_services_detected_through_engine_api(
+    repo_copy: Path,
+    monkeypatch,
+    compose_instances_data: ComposeInstancesData,
+) -> None:
+    expected_core_apps = compose_instances_data.instance_app_names.get("core", [])
+    compose_log = _install_compose_stub(repo_copy, monkeypatch, {"core": ["from-cli"]})
+    _prepend_fake_bin(
+        repo_copy,
+        monkeypatch,
+        (
+            "date",
+            "#!/usr/bin/env bash\nset -euo pipefail\nprintf '20240101-030405\\n'\n",
+        ),
+    )
+    (repo_copy / "data" / "core" / "app").mkdir(parents=True)
+
+    state = EngineStubState(
+        containers=[
+            *(engine_container(f"c-{app}", app) for app in expected_core_apps),
+            engine_container("c-stopped", "stopped", state="exited", status="Exited (0)"),
+        ]
+    )
+    with EngineStubServer(state) as engine:
+        result = run_backup(
+            repo_copy,
+            "core",
+            env_overrides={
+                "DOCKER_STATUS_BACKEND": "engine",
+                "DOCKER_HOST": f"unix://{engine.socket_path}",
+            },
+        )
+
+    assert result.returncode == 0, result.stderr
+    _assert_restart_apps(result.stdout, expected_core_apps)
+    calls = compose_log.read_text(encoding="utf-8").splitlines()
+    assert all("ps --status running --services" not in entry for entry in calls)
+    assert "/containers/json" in state.requests
+
+
+def _install_date_stub(repo_copy: Path, monkeypatch) -> Path:
+    timestamp_file = repo_copy / "date_stub_value"
+    timestamp_file.write_text("20240101-030405\n", encoding="utf-8")
+    _prepend_fake_bin(
+        repo_copy,
+        monkeypatch,
+        ("date", f"#!/usr/bin/env bash\nset -euo pipefail\ncat {timestamp_file}\n"),
+    )
+    return timestamp_file
+
+
+def test_incremental_backup_hardlinks_unchanged_files(
+    repo_copy: Path,
+    monkeypatch,
+    compose_instances_data: ComposeInstancesData,
+) -> None:
+    expected_core_apps = compose_instances_data.instance_app_names.get("core", [])
+    _install_compose_stub(repo_copy, monkeypatch, {"core": expected_core_apps})
+    timestamp_file = _install_date_stub(repo_copy, monkeypatch)
+
+    data_mount = repo_copy / "data" / "core" / "app"
+    (data_mount / "media").mkdir(parents=True)
+    (data_mount / "media" / "static.bin").write_bytes(b"static" * 1000)
+    (data_mount / "db.sqlite").write_text("v1", encoding="utf-8")
+    os.link(data_mount / "db.sqlite", data_mount / "db-alias.sqlite")
+    (data_mount / "current").symlink_to("db.sqlite")
+
+    first = run_backup(repo_copy, "core", "--incremental")
+    assert first.returncode == 0, first.stderr
+    assert "No previous incremental snapshot found" in first.stdout
+
+    (data_mount / "db.sqlite").write_text("version 2", encoding="utf-8")
+    (data_mount / "new.txt").write_text("new", encoding="utf-8")
+    timestamp_file.write_text("20240102-030405\n", encoding="utf-8")
+
+    second = run_backup(repo_copy, "core", "--incremental", "--jobs", "2")
+    assert second.returncode == 0, second.stderr
+    assert "Snapshot: 4 files, 1 linked" in second.stdout
+
+    backups = repo_copy / "backups"
+    first_dir = backups / "core-20240101-030405"
+    second_dir = backups / "core-20240102-030405"
+    assert (first_dir / "media" / "static.bin").stat().st_ino == (
+        second_dir / "media" / "static.bin"
+    ).stat().st_ino
+    assert (first_dir / "db.sqlite").read_text(encoding="utf-8") == "v1"
+    assert (second_dir / "db.sqlite").read_text(encoding="utf-8") == "version 2"
+    assert (second_dir / "db.sqlite").stat().st_ino == (second_dir / "db-alias.sqlite").stat().st_ino
+    assert os.readlink(second_dir / "current") == "db.sqlite"
+    assert (second_dir / "new.txt").read_text(encoding="utf-8") == "new"
+
+    manifest = json.loads((backups / "core-20240102-030405.manifest.json").read_text(encoding="utf-8"))
+    assert sorted(manifest["files"]) == ["db-alias.sqlite", "db.sqlite", "media/static.bin", "new.txt"]
+    assert manifest["files"]["media/static.bin"]["size"] == 6000
+    assert manifest["stats"]["linked"] == 1
+
+
+def test_incremental_checksum_copies_files_rewritten_in_place(
+    repo_copy: Path,
+    monkeypatch,
+    compose_instances_data: ComposeInstancesData,
+) -> None:
+    _install_compose_stub(repo_copy, monkeypatch)
+    timestamp_file = _install_date_stub(repo_copy, monkeypatch)
+
+    data_mount = repo_copy / "data" / "core" / "app"
+    data_mount.mkdir(parents=True)
+    target = data_mount / "state.bin"
+    target.write_bytes(b"A" * 64)
+
+    first = run_backup(repo_copy, "core", "--incremental", "--checksum")
+    assert first.returncode == 0, first.stderr
+
+    original = target.stat()
+    target.write_bytes(b"B" * 64)
+    os.utime(target, ns=(original.st_atime_ns, original.st_mtime_ns))
+    timestamp_file.write_text("20240102-030405\n", encoding="utf-8")
+
+    second = run_backup(repo_copy, "core", "--incremental", "--checksum")
+    assert second.returncode == 0, second.stderr
+
+    snapshot = repo_copy / "backups" / "core-20240102-030405" / "state.bin"
+    assert snapshot.read_bytes() == b"B" * 64
+    assert snapshot.stat().st_nlink == 1
+    assert "0 linked" in second.stdout
+
+
+def test_snapshot_engine_fails_on_unreadable_source(repo_copy: Path, tmp_path: Path) -> None:
+    script = repo_copy / "scripts" / "_internal" / "python" / "backup_snapshot.py"
+    source = tmp_path / "source"
+    (source / "locked").mkdir(parents=True)
+    (source / "file.txt").write_text("data", encoding="utf-8")
+
+    # Root reads every directory, so the unreadable one is simulated.
+    runner = (
+        "import os, runpy, sys\n"
+        "real_scandir = os.scandir\n"
+        "def scandir(path='.'):\n"
+        "    if str(path).endswith('locked'):\n"
+        "        raise PermissionError(13, 'Permission denied', str(path))\n"
+        "    return real_scandir(path)\n"
+        "os.scandir = scandir\n"
+        "sys.path.insert(0, os.path.dirname(sys.argv[1]))\n"
+        "sys.argv = sys.argv[1:]\n"
+        "runpy.run_path(sys.argv[0], run_name='__main__')\n"
+    )
+    unreadable = subprocess.run(
+        ["python3", "-c", runner, str(script), "--source", str(source), "--dest", str(tmp_path / "snap")],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    assert unreadable.returncode == 1
+    assert "Snapshot failed: [Errno 13] Permission denied" in unreadable.stderr
+    assert not (tmp_path / "snap.manifest.json").exists()
+
+    not_directory = subprocess.run(
+        ["python3", str(script), "--source", str(source / "file.txt"), "--dest", str(tmp_path / "other")],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    assert not_directory.returncode == 1
+    assert "is not a directory" in not_directory.stderr
+    assert not (tmp_path / "other").exists()
+
+
+def _unprivileged(command: list[str]) -> list[str]:
+    """Runs ``command`` as nobody when the tests run as root, which ignores file modes."""
+
+    if os.geteuid() != 0:
+        return command
+    setpriv = shutil.which("setpriv")
+    if setpriv is None:
+        pytest.skip("setpriv is needed to drop root privileges")
+    return [setpriv, "--reuid=65534", "--regid=65534", "--clear-groups", *command]
+
+
+def test_snapshot_delta_pass_handles_read_only_directories(repo_copy: Path) -> None:
+    scripts = repo_copy / "scripts" / "_internal" / "python"
+    work = Path(tempfile.mkdtemp(prefix="snapshot-modes-"))
+    try:
+        for name in ("backup_snapshot.py", "copy_engine.py"):
+            shutil.copy(scripts / name, work / name)
+        source = work / "source"
+        (source / "conf").mkdir(parents=True)
+        (source / "old").mkdir()
+        (source / "conf" / "app.ini").write_text("v1", encoding="utf-8")
+        (source / "old" / "gone.txt").write_text("gone", encoding="utf-8")
+        (source / "data.bin").write_bytes(b"d" * 10)
+        os.link(source / "data.bin", source / "data-link.bin")
+        for directory in (source / "conf", source / "old"):
+            directory.chmod(0o555)
+        work.chmod(0o777)
+        if os.geteuid() == 0:
+            os.chown(work, 65534, 65534)
+
+        dest = work / "snap"
+        command = [sys.executable, str(work / "backup_snapshot.py"), "--source", str(source), "--dest", str(dest)]
+        first = subprocess.run(
+            _unprivileged([*command, "--partial"]), capture_output=True, text=True, check=False
+        )
+        assert first.returncode == 0, first.stderr
+        assert stat.S_IMODE((dest / "conf").stat().st_mode) == 0o555
+
+        (source / "conf").chmod(0o755)
+        (source / "conf" / "app.ini").write_text("v2 changed", encoding="utf-8")
+        (source / "conf").chmod(0o555)
+        (source / "old").chmod(0o755)
+        shutil.rmtree(source / "old")
+
+        second = subprocess.run(_unprivileged(command), capture_output=True, text=True, check=False)
+
+        assert second.returncode == 0, second.stderr
+        assert (dest / "conf" / "app.ini").read_text(encoding="utf-8") == "v2 changed"
+        assert stat.S_IMODE((dest / "conf").stat().st_mode) == 0o555
+        assert not (dest / "old").exists()
+        assert (dest / "data-link.bin").stat().st_ino == (dest / "data.bin").stat().st_ino
+        # The second name of data.bin is reported apart from the copied files.
+        assert "Snapshot: 3 files, " in second.stdout
+        assert "1 hardlinked within the snapshot." in second.stdout
+    finally:
+        for current, dirnames, _ in os.walk(work):
+            for name in dirnames:
+                os.chmod(os.path.join(current, name), 0o755)
+        shutil.rmtree(work)
+
+
+def test_low_downtime_backup_syncs_changes_made_before_the_stop(
+    repo_copy: Path,
+    monkeypatch,
+    compose_instances_data: ComposeInstancesData,
+) -> None:
+    expected_core_apps = compose_instances_data.instance_app_names.get("core", [])
+    data_mount = repo_copy / "data" / "core" / "app"
+    (data_mount / "cache").mkdir(parents=True)
+    (data_mount / "static.bin").write_bytes(b"static" * 100)
+    (data_mount / "db.sqlite").write_text("live", encoding="utf-8")
+    (data_mount / "cache" / "gone.txt").write_text("gone", encoding="utf-8")
+
+    # Simulates writes that land between the live pre-copy and the stop, and
+    # records what the pre-copy left in backups/.
+    down_hook = (
+        f"ls {repo_copy}/backups > {repo_copy}/backups-at-stop.txt; "
+        f"printf 'final' > {data_mount}/db.sqlite; "
+        f"rm -rf {data_mount}/cache; "
+        f"printf 'late' > {data_mount}/late.txt"
+    )
+    compose_log = _install_compose_stub(
+        repo_copy, monkeypatch, {"core": expected_core_apps}, down_hook=down_hook
+    )
+    _install_date_stub(repo_copy, monkeypatch)
+
+    result = run_backup(repo_copy, "core", "--low-downtime")
+
+    assert result.returncode == 0, result.stderr
+    stdout = result.stdout
+    assert stdout.index("Pre-copying data") < stdout.index("Stopping stack")
+    assert stdout.index("Stopping stack") < stdout.index("Syncing files changed since the pre-copy")
+    assert "Snapshot: 3 files, 1 already current" in stdout
+    assert "Downtime: " in stdout
+
+    snapshot = repo_copy / "backups" / "core-20240101-030405"
+    assert sorted(path.name for path in snapshot.iterdir()) == ["db.sqlite", "late.txt", "static.bin"]
+    assert (snapshot / "db.sqlite").read_text(encoding="utf-8") == "final"
+    assert (snapshot / "late.txt").read_text(encoding="utf-8") == "late"
+    manifest = json.loads(
+        (repo_copy / "backups" / "core-20240101-030405.manifest.json").read_text(encoding="utf-8")
+    )
+    assert sorted(manifest["files"]) == ["db.sqlite", "late.txt", "static.bin"]
+    assert (repo_copy / "backups-at-stop.txt").read_text(encoding="utf-8").split() == [
+        "core-20240101-030405",
+        "core-20240101-030405.partial.json",
+    ]
+    assert not (repo_copy / "backups" / "core-20240101-030405.partial.json").exists()
+    _assert_compose_restart_calls(compose_log, expected_core_apps)
+
+
+def test_low_downtime_backup_removes_pre_copy_when_stop_fails(
+    repo_copy: Path,
+    monkeypatch,
+    compose_instances_data: ComposeInstancesData,
+) -> None:
+    expected_core_apps = compose_instances_data.instance_app_names.get("core", [])
+    data_mount = repo_copy / "data" / "core" / "app"
+    data_mount.mkdir(parents=True)
+    (data_mount / "db.sqlite").write_text("live", encoding="utf-8")
+    _install_compose_stub(repo_copy, monkeypatch, {"core": expected_core_apps}, down_hook="exit 1")
+    _install_date_stub(repo_copy, monkeypatch)
+
+    result = run_backup(repo_copy, "core", "--low-downtime")
+
+    assert result.returncode == 1
+    assert "Failed to stop stack 'core'" in result.stderr
+    assert list((repo_copy / "backups").iterdir()) == []
+
+
+@pytest.mark.parametrize(("compression", "extension"), [("gzip", ".tar.gz"), ("zstd", ".tar.zst")])
+def test_archive_mode_streams_compressed_tarball_with_manifest(
+    repo_copy: Path,
+    monkeypatch,
+    compose_instances_data: ComposeInstancesData,
+    compression: str,
+    extension: str,
+) -> None:
+    if shutil.which("zstd" if compression == "zstd" else "gzip") is None:
+        pytest.skip(f"{compression} is not installed")
+    expected_core_apps = compose_instances_data.instance_app_names.get("core", [])
+    compose_log = _install_compose_stub(repo_copy, monkeypatch, {"core": expected_core_apps})
+    _install_date_stub(repo_copy, monkeypatch)
+
+    data_mount = repo_copy / "data" / "core" / "app"
+    (data_mount / "nested").mkdir(parents=True)
+    (data_mount / "db.sqlite").write_bytes(b"payload" * 1000)
+    (data_mount / "nested" / "notes.txt").write_text("notes", encoding="utf-8")
+    (data_mount / "current").symlink_to("db.sqlite")
+    os.link(data_mount / "db.sqlite", data_mount / "nested" / "db-link.sqlite")
+
+    result = run_backup(repo_copy, "core", "--archive", compression)
+
+    assert result.returncode == 0, result.stderr
+    assert "Archive: 3 files" in result.stdout
+    backups = repo_copy / "backups"
+    archive_path = backups / f"core-20240101-030405{extension}"
+    assert f"completed at '{archive_path}'" in result.stdout
+    assert not (backups / "core-20240101-030405").exists()
+    assert sorted(path.name for path in backups.iterdir()) == sorted(
+        [archive_path.name, "core-20240101-030405.manifest.json"]
+    )
+
+    if compression == "gzip":
+        with tarfile.open(archive_path, "r:gz") as archive:
+            names = archive.getnames()
+            payload = archive.extractfile("db.sqlite").read()
+            assert archive.getmember("current").issym()
+    else:
+        raw = subprocess.run(
+            ["zstd", "-d", "-c", str(archive_path)], capture_output=True, check=True
+        ).stdout
+        with tarfile.open(fileobj=io.BytesIO(raw), mode="r:") as archive:
+            names = archive.getnames()
+            payload = archive.extractfile("db.sqlite").read()
+    assert sorted(names) == ["current", "db.sqlite", "nested", "nested/db-link.sqlite", "nested/notes.txt"]
+    assert payload == b"payload" * 1000
+
+    manifest = json.loads((backups / "core-20240101-030405.manifest.json").read_text(encoding="utf-8"))
+    assert manifest["archive"]["compression"] == compression
+    assert manifest["files"]["db.sqlite"]["size"] == 7000
+    assert manifest["files"]["db.sqlite"]["sha256"] == hashlib.sha256(b"payload" * 1000).hexdigest()
+    assert manifest["files"]["nested/notes.txt"]["sha256"] == hashlib.sha256(b"notes").hexdigest()
+    link = manifest["files"]["nested/db-link.sqlite"]
+    assert link["hardlink"] == "db.sqlite"
+    assert link["sha256"] == manifest["files"]["db.sqlite"]["sha256"]
+    assert (manifest["stats"]["hardlinks"], manifest["stats"]["bytes"]) == (1, 7000 + 5)
+    _assert_compose_restart_calls(compose_log, expected_core_apps)
+
+
+def _hide_command(repo_copy: Path, monkeypatch, name: str) -> None:
+    """Rebuilds PATH so that ``name`` no longer resolves (other tools still do)."""
+
+    directories = []
+    for position, directory in enumerate(os.environ.get("PATH", "").split(os.pathsep)):
+        folder = Path(directory)
+        if not (folder / name).exists():
+            directories.append(directory)
+            continue
+        shadow = repo_copy / f".path-shadow-{position}"
+        shadow.mkdir()
+        for entry in folder.iterdir():
+            if entry.name != name:
+                (shadow / entry.name).symlink_to(entry)
+        directories.append(str(shadow))
+    monkeypatch.setenv("PATH", os.pathsep.join(directories))
+
+
+def test_archive_checks_compressor_before_stopping_the_stack(
+    repo_copy: Path,
+    monkeypatch,
+    compose_instances_data: ComposeInstancesData,
+) -> None:
+    expected_core_apps = compose_instances_data.instance_app_names.get("core", [])
+    compose_log = _install_compose_stub(repo_copy, monkeypatch, {"core": expected_core_apps})
+    _hide_command(repo_copy, monkeypatch, "zstd")
+    (repo_copy / "data" / "core" / "app").mkdir(parents=True)
+
+    result = run_backup(repo_copy, "core", "--archive", "zstd")
+
+    assert result.returncode == 1
+    assert "--archive zstd requires the zstd command" in result.stderr
+    assert not compose_log.exists() or " down" not in compose_log.read_text(encoding="utf-8")
+
+
+def test_archive_requires_local_python_before_stopping_the_stack(
+    repo_copy: Path,
+    monkeypatch,
+    compose_instances_data: ComposeInstancesData,
+    tmp_path: Path,
+) -> None:
+    expected_core_apps = compose_instances_data.instance_app_names.get("core", [])
+    compose_log = _install_compose_stub(repo_copy, monkeypatch, {"core": expected_core_apps})
+    fallback_env, docker_log = install_python_fallback(tmp_path / "fallback")
+    (repo_copy / "data" / "core" / "app").mkdir(parents=True)
+    # Keep the compose stub reachable ahead of the rebuilt PATH.
+    fallback_env["PATH"] = f"{repo_copy / '.fake-bin'}{os.pathsep}{fallback_env['PATH']}"
+
+    result = run_backup(repo_copy, "core", "--archive", "gzip", env_overrides=fallback_env)
+
+    assert result.returncode == 1
+    assert "--archive requires a local python3" in result.stderr
+    assert not compose_log.exists() or " down" not in compose_log.read_text(encoding="utf-8")
+    assert docker_runs(docker_log) == []
+
+
+@pytest.mark.parametrize(("args", "threads"), [((), "-T0"), (("--jobs", "3"), "-T3")])
+def test_archive_uses_every_core_unless_jobs_is_given(
+    repo_copy: Path,
+    monkeypatch,
+    compose_instances_data: ComposeInstancesData,
+    args: tuple[str, ...],
+    threads: str,
+) -> None:
+    expected_core_apps = compose_instances_data.instance_app_names.get("core", [])
+    _install_compose_stub(repo_copy, monkeypatch, {"core": expected_core_apps})
+    _install_date_stub(repo_copy, monkeypatch)
+    zstd_log = repo_copy / "zstd_calls.log"
+    _prepend_fake_bin(
+        repo_copy,
+        monkeypatch,
+        ("zstd", f"#!/usr/bin/env bash\nprintf '%s\\n' \"$*\" >> {zstd_log}\ncat\n"),
+    )
+    monkeypatch.delenv("BACKUP_JOBS", raising=False)
+    data_mount = repo_copy / "data" / "core" / "app"
+    data_mount.mkdir(parents=True)
+    (data_mount / "db.sqlite").write_text("payload", encoding="utf-8")
+
+    result = run_backup(repo_copy, "core", "--archive", "zstd", *args)
+
+    assert result.returncode == 0, result.stderr
+    assert zstd_log.read_text(encoding="utf-8").split() == [threads, "-q", "-c"]
+
+
+def test_archive_rejects_unknown_compression(repo_copy: Path) -> None:
+    result = run_backup(repo_copy, "core", "--archive", "xz")
+
+    assert result.returncode == 1
+    assert "Invalid archive compression 'xz'" in result.stderr
@@ -3,11 +3,15 @@ from __future__ import annotations
 import json
 import os
 import shutil
+import sqlite3
 import subprocess
+import sys
 from pathlib import Path
 
 import pytest
 
+from tests.helpers.python_fallback import docker_runs, install_python_fallback
+
 SCRIPT_RELATIVE = Path("scripts") / "check_db_integrity.sh"
 
 
@@ -52,7 +56,23 @@ def compose_stub(tmp_path: Path) -> tuple[Path, Path]:
         "    fi",
         "    exit_code=${COMPOSE_STUB_EXIT_CODE:-0}",
         "    ;;",
-        "  pause|unpause)",
+        "  pause)",
+        "    exit_code=0",
+        "    ;;",
+        "  unpause)",
+        '    if [[ -n "${COMPOSE_STUB_ON_UNPAUSE:-}" ]]; then',
+        '      bash -c "$COMPOSE_STUB_ON_UNPAUSE"',
+        "    fi",
+        "    exit_code=0",
+        "    ;;",
+        "  config)",
+        "    prev=\"\"",
+        "    for token in \"$@\"; do",
+        '      if [[ "$prev" == "--output" && -n "${COMPOSE_STUB_CONFIG:-}" ]]; then',
+        '        cp "$COMPOSE_STUB_CONFIG" "$token"',
+        "      fi",
+        '      prev="$token"',
+        "    done",
         "    exit_code=0",
         "    ;;",
         "  *)",
@@ -137,7 +157,7 @@ def sqlite_stub(tmp_path: Path) -> tuple[Path, Path, Path]:
         "db_path = args[0]",
         "behavior = get_behavior(db_path)",
         "",
-        "if len(args) >= 2 and args[1] == 'PRAGMA integrity_check;':",
+        "if len(args) >= 2 and args[1] in ('PRAGMA integrity_check;', 'PRAGMA quick_check;'):",
         "    sys.exit(handle_integrity(db_path, behavior))",
         "if len(args) >= 2 and args[1] == '.recover':",
         "    sys.exit(handle_recover(db_path, behavior))",
@@ -167,6 +187,14 @@ def docker_stub(tmp_path: Path) -> tuple[Path, Path]:
         "    handle.write('\\n')",
         "",
         "args = sys.argv[1:]",
+        "stub_bin = os.environ['SQLITE3_CONTAINER_STUB_BIN']",
+        "if '-c' in args and args[args.index('-c') - 1] == 'sh':",
+        "    # Batch sessions run a shell loop; resolve sqlite3 to the stub.",
+        "    env = dict(os.environ)",
+        "    env['PATH'] = f\"{Path(stub_bin).parent}:{env.get('PATH', '')}\"",
+        "    result = subprocess.run(['sh', *args[args.index('-c'):]], env=env, check=False)",
+        "    sys.exit(result.returncode)",
+        "",
         "try:",
         "    idx = args.index('sqlite3')",
         "except ValueError:",
@@ -176,7 +204,6 @@ def docker_stub(tmp_path: Path) -> tuple[Path, Path]:
         "if not container_args:",
         "    sys.exit(0)",
         "",
-        "stub_bin = os.environ['SQLITE3_CONTAINER_STUB_BIN']",
         "result = subprocess.run(",
         "    [stub_bin, *container_args],",
         "    stdin=sys.stdin,",
@@ -267,7 +294,7 @@ def test_exits_when_no_databases(
     )
 
     assert result.returncode == 0, result.stderr
-    assert "No .db files found" in result.stdout
+    assert "No SQLite databases found" in result.stdout
     calls = compose_log.read_text(encoding="utf-8").splitlines()
     assert any(" ps " in call or call.rstrip().endswith(" ps") for call in calls)
     assert not any(" pause" in call for call in calls)
@@ -451,7 +478,9 @@ def test_recovers_corrupted_database(
 
     backups = list(db_path.parent.glob(f"{db_path.name}.*.bak"))
     assert backups, "Backup file should be created during recovery"
-    assert compose_log.read_text(encoding="utf-8").count("unpause") == 1
+    compose_calls = compose_log.read_text(encoding="utf-8")
+    assert "unpause" not in compose_calls
+    assert compose_calls.splitlines()[-1].split()[-2:] == ["restart", "app"]
 
 
 def test_json_output_reports_corrupted_database_alerts(
@@ -816,3 +845,957 @@ def test_errors_when_data_dir_env_missing(
 
     assert result.returncode == 1
     assert "Error: data directory not found" in result.stderr
+
+
+def test_container_mode_checks_all_databases_in_one_session(
+    repo_copy: Path,
+    compose_stub: tuple[Path, Path],
+    sqlite_stub: tuple[Path, Path, Path],
+    docker_stub: tuple[Path, Path],
+) -> None:
+    compose_stub_path, compose_log = compose_stub
+    sqlite_stub_path, sqlite_config, sqlite_log = sqlite_stub
+    docker_path, docker_log = docker_stub
+
+    data_dir = repo_copy / "data"
+    (data_dir / "nested").mkdir(parents=True)
+    healthy = [data_dir / "a.db", data_dir / "nested" / "b.db", data_dir / "c.db"]
+    for db_path in healthy:
+        db_path.write_text("payload", encoding="utf-8")
+    broken = data_dir / "nested" / "broken.db"
+    broken.write_text("payload", encoding="utf-8")
+    sqlite_config.write_text(
+        json.dumps(
+            {
+                str(broken): {
+                    "integrity": {"stdout": "*** in database main ***\nPage 3 is never used\n", "returncode": 0},
+                    "recover": {"stdout": "BEGIN;\nCOMMIT;\n", "returncode": 0},
+                }
+            }
+        ),
+        encoding="utf-8",
+    )
+
+    result = _run_script(
+        repo_copy,
+        compose_stub_path,
+        compose_log,
+        sqlite_stub_path,
+        sqlite_config,
+        sqlite_log,
+        "core",
+        "--format",
+        "json",
+        env={
+            "COMPOSE_STUB_SERVICES": "app",
+            "PATH": f"{docker_path.parent}:{os.environ['PATH']}",
+            "DOCKER_STUB_LOG": str(docker_log),
+            "SQLITE3_CONTAINER_STUB_BIN": str(sqlite_stub_path),
+        },
+        sqlite_mode="container",
+    )
+
+    assert result.returncode == 0, result.stderr
+    docker_calls = [json.loads(line)["argv"] for line in docker_log.read_text(encoding="utf-8").splitlines()]
+    sessions = [call for call in docker_calls if "sh" in call]
+    assert len(sessions) == 1
+    assert sessions[0].count("--volume") <= 2
+    assert sorted(sessions[0][-7::2]) == sorted(str(path) for path in [*healthy, broken])
+    # Only the corrupted database needs the per-step recovery containers.
+    assert len(docker_calls) - len(sessions) == 2
+
+    databases = {entry["path"]: entry for entry in json.loads(result.stdout)["databases"]}
+    assert all(databases[str(path)]["status"] == "ok" for path in healthy)
+    assert databases[str(broken)]["status"] == "recovered"
+    assert databases[str(broken)]["message"] == (
+        "Integrity check failed: *** in database main ***; Page 3 is never used"
+    )
+
+
+def test_container_session_failure_marks_every_database(
+    repo_copy: Path,
+    compose_stub: tuple[Path, Path],
+    sqlite_stub: tuple[Path, Path, Path],
+    tmp_path: Path,
+) -> None:
+    compose_stub_path, compose_log = compose_stub
+    sqlite_stub_path, sqlite_config, sqlite_log = sqlite_stub
+
+    runtime_dir = tmp_path / "runtime"
+    runtime_dir.mkdir()
+    runtime = runtime_dir / "docker"
+    runtime.write_text("#!/usr/bin/env bash\necho 'image pull failed' >&2\nexit 125\n", encoding="utf-8")
+    runtime.chmod(0o755)
+
+    data_dir = repo_copy / "data"
+    data_dir.mkdir()
+    for name in ("a.db", "b.db"):
+        (data_dir / name).write_text("payload", encoding="utf-8")
+
+    result = _run_script(
+        repo_copy,
+        compose_stub_path,
+        compose_log,
+        sqlite_stub_path,
+        sqlite_config,
+        sqlite_log,
+        "core",
+        "--format",
+        "json",
+        env={"COMPOSE_STUB_SERVICES": "app", "PATH": f"{runtime_dir}:{os.environ['PATH']}"},
+        sqlite_mode="container",
+    )
+
+    assert result.returncode == 2
+    payload = json.loads(result.stdout)
+    assert len(payload["databases"]) == 2
+    for entry in payload["databases"]:
+        assert entry["status"] == "failed"
+        assert "no result from the sqlite3 container session (exit 125) image pull failed" in entry["message"]
+
+
+@pytest.mark.parametrize("sqlite_mode", ["binary", "container"])
+def test_parallel_checks_keep_results_in_path_order(
+    repo_copy: Path,
+    compose_stub: tuple[Path, Path],
+    sqlite_stub: tuple[Path, Path, Path],
+    docker_stub: tuple[Path, Path],
+    tmp_path: Path,
+    sqlite_mode: str,
+) -> None:
+    compose_stub_path, compose_log = compose_stub
+    sqlite_stub_path, sqlite_config, sqlite_log = sqlite_stub
+    docker_path, docker_log = docker_stub
+
+    # Wrap the sqlite3 stub so every check sleeps and records how many ran at once.
+    slow_dir = tmp_path / "slow"
+    slow_dir.mkdir()
+    slow_stub = slow_dir / "sqlite3"
+    active_dir = tmp_path / "active"
+    active_dir.mkdir()
+    slow_stub.write_text(
+        f"""#!/usr/bin/env python3
+import os, subprocess, sys, time
+from pathlib import Path
+
+active = Path({str(active_dir)!r})
+marker = active / str(os.getpid())
+marker.touch()
+peak = active.parent / "peak"
+current = len(list(active.iterdir()))
+with open(peak, "a", encoding="utf-8") as handle:
+    handle.write(f"{{current}}\\n")
+time.sleep(0.4)
+marker.unlink()
+sys.exit(subprocess.run([{str(sqlite_stub_path)!r}, *sys.argv[1:]]).returncode)
+""",
+        encoding="utf-8",
+    )
+    slow_stub.chmod(0o755)
+
+    data_dir = repo_copy / "data"
+    data_dir.mkdir()
+    names = ["d.db", "a.db", "c.db", "b.db"]
+    for size, name in enumerate(names, start=1):
+        (data_dir / name).write_text("x" * size * 100, encoding="utf-8")
+    broken = data_dir / "c.db"
+    sqlite_config.write_text(
+        json.dumps({str(broken): {"integrity": {"stdout": "malformed", "returncode": 0}}}),
+        encoding="utf-8",
+    )
+
+    result = _run_script(
+        repo_copy,
+        compose_stub_path,
+        compose_log,
+        slow_stub,
+        sqlite_config,
+        sqlite_log,
+        "core",
+        "-j",
+        "4",
+        "--format",
+        "json",
+        env={
+            "COMPOSE_STUB_SERVICES": "app",
+            "PATH": f"{docker_path.parent}:{os.environ['PATH']}",
+            "DOCKER_STUB_LOG": str(docker_log),
+            "SQLITE3_CONTAINER_STUB_BIN": str(slow_stub),
+        },
+        sqlite_mode=sqlite_mode,
+    )
+
+    assert result.returncode == 0, result.stderr
+    payload = json.loads(result.stdout)
+    assert [Path(entry["path"]).name for entry in payload["databases"]] == sorted(names)
+    statuses = {Path(entry["path"]).name: entry["status"] for entry in payload["databases"]}
+    assert statuses == {"a.db": "ok", "b.db": "ok", "c.db": "recovered", "d.db": "ok"}
+    peak = max(int(line) for line in (tmp_path / "peak").read_text(encoding="utf-8").split())
+    assert peak >= 2
+
+
+def test_rejects_invalid_jobs(
+    repo_copy: Path,
+    compose_stub: tuple[Path, Path],
+    sqlite_stub: tuple[Path, Path, Path],
+) -> None:
+    compose_stub_path, compose_log = compose_stub
+    sqlite_stub_path, sqlite_config, sqlite_log = sqlite_stub
+
+    result = _run_script(
+        repo_copy,
+        compose_stub_path,
+        compose_log,
+        sqlite_stub_path,
+        sqlite_config,
+        sqlite_log,
+        "core",
+        "--jobs",
+        "0",
+    )
+
+    assert result.returncode == 1
+    assert "--jobs requires a positive integer" in result.stderr
+
+
+def _create_sqlite_database(path: Path, rows: int) -> None:
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+        connection.executemany(
+            "INSERT INTO items (name) VALUES (?)", [(f"item-{index}",) for index in range(rows)]
+        )
+    connection.close()
+
+
+def test_python_mode_checks_without_sqlite_cli_or_runtime(
+    repo_copy: Path,
+    compose_stub: tuple[Path, Path],
+    sqlite_stub: tuple[Path, Path, Path],
+) -> None:
+    compose_stub_path, compose_log = compose_stub
+    sqlite_stub_path, sqlite_config, sqlite_log = sqlite_stub
+
+    data_dir = repo_copy / "data"
+    (data_dir / "nested").mkdir(parents=True)
+    _create_sqlite_database(data_dir / "app.db", 500)
+    _create_sqlite_database(data_dir / "nested" / "small.db", 3)
+    broken = data_dir / "broken.db"
+    broken.write_bytes(b"definitely not a database" * 100)
+    mtimes = {path: path.stat().st_mtime_ns for path in data_dir.rglob("*.db")}
+
+    result = _run_script(
+        repo_copy,
+        compose_stub_path,
+        compose_log,
+        sqlite_stub_path,
+        sqlite_config,
+        sqlite_log,
+        "core",
+        "--jobs",
+        "2",
+        "--format",
+        "json",
+        env={
+            "COMPOSE_STUB_SERVICES": "app",
+            "SQLITE3_BIN": "sqlite3-missing",
+            "SQLITE3_CONTAINER_RUNTIME": "container-runtime-missing",
+        },
+        sqlite_mode="python",
+        use_sqlite_stub=False,
+    )
+
+    assert result.returncode == 2, result.stderr
+    assert "in-process with the Python sqlite3 module" in result.stderr
+    payload = json.loads(result.stdout)
+    statuses = {Path(entry["path"]).name: entry for entry in payload["databases"]}
+    assert statuses["app.db"]["status"] == "ok"
+    assert statuses["small.db"]["status"] == "ok"
+    assert statuses["broken.db"]["status"] == "failed"
+    assert "file is not a database" in statuses["broken.db"]["message"]
+    assert {path: path.stat().st_mtime_ns for path in data_dir.rglob("*.db")} == mtimes
+
+
+def test_python_mode_recovers_with_sqlite_cli(
+    repo_copy: Path,
+    compose_stub: tuple[Path, Path],
+    sqlite_stub: tuple[Path, Path, Path],
+) -> None:
+    compose_stub_path, compose_log = compose_stub
+    sqlite_stub_path, sqlite_config, sqlite_log = sqlite_stub
+
+    data_dir = repo_copy / "data"
+    data_dir.mkdir()
+    _create_sqlite_database(data_dir / "app.db", 10)
+    broken = data_dir / "broken.db"
+    broken.write_bytes(b"garbage" * 10)
+
+    result = _run_script(
+        repo_copy,
+        compose_stub_path,
+        compose_log,
+        sqlite_stub_path,
+        sqlite_config,
+        sqlite_log,
+        "core",
+        "--format",
+        "json",
+        env={"COMPOSE_STUB_SERVICES": "app"},
+        sqlite_mode="python",
+    )
+
+    assert result.returncode == 0, result.stderr
+    payload = json.loads(result.stdout)
+    assert [entry["status"] for entry in payload["databases"]] == ["ok", "recovered"]
+    calls = [json.loads(line)["argv"] for line in sqlite_log.read_text(encoding="utf-8").splitlines()]
+    assert all("PRAGMA integrity_check;" not in call for call in calls)
+    assert [str(broken), ".recover"] in calls
+
+
+def _pragma_calls(sqlite_log: Path) -> list[tuple[str, str]]:
+    if not sqlite_log.exists():
+        return []
+    calls = [json.loads(line)["argv"] for line in sqlite_log.read_text(encoding="utf-8").splitlines()]
+    return [(Path(call[0]).name, call[1]) for call in calls if len(call) > 1 and call[1].startswith("PRAGMA")]
+
+
+def test_ledger_skips_unchanged_databases(
+    repo_copy: Path,
+    compose_stub: tuple[Path, Path],
+    sqlite_stub: tuple[Path, Path, Path],
+) -> None:
+    compose_stub_path, compose_log = compose_stub
+    sqlite_stub_path, sqlite_config, sqlite_log = sqlite_stub
+
+    data_dir = repo_copy / "data"
+    data_dir.mkdir()
+    first = data_dir / "a.db"
+    second = data_dir / "b.db"
+    first.write_bytes(b"A" * 9000)
+    second.write_bytes(b"B" * 9000)
+
+    def run(*args: str, env: dict[str, str] | None = None) -> dict:
+        sqlite_log.write_text("", encoding="utf-8")
+        result = _run_script(
+            repo_copy,
+            compose_stub_path,
+            compose_log,
+            sqlite_stub_path,
+            sqlite_config,
+            sqlite_log,
+            "core",
+            "--format",
+            "json",
+            *args,
+            env=env,
+        )
+        assert result.returncode == 0, result.stderr
+        return json.loads(result.stdout)
+
+    payload = run()
+    assert [entry["status"] for entry in payload["databases"]] == ["ok", "ok"]
+    ledger = json.loads((data_dir / ".integrity-ledger.json").read_text(encoding="utf-8"))
+    assert sorted(ledger["databases"]) == [str(first), str(second)]
+
+    payload = run()
+    assert [entry["status"] for entry in payload["databases"]] == ["skipped", "skipped"]
+    assert _pragma_calls(sqlite_log) == []
+
+    # Same size and mtime, different last page: only the hash notices.
+    stat = second.stat()
+    second.write_bytes(b"B" * 8999 + b"C")
+    os.utime(second, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    payload = run()
+    assert [entry["status"] for entry in payload["databases"]] == ["skipped", "ok"]
+    assert _pragma_calls(sqlite_log) == [("b.db", "PRAGMA integrity_check;")]
+
+    payload = run(env={"DB_INTEGRITY_UNCHANGED": "quick"})
+    assert [entry["message"] for entry in payload["databases"]] == [
+        "Quick check OK (unchanged since the last full check)"
+    ] * 2
+    assert sorted(_pragma_calls(sqlite_log)) == [("a.db", "PRAGMA quick_check;"), ("b.db", "PRAGMA quick_check;")]
+
+    run("--full")
+    assert sorted(_pragma_calls(sqlite_log)) == [
+        ("a.db", "PRAGMA integrity_check;"),
+        ("b.db", "PRAGMA integrity_check;"),
+    ]
+
+
+def test_ledger_fingerprints_databases_while_paused(
+    repo_copy: Path,
+    compose_stub: tuple[Path, Path],
+    sqlite_stub: tuple[Path, Path, Path],
+) -> None:
+    compose_stub_path, compose_log = compose_stub
+    sqlite_stub_path, sqlite_config, sqlite_log = sqlite_stub
+
+    data_dir = repo_copy / "data"
+    data_dir.mkdir()
+    database = data_dir / "app.db"
+    database.write_bytes(b"A" * 9000)
+
+    def run(env: dict[str, str]) -> dict:
+        result = _run_script(
+            repo_copy,
+            compose_stub_path,
+            compose_log,
+            sqlite_stub_path,
+            sqlite_config,
+            sqlite_log,
+            "core",
+            "--format",
+            "json",
+            env={"COMPOSE_STUB_SERVICES": "app", **env},
+        )
+        assert result.returncode == 0, result.stderr
+        return json.loads(result.stdout)
+
+    # The service writes as soon as it is resumed; the ledger must describe
+    # the file that was checked, not the one written afterwards.
+    run({"COMPOSE_STUB_ON_UNPAUSE": f"printf B >>{database}"})
+    assert database.stat().st_size == 9001
+
+    payload = run({})
+    assert [entry["status"] for entry in payload["databases"]] == ["ok"]
+    assert payload["databases"][0]["message"] == "Integrity OK"
+
+
+def test_ledger_drops_recovered_databases(
+    repo_copy: Path,
+    compose_stub: tuple[Path, Path],
+    sqlite_stub: tuple[Path, Path, Path],
+) -> None:
+    compose_stub_path, compose_log = compose_stub
+    sqlite_stub_path, sqlite_config, sqlite_log = sqlite_stub
+
+    data_dir = repo_copy / "data"
+    data_dir.mkdir()
+    healthy = data_dir / "healthy.db"
+    broken = data_dir / "broken.db"
+    healthy.write_text("healthy", encoding="utf-8")
+    broken.write_text("broken", encoding="utf-8")
+    sqlite_config.write_text(
+        json.dumps({str(broken): {"integrity": {"stdout": "malformed", "returncode": 0}}}),
+        encoding="utf-8",
+    )
+    ledger_path = repo_copy / "state" / "ledger.json"
+
+    result = _run_script(
+        repo_copy,
+        compose_stub_path,
+        compose_log,
+        sqlite_stub_path,
+        sqlite_config,
+        sqlite_log,
+        "core",
+        env={"DB_INTEGRITY_LEDGER": "state/ledger.json"},
+    )
+
+    assert result.returncode == 0, result.stderr
+    ledger = json.loads(ledger_path.read_text(encoding="utf-8"))
+    assert list(ledger["databases"]) == [str(healthy)]
+    assert not (data_dir / ".integrity-ledger.json").exists()
+
+    result = _run_script(
+        repo_copy,
+        compose_stub_path,
+        compose_log,
+        sqlite_stub_path,
+        sqlite_config,
+        sqlite_log,
+        "core",
+        "--no-ledger",
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert "skipped" not in result.stdout
+    assert json.loads(ledger_path.read_text(encoding="utf-8")) == ledger
+
+
+def test_online_mode_checks_snapshots_without_pausing(
+    repo_copy: Path,
+    compose_stub: tuple[Path, Path],
+    sqlite_stub: tuple[Path, Path, Path],
+    tmp_path: Path,
+) -> None:
+    compose_stub_path, compose_log = compose_stub
+    sqlite_stub_path, sqlite_config, sqlite_log = sqlite_stub
+
+    data_dir = repo_copy / "data"
+    data_dir.mkdir()
+    _create_sqlite_database(data_dir / "app.db", 50)
+    _create_sqlite_database(data_dir / "media.db", 5)
+    scratch = tmp_path / "scratch"
+    scratch.mkdir()
+
+    result = _run_script(
+        repo_copy,
+        compose_stub_path,
+        compose_log,
+        sqlite_stub_path,
+        sqlite_config,
+        sqlite_log,
+        "core",
+        "--online",
+        "--format",
+        "json",
+        env={"COMPOSE_STUB_SERVICES": "app\nworker", "DB_INTEGRITY_SCRATCH": str(scratch)},
+    )
+
+    assert result.returncode == 0, result.stderr
+    payload = json.loads(result.stdout)
+    assert [entry["status"] for entry in payload["databases"]] == ["ok", "ok"]
+    calls = compose_log.read_text(encoding="utf-8").splitlines()
+    assert not any(" pause" in call for call in calls)
+
+    checked = [json.loads(line)["argv"][0] for line in sqlite_log.read_text(encoding="utf-8").splitlines()]
+    assert len(checked) == 2
+    assert all(Path(path).parent.parent == scratch for path in checked)
+    assert list(scratch.iterdir()) == []
+
+    ledger = json.loads((data_dir / ".integrity-ledger.json").read_text(encoding="utf-8"))
+    assert sorted(ledger["databases"]) == [str(data_dir / "app.db"), str(data_dir / "media.db")]
+
+
+def _use_python_fallback(tmp_path: Path, sqlite_stub_path: Path) -> tuple[dict[str, str], Path]:
+    # The sqlite3 stub is a Python script; keep it runnable once python3 is hidden.
+    lines = sqlite_stub_path.read_text(encoding="utf-8").splitlines()
+    sqlite_stub_path.write_text("\n".join([f"#!{sys.executable}", *lines[1:]]) + "\n", encoding="utf-8")
+    return install_python_fallback(tmp_path / "fallback")
+
+
+def test_online_mode_snapshots_through_docker_fallback(
+    repo_copy: Path,
+    compose_stub: tuple[Path, Path],
+    sqlite_stub: tuple[Path, Path, Path],
+    tmp_path: Path,
+) -> None:
+    compose_stub_path, compose_log = compose_stub
+    sqlite_stub_path, sqlite_config, sqlite_log = sqlite_stub
+    fallback_env, docker_log = _use_python_fallback(tmp_path, sqlite_stub_path)
+
+    data_dir = repo_copy / "data"
+    data_dir.mkdir()
+    database = data_dir / "app.db"
+    _create_sqlite_database(database, 5)
+    original = database.read_bytes()
+    scratch = tmp_path / "scratch"
+    scratch.mkdir()
+
+    result = _run_script(
+        repo_copy,
+        compose_stub_path,
+        compose_log,
+        sqlite_stub_path,
+        sqlite_config,
+        sqlite_log,
+        "core",
+        "--online",
+        "--format",
+        "json",
+        env={"COMPOSE_STUB_SERVICES": "app", "DB_INTEGRITY_SCRATCH": str(scratch), **fallback_env},
+    )
+
+    assert result.returncode == 0, result.stderr
+    payload = json.loads(result.stdout)
+    assert [entry["status"] for entry in payload["databases"]] == ["ok"]
+    assert any("db_integrity_snapshot.py" in " ".join(call) for call in docker_runs(docker_log))
+    checked = [json.loads(line)["argv"][0] for line in sqlite_log.read_text(encoding="utf-8").splitlines()]
+    assert [Path(path).parent.parent for path in checked] == [scratch]
+    assert database.read_bytes() == original
+    assert not list(data_dir.glob("app.db.*.bak"))
+
+
+def test_online_mode_pauses_only_to_recover(
+    repo_copy: Path,
+    compose_stub: tuple[Path, Path],
+    sqlite_stub: tuple[Path, Path, Path],
+) -> None:
+    compose_stub_path, compose_log = compose_stub
+    sqlite_stub_path, sqlite_config, sqlite_log = sqlite_stub
+
+    data_dir = repo_copy / "data"
+    data_dir.mkdir()
+    _create_sqlite_database(data_dir / "app.db", 5)
+    broken = data_dir / "broken.db"
+    broken.write_bytes(b"not a database at all" * 20)
+
+    result = _run_script(
+        repo_copy,
+        compose_stub_path,
+        compose_log,
+        sqlite_stub_path,
+        sqlite_config,
+        sqlite_log,
+        "core",
+        "--online",
+        "--format",
+        "json",
+        env={"COMPOSE_STUB_SERVICES": "app"},
+        sqlite_mode="python",
+    )
+
+    assert result.returncode == 0, result.stderr
+    payload = json.loads(result.stdout)
+    entries = {Path(entry["path"]).name: entry for entry in payload["databases"]}
+    assert entries["app.db"]["status"] == "ok"
+    assert entries["broken.db"]["status"] == "recovered"
+    assert "Online snapshot failed for" in result.stderr
+    calls = compose_log.read_text(encoding="utf-8").splitlines()
+    assert sum(" pause " in call or call.rstrip().endswith(" pause") for call in calls) == 1
+    assert calls[-1].split()[-2:] == ["restart", "app"]
+
+
+def test_online_mode_rechecks_live_file_when_snapshot_fails(
+    repo_copy: Path,
+    compose_stub: tuple[Path, Path],
+    sqlite_stub: tuple[Path, Path, Path],
+) -> None:
+    compose_stub_path, compose_log = compose_stub
+    sqlite_stub_path, sqlite_config, sqlite_log = sqlite_stub
+
+    data_dir = repo_copy / "data"
+    data_dir.mkdir()
+    _create_sqlite_database(data_dir / "app.db", 5)
+    # The snapshot cannot read this file, but the (stubbed) live check passes,
+    # as it would for a healthy database whose snapshot hit a lock timeout.
+    locked = data_dir / "locked.db"
+    locked.write_bytes(b"not a database at all" * 20)
+
+    result = _run_script(
+        repo_copy,
+        compose_stub_path,
+        compose_log,
+        sqlite_stub_path,
+        sqlite_config,
+        sqlite_log,
+        "core",
+        "--online",
+        "--format",
+        "json",
+        env={"COMPOSE_STUB_SERVICES": "app"},
+    )
+
+    assert result.returncode == 0, result.stderr
+    payload = json.loads(result.stdout)
+    assert [entry["status"] for entry in payload["databases"]] == ["ok", "ok"]
+    assert not list(data_dir.glob("locked.db.*.bak"))
+    assert locked.read_bytes() == b"not a database at all" * 20
+
+    checked = [json.loads(line)["argv"][0] for line in sqlite_log.read_text(encoding="utf-8").splitlines()]
+    assert str(locked) in checked
+    calls = compose_log.read_text(encoding="utf-8").splitlines()
+    assert sum(" pause " in call or call.rstrip().endswith(" pause") for call in calls) == 1
+    assert any(" unpause " in call or call.rstrip().endswith(" unpause") for call in calls)
+
+
+def test_pauses_only_the_services_owning_each_database(
+    repo_copy: Path,
+    compose_stub: tuple[Path, Path],
+    sqlite_stub: tuple[Path, Path, Path],
+    tmp_path: Path,
+) -> None:
+    compose_stub_path, compose_log = compose_stub
+    sqlite_stub_path, sqlite_config, sqlite_log = sqlite_stub
+
+    data_dir = repo_copy / "data"
+    for name in ("app", "media", "shared"):
+        (data_dir / name).mkdir(parents=True)
+    app_db = data_dir / "app" / "app.db"
+    media_dbs = [data_dir / "media" / "library.db", data_dir / "media" / "thumbs.db"]
+    shared_db = data_dir / "shared" / "cache.db"
+    for path in [app_db, *media_dbs, shared_db]:
+        path.write_text("dummy", encoding="utf-8")
+    sqlite_config.write_text(
+        json.dumps({str(media_dbs[1]): {"integrity": {"stdout": "malformed", "returncode": 0}}}),
+        encoding="utf-8",
+    )
+
+    compose_config = tmp_path / "compose-config.yml"
+    compose_config.write_text(
+        "services:\n"
+        "  app:\n"
+        "    volumes:\n"
+        "      - ${REPO_ROOT}/data/app:/var/lib/app\n"
+        "  media:\n"
+        "    volumes:\n"
+        "      - type: bind\n"
+        "        source: ./data/media\n"
+        "        target: /config\n"
+        "  worker:\n"
+        "    image: example/worker\n",
+        encoding="utf-8",
+    )
+
+    result = _run_script(
+        repo_copy,
+        compose_stub_path,
+        compose_log,
+        sqlite_stub_path,
+        sqlite_config,
+        sqlite_log,
+        "core",
+        "--format",
+        "json",
+        env={"COMPOSE_STUB_SERVICES": "app\nmedia\nworker", "COMPOSE_STUB_CONFIG": str(compose_config)},
+    )
+
+    assert result.returncode == 0, result.stderr
+    payload = json.loads(result.stdout)
+    assert [Path(entry["path"]).name for entry in payload["databases"]] == [
+        "app.db",
+        "library.db",
+        "thumbs.db",
+        "cache.db",
+    ]
+    assert payload["databases"][2]["status"] == "recovered"
+
+    actions = []
+    for call in compose_log.read_text(encoding="utf-8").splitlines():
+        tokens = call.split()
+        for action in ("pause", "unpause", "restart"):
+            if action in tokens:
+                actions.append((action, tokens[tokens.index(action) + 1 :]))
+    assert actions == [
+        ("pause", ["app"]),
+        ("unpause", ["app"]),
+        ("pause", ["media"]),
+        ("restart", ["media"]),
+        ("pause", ["app", "media", "worker"]),
+        ("unpause", ["app", "media", "worker"]),
+    ]
+
+
+def test_recovery_streams_into_place_and_keeps_original_inode(
+    repo_copy: Path,
+    compose_stub: tuple[Path, Path],
+    sqlite_stub: tuple[Path, Path, Path],
+    tmp_path: Path,
+) -> None:
+    compose_stub_path, compose_log = compose_stub
+    sqlite_stub_path, sqlite_config, sqlite_log = sqlite_stub
+
+    data_dir = repo_copy / "data"
+    data_dir.mkdir()
+    db_path = data_dir / "app.db"
+    db_path.write_text("original", encoding="utf-8")
+    db_path.chmod(0o640)
+    original_inode = db_path.stat().st_ino
+    stale_wal = data_dir / "app.db-wal"
+    stale_wal.write_text("stale frames", encoding="utf-8")
+    sqlite_config.write_text(
+        json.dumps(
+            {
+                str(db_path): {
+                    "integrity": {"stdout": "malformed", "returncode": 0},
+                    "recover": {"stdout": "BEGIN;\nCREATE TABLE t(x);\nCOMMIT;\n", "returncode": 0},
+                }
+            }
+        ),
+        encoding="utf-8",
+    )
+    scratch = tmp_path / "recovery-tmp"
+    scratch.mkdir()
+
+    result = _run_script(
+        repo_copy,
+        compose_stub_path,
+        compose_log,
+        sqlite_stub_path,
+        sqlite_config,
+        sqlite_log,
+        "core",
+        env={"COMPOSE_STUB_SERVICES": "app", "TMPDIR": str(scratch)},
+    )
+
+    assert result.returncode == 0, result.stderr
+    (backup,) = data_dir.glob("app.db.*.bak")
+    assert backup.stat().st_ino == original_inode
+    assert backup.read_text(encoding="utf-8") == "original"
+    assert db_path.stat().st_ino != original_inode
+    assert db_path.read_text(encoding="utf-8") == "BEGIN;\nCREATE TABLE t(x);\nCOMMIT;\n"
+    assert db_path.stat().st_mode & 0o777 == 0o640
+    assert sorted(path.name for path in data_dir.iterdir()) == sorted(
+        [".integrity-ledger.json", "app.db", backup.name, f"{backup.name}-wal"]
+    )
+    assert (data_dir / f"{backup.name}-wal").read_text(encoding="utf-8") == "stale frames"
+    assert list(scratch.rglob("*.sql")) == []
+
+
+def test_discovers_databases_by_header_and_checkpoints_wal(
+    repo_copy: Path,
+    compose_stub: tuple[Path, Path],
+    sqlite_stub: tuple[Path, Path, Path],
+) -> None:
+    compose_stub_path, compose_log = compose_stub
+    sqlite_stub_path, sqlite_config, sqlite_log = sqlite_stub
+
+    data_dir = repo_copy / "data"
+    (data_dir / "cache").mkdir(parents=True)
+    _create_sqlite_database(data_dir / "app.sqlite3", 5)
+    _create_sqlite_database(data_dir / "state", 5)
+    _create_sqlite_database(data_dir / "cache" / "thumbs.db", 5)
+    _create_sqlite_database(data_dir / "old.db.20260101000000.bak", 5)
+    (data_dir / "notes.txt").write_text("SQLite format 3 is mentioned here" * 20, encoding="utf-8")
+
+    wal_db = data_dir / "live.db"
+    writer = sqlite3.connect(wal_db)
+    try:
+        writer.execute("PRAGMA journal_mode=WAL")
+        writer.execute("PRAGMA wal_autocheckpoint=0")
+        writer.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+        writer.executemany("INSERT INTO items (name) VALUES (?)", [(f"item-{i}",) for i in range(200)])
+        writer.commit()
+        size_before = wal_db.stat().st_size
+        assert (data_dir / "live.db-wal").stat().st_size > 0
+
+        result = _run_script(
+            repo_copy,
+            compose_stub_path,
+            compose_log,
+            sqlite_stub_path,
+            sqlite_config,
+            sqlite_log,
+            "core",
+            "--exclude",
+            "cache",
+            "--format",
+            "json",
+            env={"COMPOSE_STUB_SERVICES": "app"},
+            sqlite_mode="python",
+        )
+    finally:
+        writer.close()
+
+    assert result.returncode == 0, result.stderr
+    payload = json.loads(result.stdout)
+    assert [Path(entry["path"]).name for entry in payload["databases"]] == [
+        "app.sqlite3",
+        "live.db",
+        "state",
+    ]
+    assert all(entry["status"] == "ok" for entry in payload["databases"])
+    assert wal_db.stat().st_size > size_before
+
+
+def test_discovers_and_checkpoints_outside_repo_through_docker_fallback(
+    repo_copy: Path,
+    compose_stub: tuple[Path, Path],
+    sqlite_stub: tuple[Path, Path, Path],
+    tmp_path: Path,
+) -> None:
+    compose_stub_path, compose_log = compose_stub
+    sqlite_stub_path, sqlite_config, sqlite_log = sqlite_stub
+    fallback_env, docker_log = _use_python_fallback(tmp_path, sqlite_stub_path)
+
+    data_dir = tmp_path / "external-data"
+    data_dir.mkdir()
+    _create_sqlite_database(data_dir / "state", 5)
+    wal_db = data_dir / "live.db"
+    writer = sqlite3.connect(wal_db)
+    try:
+        writer.execute("PRAGMA journal_mode=WAL")
+        writer.execute("PRAGMA wal_autocheckpoint=0")
+        writer.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+        writer.executemany("INSERT INTO items (name) VALUES (?)", [(f"item-{i}",) for i in range(200)])
+        writer.commit()
+        size_before = wal_db.stat().st_size
+
+        result = _run_script(
+            repo_copy,
+            compose_stub_path,
+            compose_log,
+            sqlite_stub_path,
+            sqlite_config,
+            sqlite_log,
+            "core",
+            "--no-ledger",
+            "--format",
+            "json",
+            env={"COMPOSE_STUB_SERVICES": "app", "DATA_DIR": str(data_dir), **fallback_env},
+        )
+    finally:
+        writer.close()
+
+    assert result.returncode == 0, result.stderr
+    assert "Database scanner unavailable" not in result.stderr
+    assert "Unable to checkpoint" not in result.stderr
+    payload = json.loads(result.stdout)
+    assert [Path(entry["path"]).name for entry in payload["databases"]] == ["live.db", "state"]
+    assert wal_db.stat().st_size > size_before
+    scripts_run = " ".join(" ".join(call) for call in docker_runs(docker_log))
+    assert "db_integrity_discover.py scan" in scripts_run
+    assert "db_integrity_discover.py checkpoint" in scripts_run
+
+
+def test_ledger_outside_repo_through_docker_fallback(
+    repo_copy: Path,
+    compose_stub: tuple[Path, Path],
+    sqlite_stub: tuple[Path, Path, Path],
+    tmp_path: Path,
+) -> None:
+    compose_stub_path, compose_log = compose_stub
+    sqlite_stub_path, sqlite_config, sqlite_log = sqlite_stub
+    fallback_env, _ = _use_python_fallback(tmp_path, sqlite_stub_path)
+
+    data_dir = tmp_path / "external-data"
+    data_dir.mkdir()
+    database = data_dir / "app.db"
+    _create_sqlite_database(database, 5)
+
+    def run() -> dict:
+        result = _run_script(
+            repo_copy,
+            compose_stub_path,
+            compose_log,
+            sqlite_stub_path,
+            sqlite_config,
+            sqlite_log,
+            "core",
+            "--format",
+            "json",
+            env={"COMPOSE_STUB_SERVICES": "app", "DATA_DIR": str(data_dir), **fallback_env},
+        )
+        assert result.returncode == 0, result.stderr
+        assert "integrity ledger" not in result.stderr
+        return json.loads(result.stdout)
+
+    assert [entry["status"] for entry in run()["databases"]] == ["ok"]
+    ledger = json.loads((data_dir / ".integrity-ledger.json").read_text(encoding="utf-8"))
+    assert list(ledger["databases"]) == [str(database)]
+    assert [entry["status"] for entry in run()["databases"]] == ["skipped"]
+
+
+def test_python_mode_checks_outside_repo_through_docker_fallback(
+    repo_copy: Path,
+    compose_stub: tuple[Path, Path],
+    sqlite_stub: tuple[Path, Path, Path],
+    tmp_path: Path,
+) -> None:
+    compose_stub_path, compose_log = compose_stub
+    sqlite_stub_path, sqlite_config, sqlite_log = sqlite_stub
+    fallback_env, docker_log = _use_python_fallback(tmp_path, sqlite_stub_path)
+
+    data_dir = tmp_path / "external-data"
+    data_dir.mkdir()
+    _create_sqlite_database(data_dir / "app.db", 5)
+
+    result = _run_script(
+        repo_copy,
+        compose_stub_path,
+        compose_log,
+        sqlite_stub_path,
+        sqlite_config,
+        sqlite_log,
+        "core",
+        "--no-ledger",
+        "--format",
+        "json",
+        env={"COMPOSE_STUB_SERVICES": "app", "DATA_DIR": str(data_dir), **fallback_env},
+        sqlite_mode="python",
+    )
+
+    assert result.returncode == 0, result.stderr
+    payload = json.loads(result.stdout)
+    assert [(entry["status"], entry["message"]) for entry in payload["databases"]] == [("ok", "Integrity OK")]
+    assert any("db_integrity_check.py" in " ".join(call) for call in docker_runs(docker_log))
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from .utils import run_check_health
+
+STUB_TEMPLATE = """#!/usr/bin/env python3
+import json
+import pathlib
+import sys
+
+args = sys.argv[1:]
+with pathlib.Path({log_path!r}).open("a", encoding="utf-8") as handle:
+    handle.write(json.dumps(args) + "\\n")
+
+if "config" in args and "--services" in args:
+    print("\\n".join({services!r}))
+    sys.exit(0)
+if "logs" in args:
+    if "--no-color" in args:
+        if {combined_fails!r}:
+            print("service not found", file=sys.stderr)
+            sys.exit(1)
+        for index in range(80):
+            print(f"core-web-api-1  | web-api line {{index}}")
+            if index % 20 == 0:
+                print(f"api-1  | api line {{index}}")
+        print("api-1 exited with code 0")
+        sys.exit(0)
+    print(f"{{args[-1]}} single-call line")
+    sys.exit(0)
+if "ps" in args:
+    print("NAME STATUS")
+sys.exit(0)
+"""
+
+
+def _write_stub(tmp_path: Path, services: list[str], *, combined_fails: bool = False) -> tuple[Path, Path]:
+    log_path = tmp_path / "compose-calls.log"
+    stub = tmp_path / "compose-stub"
+    stub.write_text(
+        STUB_TEMPLATE.format(log_path=str(log_path), services=services, combined_fails=combined_fails),
+        encoding="utf-8",
+    )
+    stub.chmod(0o755)
+    return stub, log_path
+
+
+def _logs_calls(log_path: Path) -> list[list[str]]:
+    calls = [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines()]
+    return [call for call in calls if "logs" in call]
+
+
+def _run(repo_copy: Path, stub: Path, *args: str):
+    return run_check_health(
+        args=list(args),
+        env={"DOCKER_COMPOSE_BIN": str(stub)},
+        cwd=repo_copy,
+        script_path=repo_copy / "scripts" / "check_health.sh",
+    )
+
+
+def test_combined_mode_demultiplexes_single_logs_call(repo_copy: Path, tmp_path: Path) -> None:
+    stub, log_path = _write_stub(tmp_path, ["api", "web-api", "worker"])
+
+    result = _run(repo_copy, stub, "--log-mode", "combined", "--format", "json", "core")
+
+    assert result.returncode == 0, result.stderr
+    calls = _logs_calls(log_path)
+    assert len(calls) == 1
+    assert calls[0][-5:] == ["--tail=50", "--no-color", "api", "web-api", "worker"]
+
+    payload = json.loads(result.stdout)
+    entries = {entry["service"]: entry for entry in payload["logs"]["entries"]}
+    assert entries["api"]["status"] == "ok"
+    assert entries["api"]["log"].splitlines() == [f"api line {index}" for index in (0, 20, 40, 60)]
+
+    web_lines = entries["web-api"]["log"].splitlines()
+    assert len(web_lines) == 50
+    assert web_lines[0] == "web-api line 30"
+    assert web_lines[-1] == "web-api line 79"
+
+    assert entries["worker"]["status"] == "error"
+    assert payload["logs"]["failed"] == ["worker"]
+    assert "no log lines for worker in the combined log stream" in result.stderr
+
+
+def test_combined_mode_falls_back_to_per_service_calls(repo_copy: Path, tmp_path: Path) -> None:
+    stub, log_path = _write_stub(tmp_path, ["api", "worker"], combined_fails=True)
+
+    result = _run(repo_copy, stub, "--log-mode", "combined", "core")
+
+    assert result.returncode == 0, result.stderr
+    assert "combined log fetch failed" in result.stderr
+    calls = _logs_calls(log_path)
+    assert [call for call in calls if "--no-color" in call][0][-2:] == ["api", "worker"]
+    assert sorted(call[-1] for call in calls if "--no-color" not in call) == ["api", "worker"]
+    assert "api single-call line" in result.stdout
+    assert "worker single-call line" in result.stdout
+
+
+def test_invalid_log_mode_is_rejected(repo_copy: Path, tmp_path: Path) -> None:
+    stub, _ = _write_stub(tmp_path, ["api"])
+
+    result = _run(repo_copy, stub, "--log-mode", "bulk", "core")
+
+    assert result.returncode == 2
+    assert "invalid value for --log-mode: bulk" in result.stderr
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from .utils import run_check_health
+
+STUB_TEMPLATE = """#!/usr/bin/env python3
+import json
+import sys
+import time
+
+args = sys.argv[1:]
+if "config" in args and "--services" in args:
+    print("\\n".join({services!r}))
+    sys.exit(0)
+if "logs" in args:
+    service = args[-1]
+    delays = {delays!r}
+    with open({events!r}, "a", encoding="utf-8") as events:
+        events.write(f"start {{service}}\\n")
+    time.sleep(delays.get(service, 0))
+    with open({events!r}, "a", encoding="utf-8") as events:
+        events.write(f"end {{service}}\\n")
+    print(f"{{service}}-line")
+    sys.exit(0)
+if "ps" in args:
+    print("NAME STATUS")
+sys.exit(0)
+"""
+
+
+def _write_stub(tmp_path: Path, services: list[str], delays: dict[str, float]) -> Path:
+    stub = tmp_path / "compose-stub"
+    events = str(tmp_path / "events.log")
+    stub.write_text(
+        STUB_TEMPLATE.format(services=services, delays=delays, events=events), encoding="utf-8"
+    )
+    stub.chmod(0o755)
+    return stub
+
+
+def _run(repo_copy: Path, stub: Path, *args: str):
+    return run_check_health(
+        args=list(args),
+        env={"DOCKER_COMPOSE_BIN": str(stub)},
+        cwd=repo_copy,
+        script_path=repo_copy / "scripts" / "check_health.sh",
+    )
+
+
+def test_logs_are_fetched_concurrently_in_stable_order(repo_copy: Path, tmp_path: Path) -> None:
+    services = [f"svc-{index}" for index in range(6)]
+    # Earlier services finish last, so completion order is the reverse of the target order.
+    delays = {service: 1.5 - index * 0.1 for index, service in enumerate(services)}
+    stub = _write_stub(tmp_path, services, delays)
+
+    result = _run(repo_copy, stub, "--jobs", "6", "core")
+
+    assert result.returncode == 0, result.stderr
+    lines = [line for line in result.stdout.splitlines() if line.endswith("-line")]
+    assert lines == [f"{service}-line" for service in services]
+    # Every fetch starts before the first one finishes, so all six overlap.
+    events = (tmp_path / "events.log").read_text(encoding="utf-8").splitlines()
+    first_end = next(index for index, event in enumerate(events) if event.startswith("end "))
+    assert sorted(events[:first_end]) == sorted(f"start {service}" for service in services)
+
+
+def test_log_timeout_marks_service_as_error(repo_copy: Path, tmp_path: Path) -> None:
+    stub = _write_stub(tmp_path, ["svc-fast", "svc-hung"], {"svc-hung": 30})
+
+    result = _run(repo_copy, stub, "--format", "json", "--log-timeout", "1", "core")
+
+    assert result.returncode == 0, result.stderr
+    assert "timed out after 1s while reading logs for svc-hung" in result.stderr
+    payload = json.loads(result.stdout)
+    statuses = {entry["service"]: entry["status"] for entry in payload["logs"]["entries"]}
+    assert statuses == {"svc-fast": "ok", "svc-hung": "error"}
+    assert payload["logs"]["failed"] == ["svc-hung"]
+
+
+def test_invalid_jobs_value_is_rejected(repo_copy: Path, tmp_path: Path) -> None:
+    stub = _write_stub(tmp_path, ["svc"], {})
+
+    result = _run(repo_copy, stub, "--jobs", "0", "core")
+
+    assert result.returncode == 2
+    assert "--jobs requires a positive integer" in result.stderr
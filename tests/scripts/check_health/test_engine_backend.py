@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from tests.helpers.docker_engine_stub import EngineStubServer, EngineStubState, engine_container
+
+from .utils import run_check_health
+
+STUB_TEMPLATE = """#!/usr/bin/env python3
+import json
+import pathlib
+import sys
+
+args = sys.argv[1:]
+with pathlib.Path({log_path!r}).open("a", encoding="utf-8") as handle:
+    handle.write(json.dumps(args) + "\\n")
+if "config" in args and "--services" in args:
+    print("api\\nworker\\ndb")
+elif "logs" in args:
+    print(f"{{args[-1]}} cli log")
+elif "ps" in args:
+    print("NAME CLI-STATUS")
+sys.exit(0)
+"""
+
+
+@pytest.fixture
+def compose_stub(tmp_path: Path) -> tuple[Path, Path]:
+    log_path = tmp_path / "compose-calls.log"
+    log_path.write_text("", encoding="utf-8")
+    stub = tmp_path / "compose-stub"
+    stub.write_text(STUB_TEMPLATE.format(log_path=str(log_path)), encoding="utf-8")
+    stub.chmod(0o755)
+    return stub, log_path
+
+
+def _status_calls(log_path: Path) -> list[list[str]]:
+    calls = [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines()]
+    return [call for call in calls if "ps" in call or "logs" in call]
+
+
+def _engine_state() -> EngineStubState:
+    state = EngineStubState(
+        containers=[
+            engine_container("c-api", "api", status="Up 2 minutes (healthy)"),
+            engine_container("c-worker", "worker"),
+            engine_container("c-other", "api", project="another"),
+        ],
+        logs={
+            "c-api": "".join(f"api line {index}\n" for index in range(60)),
+            "c-worker": "worker ready\nERR queue empty\n",
+            "c-other": "must not be read\n",
+        },
+    )
+    return state
+
+
+def test_engine_backend_reads_status_and_logs_from_socket(
+    repo_copy: Path, compose_stub: tuple[Path, Path]
+) -> None:
+    stub, log_path = compose_stub
+    with EngineStubServer(_engine_state()) as engine:
+        result = run_check_health(
+            args=["--format", "json", "core"],
+            env={
+                "DOCKER_COMPOSE_BIN": str(stub),
+                "DOCKER_STATUS_BACKEND": "engine",
+                "DOCKER_HOST": f"unix://{engine.socket_path}",
+            },
+            cwd=repo_copy,
+            script_path=repo_copy / "scripts" / "check_health.sh",
+        )
+        requests = list(engine.state.requests)
+        connections = engine.state.connections
+
+    assert result.returncode == 0, result.stderr
+    assert _status_calls(log_path) == []
+
+    payload = json.loads(result.stdout)
+    parsed = payload["compose"]["parsed"]
+    assert [(row["Service"], row["Health"]) for row in parsed] == [("api", "healthy"), ("worker", "")]
+    assert "repo-api-1" in payload["compose"]["raw"]
+
+    entries = {entry["service"]: entry for entry in payload["logs"]["entries"]}
+    api_lines = entries["api"]["log"].splitlines()
+    assert len(api_lines) == 50 and api_lines[-1] == "api line 59"
+    assert entries["worker"]["log"] == "worker ready\nERR queue empty"
+    assert entries["db"]["status"] == "error"
+    assert "no containers found for service db" in result.stderr
+    assert payload["logs"]["failed"] == ["db"]
+
+    assert "/containers/c-other/logs" not in requests
+    # One listing for the ps table and JSON together, one for the logs helper.
+    assert requests.count("/containers/json") == 2
+    # The logs helper lists containers and reads the tails over reused pooled connections.
+    assert connections < len(requests)
+
+
+def test_engine_backend_skips_one_off_containers(
+    repo_copy: Path, compose_stub: tuple[Path, Path]
+) -> None:
+    stub, _ = compose_stub
+    state = _engine_state()
+    state.containers.append(engine_container("c-run", "api", status="Exited (0) 1 minute ago", oneoff=True))
+    state.containers.append(engine_container("c-migrate", "migrate", oneoff=True))
+    state.logs["c-run"] = "ERROR one-off task failed\n"
+    with EngineStubServer(state) as engine:
+        result = run_check_health(
+            args=["--format", "json", "core"],
+            env={
+                "DOCKER_COMPOSE_BIN": str(stub),
+                "DOCKER_STATUS_BACKEND": "engine",
+                "DOCKER_HOST": f"unix://{engine.socket_path}",
+            },
+            cwd=repo_copy,
+            script_path=repo_copy / "scripts" / "check_health.sh",
+        )
+        requests = list(engine.state.requests)
+
+    assert result.returncode == 0, result.stderr
+    payload = json.loads(result.stdout)
+    parsed = payload["compose"]["parsed"]
+    # `docker compose ps` leaves out `docker compose run` containers; the engine backend matches it.
+    assert [(row["Name"], row["State"]) for row in parsed] == [
+        ("repo-api-1", "running"),
+        ("repo-worker-1", "running"),
+    ]
+    assert "run-c-" not in payload["compose"]["raw"]
+    assert "/containers/c-run/logs" not in requests
+    entries = {entry["service"]: entry for entry in payload["logs"]["entries"]}
+    assert "one-off" not in entries["api"]["log"]
+
+
+def test_engine_backend_falls_back_to_cli_without_socket(
+    repo_copy: Path, compose_stub: tuple[Path, Path], tmp_path: Path
+) -> None:
+    stub, log_path = compose_stub
+
+    result = run_check_health(
+        args=["core"],
+        env={
+            "DOCKER_COMPOSE_BIN": str(stub),
+            "DOCKER_STATUS_BACKEND": "engine",
+            "DOCKER_HOST": f"unix://{tmp_path / 'missing.sock'}",
+        },
+        cwd=repo_copy,
+        script_path=repo_copy / "scripts" / "check_health.sh",
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stderr.count("falling back to the docker CLI") == 1
+    assert "NAME CLI-STATUS" in result.stdout
+    assert "api cli log" in result.stdout
+    assert any("ps" in call for call in _status_calls(log_path))
+
+
+def test_engine_backend_uses_instance_env_chain_project_name(
+    repo_copy: Path, compose_stub: tuple[Path, Path]
+) -> None:
+    stub, _ = compose_stub
+    with (repo_copy / "env" / "local" / "core.env").open("a", encoding="utf-8") as handle:
+        handle.write("COMPOSE_PROJECT_NAME=another\n")
+
+    with EngineStubServer(_engine_state()) as engine:
+        result = run_check_health(
+            args=["--format", "json", "core"],
+            env={
+                "DOCKER_COMPOSE_BIN": str(stub),
+                "DOCKER_STATUS_BACKEND": "engine",
+                "DOCKER_HOST": f"unix://{engine.socket_path}",
+            },
+            cwd=repo_copy,
+            script_path=repo_copy / "scripts" / "check_health.sh",
+        )
+        requests = list(engine.state.requests)
+
+    assert result.returncode == 0, result.stderr
+    payload = json.loads(result.stdout)
+    assert [row["Name"] for row in payload["compose"]["parsed"]] == ["another-api-1"]
+    assert "another-api-1" in payload["compose"]["raw"]
+    assert "/containers/c-other/logs" in requests
+    assert "/containers/c-api/logs" not in requests
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from pathlib import Path
+
+from .utils import run_check_health
+
+STUB_TEMPLATE = """#!/usr/bin/env python3
+import json
+import pathlib
+import sys
+
+args = sys.argv[1:]
+state_dir = pathlib.Path({state_dir!r})
+if "config" in args and "--services" in args:
+    print("api\\nworker")
+    sys.exit(0)
+if "ps" in args:
+    if "--format" not in args:
+        print("NAME STATUS")
+        sys.exit(0)
+    counter = state_dir / "ps-count"
+    index = int(counter.read_text()) if counter.exists() else 0
+    counter.write_text(str(index + 1))
+    polls = json.loads((state_dir / "polls.json").read_text())
+    for entry in polls[min(index, len(polls) - 1)]:
+        print(json.dumps(entry))
+    sys.exit(0)
+if "logs" in args:
+    print(f"{{args[-1]}} ERROR disk almost full")
+    print(f"{{args[-1]}} ready")
+    sys.exit(0)
+sys.exit(0)
+"""
+
+
+def _container(service: str, container_id: str, state: str = "running") -> dict[str, str]:
+    return {"Service": service, "ID": container_id, "State": state, "Health": ""}
+
+
+def _write_stub(tmp_path: Path, polls: list[list[dict[str, str]]]) -> Path:
+    state_dir = tmp_path / "stub-state"
+    state_dir.mkdir()
+    (state_dir / "polls.json").write_text(json.dumps(polls), encoding="utf-8")
+    stub = tmp_path / "compose-stub"
+    stub.write_text(STUB_TEMPLATE.format(state_dir=str(state_dir)), encoding="utf-8")
+    stub.chmod(0o755)
+    return stub
+
+
+def _run(repo_copy: Path, stub: Path, *args: str, env: dict[str, str] | None = None):
+    return run_check_health(
+        args=list(args),
+        env={"DOCKER_COMPOSE_BIN": str(stub), **(env or {})},
+        cwd=repo_copy,
+        script_path=repo_copy / "scripts" / "check_health.sh",
+    )
+
+
+def test_history_records_runs_and_summarizes_window(repo_copy: Path, tmp_path: Path) -> None:
+    stub = _write_stub(
+        tmp_path,
+        [
+            [_container("api", "a1"), _container("worker", "w1")],
+            [_container("api", "a1"), _container("worker", "w1", "exited")],
+            [_container("api", "a2"), _container("worker", "w1")],
+            [_container("api", "a2"), _container("worker", "w1")],
+        ],
+    )
+    database = tmp_path / "history" / "health.sqlite"
+
+    for _ in range(4):
+        result = _run(repo_copy, stub, "--history-db", str(database), "core")
+        assert result.returncode == 0, result.stderr
+
+    with sqlite3.connect(database) as connection:
+        rows = connection.execute("SELECT service, up, check_ms FROM checks ORDER BY id").fetchall()
+    assert len(rows) == 8
+    assert all(duration is not None and duration >= 0 for _, _, duration in rows)
+    # Every service of a run gets the duration of the whole check.
+    assert all(rows[index][2] == rows[index + 1][2] for index in range(0, 8, 2))
+
+    result = _run(
+        repo_copy, stub, "--history", "--window", "1h", "--format", "json", "--history-db", str(database), "core"
+    )
+    assert result.returncode == 0, result.stderr
+    payload = json.loads(result.stdout)
+    assert payload["window"] == "1h"
+    services = {entry["service"]: entry for entry in payload["services"]}
+    assert services["api"]["samples"] == 4
+    assert services["api"]["uptime_percent"] == 100.0
+    assert services["api"]["restarts"] == 1
+    assert services["worker"]["uptime_percent"] == 75.0
+    assert services["worker"]["restarts"] == 1
+    assert services["api"]["log_errors"] == 4
+    assert services["api"]["check_p50_ms"] is not None
+    assert services["api"]["check_p95_ms"] >= services["api"]["check_p50_ms"]
+
+    text = _run(repo_copy, stub, "--history", "--history-db", str(database), "core")
+    assert text.returncode == 0, text.stderr
+    assert "Health history for the last 7d:" in text.stdout
+    assert "75.00%" in text.stdout
+
+
+def test_history_counts_errors_from_the_scan_window(repo_copy: Path, tmp_path: Path) -> None:
+    stub = _write_stub(tmp_path, [[_container("api", "a1"), _container("worker", "w1")]])
+    database = tmp_path / "health.sqlite"
+
+    # The ERROR line is scanned but falls outside the one-line tail.
+    result = _run(repo_copy, stub, "--tail", "1", "--history-db", str(database), "core")
+
+    assert result.returncode == 0, result.stderr
+    with sqlite3.connect(database) as connection:
+        rows = connection.execute("SELECT service, log_errors FROM checks ORDER BY service").fetchall()
+    assert rows == [("api", 1), ("worker", 1)]
+
+
+def test_history_query_does_not_create_missing_db(repo_copy: Path, tmp_path: Path) -> None:
+    stub = _write_stub(tmp_path, [[_container("api", "a1")]])
+    database = tmp_path / "missing" / "health.sqlite"
+
+    result = _run(repo_copy, stub, "--history", "--history-db", str(database), "core")
+
+    assert result.returncode == 0, result.stderr
+    assert "No health history recorded yet" in result.stdout
+    assert not database.parent.exists()
+
+
+def test_history_db_is_read_from_instance_env(repo_copy: Path, tmp_path: Path) -> None:
+    stub = _write_stub(tmp_path, [[_container("api", "a1"), _container("worker", "w1")]])
+    local_env = repo_copy / "env" / "local" / "core.env"
+    local_env.parent.mkdir(parents=True, exist_ok=True)
+    with local_env.open("a", encoding="utf-8") as handle:
+        handle.write("\nHEALTH_HISTORY_DB=data/health-history.sqlite\n")
+
+    result = _run(repo_copy, stub, "core")
+
+    assert result.returncode == 0, result.stderr
+    database = repo_copy / "data" / "health-history.sqlite"
+    with sqlite3.connect(database) as connection:
+        (count,) = connection.execute("SELECT COUNT(*) FROM checks").fetchone()
+    assert count == 2
+
+
+def test_watch_mode_batches_history_samples(repo_copy: Path, tmp_path: Path) -> None:
+    stub = _write_stub(
+        tmp_path,
+        [
+            [_container("api", "a1"), _container("worker", "w1")],
+            [_container("api", "a1", "exited"), _container("worker", "w1")],
+            [_container("api", "a1"), _container("worker", "w1")],
+        ],
+    )
+    database = tmp_path / "watch.sqlite"
+
+    result = _run(
+        repo_copy,
+        stub,
+        "--watch",
+        "--interval",
+        "50ms",
+        "--history-db",
+        str(database),
+        "core",
+        env={"HEALTH_WATCH_MAX_POLLS": "3"},
+    )
+
+    assert result.returncode == 0, result.stderr
+    with sqlite3.connect(database) as connection:
+        rows = connection.execute(
+            "SELECT up, restarts FROM checks WHERE service = 'api' ORDER BY id"
+        ).fetchall()
+    assert rows == [(1, 0), (0, 0), (1, 1)]
+
+
+def test_history_requires_a_database(repo_copy: Path, tmp_path: Path) -> None:
+    stub = _write_stub(tmp_path, [[]])
+
+    result = _run(repo_copy, stub, "--history", "core", env={"HEALTH_HISTORY_DB": ""})
+
+    assert result.returncode == 2
+    assert "no history database configured" in result.stderr
@@ -86,3 +86,42 @@ def test_json_output_structure(docker_stub: DockerStub, repo_copy: Path) -> None
     assert "raw" in compose_section
     assert "parsed" not in compose_section
     assert "parsed_error" not in compose_section
+
+
+def test_json_output_streams_large_logs_with_control_characters(repo_copy: Path, tmp_path: Path) -> None:
+    # A single environment variable is capped at 128 KiB on Linux; the report
+    # payload is streamed, so logs larger than that must survive intact.
+    stub = tmp_path / "compose-stub"
+    stub.write_text(
+        """#!/usr/bin/env python3
+import sys
+
+args = sys.argv[1:]
+if "config" in args and "--services" in args:
+    print("app")
+elif "logs" in args:
+    sys.stdout.write('\\x1b[32mstarted\\x1b[0m "quoted" C:\\\\path\\ttab\\n')
+    for index in range(4000):
+        sys.stdout.write(f"line {index:05d} " + "x" * 40 + "\\n")
+elif "ps" in args:
+    print("NAME STATUS")
+""",
+        encoding="utf-8",
+    )
+    stub.chmod(0o755)
+
+    result = run_check_health(
+        ["--format", "json", "--tail", "5000", "core"],
+        env={"DOCKER_COMPOSE_BIN": str(stub)},
+        cwd=repo_copy,
+        script_path=repo_copy / "scripts" / "check_health.sh",
+    )
+
+    assert result.returncode == 0, result.stderr
+    entry = json.loads(result.stdout)["logs"]["entries"][0]
+    lines = entry["log"].splitlines()
+    assert lines[0] == '\x1b[32mstarted\x1b[0m "quoted" C:\\path\ttab'
+    assert len(lines) == 4001
+    assert lines[-1] == "line 03999 " + "x" * 40
+    assert len(entry["log"].encode()) > 128 * 1024
+    assert base64.b64decode(entry["log_b64"]).decode() == entry["log"]
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+from tests.helpers.docker_engine_stub import EngineStubServer, EngineStubState, engine_container
+from tests.helpers.python_fallback import docker_runs, install_python_fallback
+
+from .utils import run_check_health
+
+STUB_TEMPLATE = """#!/usr/bin/env python3
+import json
+import pathlib
+import sys
+
+args = sys.argv[1:]
+with pathlib.Path({log_path!r}).open("a", encoding="utf-8") as handle:
+    handle.write(json.dumps(args) + "\\n")
+if "config" in args and "--services" in args:
+    print("api\\nworker")
+elif "logs" in args:
+    services = [arg for arg in args[args.index("logs") + 1 :] if not arg.startswith("--")]
+    combined = "--no-color" in args
+    for index in range(400):
+        for service in services:
+            if index % 100 == 7:
+                message = f"{{service}} ERROR request {{index}} failed"
+            elif index == 250:
+                message = f"{{service}} panic: runtime error"
+            else:
+                message = f"{{service}} line {{index}}"
+            print(f"{{service}}-1  | {{message}}" if combined else message)
+elif "ps" in args:
+    print("NAME STATUS")
+sys.exit(0)
+"""
+
+
+@pytest.fixture
+def compose_stub(tmp_path: Path) -> tuple[Path, Path]:
+    log_path = tmp_path / "compose-calls.log"
+    log_path.write_text("", encoding="utf-8")
+    stub = tmp_path / "compose-stub"
+    stub.write_text(STUB_TEMPLATE.format(log_path=str(log_path)), encoding="utf-8")
+    stub.chmod(0o755)
+    return stub, log_path
+
+
+def _logs_calls(log_path: Path) -> list[list[str]]:
+    calls = [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines()]
+    return [call for call in calls if "logs" in call]
+
+
+def _run(repo_copy: Path, stub: Path, *args: str, env: dict[str, str] | None = None):
+    return run_check_health(
+        args=[*args, "core"],
+        env={"DOCKER_COMPOSE_BIN": str(stub), **(env or {})},
+        cwd=repo_copy,
+        script_path=repo_copy / "scripts" / "check_health.sh",
+    )
+
+
+def test_since_window_is_scanned_while_only_the_tail_is_kept(
+    repo_copy: Path, compose_stub: tuple[Path, Path]
+) -> None:
+    stub, log_path = compose_stub
+
+    result = _run(repo_copy, stub, "--since", "15m", "--format", "json")
+
+    assert result.returncode == 0, result.stderr
+    for call in _logs_calls(log_path):
+        assert "--since=15m" in call
+        assert not any(arg.startswith("--tail") for arg in call)
+
+    entries = {entry["service"]: entry for entry in json.loads(result.stdout)["logs"]["entries"]}
+    api = entries["api"]
+    lines = api["log"].splitlines()
+    assert len(lines) == 50 and lines[-1] == "api line 399"
+    assert api["errors"] == {
+        "matched": 5,
+        "counts": {"ERROR": 4, "panic": 1, "OOMKilled": 0},
+        "last_matches": [
+            "api ERROR request 7 failed",
+            "api ERROR request 107 failed",
+            "api ERROR request 207 failed",
+            "api panic: runtime error",
+            "api ERROR request 307 failed",
+        ],
+    }
+
+
+def test_tail_and_custom_patterns_in_text_mode(repo_copy: Path, compose_stub: tuple[Path, Path]) -> None:
+    stub, log_path = compose_stub
+
+    result = _run(
+        repo_copy, stub, "--since", "2h", "--tail", "10", "--scan-pattern", "request [0-9]+7 ", "--matches", "2"
+    )
+
+    assert result.returncode == 0, result.stderr
+    for call in _logs_calls(log_path):
+        assert call[-3:-1] == ["--since=2h", "--tail=10"]
+    assert "[!] api: 3 log lines matched error patterns (request [0-9]+7 =3); last matches:" in result.stdout
+    assert "    api ERROR request 207 failed\n    api ERROR request 307 failed\n" in result.stdout
+    assert "api line 389" not in result.stdout
+    assert "api line 390" in result.stdout
+
+
+def test_combined_mode_reports_the_same_scan(repo_copy: Path, compose_stub: tuple[Path, Path]) -> None:
+    stub, log_path = compose_stub
+
+    result = _run(repo_copy, stub, "--log-mode", "combined", "--since", "15m", "--format", "json")
+
+    assert result.returncode == 0, result.stderr
+    (call,) = _logs_calls(log_path)
+    assert call[-4:] == ["--since=15m", "--no-color", "api", "worker"]
+    entries = {entry["service"]: entry for entry in json.loads(result.stdout)["logs"]["entries"]}
+    assert len(entries["worker"]["log"].splitlines()) == 50
+    assert entries["worker"]["errors"]["counts"] == {"ERROR": 4, "panic": 1, "OOMKilled": 0}
+    assert entries["worker"]["errors"]["last_matches"][-1] == "worker ERROR request 307 failed"
+
+
+@pytest.mark.parametrize("log_mode", ["per-service", "combined"])
+def test_patterns_use_python_regex_in_every_mode(
+    repo_copy: Path, compose_stub: tuple[Path, Path], log_mode: str
+) -> None:
+    stub, _ = compose_stub
+
+    result = _run(
+        repo_copy,
+        stub,
+        "--log-mode",
+        log_mode,
+        "--since",
+        "15m",
+        "--format",
+        "json",
+        env={"HEALTH_LOG_PATTERNS": r"(?i)\berror\b"},
+    )
+
+    assert result.returncode == 0, result.stderr
+    entries = {entry["service"]: entry for entry in json.loads(result.stdout)["logs"]["entries"]}
+    # Four "ERROR request" lines plus "panic: runtime error".
+    assert entries["api"]["errors"]["counts"] == {r"(?i)\berror\b": 5}
+
+
+def test_scanning_can_be_disabled(repo_copy: Path, compose_stub: tuple[Path, Path]) -> None:
+    stub, _ = compose_stub
+
+    result = _run(repo_copy, stub, "--format", "json", env={"HEALTH_LOG_PATTERNS": ""})
+
+    assert result.returncode == 0, result.stderr
+    for entry in json.loads(result.stdout)["logs"]["entries"]:
+        assert "errors" not in entry
+
+
+def test_engine_backend_scans_logs(repo_copy: Path, compose_stub: tuple[Path, Path]) -> None:
+    stub, _ = compose_stub
+    state = EngineStubState(
+        containers=[engine_container("c-api", "api"), engine_container("c-worker", "worker")],
+        logs={
+            "c-api": "".join(f"api line {index}\n" for index in range(80)) + "Killed: OOMKilled\n",
+            "c-worker": "worker ready\n",
+        },
+    )
+    with EngineStubServer(state) as engine:
+        result = _run(
+            repo_copy,
+            stub,
+            "--tail",
+            "5",
+            "--format",
+            "json",
+            env={"DOCKER_STATUS_BACKEND": "engine", "DOCKER_HOST": f"unix://{engine.socket_path}"},
+        )
+
+    assert result.returncode == 0, result.stderr
+    entries = {entry["service"]: entry for entry in json.loads(result.stdout)["logs"]["entries"]}
+    assert entries["api"]["log"].splitlines() == [f"api line {index}" for index in range(76, 80)] + [
+        "Killed: OOMKilled"
+    ]
+    assert entries["api"]["errors"]["counts"]["OOMKilled"] == 1
+    assert entries["worker"]["errors"]["matched"] == 0
+
+
+@pytest.mark.parametrize(
+    ("args", "message"),
+    [
+        (["--since", "yesterday"], "invalid value for --since"),
+        (["--tail", "0"], "--tail requires a positive integer"),
+        (["--scan-pattern", "(unclosed"], "invalid --scan-pattern regex"),
+    ],
+)
+def test_invalid_window_options(
+    repo_copy: Path, compose_stub: tuple[Path, Path], args: list[str], message: str
+) -> None:
+    stub, log_path = compose_stub
+
+    result = _run(repo_copy, stub, *args)
+
+    assert result.returncode == 2
+    assert message in result.stderr
+    assert _logs_calls(log_path) == []
+
+
+def test_per_service_logs_are_scanned_by_one_process(
+    repo_copy: Path, compose_stub: tuple[Path, Path], tmp_path: Path
+) -> None:
+    stub, _ = compose_stub
+    stub.write_text(stub.read_text(encoding="utf-8").replace("/usr/bin/env python3", sys.executable), encoding="utf-8")
+    env, docker_log = install_python_fallback(tmp_path / "fallback")
+
+    result = _run(repo_copy, stub, "--since", "15m", "--format", "json", env=env)
+
+    assert result.returncode == 0, result.stderr
+    (scan,) = [call for call in docker_runs(docker_log) if "--raw" in call]
+    assert [scan[index + 1] for index, arg in enumerate(scan) if arg == "--raw"] == ["0", "1"]
+    entries = {entry["service"]: entry for entry in json.loads(result.stdout)["logs"]["entries"]}
+    assert entries["worker"]["errors"]["counts"] == {"ERROR": 4, "panic": 1, "OOMKilled": 0}
+    assert len(entries["api"]["log"].splitlines()) == 50
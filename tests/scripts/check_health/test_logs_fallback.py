@@ -24,6 +24,13 @@ def _strip_env_and_file_flags(call: list[str]) -> list[str]:
     return cleaned
 
 
+def _with_sorted_log_calls(calls: list[list[str]]) -> list[list[str]]:
+    """Logs are fetched concurrently, so only the set of log calls is stable."""
+    other = [call for call in calls if "logs" not in call]
+    logs = sorted(call for call in calls if "logs" in call)
+    return other + logs
+
+
 def test_logs_fallback_through_alternative_services(
     docker_stub: DockerStub,
     repo_copy: Path,
@@ -50,14 +57,16 @@ def test_logs_fallback_through_alternative_services(
     calls = [
         _strip_env_and_file_flags(entry) for entry in docker_stub.read_calls()
     ]
-    assert calls == [
-        ["compose", "config", "--no-interpolate", "--output"],
-        ["compose", "config", "-q"],
-        ["compose", "config", "--services"],
-        ["compose", "ps"],
-        ["compose", "logs", "--tail=50", "svc-core"],
-        ["compose", "logs", "--tail=50", "svc-api"],
-    ]
+    assert _with_sorted_log_calls(calls) == _with_sorted_log_calls(
+        [
+            ["compose", "config", "--no-interpolate", "--output"],
+            ["compose", "config", "-q"],
+            ["compose", "config", "--services"],
+            ["compose", "ps"],
+            ["compose", "logs", "--tail=50", "svc-core"],
+            ["compose", "logs", "--tail=50", "svc-api"],
+        ]
+    )
 
 
 def test_logs_reports_failure_when_all_services_fail(
@@ -83,16 +92,18 @@ def test_logs_reports_failure_when_all_services_fail(
     calls = [
         _strip_env_and_file_flags(entry) for entry in docker_stub.read_calls()
     ]
-    assert calls == [
-        ["compose", "config", "--no-interpolate", "--output"],
-        ["compose", "config", "-q"],
-        ["compose", "config", "--services"],
-        ["compose", "ps"],
-        ["compose", "logs", "--tail=50", "svc-main"],
-        ["compose", "logs", "--tail=50", "svc-core"],
-        ["compose", "logs", "--tail=50", "svc-media"],
-        ["compose", "logs", "--tail=50", "svc-aux"],
-    ]
+    assert _with_sorted_log_calls(calls) == _with_sorted_log_calls(
+        [
+            ["compose", "config", "--no-interpolate", "--output"],
+            ["compose", "config", "-q"],
+            ["compose", "config", "--services"],
+            ["compose", "ps"],
+            ["compose", "logs", "--tail=50", "svc-main"],
+            ["compose", "logs", "--tail=50", "svc-core"],
+            ["compose", "logs", "--tail=50", "svc-media"],
+            ["compose", "logs", "--tail=50", "svc-aux"],
+        ]
+    )
 
 
 def test_logs_handles_comma_separated_health_services(
@@ -117,15 +128,17 @@ def test_logs_handles_comma_separated_health_services(
     calls = [
         _strip_env_and_file_flags(entry) for entry in docker_stub.read_calls()
     ]
-    assert calls == [
-        ["compose", "config", "--no-interpolate", "--output"],
-        ["compose", "config", "-q"],
-        ["compose", "config", "--services"],
-        ["compose", "ps"],
-        ["compose", "logs", "--tail=50", "svc-core"],
-        ["compose", "logs", "--tail=50", "svc-extra"],
-        ["compose", "logs", "--tail=50", "svc-auto"],
-    ]
+    assert _with_sorted_log_calls(calls) == _with_sorted_log_calls(
+        [
+            ["compose", "config", "--no-interpolate", "--output"],
+            ["compose", "config", "-q"],
+            ["compose", "config", "--services"],
+            ["compose", "ps"],
+            ["compose", "logs", "--tail=50", "svc-core"],
+            ["compose", "logs", "--tail=50", "svc-extra"],
+            ["compose", "logs", "--tail=50", "svc-auto"],
+        ]
+    )
 
 
 def test_logs_attempts_all_services_even_after_success(
@@ -149,15 +162,17 @@ def test_logs_attempts_all_services_even_after_success(
     calls = [
         _strip_env_and_file_flags(entry) for entry in docker_stub.read_calls()
     ]
-    assert calls == [
-        ["compose", "config", "--no-interpolate", "--output"],
-        ["compose", "config", "-q"],
-        ["compose", "config", "--services"],
-        ["compose", "ps"],
-        ["compose", "logs", "--tail=50", "svc-main"],
-        ["compose", "logs", "--tail=50", "svc-extra"],
-        ["compose", "logs", "--tail=50", "svc-auto"],
-    ]
+    assert _with_sorted_log_calls(calls) == _with_sorted_log_calls(
+        [
+            ["compose", "config", "--no-interpolate", "--output"],
+            ["compose", "config", "-q"],
+            ["compose", "config", "--services"],
+            ["compose", "ps"],
+            ["compose", "logs", "--tail=50", "svc-main"],
+            ["compose", "logs", "--tail=50", "svc-extra"],
+            ["compose", "logs", "--tail=50", "svc-auto"],
+        ]
+    )
 
 
 def test_logs_without_targets_uses_compose_services(
@@ -177,14 +192,16 @@ def test_logs_without_targets_uses_compose_services(
     calls = [
         _strip_env_and_file_flags(entry) for entry in docker_stub.read_calls()
     ]
-    assert calls == [
-        ["compose", "config", "--no-interpolate", "--output"],
-        ["compose", "config", "-q"],
-        ["compose", "config", "--services"],
-        ["compose", "ps"],
-        ["compose", "logs", "--tail=50", "svc-one"],
-        ["compose", "logs", "--tail=50", "svc-two"],
-    ]
+    assert _with_sorted_log_calls(calls) == _with_sorted_log_calls(
+        [
+            ["compose", "config", "--no-interpolate", "--output"],
+            ["compose", "config", "-q"],
+            ["compose", "config", "--services"],
+            ["compose", "ps"],
+            ["compose", "logs", "--tail=50", "svc-one"],
+            ["compose", "logs", "--tail=50", "svc-two"],
+        ]
+    )
 
 
 def test_logs_without_targets_and_no_services_reports_error(
@@ -205,8 +222,10 @@ def test_logs_without_targets_and_no_services_reports_error(
     calls = [
         _strip_env_and_file_flags(entry) for entry in docker_stub.read_calls()
     ]
-    assert calls == [
-        ["compose", "config", "--no-interpolate", "--output"],
-        ["compose", "config", "-q"],
-        ["compose", "config", "--services"],
-    ]
+    assert _with_sorted_log_calls(calls) == _with_sorted_log_calls(
+        [
+            ["compose", "config", "--no-interpolate", "--output"],
+            ["compose", "config", "-q"],
+            ["compose", "config", "--services"],
+        ]
+    )
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import json
+import socket
+import sys
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from tests.helpers.python_fallback import docker_runs, install_python_fallback
+
+from .utils import run_check_health
+
+STUB_TEMPLATE = """#!/usr/bin/env python3
+import json
+import sys
+
+args = sys.argv[1:]
+if "config" in args and "--services" in args:
+    print("api\\nworker\\ncache")
+elif "config" in args and "--format" in args:
+    print(json.dumps({config!r}))
+elif "logs" in args:
+    print(f"{{args[-1]}} ready")
+elif "ps" in args:
+    print("NAME STATUS")
+sys.exit(0)
+"""
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:  # noqa: N802
+        status = 200 if self.path == "/healthz" else 404
+        body = b"ok"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        return
+
+
+@pytest.fixture
+def listeners() -> Iterator[dict[str, int]]:
+    http_server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+    thread.start()
+
+    tcp_listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    tcp_listener.bind(("127.0.0.1", 0))
+    tcp_listener.listen(8)
+
+    closed = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    closed.bind(("127.0.0.1", 0))
+    closed_port = closed.getsockname()[1]
+    closed.close()
+
+    try:
+        yield {
+            "http": http_server.server_address[1],
+            "tcp": tcp_listener.getsockname()[1],
+            "closed": closed_port,
+        }
+    finally:
+        http_server.shutdown()
+        http_server.server_close()
+        tcp_listener.close()
+
+
+def _write_stub(tmp_path: Path, ports: dict[str, int]) -> Path:
+    config = {
+        "services": {
+            "api": {"ports": [{"mode": "ingress", "target": 80, "published": str(ports["http"]), "protocol": "tcp"}]},
+            "worker": {"ports": [f"127.0.0.1:{ports['tcp']}:9000", f"{ports['tcp']}:53/udp"]},
+            "cache": {"ports": [{"target": 6379, "published": str(ports["closed"]), "protocol": "tcp"}]},
+        }
+    }
+    stub = tmp_path / "compose-stub"
+    stub.write_text(STUB_TEMPLATE.format(config=config), encoding="utf-8")
+    stub.chmod(0o755)
+    return stub
+
+
+def _run(repo_copy: Path, stub: Path, *args: str, env: dict[str, str] | None = None):
+    return run_check_health(
+        args=[*args, "core"],
+        env={
+            "DOCKER_COMPOSE_BIN": str(stub),
+            "HEALTH_HTTP_PROBES": "api=/healthz",
+            "HEALTH_PROBE_TIMEOUT": "2",
+            **(env or {}),
+        },
+        cwd=repo_copy,
+        script_path=repo_copy / "scripts" / "check_health.sh",
+    )
+
+
+def test_probes_report_latency_in_json(repo_copy: Path, tmp_path: Path, listeners: dict[str, int]) -> None:
+    stub = _write_stub(tmp_path, listeners)
+
+    result = _run(repo_copy, stub, "--probe", "--format", "json")
+
+    assert result.returncode == 0, result.stderr
+    payload = json.loads(result.stdout)
+    assert payload["status"] == "degraded"
+    probes = {entry["service"]: entry for entry in payload["probes"]["entries"]}
+    assert sorted(probes) == ["api", "cache", "worker"]
+
+    api = probes["api"]
+    assert (api["kind"], api["status"], api["http_status"]) == ("http", "ok", 200)
+    assert api["port"] == listeners["http"] and api["host"] == "127.0.0.1"
+    assert api["connect_ms"] >= 0 and api["first_byte_ms"] >= 0
+
+    worker = probes["worker"]
+    assert (worker["kind"], worker["status"]) == ("tcp", "ok")
+    assert worker["connect_ms"] >= 0 and worker["first_byte_ms"] is None
+
+    assert probes["cache"]["status"] == "error"
+    assert probes["cache"]["connect_ms"] is None
+    assert payload["probes"]["failed"] == ["cache"]
+    assert "port probes failed for services: cache" in result.stderr
+
+
+def test_probes_render_text_table(repo_copy: Path, tmp_path: Path, listeners: dict[str, int]) -> None:
+    stub = _write_stub(tmp_path, listeners)
+
+    result = _run(repo_copy, stub, "--probe")
+
+    assert result.returncode == 0, result.stderr
+    section = result.stdout.split("[*] Port probes:", 1)[1].split("[*] Recent logs", 1)[0]
+    lines = [line for line in section.splitlines() if line.strip()]
+    assert lines[0].split()[:2] == ["SERVICE", "PORT"]
+    api_line = next(line for line in lines if line.startswith("api "))
+    assert f"127.0.0.1:{listeners['http']}" in api_line and "HTTP 200" in api_line
+    assert any(line.startswith("cache ") and " error " in line for line in lines)
+
+
+def test_probes_are_skipped_by_default(repo_copy: Path, tmp_path: Path, listeners: dict[str, int]) -> None:
+    stub = _write_stub(tmp_path, listeners)
+
+    result = _run(repo_copy, stub, "--format", "json")
+
+    assert result.returncode == 0, result.stderr
+    assert "probes" not in json.loads(result.stdout)
+
+
+def test_probe_timeout_is_validated(repo_copy: Path, tmp_path: Path, listeners: dict[str, int]) -> None:
+    stub = _write_stub(tmp_path, listeners)
+
+    result = _run(repo_copy, stub, "--probe", "--probe-timeout", "0")
+
+    assert result.returncode == 2
+    assert "--probe-timeout requires a positive number" in result.stderr
+
+
+def test_probes_require_local_python(repo_copy: Path, tmp_path: Path, listeners: dict[str, int]) -> None:
+    stub = _write_stub(tmp_path, listeners)
+    stub.write_text(stub.read_text(encoding="utf-8").replace("/usr/bin/env python3", sys.executable), encoding="utf-8")
+    env, docker_log = install_python_fallback(tmp_path / "fallback")
+
+    result = _run(repo_copy, stub, "--probe", env=env)
+
+    assert result.returncode == 2
+    assert "--probe requires a local python3" in result.stderr
+    assert not any("health_probes.py" in arg for call in docker_runs(docker_log) for arg in call)
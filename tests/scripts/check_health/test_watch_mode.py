@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+from tests.helpers.python_fallback import docker_runs, install_python_fallback
+
+from .utils import run_check_health
+
+STUB_TEMPLATE = """#!/usr/bin/env python3
+import json
+import pathlib
+import sys
+
+args = sys.argv[1:]
+state_dir = pathlib.Path({state_dir!r})
+if "config" in args and "--services" in args:
+    print("api\\nworker")
+    sys.exit(0)
+if "ps" in args and "--format" in args:
+    counter = state_dir / "ps-count"
+    index = int(counter.read_text()) if counter.exists() else 0
+    counter.write_text(str(index + 1))
+    polls = json.loads((state_dir / "polls.json").read_text())
+    poll = polls[min(index, len(polls) - 1)]
+    if poll is None:
+        print("Cannot connect to the Docker daemon", file=sys.stderr)
+        sys.exit(1)
+    for entry in poll:
+        print(json.dumps(entry))
+    sys.exit(0)
+if "logs" in args:
+    log_counter = state_dir / "logs-count"
+    index = int(log_counter.read_text()) if log_counter.exists() else 0
+    log_counter.write_text(str(index + 1))
+    if index == 1:
+        print("api-1  | 2026-10-19T10:00:00.123456789Z INFO ready")
+        print("api-1  | 2026-10-19T10:00:05.000000000Z ERROR database is locked")
+        print("worker-1  | 2026-10-19T10:00:06.000000000Z processed 3 jobs")
+    sys.exit(0)
+sys.exit(0)
+"""
+
+
+def _container(service: str, container_id: str, state: str = "running", health: str = "") -> dict[str, str]:
+    return {"Service": service, "ID": container_id, "State": state, "Health": health}
+
+
+def _write_stub(tmp_path: Path, polls: list[object]) -> Path:
+    state_dir = tmp_path / "stub-state"
+    state_dir.mkdir()
+    (state_dir / "polls.json").write_text(json.dumps(polls), encoding="utf-8")
+    stub = tmp_path / "compose-stub"
+    stub.write_text(STUB_TEMPLATE.format(state_dir=str(state_dir)), encoding="utf-8")
+    stub.chmod(0o755)
+    return stub
+
+
+def _run_watch(repo_copy: Path, stub: Path, polls: int, *args: str):
+    return run_check_health(
+        args=["--watch", "--interval", "50ms", *args, "core"],
+        env={"DOCKER_COMPOSE_BIN": str(stub), "HEALTH_WATCH_MAX_POLLS": str(polls)},
+        cwd=repo_copy,
+        script_path=repo_copy / "scripts" / "check_health.sh",
+    )
+
+
+def test_watch_emits_transitions_and_writes_textfile(repo_copy: Path, tmp_path: Path) -> None:
+    healthy = [_container("api", "a1", health="healthy"), _container("worker", "w1")]
+    stub = _write_stub(
+        tmp_path,
+        [
+            healthy,
+            healthy,
+            [_container("api", "a1", "exited"), _container("worker", "w2")],
+            [_container("api", "a1", health="healthy"), _container("worker", "w2")],
+        ],
+    )
+    textfile = tmp_path / "metrics" / "core.prom"
+
+    result = _run_watch(repo_copy, stub, 4, "--format", "json", "--textfile", str(textfile))
+
+    assert result.returncode == 0, result.stderr
+    events = [json.loads(line) for line in result.stdout.splitlines()]
+    summary = [(event["event"], event["service"], event.get("to")) for event in events]
+    assert summary == [
+        ("state", "api", "running (healthy)"),
+        ("state", "worker", "running"),
+        ("state", "api", "exited"),
+        ("restart", "worker", "running"),
+        ("state", "api", "running (healthy)"),
+    ]
+    assert events[2]["from"] == "running (healthy)"
+    assert events[2]["up"] is False
+
+    metrics = textfile.read_text(encoding="utf-8")
+    assert 'homelab_service_up{instance="core",service="api"} 1' in metrics
+    assert 'homelab_service_restarts_total{instance="core",service="api"} 1' in metrics
+    assert 'homelab_service_restarts_total{instance="core",service="worker"} 1' in metrics
+    assert 'homelab_service_last_log_error_timestamp_seconds{instance="core",service="api"} 1792404005.000' in metrics
+    assert 'service="worker"} 1792' not in metrics
+    assert 'homelab_health_check_success{instance="core"} 1' in metrics
+    assert "homelab_health_check_duration_seconds{" in metrics
+    assert not list(textfile.parent.glob(".*.tmp"))
+
+    build_stamp = repo_copy / ".docker-compose.yml.inputs"
+    assert build_stamp.exists()
+
+
+def test_watch_backs_off_when_polls_fail(repo_copy: Path, tmp_path: Path) -> None:
+    stub = _write_stub(tmp_path, [None, None, [_container("api", "a1"), _container("worker", "w1")]])
+
+    result = _run_watch(repo_copy, stub, 3)
+
+    assert result.returncode == 0, result.stderr
+    lines = result.stdout.splitlines()
+    assert "docker compose ps failed (attempt 1); retrying in 0.1s" in lines[0]
+    assert "docker compose ps failed (attempt 2); retrying in 0.2s" in lines[1]
+    assert lines[2].endswith("core: docker compose ps recovered")
+    assert lines[3].startswith("[*] ") and lines[3].endswith("core/api: running")
+
+
+def test_watch_rejects_invalid_interval(repo_copy: Path, tmp_path: Path) -> None:
+    stub = _write_stub(tmp_path, [[]])
+
+    result = run_check_health(
+        args=["--watch", "--interval", "soon", "core"],
+        env={"DOCKER_COMPOSE_BIN": str(stub)},
+        cwd=repo_copy,
+        script_path=repo_copy / "scripts" / "check_health.sh",
+    )
+
+    assert result.returncode == 2
+    assert "invalid value for --interval: soon" in result.stderr
+
+
+def test_watch_requires_local_python(repo_copy: Path, tmp_path: Path) -> None:
+    stub = _write_stub(tmp_path, [[_container("api", "a1")]])
+    stub.write_text(stub.read_text(encoding="utf-8").replace("/usr/bin/env python3", sys.executable), encoding="utf-8")
+    env, docker_log = install_python_fallback(tmp_path / "fallback")
+
+    result = run_check_health(
+        args=["--watch", "--interval", "50ms", "core"],
+        env={"DOCKER_COMPOSE_BIN": str(stub), "HEALTH_WATCH_MAX_POLLS": "1", **env},
+        cwd=repo_copy,
+        script_path=repo_copy / "scripts" / "check_health.sh",
+    )
+
+    assert result.returncode == 2
+    assert "--watch requires a local python3" in result.stderr
+    assert not any("health_watch.py" in arg for call in docker_runs(docker_log) for arg in call)
+    assert not (tmp_path / "stub-state" / "ps-count").exists()
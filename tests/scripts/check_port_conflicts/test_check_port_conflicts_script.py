@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+from pathlib import Path
+
+SCRIPT_RELATIVE = Path("scripts") / "check_port_conflicts.sh"
+
+
+def _build_compose_stub(
+    tmp_path: Path,
+    payloads: dict[str, dict[str, object]],
+    running: dict[str, list[dict[str, object]]] | None = None,
+) -> Path:
+    payload_dir = tmp_path / "payloads"
+    payload_dir.mkdir()
+    for instance, payload in payloads.items():
+        (payload_dir / f"{instance}.json").write_text(json.dumps(payload), encoding="utf-8")
+    for instance, rows in (running or {}).items():
+        (payload_dir / f"{instance}.ps.json").write_text(json.dumps(rows), encoding="utf-8")
+
+    script_path = tmp_path / "compose_stub.py"
+    script_path.write_text(
+        "#!/usr/bin/env python3\n"
+        "import pathlib\n"
+        "import sys\n"
+        "\n"
+        "args = sys.argv[1:]\n"
+        "if args[-3:] == ['config', '--format', 'json']:\n"
+        "    compose_file = pathlib.Path(args[args.index('-f') + 1])\n"
+        f"    payload = pathlib.Path({str(payload_dir)!r}) / f'{{compose_file.parent.name}}.json'\n"
+        "    print(payload.read_text(encoding='utf-8'))\n"
+        "elif args[-3:] == ['ps', '--format', 'json']:\n"
+        "    compose_file = pathlib.Path(args[args.index('-f') + 1])\n"
+        f"    rows = pathlib.Path({str(payload_dir)!r}) / f'{{compose_file.parent.name}}.ps.json'\n"
+        "    if rows.exists():\n"
+        "        print(rows.read_text(encoding='utf-8'))\n"
+        "sys.exit(0)\n",
+        encoding="utf-8",
+    )
+    script_path.chmod(0o755)
+    return script_path
+
+
+def _write_proc_net(tmp_path: Path, tcp_lines: list[str]) -> Path:
+    proc_dir = tmp_path / "proc_net"
+    proc_dir.mkdir()
+    header = "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode\n"
+    (proc_dir / "tcp").write_text(header + "".join(line + "\n" for line in tcp_lines), encoding="ascii")
+    return proc_dir
+
+
+def _run_script(repo_copy: Path, *args: str, env: dict[str, str]) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(
+        [str(repo_copy / SCRIPT_RELATIVE), *args],
+        capture_output=True,
+        text=True,
+        cwd=repo_copy,
+        env=env,
+        check=False,
+    )
+
+
+def _service(*ports: object) -> dict[str, object]:
+    return {"ports": list(ports), "volumes": []}
+
+
+def test_reports_range_collisions_between_instances(repo_copy: Path, tmp_path: Path) -> None:
+    stub = _build_compose_stub(
+        tmp_path,
+        {
+            "core": {
+                "services": {
+                    "app": _service({"target": 8080, "published": "8080", "protocol": "tcp"}),
+                    "dns": _service("53:53/udp"),
+                }
+            },
+            "media": {
+                "services": {
+                    "app": _service("8000-8100:9000-9100"),
+                    "dns": _service("127.0.0.1:5353:53/udp"),
+                }
+            },
+        },
+    )
+    env = os.environ.copy()
+    env.update({"DOCKER_COMPOSE_BIN": str(stub)})
+
+    result = _run_script(repo_copy, "--format", "json", "--no-host-check", env=env)
+
+    assert result.returncode == 1, result.stderr
+    report = json.loads(result.stdout)
+    assert report["instances"] == ["core", "media"]
+    assert "host_conflicts" not in report
+    assert len(report["collisions"]) == 1
+    collision = report["collisions"][0]
+    assert collision["ports"] == "8080"
+    assert collision["protocol"] == "tcp"
+    owners = {(entry["instance"], entry["service"]) for entry in collision["bindings"]}
+    assert owners == {("core", "app"), ("media", "app")}
+
+
+def test_clean_plan_warns_about_host_listeners(repo_copy: Path, tmp_path: Path) -> None:
+    stub = _build_compose_stub(
+        tmp_path,
+        {
+            "core": {"services": {"app": _service("8080:8080")}},
+            "media": {"services": {"app": _service("127.0.0.1:8081:8080")}},
+        },
+    )
+    proc_dir = _write_proc_net(
+        tmp_path,
+        [
+            "   0: 00000000:1F91 00000000:0000 0A 00000000:00000000 00:00000000 00000000     0        0 1",
+            "   1: 0100007F:1F92 00000000:0000 01 00000000:00000000 00:00000000 00000000     0        0 2",
+        ],
+    )
+    env = os.environ.copy()
+    env.update({"DOCKER_COMPOSE_BIN": str(stub), "PORT_CONFLICTS_PROC_NET": str(proc_dir)})
+
+    result = _run_script(repo_copy, env=env)
+
+    assert result.returncode == 0, result.stderr
+    assert "[*] No published-port conflicts between instances." in result.stdout
+    assert "already bound on this host" in result.stdout
+    assert "8081/tcp (listening on 0.0.0.0): media/app" in result.stdout
+    assert "8082" not in result.stdout
+
+
+def test_host_check_ignores_ports_of_the_instance_own_containers(repo_copy: Path, tmp_path: Path) -> None:
+    stub = _build_compose_stub(
+        tmp_path,
+        {
+            "core": {"services": {"app": _service("8081:8080")}},
+            "media": {"services": {"app": _service("8082:8080")}},
+        },
+        running={
+            "core": [
+                {
+                    "Service": "app",
+                    "State": "running",
+                    "Publishers": [{"URL": "0.0.0.0", "TargetPort": 8080, "PublishedPort": 8081, "Protocol": "tcp"}],
+                }
+            ]
+        },
+    )
+    proc_dir = _write_proc_net(
+        tmp_path,
+        [
+            "   0: 00000000:1F91 00000000:0000 0A 00000000:00000000 00:00000000 00000000     0        0 1",
+            "   1: 00000000:1F92 00000000:0000 0A 00000000:00000000 00:00000000 00000000     0        0 2",
+        ],
+    )
+    env = os.environ.copy()
+    env.update({"DOCKER_COMPOSE_BIN": str(stub), "PORT_CONFLICTS_PROC_NET": str(proc_dir)})
+
+    result = _run_script(repo_copy, "--format", "json", env=env)
+
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout)
+    assert [(entry["port"], entry["binding"]["instance"]) for entry in report["host_conflicts"]] == [
+        (8082, "media")
+    ]
+
+
+def test_unknown_instance_is_rejected(repo_copy: Path) -> None:
+    result = _run_script(repo_copy, "missing", env=os.environ.copy())
+
+    assert result.returncode == 1
+    assert "Error: unknown instance 'missing'." in result.stderr
@@ -504,3 +504,233 @@ def test_compose_config_failure_is_propagated(repo_copy: Path, tmp_path: Path) -
 
     log_lines = [line for line in log_path.read_text(encoding="utf-8").splitlines() if line.strip()]
     assert log_lines, "expected at least one call to the docker compose stub"
+
+
+def test_all_flag_describes_every_instance_in_isolation(
+    repo_copy: Path, tmp_path: Path, compose_instances_data: ComposeInstancesData
+) -> None:
+    compose_payload = {
+        "services": {
+            "app": {
+                "ports": [{"target": 8080, "published": 8080, "protocol": "tcp"}],
+                "volumes": [],
+            }
+        }
+    }
+    stub_path, log_path = _build_compose_stub(tmp_path, compose_payload)
+
+    env = os.environ.copy()
+    env.update(
+        {
+            "DOCKER_COMPOSE_BIN": str(stub_path),
+            "DESCRIBE_INSTANCE_CONFIG_JSON": str((tmp_path / "config.json").resolve()),
+            "DESCRIBE_INSTANCE_COMPOSE_LOG": str(log_path),
+        }
+    )
+
+    result = _run_script(repo_copy, "--all", "-j", "2", "--format", "json", env=env)
+    assert result.returncode == 0, result.stderr
+
+    payload = json.loads(result.stdout)
+    instances = [entry["instance"] for entry in payload["instances"]]
+    assert instances == compose_instances_data.instance_names
+    for entry in payload["instances"]:
+        assert [service["name"] for service in entry["services"]] == ["app"]
+        assert entry["services"][0]["ports"] == ["8080 -> 8080/tcp"]
+
+    assert not (repo_copy / "docker-compose.yml").exists()
+
+    parsed = [
+        json.loads(line)["argv"]
+        for line in log_path.read_text(encoding="utf-8").splitlines()
+        if line.strip()
+    ]
+    config_calls = [entry for entry in parsed if entry[-3:] == ["config", "--format", "json"]]
+    compose_files = {_extract_flag_arguments(call, "-f")[0] for call in config_calls}
+    assert len(compose_files) == len(compose_instances_data.instance_names)
+    assert all(Path(path).parent != repo_copy for path in compose_files)
+
+
+def test_all_flag_reports_failed_instances(repo_copy: Path, tmp_path: Path) -> None:
+    stub_path, log_path = _build_compose_stub(tmp_path, {"services": {}})
+
+    env = os.environ.copy()
+    env.update(
+        {
+            "DOCKER_COMPOSE_BIN": str(stub_path),
+            "DESCRIBE_INSTANCE_CONFIG_JSON": str((tmp_path / "config.json").resolve()),
+            "DESCRIBE_INSTANCE_COMPOSE_LOG": str(log_path),
+            "DESCRIBE_INSTANCE_COMPOSE_EXIT": "3",
+            "DESCRIBE_INSTANCE_COMPOSE_STDERR": "broken manifest",
+        }
+    )
+
+    result = _run_script(repo_copy, "--all", env=env)
+
+    assert result.returncode == 1
+    assert "Error: failed to describe instance 'core'." in result.stderr
+    assert "broken manifest" in result.stderr
+    assert "Instance: core" in result.stdout
+
+
+def test_all_flag_rejects_instance_name(repo_copy: Path, tmp_path: Path) -> None:
+    result = _run_script(repo_copy, "--all", "core", env=os.environ.copy())
+
+    assert result.returncode == 1
+    assert "Error: --all cannot be combined with an instance name." in result.stderr
+
+
+def _build_generating_stub(
+    tmp_path: Path,
+    repo_copy: Path,
+    generated: str | None = None,
+    resolved: dict[str, object] | None = None,
+) -> tuple[Path, Path]:
+    """Stub that writes a real consolidated file and answers `config --format json`."""
+
+    log_path = tmp_path / "generating_stub.log"
+    script_path = tmp_path / "generating_stub.py"
+    generated = generated or (
+        "services:\n"
+        "  app:\n"
+        "    image: example/app:latest\n"
+        "    ports:\n"
+        "      - \"${APP_PORT:-8080}:8080\"\n"
+        "    volumes:\n"
+        "      - ${REPO_ROOT:-.}/data/${LOCAL_INSTANCE:-default}/app:/var/lib/app\n"
+        "      - cache:/cache:ro\n"
+        "volumes:\n"
+        "  cache: {}\n"
+    )
+    resolved = resolved or {
+        "services": {
+            "app": {
+                "ports": [
+                    {"mode": "ingress", "target": 8080, "published": "8080", "protocol": "tcp"}
+                ],
+                "volumes": [
+                    {
+                        "type": "bind",
+                        "source": str(repo_copy / "data" / "core" / "app"),
+                        "target": "/var/lib/app",
+                        "bind": {"create_host_path": True},
+                    },
+                    {
+                        "type": "volume",
+                        "source": "cache",
+                        "target": "/cache",
+                        "read_only": True,
+                        "volume": {},
+                    },
+                ],
+            }
+        }
+    }
+    script_path.write_text(
+        "#!/usr/bin/env python3\n"
+        "import json\n"
+        "import pathlib\n"
+        "import sys\n"
+        "\n"
+        "args = sys.argv[1:]\n"
+        f"with open({str(log_path)!r}, 'a', encoding='utf-8') as handle:\n"
+        "    handle.write(json.dumps(args) + '\\n')\n"
+        "if '--output' in args:\n"
+        "    pathlib.Path(args[args.index('--output') + 1]).write_text(\n"
+        f"        {generated!r}, encoding='utf-8'\n"
+        "    )\n"
+        "elif args[-3:] == ['config', '--format', 'json']:\n"
+        f"    print({json.dumps(resolved)!r})\n"
+        "sys.exit(0)\n",
+        encoding="utf-8",
+    )
+    script_path.chmod(0o755)
+    return script_path, log_path
+
+
+def _json_config_calls(log_path: Path) -> int:
+    calls = [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines() if line]
+    return sum(1 for call in calls if call[-3:] == ["config", "--format", "json"])
+
+
+def test_fresh_build_is_described_without_docker(repo_copy: Path, tmp_path: Path) -> None:
+    stub_path, log_path = _build_generating_stub(tmp_path, repo_copy)
+    env = os.environ.copy()
+    env["DOCKER_COMPOSE_BIN"] = str(stub_path)
+
+    first = _run_script(repo_copy, "core", "--format", "json", env=env)
+    assert first.returncode == 0, first.stderr
+    assert _json_config_calls(log_path) == 1
+
+    log_path.write_text("", encoding="utf-8")
+    second = _run_script(repo_copy, "core", "--format", "json", env=env)
+    assert second.returncode == 0, second.stderr
+    assert log_path.read_text(encoding="utf-8") == ""
+    assert json.loads(second.stdout) == json.loads(first.stdout)
+
+    env_file = repo_copy / "env" / "local" / "core.env"
+    env_file.write_text(env_file.read_text(encoding="utf-8") + "APP_EXAMPLE_MESSAGE=changed\n", encoding="utf-8")
+    third = _run_script(repo_copy, "core", "--format", "json", env=env)
+    assert third.returncode == 0, third.stderr
+    assert _json_config_calls(log_path) == 1
+
+    log_path.write_text("", encoding="utf-8")
+    forced = _run_script(repo_copy, "core", "--no-cache", env=env)
+    assert forced.returncode == 0, forced.stderr
+    assert _json_config_calls(log_path) == 1
+
+
+def test_cached_summary_matches_docker_compose_config(repo_copy: Path, tmp_path: Path) -> None:
+    generated = (
+        "services:\n"
+        "  app:\n"
+        "    image: example/app:latest\n"
+        "    ports:\n"
+        "      - \"127.0.0.1:${APP_PORT:-8080}:8080\"\n"
+        "      - \"9000-9001:9000-9001/udp\"\n"
+        "    volumes:\n"
+        "      - ${REPO_ROOT:-.}/data/${LOCAL_INSTANCE:-default}/app:/var/lib/app\n"
+        "      - ./config:/etc/app:ro\n"
+        "      - cache:/cache:ro\n"
+        "      - type: bind\n"
+        "        source: ./logs\n"
+        "        target: /logs\n"
+        "      - /srv/media:/media\n"
+        "volumes:\n"
+        "  cache: {}\n"
+    )
+
+    def bind(source: Path | str, target: str, **extra: object) -> dict[str, object]:
+        return {"type": "bind", "source": str(source), "target": target, **extra}
+
+    # What `docker compose config --format json` prints for the file above.
+    resolved = {
+        "services": {
+            "app": {
+                "ports": [
+                    {"mode": "ingress", "host_ip": "127.0.0.1", "target": 8080, "published": "8080", "protocol": "tcp"},
+                    {"mode": "ingress", "target": 9000, "published": "9000", "protocol": "udp"},
+                    {"mode": "ingress", "target": 9001, "published": "9001", "protocol": "udp"},
+                ],
+                "volumes": [
+                    bind(repo_copy / "data" / "core" / "app", "/var/lib/app", bind={"create_host_path": True}),
+                    bind(repo_copy / "config", "/etc/app", read_only=True, bind={"create_host_path": True}),
+                    {"type": "volume", "source": "cache", "target": "/cache", "read_only": True, "volume": {}},
+                    bind(repo_copy / "logs", "/logs"),
+                    bind("/srv/media", "/media", bind={"create_host_path": True}),
+                ],
+            }
+        }
+    }
+    stub_path, log_path = _build_generating_stub(tmp_path, repo_copy, generated, resolved)
+    env = os.environ.copy()
+    env["DOCKER_COMPOSE_BIN"] = str(stub_path)
+
+    uncached = _run_script(repo_copy, "core", "--no-cache", "--format", "json", env=env)
+    assert uncached.returncode == 0, uncached.stderr
+    log_path.write_text("", encoding="utf-8")
+    cached = _run_script(repo_copy, "core", "--format", "json", env=env)
+    assert cached.returncode == 0, cached.stderr
+
+    assert log_path.read_text(encoding="utf-8") == ""
+    assert json.loads(cached.stdout) == json.loads(uncached.stdout)
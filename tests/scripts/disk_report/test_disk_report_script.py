@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+from pathlib import Path
+
+
+def _run_script(repo_root: Path, *args: str) -> subprocess.CompletedProcess[str]:
+    script = repo_root / "scripts" / "disk_report.sh"
+    return subprocess.run(
+        ["bash", str(script), *args],
+        cwd=repo_root,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+
+
+def _populate(app_dir: Path) -> None:
+    (app_dir / "media" / "season").mkdir(parents=True)
+    (app_dir / "config").mkdir(parents=True)
+    (app_dir / "media" / "season" / "episode.mkv").write_bytes(b"x" * 4096)
+    (app_dir / "config" / "settings.json").write_text("{}", encoding="utf-8")
+    os.link(app_dir / "media" / "season" / "episode.mkv", app_dir / "config" / "episode-link.mkv")
+
+
+def test_json_report_counts_files_inodes_and_subtrees(repo_copy: Path) -> None:
+    app_dir = repo_copy / "data" / "core" / "app"
+    _populate(app_dir)
+
+    result = _run_script(repo_copy, "core", "--format", "json", "--top", "1")
+
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout)
+    assert report["instance"] == "core"
+    entries = {item["path"]: item for item in report["directories"]}
+
+    app_entry = entries[str(app_dir)]
+    assert app_entry["bytes"] == 4096 + 2
+    assert app_entry["files"] == 2
+    assert app_entry["directories"] == 3
+    assert app_entry["inodes"] == 6
+    assert [child["path"] for child in app_entry["largest_subtrees"]] == [str(app_dir / "config")]
+
+    backups_entry = entries[str(repo_copy / "backups")]
+    assert backups_entry["scanned"] is False
+    assert backups_entry["exists"] is False
+
+
+def test_cache_only_rescans_changed_directories(repo_copy: Path) -> None:
+    app_dir = repo_copy / "data" / "core" / "app"
+    _populate(app_dir)
+
+    first = _run_script(repo_copy, "core", "--format", "json")
+    assert first.returncode == 0, first.stderr
+    assert json.loads(first.stdout)["scan"] == {"rescanned": 4, "reused": 0}
+    assert (repo_copy / "data" / ".disk-report-cache.json").is_file()
+
+    (app_dir / "media" / "season" / "extra.nfo").write_text("abc", encoding="utf-8")
+
+    second = _run_script(repo_copy, "core", "--format", "json")
+    assert second.returncode == 0, second.stderr
+    report = json.loads(second.stdout)
+    assert report["scan"] == {"rescanned": 1, "reused": 3}
+    app_entry = next(item for item in report["directories"] if item["path"] == str(app_dir))
+    assert app_entry["files"] == 3
+    assert app_entry["bytes"] == 4096 + 2 + 3
+
+
+def test_cache_reports_files_grown_in_place(repo_copy: Path) -> None:
+    app_dir = repo_copy / "data" / "core" / "app"
+    _populate(app_dir)
+    settings = app_dir / "config" / "settings.json"
+
+    first = _run_script(repo_copy, "core", "--format", "json")
+    assert first.returncode == 0, first.stderr
+
+    config_mtime = (app_dir / "config").stat().st_mtime_ns
+    with settings.open("a", encoding="utf-8") as handle:
+        handle.write(" " * 98)
+    assert (app_dir / "config").stat().st_mtime_ns == config_mtime
+
+    second = _run_script(repo_copy, "core", "--format", "json")
+    assert second.returncode == 0, second.stderr
+    report = json.loads(second.stdout)
+    assert report["scan"] == {"rescanned": 0, "reused": 4}
+    app_entry = next(item for item in report["directories"] if item["path"] == str(app_dir))
+    assert app_entry["bytes"] == 4096 + 100
+
+
+def test_rejects_invalid_jobs(repo_copy: Path) -> None:
+    result = _run_script(repo_copy, "core", "--jobs", "zero")
+
+    assert result.returncode == 1
+    assert "--jobs requires a positive integer" in result.stderr
@@ -127,3 +127,60 @@ def test_script_creates_directories_and_applies_owner(repo_copy: Path) -> None:
         assert backups_stat.st_gid == gid
 
     assert "Permission fixes completed" in stdout
+
+
+def test_dry_run_resolves_interpolated_bind_mounts(repo_copy: Path) -> None:
+    env_file = repo_copy / "env" / "local" / "core.env"
+    uid, gid = _current_ids()
+    _append_env_values(env_file, uid=uid, gid=gid)
+    media_root = repo_copy / "media-root"
+    with env_file.open("a", encoding="utf-8") as handle:
+        handle.write(f"MEDIA_ROOT={media_root}\n")
+        handle.write("COMPOSE_EXTRA_FILES=compose/extra.yml\n")
+
+    (repo_copy / "compose" / "extra.yml").write_text(
+        "services:\n"
+        "  app:\n"
+        "    volumes:\n"
+        "      - ${MEDIA_ROOT}/library:/library:ro\n"
+        "      - type: bind\n"
+        "        source: ${REPO_ROOT:-.}/data/${LOCAL_INSTANCE}/cache\n"
+        "        target: /cache\n"
+        "      - ${UNDEFINED_ROOT}/skipped:/skipped\n",
+        encoding="utf-8",
+    )
+
+    result = _run_script(repo_copy, "core", "--dry-run")
+
+    assert result.returncode == 0, result.stderr
+    assert f"mkdir -p {repo_copy / 'data' / 'core' / 'app'}" in result.stdout
+    assert f"mkdir -p {media_root / 'library'}" in result.stdout
+    assert f"mkdir -p {repo_copy / 'data' / 'core' / 'cache'}" in result.stdout
+    assert "skipped" not in result.stdout
+    assert "UNDEFINED_ROOT" in result.stderr
+    assert not (media_root / "library").exists()
+
+
+def test_relative_bind_sources_in_overlays_resolve_against_the_project_dir(repo_copy: Path) -> None:
+    env_file = repo_copy / "env" / "local" / "core.env"
+    uid, gid = _current_ids()
+    _append_env_values(env_file, uid=uid, gid=gid)
+    with env_file.open("a", encoding="utf-8") as handle:
+        handle.write("COMPOSE_EXTRA_FILES=compose/overlays/extra.yml\n")
+
+    overlay = repo_copy / "compose" / "overlays" / "extra.yml"
+    overlay.parent.mkdir()
+    overlay.write_text(
+        "services:\n"
+        "  app:\n"
+        "    volumes:\n"
+        "      - ./data/core/uploads:/uploads\n",
+        encoding="utf-8",
+    )
+
+    result = _run_script(repo_copy, "core", "--dry-run")
+
+    assert result.returncode == 0, result.stderr
+    # Like docker compose: relative to the project (repository root), not to the overlay's directory.
+    assert f"mkdir -p {repo_copy / 'data' / 'core' / 'uploads'}" in result.stdout
+    assert str(overlay.parent / "data") not in result.stdout
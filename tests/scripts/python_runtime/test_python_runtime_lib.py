@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import shlex
+import subprocess
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+PYTHON_RUNTIME = REPO_ROOT / "scripts" / "_internal" / "lib" / "python_runtime.sh"
+
+
+def _docker_prefix(repo_root: Path, extra_mounts: str) -> list[str]:
+    script = f"""
+set -euo pipefail
+source {shlex.quote(str(PYTHON_RUNTIME))}
+python_runtime__build_docker_prefix {shlex.quote(str(repo_root))} ""
+"""
+    result = subprocess.run(
+        ["bash", "-c", script],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={"PATH": "/usr/bin:/bin", "PYTHON_RUNTIME_EXTRA_MOUNTS": extra_mounts},
+    )
+    return result.stdout.splitlines()
+
+
+def test_docker_prefix_mounts_extra_paths(tmp_path: Path) -> None:
+    scratch = tmp_path / "scratch dir"
+    data = tmp_path / "data"
+
+    prefix = _docker_prefix(tmp_path / "repo", f"{scratch}:{data}:")
+
+    volumes = [prefix[index + 1] for index, arg in enumerate(prefix) if arg == "-v"]
+    assert volumes == [
+        f"{tmp_path / 'repo'}:{tmp_path / 'repo'}",
+        f"{scratch}:{scratch}",
+        f"{data}:{data}",
+    ]
+
+
+def test_docker_prefix_without_extra_mounts(tmp_path: Path) -> None:
+    prefix = _docker_prefix(tmp_path, "")
+
+    assert prefix.count("-v") == 1